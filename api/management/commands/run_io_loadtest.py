@@ -0,0 +1,41 @@
+# api/management/commands/run_io_loadtest.py
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from saferatio.loadtest import IO_MODES, IoLoadTestRunner, format_io_report
+from saferatio.synthetic_data import DEFAULT_PREFIX
+
+
+class Command(BaseCommand):
+    help = 'اختبار حمل لنقطة نهاية تنتظر التخزين (رفع الصورة الشخصية): WSGI بخيوط محدودة مقابل ASGI في حلقة أحداث واحدة'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modes', default=','.join(IO_MODES), help=f"الأوضاع مفصولة بفواصل ({', '.join(IO_MODES)})")
+        parser.add_argument('--requests', type=int, default=40, help='عدد الطلبات في كل وضع')
+        parser.add_argument('--concurrency', type=int, default=4, help='عدد خيوط WSGI (مثل --threads في gthread)')
+        parser.add_argument('--latency-ms', type=int, default=200, help='تأخير التخزين المصطنع لكل ملف')
+        parser.add_argument('--username', default=None, help='المستخدم الرافع (الافتراضي أول مستخدم اصطناعي)')
+        parser.add_argument('--prefix', default=DEFAULT_PREFIX, help='بادئة المستخدمين الاصطناعيين')
+        parser.add_argument('--host', default='localhost', help='قيمة Host في الطلبات (يجب أن تكون ضمن ALLOWED_HOSTS)')
+        parser.add_argument('--json', dest='json_path', default=None, help='حفظ التقرير بصيغة JSON في هذا المسار')
+
+    def handle(self, *args, **options):
+        modes = [name.strip() for name in options['modes'].split(',') if name.strip()]
+        try:
+            report = IoLoadTestRunner(
+                requests=options['requests'],
+                concurrency=options['concurrency'],
+                latency=options['latency_ms'] / 1000,
+                username=options['username'],
+                prefix=options['prefix'],
+                host=options['host'],
+            ).run(modes)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(format_io_report(report))
+        if options['json_path']:
+            with open(options['json_path'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            self.stdout.write(f"💾 {options['json_path']}")
@@ -0,0 +1,48 @@
+# api/management/commands/run_loadtest.py
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from saferatio.loadtest import SCENARIOS, LoadTestRunner, format_report
+from saferatio.synthetic_data import DEFAULT_PASSWORD, DEFAULT_PREFIX
+
+
+class Command(BaseCommand):
+    help = 'اختبار حمل محلي: إعادة تشغيل سيناريوهات المستخدمين على تطبيق WSGI وقياس زمن الاستجابة والاستعلامات'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scenarios', default=','.join(SCENARIOS),
+            help=f"السيناريوهات بالترتيب مفصولة بفواصل ({', '.join(SCENARIOS)})",
+        )
+        parser.add_argument('--iterations', type=int, default=50, help='عدد جلسات المستخدمين الافتراضيين')
+        parser.add_argument('--concurrency', type=int, default=1, help='عدد الجلسات المتزامنة (خيوط)')
+        parser.add_argument('--prefix', default=DEFAULT_PREFIX, help='بادئة المستخدمين الاصطناعيين')
+        parser.add_argument('--password', default=DEFAULT_PASSWORD, help='كلمة مرور المستخدمين الاصطناعيين')
+        parser.add_argument('--host', default='localhost', help='قيمة Host في الطلبات (يجب أن تكون ضمن ALLOWED_HOSTS)')
+        parser.add_argument('--upload-rows', type=int, default=20, help='عدد صفوف ملف الموظفين في سيناريو الرفع')
+        parser.add_argument('--seed', type=int, default=1, help='البذرة العشوائية لمدخلات الطلبات')
+        parser.add_argument('--json', dest='json_path', default=None, help='حفظ التقرير بصيغة JSON في هذا المسار')
+
+    def handle(self, *args, **options):
+        scenarios = [name.strip() for name in options['scenarios'].split(',') if name.strip()]
+        try:
+            runner = LoadTestRunner(
+                scenarios=scenarios,
+                iterations=options['iterations'],
+                concurrency=options['concurrency'],
+                prefix=options['prefix'],
+                password=options['password'],
+                host=options['host'],
+                upload_rows=options['upload_rows'],
+                seed=options['seed'],
+            )
+            report = runner.run()
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(format_report(report))
+        if options['json_path']:
+            with open(options['json_path'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            self.stdout.write(f"💾 {options['json_path']}")
@@ -0,0 +1,39 @@
+# api/management/commands/seed_synthetic_data.py
+from django.core.management.base import BaseCommand, CommandError
+
+from saferatio.synthetic_data import (
+    DEFAULT_PASSWORD, DEFAULT_PREFIX, DEFAULT_VOLUMES, delete_synthetic_data, seed_synthetic_data,
+)
+
+
+class Command(BaseCommand):
+    help = 'توليد بيانات اصطناعية بأحجام واقعية (مستخدمون، شركات وموظفون، مركبات، اقتباسات، وثائق، مطالبات، سجلات حسابات)'
+
+    def add_arguments(self, parser):
+        for name, default in DEFAULT_VOLUMES.items():
+            parser.add_argument(
+                f"--{name.replace('_', '-')}", type=type(default), default=default,
+                help=f'الافتراضي {default}',
+            )
+        parser.add_argument('--seed', type=int, default=42, help='البذرة العشوائية (نفس البذرة = نفس البيانات)')
+        parser.add_argument('--prefix', default=DEFAULT_PREFIX, help='بادئة المعرفات لتمييز البيانات الاصطناعية')
+        parser.add_argument('--password', default=DEFAULT_PASSWORD, help='كلمة مرور كل المستخدمين الاصطناعيين')
+        parser.add_argument('--batch-size', type=int, default=2000, help='حجم دفعات الإدراج')
+        parser.add_argument('--delete', action='store_true', help='حذف البيانات الاصطناعية بهذه البادئة بدلاً من توليدها')
+
+    def handle(self, *args, **options):
+        if options['delete']:
+            deleted, per_model = delete_synthetic_data(options['prefix'])
+            for label, count in sorted(per_model.items()):
+                self.stdout.write(f'🗑️ {label}: {count}')
+            self.stdout.write(self.style.SUCCESS(f'✅ تم حذف {deleted} سجل'))
+            return
+
+        volumes = {name: options[name] for name in DEFAULT_VOLUMES}
+        if volumes['users'] < 1 or volumes['months'] < 1:
+            raise CommandError('--users و --months يجب أن تكون 1 على الأقل')
+        counts = seed_synthetic_data(
+            prefix=options['prefix'], seed=options['seed'], batch_size=options['batch_size'],
+            password=options['password'], log=self.stdout.write, **volumes,
+        )
+        self.stdout.write(self.style.SUCCESS(f'✅ تم توليد {sum(counts.values())} سجل'))
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Vehicle, CarInsuranceQuote, CarPolicy, Claim, VehicleDocument
+from .models import Vehicle, CarInsuranceQuote, CarPolicy, CarRenewalRun, Claim, VehicleDocument
 
 @admin.register(Vehicle)
 class VehicleAdmin(admin.ModelAdmin):
@@ -22,6 +22,12 @@ class CarPolicyAdmin(admin.ModelAdmin):
     search_fields = ['policy_number', 'quote__quote_number']
     readonly_fields = ['created_at', 'updated_at']
 
+@admin.register(CarRenewalRun)
+class CarRenewalRunAdmin(admin.ModelAdmin):
+    list_display = ['id', 'status', 'window_start', 'window_end', 'renewed', 'total', 'progress_percent', 'started_at', 'finished_at']
+    list_filter = ['status', 'started_at']
+    readonly_fields = ['total', 'renewed', 'batches', 'last_expiry_date', 'last_policy_id', 'last_error', 'started_at', 'updated_at', 'finished_at']
+
 @admin.register(Claim)
 class ClaimAdmin(admin.ModelAdmin):
     list_display = ['claim_number', 'policy', 'claim_date', 'estimated_amount', 'status']
@@ -1,9 +1,13 @@
 from decimal import Decimal
 from datetime import date, timedelta
-from .rules import compute_adjustments, RATING
+from types import SimpleNamespace
+
+import pandas as pd
+
+from .rules import compute_adjustments, rating_cells, RATING, RATING_CELL_COLUMNS
 from .models import Vehicle, CarInsuranceQuote
 from django.db import transaction 
-import uuid
+from insurance.services.identifiers import next_number
 
 def calculate_premium(vehicle, coverage_type='comprehensive', driver_age=30, 
                      claims_history=0, no_claims_years=0):
@@ -70,6 +74,63 @@ def calculate_premium(vehicle, coverage_type='comprehensive', driver_age=30,
         }
     }
 
+VEHICLE_PRICING_FIELDS = ('vehicle_type', 'year', 'current_value', 'engine_size')
+
+
+def calculate_vehicle_premium(vehicle, **kwargs):
+    """calculate_premium for plain vehicle fields (pricing pool job: picklable in and out)"""
+    return calculate_premium(vehicle=SimpleNamespace(**vehicle), **kwargs)
+
+
+def warm_pricing_caches():
+    """Pricing pool worker warmup: rating table is loaded at import, exercise one full path"""
+    calculate_vehicle_premium({'vehicle_type': 'car', 'year': date.today().year, 'current_value': 10000, 'engine_size': 1.6})
+
+
+PREMIUM_COLUMNS = ['base_premium', 'discount_amount', 'final_premium', 'excess_amount']
+
+
+def calculate_premiums_frame(frame):
+    """
+    Calculate premiums for many risks at once (e.g. a renewal book)
+    
+    Args:
+        frame: DataFrame with vehicle_type, coverage_type, year, current_value, engine_size,
+               driver_age, claims_history and no_claims_years columns
+    
+    Returns:
+        DataFrame with PREMIUM_COLUMNS, same index as `frame`
+    
+    Rows are grouped by rating cell and `calculate_premium` runs once per distinct cell,
+    so the figures are exactly those of the single-risk path.
+    """
+    if frame.empty:
+        return pd.DataFrame(columns=PREMIUM_COLUMNS, index=frame.index)
+    
+    cells = rating_cells(frame)
+    representatives = cells.drop_duplicates(RATING_CELL_COLUMNS)
+    inputs = frame.loc[representatives.index].to_dict('records')
+    priced = []
+    for row, cell in zip(inputs, representatives.itertuples(index=False)):
+        result = calculate_premium(
+            vehicle=SimpleNamespace(
+                vehicle_type=row['vehicle_type'],
+                year=row['year'],
+                current_value=row['current_value'],
+                engine_size=row['engine_size'],
+            ),
+            coverage_type=row['coverage_type'],
+            driver_age=None if pd.isna(row['driver_age']) else int(row['driver_age']),
+            claims_history=int(cell.claims_history),
+            no_claims_years=int(cell.no_claims_years),
+        )
+        priced.append([result[column] for column in PREMIUM_COLUMNS])
+    
+    table = representatives.join(pd.DataFrame(priced, columns=PREMIUM_COLUMNS, index=representatives.index))
+    premiums = cells.merge(table, on=RATING_CELL_COLUMNS, how='left')[PREMIUM_COLUMNS]
+    premiums.index = frame.index
+    return premiums
+
 def calculate_short_term_premium(annual_premium, duration_days):
     """
     Calculate premium for short-term insurance
@@ -166,7 +227,7 @@ def create_quote_from_vehicle(vehicle, user, coverage_type='comprehensive',
     try:
         with transaction.atomic():
             # توليد رقم اقتباس فريد
-            quote_number = f"QTE-{uuid.uuid4().hex[:8].upper()}"
+            quote_number = next_number('car_quote')
         # Calculate premium
         premium_result = calculate_premium(
             vehicle=vehicle,
@@ -0,0 +1,48 @@
+# car_insurance/management/commands/renew_expiring_policies.py
+from django.core.management.base import BaseCommand, CommandError
+
+from car_insurance.models import CarRenewalRun
+from car_insurance.services.renewal import DEFAULT_BATCH_SIZE, DEFAULT_WINDOW_DAYS, run_renewals, start_run
+
+
+class Command(BaseCommand):
+    help = 'إنشاء اقتباسات تجديد لوثائق السيارات النشطة التي تنتهي خلال الفترة المحددة (قابل للاستئناف)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=DEFAULT_WINDOW_DAYS, help='الوثائق التي تنتهي خلال هذا العدد من الأيام')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='عدد الوثائق في كل دفعة')
+        parser.add_argument('--resume', type=int, default=None, metavar='RUN_ID', help='استئناف تشغيل سابق متوقف')
+        parser.add_argument('--max-batches', type=int, default=None, help='إيقاف التشغيل بعد هذا العدد من الدفعات')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size يجب أن يكون 1 على الأقل')
+
+        if options['resume']:
+            try:
+                run = CarRenewalRun.objects.get(pk=options['resume'])
+            except CarRenewalRun.DoesNotExist:
+                raise CommandError(f"لا يوجد تشغيل تجديد برقم {options['resume']}")
+            if run.status == 'completed':
+                self.stdout.write(f'✅ التشغيل {run.pk} مكتمل ({run.renewed}/{run.total})')
+                return
+            self.stdout.write(f'🔄 استئناف التشغيل {run.pk} من الوثيقة {run.last_policy_id}')
+        else:
+            run = start_run(days=options['days'], batch_size=options['batch_size'])
+            self.stdout.write(
+                f'🚗 التشغيل {run.pk}: {run.total} وثيقة تنتهي بين {run.window_start} و {run.window_end}'
+            )
+
+        try:
+            run_renewals(
+                run,
+                max_batches=options['max_batches'],
+                log=lambda r: self.stdout.write(f'🔄 {r.renewed}/{r.total} ({r.progress_percent}%)'),
+            )
+        except Exception as e:
+            raise CommandError(f'❌ توقف التشغيل {run.pk}: {e} (للاستئناف: --resume {run.pk})')
+
+        if run.status == 'completed':
+            self.stdout.write(self.style.SUCCESS(f'✅ تم إنشاء {run.renewed} اقتباس تجديد (التشغيل {run.pk})'))
+        else:
+            self.stdout.write(f'⏸️ التشغيل {run.pk} متوقف عند {run.renewed}/{run.total} (للاستئناف: --resume {run.pk})')
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.8 on 2026-10-19 03:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('car_insurance', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='carinsurancequote',
+            index=models.Index(fields=['user', '-created_at'], name='cquote_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='carinsurancequote',
+            index=models.Index(fields=['user', 'status', 'created_at'], name='cquote_user_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='carinsurancequote',
+            index=models.Index(fields=['status', 'created_at'], name='cquote_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='carpolicy',
+            index=models.Index(fields=['user', '-created_at'], name='cpolicy_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='carpolicy',
+            index=models.Index(condition=models.Q(('status', 'active')), fields=['user', 'expiry_date'], name='cpolicy_user_active_exp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='carpolicy',
+            index=models.Index(condition=models.Q(('status', 'active')), fields=['expiry_date'], name='cpolicy_active_exp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='carpolicy',
+            index=models.Index(fields=['status', 'created_at'], name='cpolicy_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='carpolicy',
+            index=models.Index(fields=['created_at'], name='cpolicy_created_idx'),
+        ),
+        migrations.AlterField(
+            model_name='carinsurancequote',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='carpolicy',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+    ]
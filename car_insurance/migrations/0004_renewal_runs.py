@@ -0,0 +1,42 @@
+# Generated by Django 5.2.8 on 2026-10-19 04:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('car_insurance', '0003_policy_quote_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CarRenewalRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='running', max_length=20)),
+                ('window_start', models.DateField()),
+                ('window_end', models.DateField()),
+                ('batch_size', models.PositiveIntegerField(default=1000)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('renewed', models.PositiveIntegerField(default=0)),
+                ('batches', models.PositiveIntegerField(default=0)),
+                ('last_expiry_date', models.DateField(blank=True, null=True)),
+                ('last_policy_id', models.BigIntegerField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'car_insurance_renewal_run',
+                'ordering': ['-started_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='carinsurancequote',
+            name='renewal_of',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='renewal_quotes', to='car_insurance.carpolicy'),
+        ),
+    ]
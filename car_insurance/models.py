@@ -2,7 +2,7 @@ from django.db import models
 from django.conf import settings
 from users.models import CustomUser
 from decimal import Decimal
-import uuid
+from insurance.services.identifiers import next_number
 
 # # Helper functions for default values (not lambdas)
 # def default_license_plate():
@@ -21,8 +21,8 @@ import uuid
 #     return f"CLM_{uuid.uuid4().hex[:8].upper()}"
 
 def generate_policy_number():
-    """Generate unique policy number"""
-    return f"POL-{uuid.uuid4().hex[:8].upper()}"
+    """Generate unique policy number (sequence-backed, see insurance/services/identifiers.py)"""
+    return next_number('car_policy')
 
 class Vehicle(models.Model):
     VEHICLE_TYPES = (
@@ -91,7 +91,7 @@ class CarInsuranceQuote(models.Model):
     )
     
     vehicle = models.ForeignKey(Vehicle, on_delete=models.CASCADE)
-    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, db_index=False)
     quote_number = models.CharField(max_length=20, unique=True)
     coverage_type = models.CharField(max_length=25, choices=COVERAGE_TYPES, default='comprehensive')
     premium_amount = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
@@ -110,12 +110,25 @@ class CarInsuranceQuote(models.Model):
     discount_amount = models.DecimalField(max_digits=8, decimal_places=2, default=Decimal('0.00'))
     final_premium = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
     
+    # الوثيقة التي صدر هذا الاقتباس لتجديدها (مهمة التجديد الجماعي)
+    renewal_of = models.ForeignKey(
+        'CarPolicy', on_delete=models.SET_NULL, null=True, blank=True, related_name='renewal_quotes'
+    )
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         db_table = 'car_insurance_quote'
         ordering = ['-created_at']
+        indexes = [
+            # قائمة اقتباسات المستخدم (الأحدث أولاً)، وتغني عن فهرس user_id
+            models.Index(fields=['user', '-created_at'], name='cquote_user_created_idx'),
+            # اقتباسات المستخدم حسب الحالة (بانتظار القرار، المقبولة)
+            models.Index(fields=['user', 'status', 'created_at'], name='cquote_user_status_idx'),
+            # إحصائيات الإدارة حسب الحالة والفترة
+            models.Index(fields=['status', 'created_at'], name='cquote_status_created_idx'),
+        ]
     
     def __str__(self):
         return f"Quote {self.quote_number} - {self.vehicle}"
@@ -130,7 +143,7 @@ class CarPolicy(models.Model):
     
     quote = models.OneToOneField(CarInsuranceQuote, on_delete=models.CASCADE, related_name='policy')
     policy_number = models.CharField(max_length=50, unique=True,  default=generate_policy_number)
-    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, db_index=False)
     vehicle = models.ForeignKey('Vehicle', on_delete=models.CASCADE)
     status = models.CharField(max_length=20, choices=POLICY_STATUS, default='pending')
     document_url = models.FileField(upload_to='policy_documents/', null=True, blank=True)
@@ -153,6 +166,24 @@ class CarPolicy(models.Model):
         db_table = 'car_insurance_policy'
         ordering = ['-created_at']
         verbose_name_plural = 'Car policies'
+        indexes = [
+            # قائمة وثائق المستخدم (الأحدث أولاً)، وتغني عن فهرس user_id
+            models.Index(fields=['user', '-created_at'], name='cpolicy_user_created_idx'),
+            # الوثائق النشطة القريبة من الانتهاء لكل مستخدم (تحذيرات لوحة التحكم، expiring_soon)
+            models.Index(
+                fields=['user', 'expiry_date'], name='cpolicy_user_active_exp_idx',
+                condition=models.Q(status='active'),
+            ),
+            # الوثائق النشطة حسب تاريخ الانتهاء لجميع المستخدمين (المهام المجدولة والإدارة)
+            models.Index(
+                fields=['expiry_date'], name='cpolicy_active_exp_idx',
+                condition=models.Q(status='active'),
+            ),
+            # إحصائيات الإدارة حسب الحالة والفترة
+            models.Index(fields=['status', 'created_at'], name='cpolicy_status_created_idx'),
+            # التقارير المالية حسب الفترة
+            models.Index(fields=['created_at'], name='cpolicy_created_idx'),
+        ]
     
     def __str__(self):
         return f"Policy {self.policy_number} - {self.vehicle}"
@@ -160,7 +191,7 @@ class CarPolicy(models.Model):
     def save(self, *args, **kwargs):
         # إذا كان policy_number فارغاً، أنشئ واحداً
         if not self.policy_number:
-            self.policy_number = f"POL-{uuid.uuid4().hex[:8].upper()}"
+            self.policy_number = generate_policy_number()
         
         # إذا كان expiry_date فارغاً، احسبه من inception_date
         if not self.expiry_date and self.inception_date:
@@ -192,6 +223,42 @@ class CarPolicy(models.Model):
             "شروط وأحكام إضافية حسب نوع التغطية"
         ]   
 
+class CarRenewalRun(models.Model):
+    """Progress of one bulk renewal batch job (resumable from its keyset cursor)"""
+    STATUS = (
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    )
+    
+    status = models.CharField(max_length=20, choices=STATUS, default='running')
+    window_start = models.DateField()
+    window_end = models.DateField()
+    batch_size = models.PositiveIntegerField(default=1000)
+    
+    # التقدم: الوثائق المرشحة عند البدء، وما جُدد منها، وآخر وثيقة تمت معالجتها
+    total = models.PositiveIntegerField(default=0)
+    renewed = models.PositiveIntegerField(default=0)
+    batches = models.PositiveIntegerField(default=0)
+    last_expiry_date = models.DateField(null=True, blank=True)
+    last_policy_id = models.BigIntegerField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default='')
+    
+    started_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'car_insurance_renewal_run'
+        ordering = ['-started_at']
+    
+    def __str__(self):
+        return f"Renewal run {self.pk} ({self.window_start} - {self.window_end}): {self.renewed}/{self.total}"
+    
+    @property
+    def progress_percent(self):
+        return round(self.renewed * 100 / self.total, 1) if self.total else 100.0
+
 class Claim(models.Model):
     CLAIM_STATUS = (
         ('submitted', 'Submitted'),
@@ -3,6 +3,9 @@ from datetime import date
 import os
 import json
 
+import numpy as np
+import pandas as pd
+
 
 # Load rating table from JSON config
 _TABLE_PATH = os.path.join(os.path.dirname(__file__), 'rating_table.json')
@@ -104,3 +107,56 @@ def compute_adjustments(vehicle, coverage_type, driver_age, claims_history, no_c
         'notes': notes,
         'vehicle_age': vehicle_age,
     }
+
+
+RATED_VEHICLE_TYPES = ['car', 'suv', 'truck', 'motorcycle']
+RATING_CELL_COLUMNS = [
+    'vehicle_type', 'coverage_type', 'age_tier', 'value_tier', 'engine_tier', 'driver_tier',
+    'claims_history', 'no_claims_years',
+]
+
+
+def rating_cells(frame):
+    """
+    Vectorized rating cell of each row, using the same thresholds as `compute_adjustments`.
+
+    `frame` columns: vehicle_type, coverage_type, year, current_value, engine_size, driver_age,
+    claims_history, no_claims_years. Rows in the same cell get identical premiums from
+    `calculate_premium`, so large books can be priced once per distinct cell.
+    """
+    current_year = date.today().year
+    va = RATING.get('vehicle_age', {})
+    vt = RATING.get('vehicle_value_tiers', {})
+    es = RATING.get('engine_size_multipliers', {})
+    da = RATING.get('driver_age', {})
+
+    vehicle_age = current_year - pd.to_numeric(frame['year'], errors='coerce').fillna(current_year)
+    value = pd.to_numeric(frame['current_value'], errors='coerce').fillna(0).astype(float)
+    engine = pd.to_numeric(frame['engine_size'], errors='coerce').fillna(0).astype(float)
+    driver_age = pd.to_numeric(frame['driver_age'], errors='coerce').fillna(30)
+
+    return pd.DataFrame({
+        'vehicle_type': frame['vehicle_type'].where(frame['vehicle_type'].isin(RATED_VEHICLE_TYPES), 'car'),
+        'coverage_type': frame['coverage_type'],
+        'age_tier': np.select(
+            [vehicle_age < va.get('new_less_than_years', 3), vehicle_age < 7], ['new', 'medium'], 'older'
+        ),
+        'value_tier': np.select(
+            [value > float(vt.get('luxury_threshold', 50000)), value > float(vt.get('mid_threshold', 25000))],
+            ['luxury', 'midrange'], 'economy',
+        ),
+        'engine_tier': np.select(
+            [engine >= float(es.get('large_threshold', 3.0)), engine >= float(es.get('mid_threshold', 2.0))],
+            ['large', 'mid'], 'small',
+        ),
+        'driver_tier': np.select(
+            [
+                driver_age < da.get('young_threshold', 25),
+                driver_age < da.get('young_adult_threshold', 30),
+                driver_age > da.get('senior_threshold', 65),
+            ],
+            ['young', 'young_adult', 'senior'], 'prime',
+        ),
+        'claims_history': pd.to_numeric(frame['claims_history'], errors='coerce').fillna(0).astype(int),
+        'no_claims_years': pd.to_numeric(frame['no_claims_years'], errors='coerce').fillna(0).astype(int),
+    }, index=frame.index)
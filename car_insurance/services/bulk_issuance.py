@@ -0,0 +1,82 @@
+# car_insurance/services/bulk_issuance.py
+"""
+Bulk quote acceptance: issue policies for many quoted car quotes in one transaction.
+
+The selected quotes are locked (select_for_update) so two requests cannot issue the same
+quote, policies are inserted with one bulk_create using pre-generated policy numbers, the
+quotes are flipped to accepted with one UPDATE, and policy documents are generated in the
+background once the transaction commits.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from saferatio.background import run_after_commit
+
+from insurance.services.identifiers import reserve_numbers
+from ..models import CarInsuranceQuote, CarPolicy
+
+MAX_BULK_QUOTES = 500
+BULK_BATCH_SIZE = 500
+
+
+def policy_document_url(policy_number):
+    return f'policy_documents/policy_{policy_number}.pdf'
+
+
+def generate_policy_documents(policy_ids):
+    """Build each policy document and store its URL (background, after commit)"""
+    policies = list(CarPolicy.objects.filter(pk__in=policy_ids).select_related('user', 'vehicle', 'quote'))
+    for policy in policies:
+        policy.generate_policy_document()
+        policy.document_url = policy_document_url(policy.policy_number)
+    CarPolicy.objects.bulk_update(policies, ['document_url'], batch_size=BULK_BATCH_SIZE)
+    return len(policies)
+
+
+def issue_policies(user, quote_ids):
+    """
+    Accept the user's quoted quotes in quote_ids and create their policies.
+
+    Returns (policies, skipped_ids); quotes that are missing, not quoted or that already
+    have a policy are skipped rather than failing the whole batch.
+    """
+    quote_ids = list(dict.fromkeys(quote_ids))
+    today = timezone.localdate()
+
+    with transaction.atomic():
+        quotes = list(
+            CarInsuranceQuote.objects.select_for_update(of=('self',))
+            .select_related('vehicle')
+            .filter(pk__in=quote_ids, user=user, status='quoted', policy__isnull=True)
+            .order_by('pk')
+        )
+        if not quotes:
+            return [], quote_ids
+
+        policies = CarPolicy.objects.bulk_create([
+            CarPolicy(
+                quote=quote,
+                user=user,
+                vehicle=quote.vehicle,
+                policy_number=number,
+                status='pending',
+                expiry_date=today + timedelta(days=365),
+                total_premium=quote.final_premium,
+                paid_amount=0,
+                payment_status='pending',
+            )
+            for quote, number in zip(quotes, reserve_numbers('car_policy', len(quotes)))
+        ], batch_size=BULK_BATCH_SIZE)
+
+        CarInsuranceQuote.objects.filter(pk__in=[quote.pk for quote in quotes]).update(
+            status='accepted', updated_at=timezone.now(),
+        )
+        for quote in quotes:
+            quote.status = 'accepted'
+
+        run_after_commit(generate_policy_documents, [policy.pk for policy in policies])
+
+    issued = {quote.pk for quote in quotes}
+    return policies, [quote_id for quote_id in quote_ids if quote_id not in issued]
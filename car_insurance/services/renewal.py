@@ -0,0 +1,160 @@
+# car_insurance/services/renewal.py
+"""
+Bulk renewal of active car policies expiring within a window.
+
+Each batch runs in one transaction: lock the next policies (keyset on expiry_date, id, which
+follows cpolicy_active_exp_idx), price them with calculate_premiums_frame, bulk_create the
+renewal quotes, stamp renewal_date on the policies and advance the run's cursor. A crash
+loses at most the batch in flight; resuming the run continues after the last committed
+batch, and policies that already have a renewal_date are never picked again, so re-running
+a window is safe.
+
+Unlike the single `renew` action the old policy stays active until it actually expires;
+renewal_date marks it as renewed.
+"""
+from datetime import timedelta
+
+import pandas as pd
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from insurance.services.identifiers import reserve_numbers
+from ..calculations import calculate_premiums_frame
+from ..models import CarInsuranceQuote, CarPolicy, CarRenewalRun
+
+DEFAULT_WINDOW_DAYS = 30
+DEFAULT_BATCH_SIZE = 1000
+QUOTE_VALIDITY_DAYS = 30
+
+POLICY_COLUMNS = {
+    'pk': 'policy_id',
+    'expiry_date': 'expiry_date',
+    'user_id': 'user_id',
+    'vehicle_id': 'vehicle_id',
+    'quote__coverage_type': 'coverage_type',
+    'quote__claims_history': 'claims_history',
+    'quote__no_claims_years': 'no_claims_years',
+    'vehicle__vehicle_type': 'vehicle_type',
+    'vehicle__year': 'year',
+    'vehicle__current_value': 'current_value',
+    'vehicle__engine_size': 'engine_size',
+    'user__profile__date_of_birth': 'date_of_birth',
+}
+
+
+def renewal_candidates(window_start, window_end):
+    return CarPolicy.objects.filter(
+        status='active', expiry_date__range=(window_start, window_end), renewal_date__isnull=True,
+    )
+
+
+def start_run(days=DEFAULT_WINDOW_DAYS, batch_size=DEFAULT_BATCH_SIZE, today=None):
+    """New run for policies expiring in [today, today + days]"""
+    today = today or timezone.localdate()
+    window_end = today + timedelta(days=days)
+    return CarRenewalRun.objects.create(
+        window_start=today,
+        window_end=window_end,
+        batch_size=batch_size,
+        total=renewal_candidates(today, window_end).count(),
+    )
+
+
+def driver_ages(dates_of_birth, today):
+    """Vectorized Profile.age (NaN when unknown, priced with the default age)"""
+    born = pd.to_datetime(dates_of_birth, errors='coerce')
+    before_birthday = (born.dt.month > today.month) | ((born.dt.month == today.month) & (born.dt.day > today.day))
+    return today.year - born.dt.year - before_birthday.astype(int)
+
+
+def next_batch(run):
+    queryset = renewal_candidates(run.window_start, run.window_end)
+    if run.last_policy_id is not None:
+        queryset = queryset.filter(
+            Q(expiry_date__gt=run.last_expiry_date)
+            | Q(expiry_date=run.last_expiry_date, pk__gt=run.last_policy_id)
+        )
+    rows = list(
+        queryset.select_for_update(of=('self',))
+        .order_by('expiry_date', 'pk')
+        .values(*POLICY_COLUMNS)[:run.batch_size]
+    )
+    return pd.DataFrame(rows, columns=list(POLICY_COLUMNS)).rename(columns=POLICY_COLUMNS)
+
+
+def renew_batch(run):
+    """Renew the next batch of the run; returns the number of policies renewed (0 when done)"""
+    today = timezone.localdate()
+    with transaction.atomic():
+        batch = next_batch(run)
+        if batch.empty:
+            return 0
+
+        batch['driver_age'] = driver_ages(batch['date_of_birth'], today)
+        batch['no_claims_years'] = batch['no_claims_years'] + 1  # one more claim-free year
+        premiums = calculate_premiums_frame(batch)
+
+        quotes = [
+            CarInsuranceQuote(
+                vehicle_id=row.vehicle_id,
+                user_id=row.user_id,
+                renewal_of_id=row.policy_id,
+                quote_number=number,
+                coverage_type=row.coverage_type,
+                premium_amount=premium.final_premium,
+                excess_amount=premium.excess_amount,
+                claims_history=row.claims_history,
+                no_claims_years=row.no_claims_years,
+                base_premium=premium.base_premium,
+                discount_amount=premium.discount_amount,
+                final_premium=premium.final_premium,
+                status='quoted',
+            )
+            for row, premium, number in zip(
+                batch.itertuples(index=False), premiums.itertuples(index=False), reserve_numbers('car_quote', len(batch))
+            )
+        ]
+        CarInsuranceQuote.objects.bulk_create(quotes, batch_size=run.batch_size)
+
+        # end_date is auto_now_add, so validity is set after the insert (one UPDATE per batch)
+        CarInsuranceQuote.objects.filter(pk__in=[quote.pk for quote in quotes]).update(
+            end_date=today + timedelta(days=QUOTE_VALIDITY_DAYS),
+        )
+        CarPolicy.objects.filter(pk__in=batch['policy_id'].tolist()).update(
+            renewal_date=today, updated_at=timezone.now(),
+        )
+
+        last = batch.iloc[-1]
+        run.last_expiry_date = last['expiry_date']
+        run.last_policy_id = int(last['policy_id'])
+        run.renewed += len(batch)
+        run.batches += 1
+        run.save(update_fields=['last_expiry_date', 'last_policy_id', 'renewed', 'batches', 'updated_at'])
+    return len(batch)
+
+
+def run_renewals(run, max_batches=None, log=None):
+    """Process (or resume) a run until the window is exhausted or max_batches is reached"""
+    if run.status != 'running':
+        run.status = 'running'
+        run.last_error = ''
+        run.save(update_fields=['status', 'last_error', 'updated_at'])
+
+    batches = 0
+    try:
+        while max_batches is None or batches < max_batches:
+            if not renew_batch(run):
+                run.status = 'completed'
+                run.finished_at = timezone.now()
+                run.save(update_fields=['status', 'finished_at', 'updated_at'])
+                break
+            batches += 1
+            if log:
+                log(run)
+    except Exception as e:
+        run.status = 'failed'
+        run.last_error = str(e)
+        run.save(update_fields=['status', 'last_error', 'updated_at'])
+        raise
+    return run
@@ -1,9 +1,11 @@
 # car_insurance/static_reports.py
+import html
 import json
 import re
 import tempfile
 from datetime import datetime
 from decimal import Decimal
+from functools import lru_cache
 from django.conf import settings
 from django.http import HttpResponse
 from reportlab.lib import colors
@@ -11,6 +13,97 @@ from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+from django.template.base import VariableNode
+from django.template.loader import get_template, render_to_string
+from django.templatetags.static import static
+from django.utils.safestring import mark_safe
+
+# القوالب تُجهز مرة واحدة لكل عملية والأنماط ملف ثابت واحد يخزنه المتصفح
+QUOTE_REPORT_TEMPLATE = 'car_insurance/reports/quote_report.html'
+POLICY_REPORT_TEMPLATE = 'car_insurance/reports/policy_report.html'
+REPORT_STYLESHEET = 'car_insurance/reports.css'
+
+_SLOT = re.compile(r'\x1e(\w+)\x1f')
+
+
+class PrecompiledTemplate:
+    """
+    قالب Django بمتغيرات بسيطة فقط ({{ name }} بلا فلاتر أو وسوم منطقية) يُرسم مرة واحدة
+    بعلامات مكان المتغيرات ثم يُقسم إلى أجزاء نصية، فيصبح كل رسم تهريب القيم ودمجها فقط.
+    """
+
+    def __init__(self, template_name):
+        template = get_template(template_name).template
+        names = []
+        for node in template.nodelist.get_nodes_by_type(VariableNode):
+            expression = node.filter_expression
+            if expression.filters or not isinstance(expression.var.var, str) or '.' in expression.var.var:
+                raise ValueError(f'{template_name}: المتغيرات يجب أن تكون بسيطة ({expression.token})')
+            names.append(expression.var.var)
+        rendered = render_to_string(template_name, {name: mark_safe(f'\x1e{name}\x1f') for name in names})
+        self.parts = _SLOT.split(rendered)  # الفهارس الفردية أسماء متغيرات
+
+    def render(self, context):
+        parts = list(self.parts)
+        for index in range(1, len(parts), 2):
+            value = context[parts[index]]
+            # html.escape مباشرة (django.utils.html.escape نفس الناتج مع تكلفة keep_lazy)
+            parts[index] = value.__html__() if hasattr(value, '__html__') else html.escape(str(value))
+        return ''.join(parts)
+
+
+_compiled = {}
+
+
+def get_precompiled(template_name):
+    # في DEBUG يُعاد التجهيز كل مرة حتى تظهر تعديلات القالب دون إعادة التشغيل
+    compiled = None if settings.DEBUG else _compiled.get(template_name)
+    if compiled is None:
+        compiled = _compiled[template_name] = PrecompiledTemplate(template_name)
+    return compiled
+
+
+@lru_cache(maxsize=1)
+def _stylesheet_path():
+    return static(REPORT_STYLESHEET)
+
+
+def report_stylesheet_url(request=None):
+    """رابط ملف الأنماط (مطلق عند توفر الطلب لأن HTML يُعرض غالباً خارج نطاق الخادم)"""
+    url = _stylesheet_path()
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+# الأقسام التي تعتمد فقط على نوع التغطية أو نوع/عمر المركبة تُولد مرة لكل عملية
+FRAGMENT_CACHE_LIMIT = 64
+_fragments = {}
+
+
+def _render_fragment(template_name, key, context):
+    fragment = _fragments.get((template_name, key))
+    if fragment is None:
+        fragment = mark_safe(render_to_string(template_name, context))
+        if len(_fragments) < FRAGMENT_CACHE_LIMIT:
+            _fragments[(template_name, key)] = fragment
+    return fragment
+
+
+def render_coverage_section(coverage_type, coverage):
+    return _render_fragment('car_insurance/reports/_coverage_section.html', coverage_type, {'coverage': coverage})
+
+
+def render_recommendations_section(recommendations):
+    # كل توصية نص ثابت لعنوانها، فالعناوين تكفي كمفتاح
+    return _render_fragment(
+        'car_insurance/reports/_recommendations_section.html',
+        tuple(rec['title'] for rec in recommendations),
+        {'recommendations': recommendations},
+    )
+
+
+def render_safety_tips_section(tips):
+    return _render_fragment('car_insurance/reports/_safety_tips_section.html', tuple(tips), {'tips': tips})
+
 
 class StaticReportGenerator:
     """Generate static insurance reports based on rules and inputs"""
@@ -76,16 +169,19 @@ class StaticReportGenerator:
     }
     
     @staticmethod
-    def generate_comprehensive_report(quote):
+    def generate_comprehensive_report(quote, request=None):
         """Generate comprehensive static report"""
         vehicle = quote.vehicle
         user = quote.user
+        now = datetime.now()
         
         # تحليل البيانات
         analysis = StaticReportGenerator.analyze_vehicle(vehicle, quote)
+        analysis['generated_at'] = now.strftime('%Y-%m-%d %H:%M:%S')
+        analysis['report_id'] = f"STATIC-REP-{quote.id}-{now.strftime('%Y%m%d')}"
         
         # إنشاء التقرير
-        report_html = StaticReportGenerator.create_report_html(vehicle, quote, analysis, user)
+        report_html = StaticReportGenerator.create_report_html(vehicle, quote, analysis, user, request=request)
         
         return {
             'success': True,
@@ -93,8 +189,8 @@ class StaticReportGenerator:
             'report_type': 'static_comprehensive',
             'report_html': report_html,
             'report_data': analysis,
-            'generated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'report_id': f"STATIC-REP-{quote.id}-{datetime.now().strftime('%Y%m%d')}"
+            'generated_at': analysis['generated_at'],
+            'report_id': analysis['report_id']
         }
     
     @staticmethod
@@ -355,321 +451,81 @@ class StaticReportGenerator:
         return coverages.get(coverage_type, coverages['comprehensive'])
     
     @staticmethod
-    def create_report_html(vehicle, quote, analysis, user):
-        """Create comprehensive HTML report"""
-        
-        # تحليل البيانات
+    def create_report_html(vehicle, quote, analysis, user, request=None):
+        """Create comprehensive HTML report (compiled template + cached static sections)"""
         market = analysis['market_comparison']
         coverage = analysis['coverage_analysis']
-        
-        report_html = f"""
-        <!DOCTYPE html>
-        <html dir="rtl" lang="ar">
-        <head>
-            <meta charset="UTF-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <title>تقرير تأمين شامل - {vehicle.make} {vehicle.model}</title>
-            <style>
-                * {{ box-sizing: border-box; margin: 0; padding: 0; }}
-                body {{ font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; line-height: 1.6; color: #333; background: #f5f5f5; padding: 20px; }}
-                .report-container {{ max-width: 1200px; margin: 0 auto; background: white; border-radius: 10px; box-shadow: 0 0 20px rgba(0,0,0,0.1); overflow: hidden; }}
-                .header {{ background: linear-gradient(135deg, #2c3e50, #3498db); color: white; padding: 30px; text-align: center; }}
-                .header h1 {{ font-size: 28px; margin-bottom: 10px; }}
-                .header .subtitle {{ font-size: 16px; opacity: 0.9; }}
-                .meta-info {{ background: #f8f9fa; padding: 20px; border-bottom: 1px solid #ddd; }}
-                .meta-grid {{ display: grid; grid-template-columns: repeat(auto-fit, minmax(250px, 1fr)); gap: 15px; }}
-                .meta-item {{ background: white; padding: 15px; border-radius: 5px; border: 1px solid #e0e0e0; }}
-                .meta-label {{ color: #666; font-size: 14px; margin-bottom: 5px; }}
-                .meta-value {{ font-weight: bold; color: #2c3e50; }}
-                .section {{ padding: 30px; border-bottom: 1px solid #eee; }}
-                .section:last-child {{ border-bottom: none; }}
-                .section-title {{ color: #2c3e50; margin-bottom: 20px; padding-bottom: 10px; border-bottom: 2px solid #3498db; font-size: 22px; }}
-                .risk-badge {{ display: inline-block; padding: 5px 15px; border-radius: 20px; font-weight: bold; margin: 5px; }}
-                .risk-low {{ background: #d4edda; color: #155724; }}
-                .risk-medium {{ background: #fff3cd; color: #856404; }}
-                .risk-high {{ background: #f8d7da; color: #721c24; }}
-                .comparison-card {{ background: #f8f9fa; border-radius: 8px; padding: 20px; margin: 15px 0; border-right: 4px solid #3498db; }}
-                .recommendation-grid {{ display: grid; grid-template-columns: repeat(auto-fit, minmax(300px, 1fr)); gap: 20px; }}
-                .recommendation-card {{ background: white; border-radius: 8px; padding: 20px; border: 1px solid #e0e0e0; transition: transform 0.3s; }}
-                .recommendation-card:hover {{ transform: translateY(-5px); box-shadow: 0 5px 15px rgba(0,0,0,0.1); }}
-                .rec-category {{ color: #3498db; font-size: 14px; font-weight: bold; margin-bottom: 10px; }}
-                .rec-title {{ color: #2c3e50; font-size: 18px; margin-bottom: 10px; }}
-                .rec-desc {{ color: #666; margin-bottom: 10px; }}
-                .rec-impact {{ color: #27ae60; font-size: 14px; }}
-                .tip-list {{ list-style: none; }}
-                .tip-list li {{ padding: 10px 0; padding-right: 30px; position: relative; }}
-                .tip-list li:before {{ content: "✓"; position: absolute; right: 0; color: #27ae60; font-weight: bold; }}
-                .coverage-table {{ width: 100%; border-collapse: collapse; margin: 20px 0; }}
-                .coverage-table th, .coverage-table td {{ padding: 12px; text-align: right; border: 1px solid #ddd; }}
-                .coverage-table th {{ background: #2c3e50; color: white; }}
-                .coverage-table tr:nth-child(even) {{ background: #f9f9f9; }}
-                .covers {{ color: #27ae60; }}
-                .not-covers {{ color: #e74c3c; }}
-                .footer {{ background: #2c3e50; color: white; padding: 20px; text-align: center; margin-top: 30px; }}
-                @media (max-width: 768px) {{ 
-                    .meta-grid, .recommendation-grid {{ grid-template-columns: 1fr; }}
-                    .section {{ padding: 20px; }}
-                }}
-            </style>
-        </head>
-        <body>
-            <div class="report-container">
-                
-                <!-- العنوان الرئيسي -->
-                <div class="header">
-                    <h1>📊 تقرير تأمين شامل وتحليل مخاطر</h1>
-                    <div class="subtitle">{vehicle.year} {vehicle.make} {vehicle.model} | {quote.quote_number}</div>
-                </div>
-                
-                <!-- معلومات عامة -->
-                <div class="meta-info">
-                    <div class="meta-grid">
-                        <div class="meta-item">
-                            <div class="meta-label">العميل</div>
-                            <div class="meta-value">{user.get_full_name() or user.email}</div>
-                        </div>
-                        <div class="meta-item">
-                            <div class="meta-label">نوع المركبة</div>
-                            <div class="meta-value">{analysis['vehicle_type_ar']}</div>
-                        </div>
-                        <div class="meta-item">
-                            <div class="meta-label">عمر المركبة</div>
-                            <div class="meta-value">{analysis['vehicle_age']} سنة</div>
-                        </div>
-                        <div class="meta-item">
-                            <div class="meta-label">مستوى الخطر العام</div>
-                            <div class="meta-value">
-                                <span class="risk-badge {'risk-high' if 'مرتفع' in analysis['overall_risk'] else 'risk-medium' if 'متوسط' in analysis['overall_risk'] else 'risk-low'}">
-                                    {analysis['overall_risk']}
-                                </span>
-                            </div>
-                        </div>
-                    </div>
-                </div>
-                
-                <!-- القسم 1: الملخص التنفيذي -->
-                <div class="section">
-                    <h2 class="section-title">📈 الملخص التنفيذي</h2>
-                    <p>هذا التقرير يقدم تحليلاً شاملاً لوثيقة تأمين مركبتك {vehicle.make} {vehicle.model} موديل {vehicle.year}. بناءً على تحليل {len(analysis['recommendations'])} عامل خطر رئيسي، تم تقييم مستوى الخطر العام للمركبة بأنه <strong>{analysis['overall_risk']}</strong>.</p>
-                    <p>القسط الحالي (${quote.final_premium}) هو <strong>{market['comparison']}</strong> مقارنة بمتوسط أسعار السوق. {market['advice']}.</p>
-                </div>
-                
-                <!-- القسم 2: تحليل المخاطر التفصيلي -->
-                <div class="section">
-                    <h2 class="section-title">🔍 تحليل المخاطر التفصيلي</h2>
-                    <div class="meta-grid">
-                        <div class="meta-item">
-                            <div class="meta-label">عمر المركبة</div>
-                            <div class="meta-value">{analysis['analyses']['vehicle_age'].get('note', '')}</div>
-                        </div>
-                        <div class="meta-item">
-                            <div class="meta-label">سعة المحرك</div>
-                            <div class="meta-value">{analysis['analyses']['engine_size'].get('note', '')}</div>
-                        </div>
-                        <div class="meta-item">
-                            <div class="meta-label">القيمة السوقية</div>
-                            <div class="meta-value">{analysis['analyses']['vehicle_value'].get('note', '')}</div>
-                        </div>
-                        <div class="meta-item">
-                            <div class="meta-label">تاريخ المطالبات</div>
-                            <div class="meta-value">{analysis['analyses']['claims_history'].get('note', '')}</div>
-                        </div>
-                    </div>
-                    
-                    <div class="comparison-card">
-                        <h3>📊 مقارنة مع سوق التأمين</h3>
-                        <p>متوسط سوق التأمين للمركبات من نوع <strong>{analysis['vehicle_type_ar']}</strong> مع تغطية <strong>{coverage['name']}</strong> هو <strong>${market['market_average']}</strong> سنوياً.</p>
-                        <p>قسطك الحالي: <strong>${market['actual_premium']}</strong> ({market['difference_percent']}% {['أعلى', 'أقل'][market['difference'] < 0]} من المتوسط)</p>
-                        <p><strong>التوصية:</strong> {market['advice']}</p>
-                    </div>
-                </div>
-                
-                <!-- القسم 3: تحليل التغطية -->
-                <div class="section">
-                    <h2 class="section-title">🛡️ تحليل التغطية: {coverage['name']}</h2>
-                    
-                    <table class="coverage-table">
-                        <thead>
-                            <tr>
-                                <th width="50%">ما يتم تغطيته</th>
-                                <th width="50%">ما لا يتم تغطيته</th>
-                            </tr>
-                        </thead>
-                        <tbody>
-                            <tr>
-                                <td class="covers">
-                                    <ul class="tip-list">
-                                        {''.join(f'<li>{item}</li>' for item in coverage['covers'])}
-                                    </ul>
-                                </td>
-                                <td class="not-covers">
-                                    <ul class="tip-list">
-                                        {''.join(f'<li>{item}</li>' for item in coverage['not_covered'])}
-                                    </ul>
-                                </td>
-                            </tr>
-                        </tbody>
-                    </table>
-                    
-                    <p><strong>الأنسب لـ:</strong> {coverage['best_for']}</p>
-                </div>
-                
-                <!-- القسم 4: التوصيات الإستراتيجية -->
-                <div class="section">
-                    <h2 class="section-title">💡 التوصيات الإستراتيجية</h2>
-                    <p>بناءً على تحليل مركبتك، نقدم التوصيات التالية لتقليل المخاطر وتحسين تجربة التأمين:</p>
-                    
-                    <div class="recommendation-grid">
-                        {''.join(f'''
-                        <div class="recommendation-card">
-                            <div class="rec-category">{rec['category']}</div>
-                            <div class="rec-title">{rec['title']}</div>
-                            <div class="rec-desc">{rec['description']}</div>
-                            <div class="rec-impact">🗲 {rec['impact']}</div>
-                        </div>
-                        ''' for rec in analysis['recommendations'][:6])}
-                    </div>
-                </div>
-                
-                <!-- القسم 5: نصائح السلامة -->
-                <div class="section">
-                    <h2 class="section-title">🚗 نصائح السلامة المرورية</h2>
-                    <ul class="tip-list">
-                        {''.join(f'<li>{tip}</li>' for tip in analysis['safety_tips'][:8])}
-                    </ul>
-                </div>
-                
-                <!-- القسم 6: جدول الأقساط -->
-                <div class="section">
-                    <h2 class="section-title">💰 جدول الأقساط والتخفيضات</h2>
-                    <table class="coverage-table">
-                        <thead>
-                            <tr>
-                                <th>البند</th>
-                                <th>القيمة</th>
-                                <th>التأثير على القسط</th>
-                            </tr>
-                        </thead>
-                        <tbody>
-                            <tr>
-                                <td>القسط الأساسي</td>
-                                <td>${analysis['analyses']['vehicle_value'].get('factor', 1) * 1000:.2f}</td>
-                                <td>حساب أولي بناءً على قيمة المركبة</td>
-                            </tr>
-                            <tr>
-                                <td>عامل المخاطر الإجمالي</td>
-                                <td>{analysis['total_risk_factor']}x</td>
-                                <td>ضرب في جميع عوامل الخطر</td>
-                            </tr>
-                            <tr>
-                                <td>خصم عدم المطالبات</td>
-                                <td>{analysis['analyses']['no_claims_years']['discount_percent']}%</td>
-                                <td>خصم لـ {quote.no_claims_years} سنوات بدون مطالبات</td>
-                            </tr>
-                            <tr style="background: #e8f5e8;">
-                                <td><strong>القسط النهائي</strong></td>
-                                <td><strong>${quote.final_premium}</strong></td>
-                                <td><strong>بعد تطبيق جميع العوامل</strong></td>
-                            </tr>
-                        </tbody>
-                    </table>
-                </div>
-                
-                <!-- التذييل -->
-                <div class="footer">
-                    <p>تم إنشاء هذا التقرير في: {analysis['generated_at']}</p>
-                    <p>رقم التقرير: {analysis['report_id']}</p>
-                    <p>مع خالص التقدير،<br>فريق SafeRatio Insurance</p>
-                    <p style="font-size: 12px; margin-top: 10px; opacity: 0.8;">
-                        ملاحظة: هذا التقرير لأغراض إعلامية فقط. للتفاصيل الكاملة يرجى الرجوع لوثيقة التأمين الموقعة.
-                    </p>
-                </div>
-                
-            </div>
-        </body>
-        </html>
-        """
-        
-        return report_html
+        overall_risk = analysis['overall_risk']
+        analyses = analysis['analyses']
+        
+        # كل القيم نصوص جاهزة: القالب لا يبحث في الكائنات ولا يمر بتنسيق الأرقام المحلي
+        context = {
+            'make': str(vehicle.make),
+            'model': str(vehicle.model),
+            'year': str(vehicle.year),
+            'quote_number': str(quote.quote_number),
+            'customer_name': user.get_full_name() or user.email,
+            'vehicle_type_ar': analysis['vehicle_type_ar'],
+            'vehicle_age': str(analysis['vehicle_age']),
+            'overall_risk': overall_risk,
+            'risk_class': 'risk-high' if 'مرتفع' in overall_risk else 'risk-medium' if 'متوسط' in overall_risk else 'risk-low',
+            'factors_count': str(len(analysis['recommendations'])),
+            'final_premium': str(quote.final_premium),
+            'market_comparison': market['comparison'],
+            'market_advice': market['advice'],
+            'market_average': str(market['market_average']),
+            'actual_premium': str(market['actual_premium']),
+            'difference_percent': str(market['difference_percent']),
+            'market_direction': 'أقل' if market['difference'] < 0 else 'أعلى',
+            'age_note': analyses['vehicle_age'].get('note', ''),
+            'engine_note': analyses['engine_size'].get('note', ''),
+            'value_note': analyses['vehicle_value'].get('note', ''),
+            'claims_note': analyses['claims_history'].get('note', ''),
+            'coverage_name': coverage['name'],
+            'base_premium': f"{analyses['vehicle_value'].get('factor', 1) * 1000:.2f}",
+            'total_risk_factor': str(analysis['total_risk_factor']),
+            'no_claims_discount': str(analyses['no_claims_years']['discount_percent']),
+            'no_claims_years': str(quote.no_claims_years),
+            'coverage_section': render_coverage_section(quote.coverage_type, coverage),
+            'recommendations_section': render_recommendations_section(analysis['recommendations'][:6]),
+            'safety_tips_section': render_safety_tips_section(analysis['safety_tips'][:8]),
+            'generated_at': analysis.get('generated_at') or datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'report_id': analysis.get('report_id') or f"STATIC-REP-{quote.id}-{datetime.now().strftime('%Y%m%d')}",
+            'stylesheet_url': report_stylesheet_url(request),
+        }
+        return get_precompiled(QUOTE_REPORT_TEMPLATE).render(context)
     
     @staticmethod
-    def generate_policy_report(policy):
+    def generate_policy_report(policy, request=None):
         """Generate comprehensive policy report"""
         quote = policy.quote
         vehicle = policy.vehicle
-        user = policy.user
         
         # تحليل الوثيقة
         days_remaining = (policy.expiry_date - datetime.now().date()).days
         coverage_percentage = (365 - days_remaining) / 365 * 100
         
-        report_html = f"""
-        <!DOCTYPE html>
-        <html dir="rtl" lang="ar">
-        <head>
-            <meta charset="UTF-8">
-            <style>
-                body {{ font-family: Arial, sans-serif; padding: 20px; }}
-                .header {{ background: #2c3e50; color: white; padding: 20px; border-radius: 10px 10px 0 0; }}
-                .section {{ margin: 20px 0; padding: 20px; border: 1px solid #ddd; border-radius: 5px; }}
-                .policy-number {{ font-size: 24px; font-weight: bold; color: #3498db; }}
-                .status-badge {{ display: inline-block; padding: 5px 15px; border-radius: 20px; }}
-                .status-active {{ background: #27ae60; color: white; }}
-                .status-pending {{ background: #f39c12; color: white; }}
-            </style>
-        </head>
-        <body>
-            <div class="header">
-                <h1>وثيقة تأمين مركبة</h1>
-                <div class="policy-number">{policy.policy_number}</div>
-            </div>
-            
-            <div class="section">
-                <h2>معلومات الوثيقة</h2>
-                <p><strong>الحالة:</strong> <span class="status-badge status-{policy.status}">{policy.get_status_display()}</span></p>
-                <p><strong>الفترة:</strong> {policy.inception_date} إلى {policy.expiry_date} ({days_remaining} يوم متبق)</p>
-                <p><strong>نسبة التغطية المستخدمة:</strong> {coverage_percentage:.1f}%</p>
-            </div>
-            
-            <div class="section">
-                <h2>معلومات المركبة</h2>
-                <p><strong>المركبة:</strong> {vehicle.year} {vehicle.make} {vehicle.model}</p>
-                <p><strong>رقم اللوحة:</strong> {vehicle.license_plate}</p>
-                <p><strong>القيمة:</strong> ${vehicle.current_value}</p>
-            </div>
-            
-            <div class="section">
-                <h2>التغطية والشروط</h2>
-                <p><strong>نوع التغطية:</strong> {quote.get_coverage_type_display()}</p>
-                <p><strong>مبلغ التحمل:</strong> ${quote.excess_amount}</p>
-                <p><strong>الشروط:</strong></p>
-                <ul>
-                    <li>الإبلاغ عن الحوادث خلال 24 ساعة</li>
-                    <li>تقديم تقرير شرطة في حالة السرقة</li>
-                    <li>صيانة دورية للمركبة</li>
-                </ul>
-            </div>
-            
-            <div class="section">
-                <h2>المعلومات المالية</h2>
-                <p><strong>القسط الإجمالي:</strong> ${policy.total_premium}</p>
-                <p><strong>القسط الشهري:</strong> ${policy.total_premium / 12:.2f}</p>
-                <p><strong>المبلغ المدفوع:</strong> ${policy.paid_amount}</p>
-                <p><strong>الحالة المالية:</strong> {policy.payment_status}</p>
-            </div>
-            
-            <div class="section">
-                <h2>خطوات التالية</h2>
-                <ol>
-                    <li>إكمال عملية الدفع لتفعيل الوثيقة</li>
-                    <li>تحميل شهادة التأمين</li>
-                    <li>مراجعة شروط وأحكام الوثيقة</li>
-                    <li>الاتصال بالدعم في حالة الاستفسارات</li>
-                </ol>
-            </div>
-        </body>
-        </html>
-        """
+        report_html = get_precompiled(POLICY_REPORT_TEMPLATE).render({
+            'policy_number': str(policy.policy_number),
+            'status': str(policy.status),
+            'status_display': policy.get_status_display(),
+            'inception_date': str(policy.inception_date),
+            'expiry_date': str(policy.expiry_date),
+            'days_remaining': str(days_remaining),
+            'coverage_percentage': f"{coverage_percentage:.1f}",
+            'make': str(vehicle.make),
+            'model': str(vehicle.model),
+            'year': str(vehicle.year),
+            'license_plate': str(vehicle.license_plate),
+            'vehicle_value': str(vehicle.current_value),
+            'coverage_type_display': quote.get_coverage_type_display(),
+            'excess_amount': str(quote.excess_amount),
+            'total_premium': str(policy.total_premium),
+            'monthly_premium': f"{policy.total_premium / 12:.2f}",
+            'paid_amount': str(policy.paid_amount),
+            'payment_status': str(policy.payment_status),
+            'stylesheet_url': report_stylesheet_url(request),
+        })
         
         return {
             'success': True,
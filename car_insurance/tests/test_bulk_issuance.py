@@ -0,0 +1,102 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from car_insurance.models import CarInsuranceQuote, CarPolicy, Vehicle
+from saferatio.background import get_background_worker
+
+User = get_user_model()
+
+URL = '/api/car-insurance/quotes/bulk-accept/'
+
+
+@override_settings(BACKGROUND_TASKS={'ASYNC': False})
+class BulkIssuanceTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='fleet_owner', password='pass', first_name='أسطول')
+        self.other = User.objects.create_user(username='other_owner', password='pass')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def make_quotes(self, count, user=None, status='quoted'):
+        user = user or self.user
+        quotes = []
+        start = CarInsuranceQuote.objects.count()
+        for i in range(start, start + count):
+            vehicle = Vehicle.objects.create(
+                user=user, make='Toyota', model='Hilux', license_plate=f'FL-{i}',
+                current_value=Decimal('20000.00'),
+            )
+            quotes.append(CarInsuranceQuote.objects.create(
+                vehicle=vehicle, user=user, quote_number=f'CQ-FL-{i}', status=status,
+                final_premium=Decimal('900.00') + i,
+            ))
+        return quotes
+
+    def test_issues_policies_and_skips_ineligible_quotes(self):
+        quotes = self.make_quotes(5)
+        draft = self.make_quotes(1, status='draft')[0]
+        foreign = self.make_quotes(1, user=self.other)[0]
+        ids = [quote.id for quote in quotes] + [draft.id, foreign.id, 999999]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(URL, {'quote_ids': ids}, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['skipped_quote_ids'], [draft.id, foreign.id, 999999])
+        self.assertEqual(len(response.data['policies']), 5)
+
+        policies = CarPolicy.objects.filter(quote__in=quotes)
+        self.assertEqual(policies.count(), 5)
+        self.assertEqual(len({policy.policy_number for policy in policies}), 5)
+        for policy in policies:
+            self.assertEqual(policy.total_premium, policy.quote.final_premium)
+            self.assertIsNotNone(policy.expiry_date)
+            self.assertEqual(policy.document_url.name, f'policy_documents/policy_{policy.policy_number}.pdf')
+        self.assertEqual(
+            set(CarInsuranceQuote.objects.filter(pk__in=[q.id for q in quotes]).values_list('status', flat=True)),
+            {'accepted'},
+        )
+        self.assertEqual(CarInsuranceQuote.objects.get(pk=draft.id).status, 'draft')
+
+        # إعادة الطلب لا تصدر وثائق مكررة
+        response = self.client.post(URL, {'quote_ids': [quotes[0].id]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['skipped_quote_ids'], [quotes[0].id])
+
+    def test_query_count_does_not_grow_with_batch(self):
+        def issue(quotes):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(URL, {'quote_ids': [q.id for q in quotes]}, format='json')
+            self.assertEqual(response.status_code, 201)
+            return len(queries)
+
+        self.assertEqual(issue(self.make_quotes(2)), issue(self.make_quotes(20)))
+
+    def test_validation(self):
+        self.assertEqual(self.client.post(URL, {'quote_ids': []}, format='json').status_code, 400)
+        self.assertEqual(self.client.post(URL, {'quote_ids': ['x']}, format='json').status_code, 400)
+        self.assertEqual(self.client.post(URL, {'quote_ids': list(range(501))}, format='json').status_code, 400)
+
+
+class BackgroundDocumentTests(TransactionTestCase):
+    def test_documents_generated_by_worker_after_commit(self):
+        user = User.objects.create_user(username='async_owner', password='pass')
+        vehicle = Vehicle.objects.create(user=user, license_plate='ASYNC-1', current_value=Decimal('15000.00'))
+        quote = CarInsuranceQuote.objects.create(
+            vehicle=vehicle, user=user, quote_number='CQ-ASYNC-1', status='quoted', final_premium=Decimal('800.00'),
+        )
+        client = APIClient()
+        client.force_authenticate(user)
+
+        with override_settings(BACKGROUND_TASKS={'ASYNC': True}):
+            response = client.post(URL, {'quote_ids': [quote.id]}, format='json')
+            get_background_worker().join()
+
+        self.assertEqual(response.status_code, 201)
+        policy = CarPolicy.objects.get(quote=quote)
+        self.assertEqual(policy.document_url.name, f'policy_documents/policy_{policy.policy_number}.pdf')
@@ -0,0 +1,101 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from car_insurance.models import CarInsuranceQuote, CarPolicy, Vehicle
+
+User = get_user_model()
+
+STATUSES = ['active', 'expired', 'pending', 'cancelled']
+
+
+@skipUnless(connection.vendor in ('postgresql', 'sqlite'), 'Query plans are only checked on PostgreSQL and SQLite')
+class CarPolicyQuoteQueryPlanTests(TestCase):
+    """Policy/quote list, expiry and admin queries must hit their dedicated indexes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [User.objects.create_user(username=f'driver{i}', password='pass') for i in range(5)]
+        today = date.today()
+        for user in cls.users:
+            vehicle = Vehicle.objects.create(
+                user=user, license_plate=f'PLATE-{user.id}', current_value=Decimal('15000.00')
+            )
+            quotes = CarInsuranceQuote.objects.bulk_create([
+                CarInsuranceQuote(
+                    vehicle=vehicle, user=user, quote_number=f'CQ-{user.id}-{i}',
+                    status=['draft', 'pending', 'accepted', 'rejected'][i % 4],
+                )
+                for i in range(40)
+            ])
+            CarPolicy.objects.bulk_create([
+                CarPolicy(
+                    quote=quote, user=user, vehicle=vehicle, policy_number=f'CP-{quote.quote_number}',
+                    status=STATUSES[i % len(STATUSES)], expiry_date=today + timedelta(days=i * 9),
+                )
+                for i, quote in enumerate(quotes)
+            ])
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def assertUsesIndex(self, queryset, index_name):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                # tiny tables: check that the index is usable, not that a seq scan is cheaper
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = queryset.explain()
+        # PostgreSQL: the exact planned index. SQLite's planner has no cost model for partial
+        # indexes and may pick any matching one, so only a full table scan is rejected there.
+        if connection.vendor == 'postgresql':
+            self.assertIn(index_name, plan, f'{index_name} not used:\n{plan}')
+        else:
+            self.assertRegex(plan, r'USING (COVERING )?INDEX \w+_idx', f'{index_name} not used:\n{plan}')
+
+    def test_user_policies_list(self):
+        self.assertUsesIndex(
+            CarPolicy.objects.filter(user=self.users[0]).order_by('-created_at'), 'cpolicy_user_created_idx'
+        )
+
+    def test_user_expiring_policies(self):
+        today = date.today()
+        self.assertUsesIndex(
+            CarPolicy.objects.filter(
+                user=self.users[0], status='active', expiry_date__range=[today, today + timedelta(days=30)]
+            ),
+            'cpolicy_user_active_exp_idx',
+        )
+
+    def test_all_expiring_policies(self):
+        today = date.today()
+        self.assertUsesIndex(
+            CarPolicy.objects.filter(status='active', expiry_date__lte=today + timedelta(days=30)),
+            'cpolicy_active_exp_idx',
+        )
+
+    def test_admin_status_counts(self):
+        self.assertUsesIndex(
+            CarPolicy.objects.filter(status='pending', created_at__gte=timezone.now() - timedelta(days=30)),
+            'cpolicy_status_created_idx',
+        )
+
+    def test_financial_report_range(self):
+        self.assertUsesIndex(
+            CarPolicy.objects.filter(created_at__range=[timezone.now() - timedelta(days=90), timezone.now()]),
+            'cpolicy_created_idx',
+        )
+
+    def test_user_quotes_by_status(self):
+        self.assertUsesIndex(
+            CarInsuranceQuote.objects.filter(user=self.users[0], status='pending'), 'cquote_user_status_idx'
+        )
+
+    def test_user_recent_quotes(self):
+        self.assertUsesIndex(
+            CarInsuranceQuote.objects.filter(user=self.users[0]).order_by('-created_at')[:5],
+            'cquote_user_created_idx',
+        )
@@ -0,0 +1,134 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock
+
+import pandas as pd
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from car_insurance.calculations import PREMIUM_COLUMNS, calculate_premium, calculate_premiums_frame
+from car_insurance.models import CarInsuranceQuote, CarPolicy, CarRenewalRun, Vehicle
+from car_insurance.services import renewal
+from users.models import Profile
+
+User = get_user_model()
+
+
+class PremiumsFrameTests(TestCase):
+    def test_matches_single_risk_path(self):
+        rows = [
+            {
+                'vehicle_type': vehicle_type, 'coverage_type': coverage, 'year': year,
+                'current_value': Decimal(value), 'engine_size': engine, 'driver_age': driver_age,
+                'claims_history': claims, 'no_claims_years': no_claims,
+            }
+            for vehicle_type, coverage, year, value, engine, driver_age, claims, no_claims in [
+                ('car', 'comprehensive', 2024, '18000.00', Decimal('1.6'), None, 0, 0),
+                ('suv', 'third_party', 2015, '60000.00', Decimal('3.5'), 22, 2, 3),
+                ('truck', 'third_party_fire_theft', 2001, '26000.50', None, 70, 0, 9),
+                ('bus', 'comprehensive', 2019, '25000.00', Decimal('2.0'), 27, 1, 1),
+                ('car', 'comprehensive', 2024, '19000.00', Decimal('1.8'), 40, 0, 0),
+            ]
+        ]
+        premiums = calculate_premiums_frame(pd.DataFrame(rows))
+
+        for row, (_, premium) in zip(rows, premiums.iterrows()):
+            expected = calculate_premium(
+                vehicle=SimpleNamespace(**{key: row[key] for key in ('vehicle_type', 'year', 'current_value', 'engine_size')}),
+                coverage_type=row['coverage_type'], driver_age=row['driver_age'],
+                claims_history=row['claims_history'], no_claims_years=row['no_claims_years'],
+            )
+            self.assertEqual(list(premium), [expected[column] for column in PREMIUM_COLUMNS])
+
+
+class RenewalRunTests(TestCase):
+    def setUp(self):
+        self.today = date.today()
+        self.user = User.objects.create_user(username='renewal_owner', password='pass')
+        Profile.objects.filter(user=self.user).update(date_of_birth=date(self.today.year - 23, 1, 1))
+        self.policies = [self.make_policy(days) for days in (1, 5, 5, 12, 29)]
+        self.make_policy(45)  # خارج الفترة
+        self.make_policy(3, status='pending')
+        self.make_policy(6, renewal_date=self.today)  # مجددة مسبقاً
+
+    def make_policy(self, days, status='active', renewal_date=None):
+        index = CarPolicy.objects.count()
+        vehicle = Vehicle.objects.create(
+            user=self.user, license_plate=f'RN-{index}', current_value=Decimal('30000.00'),
+            year=2016, vehicle_type='suv', engine_size=Decimal('2.4'),
+        )
+        quote = CarInsuranceQuote.objects.create(
+            vehicle=vehicle, user=self.user, quote_number=f'CQ-RN-{index}', status='accepted',
+            coverage_type='comprehensive', claims_history=index % 2, no_claims_years=2,
+        )
+        return CarPolicy.objects.create(
+            quote=quote, user=self.user, vehicle=vehicle, policy_number=f'CP-RN-{index}', status=status,
+            expiry_date=self.today + timedelta(days=days), renewal_date=renewal_date,
+        )
+
+    def test_renews_window_once(self):
+        run = renewal.run_renewals(renewal.start_run(days=30, batch_size=2))
+
+        self.assertEqual(run.status, 'completed')
+        self.assertEqual((run.total, run.renewed, run.batches), (5, 5, 3))
+        self.assertEqual(run.progress_percent, 100.0)
+
+        for policy in self.policies:
+            policy.refresh_from_db()
+            self.assertEqual(policy.status, 'active')
+            self.assertEqual(policy.renewal_date, self.today)
+            quote = policy.renewal_quotes.get()
+            expected = calculate_premium(
+                vehicle=policy.vehicle, coverage_type='comprehensive', driver_age=23,
+                claims_history=policy.quote.claims_history, no_claims_years=3,
+            )
+            self.assertEqual(quote.status, 'quoted')
+            self.assertEqual(quote.no_claims_years, 3)
+            self.assertEqual(quote.final_premium, Decimal(str(expected['final_premium'])))
+            self.assertEqual(quote.end_date, self.today + timedelta(days=renewal.QUOTE_VALIDITY_DAYS))
+        self.assertEqual(CarInsuranceQuote.objects.filter(renewal_of__isnull=False).count(), 5)
+
+        # تشغيل جديد لنفس الفترة لا يجد شيئاً
+        rerun = renewal.run_renewals(renewal.start_run(days=30))
+        self.assertEqual((rerun.total, rerun.renewed), (0, 0))
+        self.assertEqual(CarInsuranceQuote.objects.filter(renewal_of__isnull=False).count(), 5)
+
+    def test_failed_run_resumes_after_last_committed_batch(self):
+        run = renewal.start_run(days=30, batch_size=2)
+        real = renewal.calculate_premiums_frame
+        calls = []
+
+        def flaky(frame):
+            calls.append(len(frame))
+            if len(calls) == 2:
+                raise RuntimeError('rating service unavailable')
+            return real(frame)
+
+        with mock.patch.object(renewal, 'calculate_premiums_frame', side_effect=flaky):
+            with self.assertRaises(RuntimeError):
+                renewal.run_renewals(run)
+
+        run.refresh_from_db()
+        self.assertEqual((run.status, run.renewed), ('failed', 2))
+        self.assertIn('rating service unavailable', run.last_error)
+        self.assertEqual(CarInsuranceQuote.objects.filter(renewal_of__isnull=False).count(), 2)
+
+        out = StringIO()
+        call_command('renew_expiring_policies', resume=run.pk, stdout=out)
+        run.refresh_from_db()
+        self.assertEqual((run.status, run.renewed), ('completed', 5))
+        self.assertEqual(CarInsuranceQuote.objects.filter(renewal_of__isnull=False).count(), 5)
+        self.assertIn(str(run.pk), out.getvalue())
+
+    def test_command_max_batches_and_unknown_run(self):
+        out = StringIO()
+        call_command('renew_expiring_policies', days=30, batch_size=2, max_batches=1, stdout=out)
+        run = CarRenewalRun.objects.get()
+        self.assertEqual((run.status, run.renewed), ('running', 2))
+        self.assertIn(f'--resume {run.pk}', out.getvalue())
+
+        with self.assertRaises(CommandError):
+            call_command('renew_expiring_policies', resume=run.pk + 100, stdout=out)
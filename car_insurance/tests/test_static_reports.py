@@ -0,0 +1,74 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory, TestCase
+from rest_framework.test import APIClient
+
+from car_insurance import static_reports
+from car_insurance.models import CarInsuranceQuote, CarPolicy, Vehicle
+from car_insurance.static_reports import PrecompiledTemplate, StaticReportGenerator
+
+User = get_user_model()
+
+
+class StaticReportTests(TestCase):
+    def setUp(self):
+        static_reports._fragments.clear()
+        self.user = User.objects.create_user(username='report_owner', password='pass', first_name='سالم')
+        self.vehicle = Vehicle.objects.create(
+            user=self.user, make='<script>alert(1)</script>', model='Corolla', year=2019,
+            license_plate='RPT-1', current_value=Decimal('18000.00'),
+        )
+        self.quote = CarInsuranceQuote.objects.create(
+            vehicle=self.vehicle, user=self.user, quote_number='CQ-RPT-1', coverage_type='comprehensive',
+            final_premium=Decimal('950.00'),
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_quote_report_links_shared_stylesheet_and_escapes_values(self):
+        report = StaticReportGenerator.generate_comprehensive_report(self.quote)
+        html = report['report_html']
+
+        self.assertIn('car_insurance/reports.css', html)
+        self.assertNotIn('<style', html)
+        self.assertNotIn('<script>alert(1)</script>', html)
+        self.assertIn('&lt;script&gt;alert(1)&lt;/script&gt;', html)
+        self.assertIn('CQ-RPT-1', html)
+        self.assertIn(report['report_data']['report_id'], html)
+
+    def test_sections_rendered_once_per_key(self):
+        StaticReportGenerator.generate_comprehensive_report(self.quote)
+        cached = dict(static_reports._fragments)
+        self.assertTrue(cached)
+
+        StaticReportGenerator.generate_comprehensive_report(self.quote)
+        self.assertEqual(static_reports._fragments.keys(), cached.keys())
+        for key, fragment in cached.items():
+            self.assertIs(static_reports._fragments[key], fragment)
+
+    def test_precompiled_template_rejects_filters(self):
+        with self.assertRaises(ValueError):
+            PrecompiledTemplate('car_insurance/reports/_coverage_section.html')
+
+    def test_absolute_stylesheet_url_and_compare_endpoint(self):
+        request = RequestFactory().get('/api/car-insurance/vehicles/compare_quotes/')
+        html = StaticReportGenerator.generate_comprehensive_report(self.quote, request=request)['report_html']
+        # رابط الأنماط مطلق لأن HTML يُعرض خارج الموقع
+        self.assertIn('http://testserver/static/car_insurance/reports.css', html)
+
+        response = self.client.get('/api/car-insurance/vehicles/compare_quotes/', {'quote_ids': str(self.quote.id)})
+        self.assertEqual(response.status_code, 200)
+
+    def test_policy_report(self):
+        policy = CarPolicy.objects.create(
+            quote=self.quote, user=self.user, vehicle=self.vehicle, policy_number='CP-RPT-1', status='active',
+            expiry_date=date.today() + timedelta(days=200), total_premium=Decimal('1200.00'),
+        )
+        response = self.client.get(f'/api/car-insurance/policies/{policy.id}/report/')
+        self.assertEqual(response.status_code, 200)
+        html = response.data['report']['report_html']
+        self.assertIn('CP-RPT-1', html)
+        self.assertIn('policy-report', html)
+        self.assertNotIn('<style', html)
@@ -4,7 +4,6 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
 from django.shortcuts import get_object_or_404
-import uuid
 from datetime import date, timedelta, datetime
 from .models import Vehicle, CarInsuranceQuote, CarPolicy, Claim, VehicleDocument, generate_policy_number
 # import google.generativeai as genai
@@ -14,6 +13,10 @@ from reportlab.pdfgen import canvas
 import io
 import json
 from .static_reports import StaticReportGenerator
+from .services import bulk_issuance
+from insurance.services.identifiers import next_number
+from saferatio.pricing_pool import price
+from insurance.services.policy_expiry import expiring_policy_ids
 # from .reports import InsuranceReportGenerator
 
 
@@ -24,7 +27,7 @@ from .serializers import (
 )
 from .calculations import (
     calculate_premium, calculate_short_term_premium,
-    calculate_depreciation, create_quote_from_vehicle
+    calculate_depreciation, create_quote_from_vehicle, VEHICLE_PRICING_FIELDS
 )
 
 # Configure Gemini
@@ -163,7 +166,7 @@ class VehicleViewSet(viewsets.ModelViewSet):
                 )
             
             # إنشاء التقرير الثابت
-            report_data = StaticReportGenerator.generate_comprehensive_report(quote)
+            report_data = StaticReportGenerator.generate_comprehensive_report(quote, request=request)
             
             format_type = request.query_params.get('format', 'html')
             
@@ -250,7 +253,7 @@ class VehicleViewSet(viewsets.ModelViewSet):
             
             for quote in quotes:
                 # توليد تقرير لكل اقتباس باستخدام النظام الثابت
-                report = StaticReportGenerator.generate_comprehensive_report(quote)
+                report = StaticReportGenerator.generate_comprehensive_report(quote, request=request)
                 report_data = report.get('report_data', {})
                 
                 # استخراج تحليل المخاطر
@@ -589,6 +592,43 @@ class CarInsuranceQuoteViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
     
+    @action(detail=False, methods=['post'], url_path='bulk-accept')
+    def bulk_accept(self, request):
+        """
+        Accept many quoted quotes at once (quote_ids: list of ids) and issue their policies
+        in one transaction; documents are generated in the background after commit.
+        """
+        quote_ids = request.data.get('quote_ids')
+        if not isinstance(quote_ids, list) or not quote_ids:
+            return Response({'error': 'quote_ids must be a non-empty list'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            quote_ids = [int(quote_id) for quote_id in quote_ids]
+        except (TypeError, ValueError):
+            return Response({'error': 'quote_ids must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(quote_ids) > bulk_issuance.MAX_BULK_QUOTES:
+            return Response(
+                {'error': f'At most {bulk_issuance.MAX_BULK_QUOTES} quotes per request'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        policies, skipped = bulk_issuance.issue_policies(request.user, quote_ids)
+        return Response({
+            'success': True,
+            'message': f'{len(policies)} policies created.',
+            'policies': [
+                {
+                    'id': policy.id,
+                    'quote_id': policy.quote_id,
+                    'policy_number': policy.policy_number,
+                    'status': policy.status,
+                    'total_premium': str(policy.total_premium),
+                    'certificate_url': f'/api/car-insurance/policies/{policy.id}/certificate/',
+                }
+                for policy in policies
+            ],
+            'skipped_quote_ids': skipped,
+        }, status=status.HTTP_201_CREATED if policies else status.HTTP_200_OK)
+
     # In car_insurance/views.py
     @action(detail=True, methods=['post'])
     def accept(self, request, pk=None):
@@ -725,7 +765,7 @@ class CarPolicyViewSet(viewsets.ModelViewSet):
             vehicle=original_quote.vehicle,
             user=request.user,
             coverage_type=original_quote.coverage_type,
-            driver_age=original_quote.driver_age,
+            driver_age=original_quote.vehicle.driver_age,
             claims_history=original_quote.claims_history,
             no_claims_years=original_quote.no_claims_years + 1  # Add one more year of no claims
         )
@@ -749,15 +789,8 @@ class CarPolicyViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def expiring_soon(self, request):
-        """Get policies expiring in the next 30 days"""
-        from datetime import timedelta
-        today = date.today()
-        next_month = today + timedelta(days=30)
-        
-        expiring_policies = self.get_queryset().filter(
-            status='active',
-            expiry_date__range=[today, next_month]
-        )
+        """Get policies expiring in the next 30 days (set precomputed by the expiry scheduler)"""
+        expiring_policies = self.get_queryset().filter(pk__in=expiring_policy_ids(request.user, 'car'))
         serializer = self.get_serializer(expiring_policies, many=True)
         return Response(serializer.data)
     
@@ -794,7 +827,7 @@ class CarPolicyViewSet(viewsets.ModelViewSet):
         policy = self.get_object()
         
         # إنشاء تقرير شامل للوثيقة
-        # report_data = StaticReportGenerator.generate_policy_report(policy)
+        report_data = StaticReportGenerator.generate_policy_report(policy, request=request)
         
         format_type = request.query_params.get('format', 'html')
         
@@ -844,7 +877,7 @@ class ClaimViewSet(viewsets.ModelViewSet):
     
     def perform_create(self, serializer):
         # Generate claim number
-        claim_number = f"CLM-{uuid.uuid4().hex[:8].upper()}"
+        claim_number = next_number('claim')
         serializer.save(claim_number=claim_number)
     
     @action(detail=True, methods=['post'])
@@ -915,9 +948,10 @@ class PremiumCalculatorView(APIView):
         claims_history = int(data.get('claims_history', 0))
         no_claims_years = int(data.get('no_claims_years', 0))
         
-        # Calculate premium
-        premium_result = calculate_premium(
-            vehicle=mock_vehicle,
+        # Calculate premium (in the pricing pool when enabled)
+        premium_result = price(
+            'car.premium',
+            vehicle={field: getattr(mock_vehicle, field) for field in VEHICLE_PRICING_FIELDS},
             coverage_type=coverage_type,
             driver_age=driver_age,
             claims_history=claims_history,
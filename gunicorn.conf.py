@@ -0,0 +1,24 @@
+# gunicorn.conf.py
+"""
+إعدادات gunicorn (Procfile: gunicorn -c gunicorn.conf.py)
+
+SERVER_MODE:
+- wsgi (الافتراضي): saferatio.wsgi بعمال gthread، كل طلب يحجز خيطاً حتى ينتهي (GUNICORN_THREADS لكل عامل)
+- asgi: saferatio.asgi بعمال uvicorn، الـ views غير المتزامنة (saferatio.async_views) تنتظر البريد
+  والتخزين دون حجز العامل، والـ views المتزامنة الباقية تعمل في خيوط Django كالمعتاد
+
+عدد العمال من WEB_CONCURRENCY والمنفذ من PORT (يقرأهما gunicorn مباشرة).
+"""
+import os
+
+SERVER_MODE = os.environ.get('SERVER_MODE', 'wsgi').lower()
+
+if SERVER_MODE == 'asgi':
+    wsgi_app = 'saferatio.asgi:application'
+    worker_class = 'uvicorn_worker.UvicornWorker'
+elif SERVER_MODE == 'wsgi':
+    wsgi_app = 'saferatio.wsgi:application'
+    worker_class = 'gthread'
+    threads = int(os.environ.get('GUNICORN_THREADS', 4))
+else:
+    raise RuntimeError(f'SERVER_MODE غير معروف: {SERVER_MODE} (wsgi أو asgi)')
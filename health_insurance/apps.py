@@ -6,6 +6,6 @@ class HealthInsuranceConfig(AppConfig):
     name = 'health_insurance'
     verbose_name = 'التأمين الصحي'
     
-    # def ready(self):
-    #     """تهيئة التطبيق"""
-    #     import health_insurance.signals
\ No newline at end of file
+    def ready(self):
+        """تهيئة التطبيق"""
+        import health_insurance.signals  # noqa: F401
\ No newline at end of file
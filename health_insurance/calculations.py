@@ -1,6 +1,7 @@
 # health_insurance/calculations.py
 from decimal import Decimal, ROUND_HALF_UP
 from datetime import date
+import numpy as np
 from .models import SectorPricingFactor, HealthCoveragePlan
 
 def calculate_health_premium(company, coverage_plan, insured_count):
@@ -97,23 +98,17 @@ def quick_health_calculator(sector='tech_software', size_category='small',
     from .models import HealthCoveragePlan
     
     # الحصول على خطة افتراضية
-    try:
-        coverage_plan = HealthCoveragePlan.objects.filter(
-            is_active=True,
-            plan_type='basic'
-        ).first()
-        
-        if not coverage_plan:
-            coverage_plan = HealthCoveragePlan.objects.filter(is_active=True).first()
-        
-        if not coverage_plan:
-            # خطة افتراضية
-            coverage_plan = type('obj', (object,), {
-                'base_price_per_employee': Decimal('1000'),
-                'name': 'خطة أساسية',
-                'plan_type': 'basic'
-            })()
-    except:
+    # (أخطاء قاعدة البيانات تصل للمستدعي: التسعير بخطة افتراضية عندها يعطي قسطاً خاطئاً)
+    coverage_plan = HealthCoveragePlan.objects.filter(
+        is_active=True,
+        plan_type='basic'
+    ).first()
+    
+    if not coverage_plan:
+        coverage_plan = HealthCoveragePlan.objects.filter(is_active=True).first()
+    
+    if not coverage_plan:
+        # خطة افتراضية
         coverage_plan = type('obj', (object,), {
             'base_price_per_employee': Decimal('1000'),
             'name': 'خطة أساسية',
@@ -139,8 +134,23 @@ def quick_health_calculator(sector='tech_software', size_category='small',
     # استدعاء الحساب الرئيسي
     return calculate_health_premium(mock_company, coverage_plan, employee_count)
 
+def warm_pricing_caches():
+    """تهيئة عملية التسعير: فتح اتصال قاعدة البيانات وتنفيذ مسار الحاسبة السريعة مرة"""
+    quick_health_calculator()
+
 # ============= دوال العوامل =============
 
+# عوامل القطاعات الافتراضية (عند غياب SectorPricingFactor)
+DEFAULT_SECTOR_FACTORS = {
+    'health_hospital': Decimal('1.5'),
+    'health_clinic': Decimal('1.3'),
+    'health_pharmacy': Decimal('1.1'),
+    'tech_software': Decimal('1.0'),
+    'construction_civil': Decimal('1.8'),
+    'retail_store': Decimal('1.2'),
+    'default': Decimal('1.0')
+}
+
 def get_sector_factor(sector):
     """عامل القطاع"""
     try:
@@ -148,16 +158,7 @@ def get_sector_factor(sector):
         return factor.base_factor
     except:
         # عوامل افتراضية
-        sector_factors = {
-            'health_hospital': Decimal('1.5'),
-            'health_clinic': Decimal('1.3'),
-            'health_pharmacy': Decimal('1.1'),
-            'tech_software': Decimal('1.0'),
-            'construction_civil': Decimal('1.8'),
-            'retail_store': Decimal('1.2'),
-            'default': Decimal('1.0')
-        }
-        return sector_factors.get(sector, sector_factors['default'])
+        return DEFAULT_SECTOR_FACTORS.get(sector, DEFAULT_SECTOR_FACTORS['default'])
 
 def get_size_factor(size):
     """عامل حجم الشركة"""
@@ -238,4 +239,107 @@ def get_insurance_history_factor(has_previous, years):
     elif years >= 1:
         return Decimal('0.9')
     else:
-        return Decimal('1.0')
\ No newline at end of file
+        return Decimal('1.0')
+
+# ============= محرك "ماذا لو" (سطح الأقساط) =============
+
+# أبعاد التغيير المدعومة: اسم البعد -> (حقل الشركة، دالة العامل)
+WHAT_IF_DIMENSIONS = {
+    'sector': ('sector', None),  # دفعة واحدة عبر get_sector_factors
+    'size_category': ('size_category', get_size_factor),
+    'establishment_age': ('establishment_age', get_age_factor),
+    'risk_level': ('risk_level', get_risk_factor),
+    'work_environment': ('work_environment', get_environment_factor),
+    'city': ('city', get_city_factor),
+    'claims_history': ('claims_history', get_claims_factor),
+}
+MAX_SURFACE_CELLS = 10000
+
+
+def get_sector_factors(sectors):
+    """عوامل عدة قطاعات باستعلام واحد (مع نفس القيم الافتراضية لـ get_sector_factor)"""
+    stored = dict(
+        SectorPricingFactor.objects.filter(sector__in=sectors).values_list('sector', 'base_factor')
+    )
+    default = DEFAULT_SECTOR_FACTORS['default']
+    return [stored.get(s, DEFAULT_SECTOR_FACTORS.get(s, default)) for s in sectors]
+
+
+def calculate_premium_surface(company, coverage_plan, insured_count, variations, plans=None):
+    """
+    حساب سطح الأقساط لشبكة من تغييرات العوامل في استدعاء واحد
+
+    القسط = السعر الأساسي × العدد × حاصل ضرب عوامل مستقلة، لذلك يُحسب كل بعد كمتجه
+    عوامل مرة واحدة ثم يُبنى السطح كجداء خارجي (outer product) للمتجهات.
+
+    Args:
+        company: كائن Company (القيم الأساسية للأبعاد غير المتغيرة)
+        coverage_plan: الخطة الأساسية
+        insured_count: العدد الأساسي للمؤمن عليهم
+        variations: {اسم البعد: [قيم]} من WHAT_IF_DIMENSIONS أو 'insured_count'
+        plans: قائمة خطط لبُعد الخطة (اختياري)
+
+    Returns:
+        dict: الأبعاد ومتجهات عواملها والسطح (قائمة متداخلة بترتيب الأبعاد)
+    """
+    unknown = set(variations) - set(WHAT_IF_DIMENSIONS) - {'insured_count'}
+    if unknown:
+        raise ValueError(f"أبعاد غير مدعومة: {sorted(unknown)}")
+
+    dimensions = []
+
+    # بُعد الخطة (السعر الأساسي للموظف)
+    plans = list(plans) if plans else [coverage_plan]
+    dimensions.append({
+        'name': 'coverage_plan',
+        'values': [plan.id if getattr(plan, 'id', None) else plan.name for plan in plans],
+        'factors': [Decimal(str(plan.base_price_per_employee)) for plan in plans],
+    })
+
+    # بُعد عدد المؤمن عليهم
+    counts = [max(int(c), 1) for c in variations.get('insured_count', [insured_count])]
+    dimensions.append({'name': 'insured_count', 'values': counts, 'factors': [Decimal(c) for c in counts]})
+
+    # عوامل الشركة: متجه لكل بعد متغير (بترتيب الطلب)، وقيمة ثابتة للباقي
+    fixed_factor = get_insurance_history_factor(
+        company.has_previous_insurance, company.previous_insurance_years
+    )
+    for name, values in variations.items():
+        if name == 'insured_count' or not values:
+            continue
+        factor_func = WHAT_IF_DIMENSIONS[name][1]
+        factors = get_sector_factors(values) if name == 'sector' else [factor_func(v) for v in values]
+        dimensions.append({'name': name, 'values': list(values), 'factors': factors})
+    for name, (field, factor_func) in WHAT_IF_DIMENSIONS.items():
+        if not variations.get(name):
+            value = getattr(company, field)
+            fixed_factor *= get_sector_factor(value) if name == 'sector' else factor_func(value)
+
+    shape = [len(d['factors']) for d in dimensions]
+    if int(np.prod(shape)) > MAX_SURFACE_CELLS:
+        raise ValueError(f"الشبكة كبيرة جداً ({int(np.prod(shape))} خلية). الحد الأقصى {MAX_SURFACE_CELLS}")
+
+    # الجداء الخارجي بقيم Decimal (مصفوفة object) لتطابق calculate_health_premium تماماً
+    surface = np.array(fixed_factor, dtype=object)
+    for dim in dimensions:
+        surface = np.multiply.outer(surface, np.array(dim['factors'], dtype=object))
+
+    cent = Decimal('0.01')
+    quantize = np.frompyfunc(lambda v: float(v.quantize(cent, rounding=ROUND_HALF_UP)), 1, 1)
+    annual = quantize(surface)
+
+    flat_index = int(np.argmin(surface))
+    min_cell = [int(i) for i in np.unravel_index(flat_index, surface.shape)]
+    max_cell = [int(i) for i in np.unravel_index(int(np.argmax(surface)), surface.shape)]
+
+    for dim in dimensions:
+        dim['factors'] = [float(f) for f in dim['factors']]
+
+    return {
+        'dimensions': dimensions,
+        'shape': shape,
+        'fixed_factor': float(fixed_factor),
+        'annual_premium': annual.tolist(),
+        'min': {'cell': min_cell, 'annual_premium': annual[tuple(min_cell)]},
+        'max': {'cell': max_cell, 'annual_premium': annual[tuple(max_cell)]},
+    }
@@ -0,0 +1,57 @@
+# health_insurance/management/commands/archive_calculation_logs.py
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from health_insurance.services.calculation_log_partitions import (
+    PARTITIONS_AHEAD, archive_month, ensure_partitions, get_retention_months, is_partitioned,
+    months_to_archive,
+)
+
+
+class Command(BaseCommand):
+    help = 'أرشفة سجلات حسابات التأمين الصحي الأقدم من مدة الاحتفاظ إلى ملفات مضغوطة وإنشاء الأقسام القادمة'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--keep-months', type=int, default=None,
+            help='عدد الأشهر المحتفظ بها (يشمل الشهر الحالي)، الافتراضي HEALTH_CALCULATION_LOG["RETENTION_MONTHS"]',
+        )
+        parser.add_argument(
+            '--archive-dir', default=None,
+            help='مجلد ملفات الأرشيف، الافتراضي HEALTH_CALCULATION_LOG["ARCHIVE_DIR"]',
+        )
+        parser.add_argument('--months-ahead', type=int, default=PARTITIONS_AHEAD, help='عدد الأقسام القادمة المطلوب إنشاؤها')
+        parser.add_argument('--dry-run', action='store_true', help='عرض الأشهر التي ستُؤرشف فقط')
+
+    def handle(self, *args, **options):
+        keep_months = options['keep_months'] or get_retention_months()
+        if keep_months < 1:
+            raise CommandError('--keep-months يجب أن يكون 1 على الأقل')
+        archive_dir = options['archive_dir'] or getattr(settings, 'HEALTH_CALCULATION_LOG', {}).get(
+            'ARCHIVE_DIR', os.path.join(settings.BASE_DIR, 'var', 'calculation_log_archive')
+        )
+
+        months = months_to_archive(keep_months)
+        if options['dry_run']:
+            for month in months:
+                self.stdout.write(f'📦 سيُؤرشف: {month:%Y-%m}')
+            self.stdout.write(f'✅ {len(months)} شهر للأرشفة (الاحتفاظ بـ {keep_months} شهر)')
+            return
+
+        if is_partitioned():
+            created = ensure_partitions(months_ahead=options['months_ahead'])
+            for name in created:
+                self.stdout.write(f'➕ قسم جديد: {name}')
+
+        total = 0
+        for month in months:
+            path, rows = archive_month(month, archive_dir)
+            total += rows
+            if path:
+                self.stdout.write(f'📦 {month:%Y-%m}: {rows} سجل → {path}')
+            else:
+                self.stdout.write(f'🗑️ {month:%Y-%m}: لا توجد سجلات')
+
+        self.stdout.write(self.style.SUCCESS(f'✅ تمت أرشفة {total} سجل من {len(months)} شهر'))
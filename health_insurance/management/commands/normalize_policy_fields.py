@@ -0,0 +1,22 @@
+# health_insurance/management/commands/normalize_policy_fields.py
+from django.core.management.base import BaseCommand, CommandError
+
+from health_insurance.services.policy_fields import backfill_policy_fields
+
+
+class Command(BaseCommand):
+    help = 'تعبئة حقول وثائق التأمين الصحي المشتقة من JSON (نوع التأمين، طريقة الدفع، الخطة، أفراد العائلة) للوثائق الموجودة'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='عدد الوثائق في كل دفعة')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size يجب أن يكون 1 على الأقل')
+
+        updated = backfill_policy_fields(
+            batch_size=batch_size,
+            log=lambda count: self.stdout.write(f'🔄 {count} وثيقة'),
+        )
+        self.stdout.write(self.style.SUCCESS(f'✅ تم توحيد حقول {updated} وثيقة'))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-19 02:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('health_insurance', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employee',
+            name='row_hash',
+            field=models.CharField(blank=True, default='', max_length=40, verbose_name='بصمة صف الملف'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.8 on 2026-10-19 02:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('health_insurance', '0002_employee_row_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompanyRosterStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_employees', models.IntegerField(default=0)),
+                ('male_count', models.IntegerField(default=0)),
+                ('female_count', models.IntegerField(default=0)),
+                ('married_count', models.IntegerField(default=0)),
+                ('chronic_count', models.IntegerField(default=0)),
+                ('spouses_total', models.IntegerField(default=0)),
+                ('children_total', models.IntegerField(default=0)),
+                ('parents_total', models.IntegerField(default=0)),
+                ('age_total', models.IntegerField(default=0)),
+                ('salary_total', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('age_counts', models.JSONField(blank=True, default=dict)),
+                ('dependents_counts', models.JSONField(blank=True, default=dict)),
+                ('salary_buckets', models.JSONField(blank=True, default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('company', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='roster_stats', to='health_insurance.company')),
+            ],
+            options={
+                'verbose_name': 'إحصائيات موظفي الشركة',
+                'verbose_name_plural': 'إحصائيات موظفي الشركات',
+                'db_table': 'company_roster_stats',
+            },
+        ),
+    ]
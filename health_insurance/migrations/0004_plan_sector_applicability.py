@@ -0,0 +1,50 @@
+# Generated by Django 5.2.8 on 2026-10-19 03:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_applicability(apps, schema_editor):
+    """بناء جدول الأهلية للخطط الموجودة"""
+    from health_insurance.models import applicable_sectors_for
+
+    HealthCoveragePlan = apps.get_model('health_insurance', 'HealthCoveragePlan')
+    PlanSectorApplicability = apps.get_model('health_insurance', 'PlanSectorApplicability')
+    PlanSectorApplicability.objects.bulk_create([
+        PlanSectorApplicability(plan_id=plan.id, sector=sector)
+        for plan in HealthCoveragePlan.objects.all()
+        for sector in applicable_sectors_for(plan.applicable_to, plan.custom_sectors)
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('health_insurance', '0003_company_roster_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='healthcoverageplan',
+            name='applicable_to',
+            field=models.CharField(choices=[('all', 'جميع القطاعات'), ('healthcare', 'القطاع الصحي'), ('high_risk', 'القطاعات عالية المخاطر'), ('standard', 'القطاعات العادية'), ('custom', 'قطاعات محددة')], default='all', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='healthcoverageplan',
+            name='custom_sectors',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.CreateModel(
+            name='PlanSectorApplicability',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sector', models.CharField(choices=[('health_hospital', 'مستشفى'), ('health_clinic', 'عيادة'), ('health_pharmacy', 'صيدلية'), ('health_lab', 'مختبر طبي'), ('health_center', 'مركز طبي'), ('health_dental', 'عيادة أسنان'), ('health_optical', 'مركز بصريات'), ('health_other', 'خدمات صحية أخرى'), ('tech_software', 'شركة برمجيات'), ('tech_web', 'تطوير مواقع وتطبيقات'), ('tech_ai', 'ذكاء اصطناعي'), ('tech_cyber', 'أمن سيبراني'), ('tech_cloud', 'حوسبة سحابية'), ('tech_gaming', 'ألعاب إلكترونية'), ('tech_other', 'تكنولوجيا أخرى'), ('construction_civil', 'مقاولات إنشائية'), ('construction_electrical', 'مقاولات كهرباء'), ('construction_mechanical', 'مقاولات ميكانيكا'), ('construction_roads', 'مقاولات طرق وجسور'), ('construction_decoration', 'تشطيب وديكور'), ('construction_other', 'مقاولات أخرى'), ('retail_store', 'متجر تجزئة'), ('wholesale', 'توزيع وتجارة جملة'), ('ecommerce', 'متجر إلكتروني'), ('retail_other', 'تجارة أخرى'), ('services_logistics', 'شركة شحن ولوجستيات'), ('services_cleaning', 'خدمات نظافة'), ('services_maintenance', 'صيانة وخدمات فنية'), ('services_transport', 'نقل ومواصلات'), ('services_other', 'خدمات أخرى'), ('other', 'أخرى')], max_length=50)),
+                ('plan', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sector_applicability', to='health_insurance.healthcoverageplan')),
+            ],
+            options={
+                'db_table': 'health_plan_sector_applicability',
+                'constraints': [models.UniqueConstraint(fields=('sector', 'plan'), name='unique_plan_sector_applicability')],
+            },
+        ),
+        migrations.RunPython(build_applicability, migrations.RunPython.noop),
+    ]
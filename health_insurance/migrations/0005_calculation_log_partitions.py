@@ -0,0 +1,117 @@
+# Generated by Django 5.2.8 on 2026-10-19 03:15
+
+from datetime import date, datetime, time, timezone
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# نسخة ثابتة من health_insurance.services.calculation_log_partitions وقت كتابة الترحيل:
+# تغيير الخدمة أو إعداداتها لاحقاً لا يغير ما يفعله هذا الترحيل على قاعدة جديدة
+TABLE = 'health_calculation_log'
+DEFAULT_PARTITION = 'health_calculation_log_default'
+PARTITIONS_AHEAD = 3
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def create_month_partition(cursor, qn, month):
+    """قسم الشهر مع نقل صفوفه من القسم الافتراضي"""
+    name = f'{TABLE}_p{month:%Y%m}'
+    start = datetime.combine(month, time.min, tzinfo=timezone.utc)
+    end = datetime.combine(add_months(month, 1), time.min, tzinfo=timezone.utc)
+    cursor.execute(f'CREATE TABLE {qn(name)} (LIKE {qn(TABLE)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+    cursor.execute(
+        f'WITH moved AS (DELETE FROM {qn(DEFAULT_PARTITION)} '
+        f'WHERE created_at >= %s AND created_at < %s RETURNING *) '
+        f'INSERT INTO {qn(name)} SELECT * FROM moved', [start, end]
+    )
+    cursor.execute(
+        f"ALTER TABLE {qn(TABLE)} ATTACH PARTITION {qn(name)} "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    )
+
+
+def partition_calculation_log(apps, schema_editor):
+    """
+    تقسيم الجدول شهرياً في PostgreSQL (لا شيء في قواعد البيانات الأخرى)
+
+    المفتاح الأساسي يصبح (id, created_at) لأن PostgreSQL يشترط أن يتضمن عمود التقسيم،
+    ويُستبدل تسلسل id بتسلسل يملكه الجدول الجديد. الفهارس والمفاتيح الأجنبية تُعاد كما هي.
+    """
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    qn = connection.ops.quote_name
+    legacy = f'{TABLE}_unpartitioned'
+    sequence = f'{TABLE}_partitioned_id_seq'
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)", [TABLE])
+        if cursor.fetchone() is not None:
+            return
+        cursor.execute(
+            "SELECT indexdef FROM pg_indexes WHERE schemaname = current_schema() AND tablename = %s AND indexname NOT IN "
+            "(SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(%s))", [TABLE, TABLE]
+        )
+        index_definitions = [row[0] for row in cursor.fetchall()]
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = to_regclass(%s) AND contype = 'f'", [TABLE]
+        )
+        foreign_keys = cursor.fetchall()
+        cursor.execute(f'SELECT min(created_at), max(id) FROM {qn(TABLE)}')
+        first_created, max_id = cursor.fetchone()
+
+        cursor.execute(f'ALTER TABLE {qn(TABLE)} RENAME TO {qn(legacy)}')
+        cursor.execute(
+            f'CREATE TABLE {qn(TABLE)} (LIKE {qn(legacy)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+            f'PARTITION BY RANGE (created_at)'
+        )
+        cursor.execute(f'ALTER TABLE {qn(TABLE)} ALTER COLUMN id DROP DEFAULT')
+        cursor.execute(f'CREATE SEQUENCE {qn(sequence)} OWNED BY {qn(TABLE)}.id')
+        cursor.execute(f"ALTER TABLE {qn(TABLE)} ALTER COLUMN id SET DEFAULT nextval('{sequence}')")
+        cursor.execute(f'CREATE TABLE {qn(DEFAULT_PARTITION)} PARTITION OF {qn(TABLE)} DEFAULT')
+
+        # أقسام الأشهر من أقدم سجل (أو الشهر الحالي) حتى PARTITIONS_AHEAD شهراً قادماً
+        current = date.today().replace(day=1)
+        month = date(first_created.year, first_created.month, 1) if first_created else current
+        while month <= add_months(current, PARTITIONS_AHEAD):
+            create_month_partition(cursor, qn, month)
+            month = add_months(month, 1)
+
+        cursor.execute(f'INSERT INTO {qn(TABLE)} SELECT * FROM {qn(legacy)}')
+        if max_id:
+            cursor.execute('SELECT setval(%s, %s)', [sequence, max_id])
+        cursor.execute(f'DROP TABLE {qn(legacy)}')
+        cursor.execute(f'ALTER TABLE {qn(TABLE)} ADD CONSTRAINT {qn(TABLE + "_pkey")} PRIMARY KEY (id, created_at)')
+        for definition in index_definitions:
+            cursor.execute(definition)
+        for name, definition in foreign_keys:
+            cursor.execute(f'ALTER TABLE {qn(TABLE)} ADD CONSTRAINT {qn(name)} {definition}')
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('health_insurance', '0004_plan_sector_applicability'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='healthcalculationlog',
+            name='user',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='healthcalculationlog',
+            index=models.Index(fields=['user', 'created_at', 'company_sector', 'calculated_premium'], name='calc_log_user_stats_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='healthcalculationlog',
+            index=models.Index(fields=['created_at'], name='calc_log_created_idx'),
+        ),
+        migrations.RunPython(partition_calculation_log, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.8 on 2026-10-19 03:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('health_insurance', '0005_calculation_log_partitions'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='healthinsurancepolicy',
+            index=models.Index(fields=['user', '-created_at'], name='hpolicy_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='healthinsurancepolicy',
+            index=models.Index(condition=models.Q(('status', 'active')), fields=['user', 'expiry_date'], name='hpolicy_user_active_exp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='healthinsurancepolicy',
+            index=models.Index(condition=models.Q(('status', 'active')), fields=['expiry_date'], name='hpolicy_active_exp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='healthinsurancepolicy',
+            index=models.Index(fields=['status', 'created_at'], name='hpolicy_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='healthinsurancepolicy',
+            index=models.Index(fields=['created_at'], name='hpolicy_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='healthinsurancequote',
+            index=models.Index(fields=['user', '-created_at'], name='hquote_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='healthinsurancequote',
+            index=models.Index(fields=['user', 'status', 'created_at'], name='hquote_user_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='healthinsurancequote',
+            index=models.Index(fields=['status', 'created_at'], name='hquote_status_created_idx'),
+        ),
+        migrations.AlterField(
+            model_name='healthinsurancepolicy',
+            name='user',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='healthinsurancequote',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+    ]
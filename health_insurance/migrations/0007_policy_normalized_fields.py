@@ -0,0 +1,38 @@
+# Generated by Django 5.2.8 on 2026-10-19 03:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('health_insurance', '0006_policy_quote_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='healthinsurancepolicy',
+            name='coverage_plan_name',
+            field=models.CharField(blank=True, default='', max_length=200),
+        ),
+        migrations.AddField(
+            model_name='healthinsurancepolicy',
+            name='coverage_type',
+            field=models.CharField(blank=True, default='', max_length=30),
+        ),
+        migrations.AddField(
+            model_name='healthinsurancepolicy',
+            name='family_children',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='healthinsurancepolicy',
+            name='family_parents',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='healthinsurancepolicy',
+            name='family_spouses',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -2,13 +2,14 @@
 from django.db import models
 from django.conf import settings
 from decimal import Decimal
-import uuid
+from bisect import bisect_right
+from insurance.services.identifiers import next_number
 
 def generate_health_quote_number():
-    return f"HQ-{uuid.uuid4().hex[:8].upper()}"
+    return next_number('health_quote')
 
 def generate_health_policy_number():
-    return f"HP-{uuid.uuid4().hex[:8].upper()}"
+    return next_number('health_policy')
 
 # ============= Company Model =============
 class Company(models.Model):
@@ -80,6 +81,17 @@ class Company(models.Model):
         ('hazardous', 'بيئة خطرة'),
     )
     
+    # القطاعات عالية المخاطر (تُستخدم في أهلية خطط التغطية)
+    HIGH_RISK_SECTORS = (
+        'construction_civil',
+        'construction_electrical',
+        'construction_mechanical',
+        'construction_roads',
+        'health_hospital',
+        'services_transport',
+        'services_logistics',
+    )
+    
     # ========== CORE FIELDS ==========
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     
@@ -263,6 +275,7 @@ class Employee(models.Model):  # ✅ هذا النموذج يجب أن يكون
     chronic_diseases = models.BooleanField(default=False, verbose_name="أمراض مزمنة")
     include_parents = models.BooleanField(default=False, verbose_name="يشمل الوالدين")
     parents_count = models.IntegerField(default=0, verbose_name="عدد الوالدين")
+    row_hash = models.CharField(max_length=40, blank=True, default='', verbose_name="بصمة صف الملف")
 
     class Meta:
         verbose_name = 'موظف'
@@ -297,6 +310,175 @@ class Employee(models.Model):  # ✅ هذا النموذج يجب أن يكون
         
         super().save(*args, **kwargs)
 
+# ============= Company Roster Statistics =============
+# حدود شرائح الرواتب (تصاعد هندسي 25%) لتقدير الشرائح المئوية دون قراءة كل الرواتب،
+# مع حدود فئات محرك التسعير (50000 و150000) ليكون توزيع الرواتب دقيقاً
+SALARY_BUCKET_EDGES = sorted({0, 50000, 150000} | {round(100 * Decimal('1.25') ** k) for k in range(61)})
+
+
+class CompanyRosterStats(models.Model):
+    """إحصائيات موظفي الشركة، تُحدَّث تدريجياً مع كل إضافة/تعديل/حذف موظف"""
+    company = models.OneToOneField(Company, on_delete=models.CASCADE, related_name='roster_stats')
+    total_employees = models.IntegerField(default=0)
+    male_count = models.IntegerField(default=0)
+    female_count = models.IntegerField(default=0)
+    married_count = models.IntegerField(default=0)
+    chronic_count = models.IntegerField(default=0)
+    spouses_total = models.IntegerField(default=0)
+    children_total = models.IntegerField(default=0)
+    parents_total = models.IntegerField(default=0)
+    age_total = models.IntegerField(default=0)
+    salary_total = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    age_counts = models.JSONField(default=dict, blank=True)         # {العمر: العدد}
+    dependents_counts = models.JSONField(default=dict, blank=True)  # {عدد المعالين: العدد}
+    salary_buckets = models.JSONField(default=dict, blank=True)     # {رقم الشريحة: العدد}
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'company_roster_stats'
+        verbose_name = 'إحصائيات موظفي الشركة'
+        verbose_name_plural = 'إحصائيات موظفي الشركات'
+
+    def __str__(self):
+        return f"إحصائيات {self.company_id} - {self.total_employees} موظف"
+
+    @staticmethod
+    def salary_bucket(salary):
+        """رقم شريحة الراتب"""
+        return max(bisect_right(SALARY_BUCKET_EDGES, float(salary or 0)) - 1, 0)
+
+    @staticmethod
+    def _bump(counts, key, delta):
+        key = str(key)
+        value = counts.get(key, 0) + delta
+        if value:
+            counts[key] = value
+        else:
+            counts.pop(key, None)
+
+    def apply(self, values, sign=1):
+        """إضافة (sign=1) أو طرح (sign=-1) مساهمة موظف واحد"""
+        dependents = values['wives_count'] + values['children_count'] + values['parents_count']
+        self.total_employees += sign
+        self.male_count += sign if values['gender'] == 'male' else 0
+        self.female_count += sign if values['gender'] == 'female' else 0
+        self.married_count += sign if values['marital_status'] == 'married' else 0
+        self.chronic_count += sign if values['chronic_diseases'] else 0
+        self.spouses_total += sign * values['wives_count']
+        self.children_total += sign * values['children_count']
+        self.parents_total += sign * values['parents_count']
+        self.age_total += sign * values['age']
+        self.salary_total += sign * Decimal(str(values['base_salary'] or 0))
+        self._bump(self.age_counts, values['age'], sign)
+        self._bump(self.dependents_counts, dependents, sign)
+        self._bump(self.salary_buckets, self.salary_bucket(values['base_salary']), sign)
+
+    @property
+    def total_dependents(self):
+        return self.spouses_total + self.children_total + self.parents_total
+
+    @property
+    def average_age(self):
+        return round(self.age_total / self.total_employees, 1) if self.total_employees else 0
+
+    @property
+    def chronic_ratio(self):
+        return round(self.chronic_count / self.total_employees, 4) if self.total_employees else 0
+
+    def count_ages(self, min_age=None, max_age=None):
+        """عدد الموظفين ضمن نطاق عمري (شامل)"""
+        return sum(
+            count for age, count in self.age_counts.items()
+            if (min_age is None or int(age) >= min_age) and (max_age is None or int(age) <= max_age)
+        )
+
+    def age_distribution(self):
+        """توزيع الأعمار بنفس فئات محرك التسعير"""
+        return {
+            'under_30': self.count_ages(max_age=29),
+            '30_40': self.count_ages(30, 39),
+            '40_50': self.count_ages(40, 49),
+            '50_60': self.count_ages(50, 59),
+            'over_60': self.count_ages(min_age=60),
+        }
+
+    def dependents_distribution(self):
+        """توزيع عدد المعالين لكل موظف"""
+        distribution = {'0': 0, '1_2': 0, '3_4': 0, '5+': 0}
+        for dependents, count in self.dependents_counts.items():
+            dependents = int(dependents)
+            if dependents == 0:
+                distribution['0'] += count
+            elif dependents <= 2:
+                distribution['1_2'] += count
+            elif dependents <= 4:
+                distribution['3_4'] += count
+            else:
+                distribution['5+'] += count
+        return distribution
+
+    def salary_quantile(self, q):
+        """تقدير الشريحة المئوية للراتب بالاستيفاء داخل شريحة الراتب"""
+        if not self.total_employees:
+            return 0
+        target = q * self.total_employees
+        seen = 0
+        for bucket in sorted(self.salary_buckets, key=int):
+            count = self.salary_buckets[bucket]
+            if seen + count >= target:
+                index = int(bucket)
+                low = SALARY_BUCKET_EDGES[index]
+                high = SALARY_BUCKET_EDGES[min(index + 1, len(SALARY_BUCKET_EDGES) - 1)]
+                return round(low + (high - low) * (target - seen) / count, 2)
+            seen += count
+        return float(SALARY_BUCKET_EDGES[-1])
+
+    def salary_distribution(self):
+        """توزيع الرواتب بنفس حدود محرك التسعير"""
+        distribution = {'low': 0, 'medium': 0, 'high': 0}
+        for bucket, count in self.salary_buckets.items():
+            low = SALARY_BUCKET_EDGES[int(bucket)]
+            if low < 50000:
+                distribution['low'] += count
+            elif low < 150000:
+                distribution['medium'] += count
+            else:
+                distribution['high'] += count
+        return distribution
+
+    def as_analysis(self):
+        """تحليل الموظفين بنفس شكل UniversalPricingEngine.analyze_employees_file"""
+        total = self.total_employees
+        return {
+            'total_employees': total,
+            'male_count': self.male_count,
+            'female_count': self.female_count,
+            'married_count': self.married_count,
+            'total_dependents': self.total_dependents,
+            'family_members': {
+                'spouses': self.spouses_total,
+                'children': self.children_total,
+                'parents': self.parents_total,
+            },
+            'average_salary': float(self.salary_total / total) if total else 0,
+            'salary_quantiles': {
+                'p25': self.salary_quantile(0.25),
+                'p50': self.salary_quantile(0.5),
+                'p75': self.salary_quantile(0.75),
+                'p90': self.salary_quantile(0.9),
+            },
+            'salary_distribution': self.salary_distribution(),
+            'average_age': self.average_age,
+            'age_distribution': self.age_distribution(),
+            'dependents_analysis': {
+                'total': self.total_dependents,
+                'average': round(self.total_dependents / total, 2) if total else 0,
+                'distribution': self.dependents_distribution(),
+            },
+            'chronic_count': self.chronic_count,
+            'chronic_ratio': self.chronic_ratio,
+        }
+
 # ============= Health Coverage Plan =============
 class HealthCoveragePlan(models.Model):
     PLAN_TYPES = (
@@ -306,6 +488,14 @@ class HealthCoveragePlan(models.Model):
         ('custom', 'مخصص'),
     )
     
+    APPLICABLE_TO_CHOICES = (
+        ('all', 'جميع القطاعات'),
+        ('healthcare', 'القطاع الصحي'),
+        ('high_risk', 'القطاعات عالية المخاطر'),
+        ('standard', 'القطاعات العادية'),
+        ('custom', 'قطاعات محددة'),
+    )
+    
     # Basic Information
     name = models.CharField(max_length=100)
     plan_type = models.CharField(max_length=20, choices=PLAN_TYPES, default='standard')
@@ -332,6 +522,10 @@ class HealthCoveragePlan(models.Model):
     includes_chronic_medication = models.BooleanField(default=True)
     includes_work_accidents = models.BooleanField(default=False)
     
+    # Applicability
+    applicable_to = models.CharField(max_length=20, choices=APPLICABLE_TO_CHOICES, default='all')
+    custom_sectors = models.JSONField(default=list, blank=True)
+    
     # Status
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -342,6 +536,51 @@ class HealthCoveragePlan(models.Model):
     
     def __str__(self):
         return f"{self.name}"
+    
+    def get_applicable_sectors(self):
+        """القطاعات التي تنطبق عليها الخطة"""
+        return applicable_sectors_for(self.applicable_to, self.custom_sectors)
+    
+    def is_applicable_to_company(self, company):
+        """هل تنطبق الخطة على قطاع الشركة؟"""
+        return company.sector in self.get_applicable_sectors()
+    
+    def sync_sector_applicability(self):
+        """إعادة بناء صفوف جدول الأهلية (قطاع × خطة) لهذه الخطة"""
+        PlanSectorApplicability.objects.filter(plan=self).delete()
+        PlanSectorApplicability.objects.bulk_create([
+            PlanSectorApplicability(plan=self, sector=sector)
+            for sector in self.get_applicable_sectors()
+        ])
+
+
+def applicable_sectors_for(applicable_to, custom_sectors=None):
+    """قائمة القطاعات حسب نوع الأهلية (دالة مستقلة لاستخدامها في الترحيلات)"""
+    sectors = [value for value, _ in Company.SECTOR_CHOICES]
+    if applicable_to == 'healthcare':
+        return [s for s in sectors if s.startswith('health_')]
+    if applicable_to == 'high_risk':
+        return [s for s in sectors if s in Company.HIGH_RISK_SECTORS]
+    if applicable_to == 'standard':
+        return [s for s in sectors if s not in Company.HIGH_RISK_SECTORS]
+    if applicable_to == 'custom':
+        return [s for s in sectors if s in (custom_sectors or [])]
+    return sectors
+
+
+class PlanSectorApplicability(models.Model):
+    """جدول الأهلية (قطاع × خطة): فلترة الخطط حسب القطاع باستعلام ربط مفهرس واحد"""
+    plan = models.ForeignKey(HealthCoveragePlan, on_delete=models.CASCADE, related_name='sector_applicability')
+    sector = models.CharField(max_length=50, choices=Company.SECTOR_CHOICES)
+    
+    class Meta:
+        db_table = 'health_plan_sector_applicability'
+        constraints = [
+            models.UniqueConstraint(fields=['sector', 'plan'], name='unique_plan_sector_applicability')
+        ]
+    
+    def __str__(self):
+        return f"{self.plan_id} - {self.sector}"
 
 # ============= Health Insurance Quote =============
 class HealthInsuranceQuote(models.Model):
@@ -356,7 +595,7 @@ class HealthInsuranceQuote(models.Model):
     
     # Relationships
     company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='quotes')
-    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, db_index=False)
     coverage_plan = models.ForeignKey(HealthCoveragePlan, on_delete=models.SET_NULL, null=True, blank=True)
     calculation_data = models.JSONField(default=dict, blank=True)
     coverage_details = models.JSONField(default=dict, blank=True) 
@@ -388,6 +627,14 @@ class HealthInsuranceQuote(models.Model):
     class Meta:
         db_table = 'health_insurance_quote'
         ordering = ['-created_at']
+        indexes = [
+            # قائمة اقتباسات المستخدم (الأحدث أولاً)، وتغني عن فهرس user_id
+            models.Index(fields=['user', '-created_at'], name='hquote_user_created_idx'),
+            # اقتباسات المستخدم حسب الحالة (بانتظار القرار، المقبولة)
+            models.Index(fields=['user', 'status', 'created_at'], name='hquote_user_status_idx'),
+            # إحصائيات الإدارة حسب الحالة والفترة
+            models.Index(fields=['status', 'created_at'], name='hquote_status_created_idx'),
+        ]
     
     def __str__(self):
         return f"Quote {self.quote_number}"
@@ -399,7 +646,7 @@ class HealthInsurancePolicy(models.Model):
         on_delete=models.CASCADE,
         related_name='policies'
     )
-    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, db_index=False)
     company = models.ForeignKey(
         Company, 
         on_delete=models.CASCADE,
@@ -430,6 +677,13 @@ class HealthInsurancePolicy(models.Model):
     family_members = models.JSONField(default=dict, blank=True)
     policy_details = models.JSONField(default=dict, blank=True)
     
+    # مشتقة من حقول JSON أعلاه عند الحفظ (services/policy_fields.py) ليقرأها السيريالايزر مباشرة
+    coverage_type = models.CharField(max_length=30, blank=True, default='')
+    coverage_plan_name = models.CharField(max_length=200, blank=True, default='')
+    family_spouses = models.PositiveIntegerField(default=0)
+    family_children = models.PositiveIntegerField(default=0)
+    family_parents = models.PositiveIntegerField(default=0)
+    
     # Status fields
     STATUS_CHOICES = [
         ('draft', 'مسودة'),
@@ -458,9 +712,44 @@ class HealthInsurancePolicy(models.Model):
     # Employee count
     total_employees = models.IntegerField(default=0)
     
+    class Meta:
+        indexes = [
+            # قائمة وثائق المستخدم (الأحدث أولاً)، وتغني عن فهرس user_id
+            models.Index(fields=['user', '-created_at'], name='hpolicy_user_created_idx'),
+            # الوثائق النشطة القريبة من الانتهاء لكل مستخدم (تحذيرات لوحة التحكم، expiring_soon)
+            models.Index(
+                fields=['user', 'expiry_date'], name='hpolicy_user_active_exp_idx',
+                condition=models.Q(status='active'),
+            ),
+            # الوثائق النشطة حسب تاريخ الانتهاء لجميع المستخدمين (المهام المجدولة والإدارة)
+            models.Index(
+                fields=['expiry_date'], name='hpolicy_active_exp_idx',
+                condition=models.Q(status='active'),
+            ),
+            # إحصائيات الإدارة حسب الحالة والفترة
+            models.Index(fields=['status', 'created_at'], name='hpolicy_status_created_idx'),
+            # التقارير المالية حسب الفترة
+            models.Index(fields=['created_at'], name='hpolicy_created_idx'),
+        ]
+    
     def __str__(self):
         return f"{self.policy_number} - {self.company.name}"
     
+    def save(self, *args, **kwargs):
+        """حفظ مع توحيد الحقول المشتقة من JSON"""
+        from .services.policy_fields import NORMALIZED_FIELDS, SOURCE_FIELDS, normalize_policy_fields
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or SOURCE_FIELDS.intersection(update_fields):
+            normalize_policy_fields(self)
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | set(NORMALIZED_FIELDS)
+        super().save(*args, **kwargs)
+    
+    @property
+    def family_counts(self):
+        return {'spouses': self.family_spouses, 'children': self.family_children, 'parents': self.family_parents}
+    
     def get_status_display(self):
         return dict(self.STATUS_CHOICES).get(self.status, self.status)
     
@@ -493,7 +782,8 @@ class CoveragePlan(models.Model):
 
 # ============= Other Models =============
 class HealthCalculationLog(models.Model):
-    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True)
+    # فهرس user_id مغطى بالفهرس المركب calc_log_user_stats_idx
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True, db_index=False)
     company_sector = models.CharField(max_length=50, choices=Company.SECTOR_CHOICES)
     company_size = models.CharField(max_length=20, choices=Company.SIZE_CHOICES)
     employee_count = models.IntegerField()
@@ -506,6 +796,15 @@ class HealthCalculationLog(models.Model):
     class Meta:
         db_table = 'health_calculation_log'
         ordering = ['-created_at']
+        indexes = [
+            # إحصائيات المستخدم ونشاطه الأخير ضمن نافذة زمنية (يغطي التجميع حسب القطاع والقسط)
+            models.Index(
+                fields=['user', 'created_at', 'company_sector', 'calculated_premium'],
+                name='calc_log_user_stats_idx',
+            ),
+            # الأرشفة والتقارير العامة حسب التاريخ
+            models.Index(fields=['created_at'], name='calc_log_created_idx'),
+        ]
     
     def __str__(self):
         return f"Calculation {self.id}"
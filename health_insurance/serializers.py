@@ -78,16 +78,7 @@ class CompanySerializer(serializers.ModelSerializer):
     
     def get_is_high_risk_sector(self, obj):
         """هل القطاع عالي المخاطر؟"""
-        high_risk_sectors = [
-            'construction_civil',
-            'construction_electrical',
-            'construction_mechanical',
-            'construction_roads',
-            'health_hospital',
-            'services_transport',
-            'services_logistics'
-        ]
-        return obj.sector in high_risk_sectors
+        return obj.sector in Company.HIGH_RISK_SECTORS
     
     def validate_cr_number(self, value):
         """التحقق من رقم السجل التجاري"""
@@ -456,15 +447,16 @@ class HealthInsurancePolicySerializer(serializers.ModelSerializer):
     """سيريالايزر لوثيقة التأمين"""
     company_name = serializers.CharField(source='company.name', read_only=True)
     quote_number = serializers.CharField(source='quote.quote_number', read_only=True)
-    coverage_plan_name = serializers.SerializerMethodField()
+    # الحقول المشتقة من JSON تُحسب عند الحفظ (services/policy_fields.py)
+    coverage_plan_name = serializers.CharField(read_only=True)
     coverage_plan_details = serializers.SerializerMethodField()
     status_display = serializers.CharField(source='get_status_display', read_only=True)
     payment_status_display = serializers.CharField(source='get_payment_status_display', read_only=True)
     days_remaining = serializers.SerializerMethodField()
-    insurance_type = serializers.SerializerMethodField()
+    insurance_type = serializers.CharField(read_only=True)
     family_members = serializers.SerializerMethodField()
-    payment_method = serializers.SerializerMethodField()
-    coverage_type = serializers.SerializerMethodField()
+    payment_method = serializers.CharField(read_only=True)
+    coverage_type = serializers.CharField(read_only=True)
     due_amount = serializers.SerializerMethodField()
     paid_amount = serializers.SerializerMethodField()
     
@@ -482,95 +474,9 @@ class HealthInsurancePolicySerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['created_at']
 
-    def get_coverage_plan_name(self, obj):
-        # Get coverage plan name from policy_details or coverage_details
-        if obj.policy_details and 'coverage_plan_name' in obj.policy_details:
-            return obj.policy_details['coverage_plan_name']
-        
-        if obj.coverage_details:
-            # Try to parse coverage_details if it's a string
-            coverage_details = obj.coverage_details
-            if isinstance(coverage_details, str):
-                try:
-                    coverage_details = json.loads(coverage_details)
-                except:
-                    coverage_details = {}
-            
-            if 'insurance_type_data' in coverage_details:
-                insurance_data = coverage_details['insurance_type_data']
-                if isinstance(insurance_data, dict) and 'name' in insurance_data:
-                    return insurance_data['name']
-        
-        # Map insurance_type to plan name
-        plan_names = {
-            'A': 'التغطية الشاملة',
-            'B': 'التغطية المتوسطة',
-            'C': 'التغطية الأساسية',
-            'comprehensive': 'التغطية الشاملة',
-            'medium': 'التغطية المتوسطة',
-            'basic': 'التغطية الأساسية'
-        }
-        
-        # Get insurance_type from obj or policy_details
-        insurance_type = self.get_insurance_type(obj)
-        return plan_names.get(insurance_type, f'خطة {insurance_type}')
-    
     def get_family_members(self, obj):
-        """استخراج أفراد العائلة من مصادر متعددة"""
-        family_members = {'spouses': 0, 'children': 0, 'parents': 0}
-        
-        # 1. من حقل family_members المباشر
-        if obj.family_members:
-            if isinstance(obj.family_members, str):
-                try:
-                    family_members = json.loads(obj.family_members)
-                except:
-                    pass
-            elif isinstance(obj.family_members, dict):
-                family_members = obj.family_members
-        
-        # 2. من calculation_data
-        if obj.calculation_data:
-            calculation_data = obj.calculation_data
-            if isinstance(calculation_data, str):
-                try:
-                    calculation_data = json.loads(calculation_data)
-                except:
-                    calculation_data = {}
-            
-            if 'family_data' in calculation_data:
-                family_data = calculation_data['family_data']
-                family_members.update({
-                    'spouses': family_data.get('spouses', family_members['spouses']),
-                    'children': family_data.get('children', family_members['children']),
-                    'parents': family_data.get('parents', family_members['parents'])
-                })
-        
-        # 3. من coverage_details
-        if obj.coverage_details:
-            coverage_details = obj.coverage_details
-            if isinstance(coverage_details, str):
-                try:
-                    coverage_details = json.loads(coverage_details)
-                except:
-                    coverage_details = {}
-            
-            if 'family_members' in coverage_details:
-                family_members.update({
-                    'spouses': coverage_details['family_members'].get('spouses', family_members['spouses']),
-                    'children': coverage_details['family_members'].get('children', family_members['children']),
-                    'parents': coverage_details['family_members'].get('parents', family_members['parents'])
-                })
-        
-        # 4. من policy_details
-        if obj.policy_details and 'family_members' in obj.policy_details:
-            family_members.update({
-                'spouses': obj.policy_details['family_members'].get('spouses', family_members['spouses']),
-                'children': obj.policy_details['family_members'].get('children', family_members['children']),
-                'parents': obj.policy_details['family_members'].get('parents', family_members['parents'])
-            })
-        
-        return family_members
+        """أعداد أفراد العائلة (محسوبة عند حفظ الوثيقة)"""
+        return obj.family_counts
     
     def get_coverage_plan_details(self, obj):
         """الحصول على تفاصيل خطة التغطية"""
@@ -601,110 +507,6 @@ class HealthInsurancePolicySerializer(serializers.ModelSerializer):
             return max(0, remaining)
         return 0
     
-    def get_insurance_type(self, obj):
-        """استخراج نوع التأمين من مصادر متعددة"""
-        # 1. من policy_details
-        if obj.policy_details and 'insurance_type' in obj.policy_details:
-            return obj.policy_details['insurance_type']
-        
-        # 2. من coverage_details
-        if obj.coverage_details:
-            coverage_details = obj.coverage_details
-            if isinstance(coverage_details, str):
-                try:
-                    coverage_details = json.loads(coverage_details)
-                except:
-                    coverage_details = {}
-            
-            if 'insurance_type' in coverage_details:
-                return coverage_details['insurance_type']
-            
-            if 'insurance_type_data' in coverage_details:
-                insurance_data = coverage_details['insurance_type_data']
-                if isinstance(insurance_data, dict) and 'code' in insurance_data:
-                    return insurance_data['code']
-        
-        # 3. من quote notes
-        if obj.quote and obj.quote.notes:
-            try:
-                notes_data = json.loads(obj.quote.notes)
-                if 'insurance_type' in notes_data:
-                    return notes_data['insurance_type']
-            except:
-                pass
-        
-        # 4. من quote مباشرة
-        if obj.quote and obj.quote.insurance_type:
-            return obj.quote.insurance_type
-        
-        return 'B'
-    
-    def get_payment_method(self, obj):
-        """استخراج طريقة الدفع"""
-        # 1. من policy_details
-        if obj.policy_details and 'payment_method' in obj.policy_details:
-            return obj.policy_details['payment_method']
-        
-        # 2. من coverage_details
-        if obj.coverage_details:
-            coverage_details = obj.coverage_details
-            if isinstance(coverage_details, str):
-                try:
-                    coverage_details = json.loads(coverage_details)
-                except:
-                    coverage_details = {}
-            
-            if 'payment_method' in coverage_details:
-                return coverage_details['payment_method']
-        
-        # 3. من quote
-        if obj.quote and obj.quote.payment_method:
-            return obj.quote.payment_method
-        
-        return 'annual'
-    
-    # In health_insurance/serializers.py - UPDATE HealthInsurancePolicySerializer:
-    def get_coverage_type(self, obj):
-        """استخراج نوع التغطية"""
-        # 1. من policy_details
-        if obj.policy_details and 'coverage_type' in obj.policy_details:
-            return obj.policy_details['coverage_type']
-        
-        # 2. من coverage_details
-        if obj.coverage_details:
-            coverage_details = obj.coverage_details
-            if isinstance(coverage_details, str):
-                try:
-                    coverage_details = json.loads(coverage_details)
-                except:
-                    coverage_details = {}
-            
-            if 'coverage_type' in coverage_details:
-                return coverage_details['coverage_type']
-        
-        # 3. من quote coverage_details
-        if obj.quote and obj.quote.coverage_details:
-            quote_coverage = obj.quote.coverage_details
-            if isinstance(quote_coverage, str):
-                try:
-                    quote_coverage = json.loads(quote_coverage)
-                except:
-                    quote_coverage = {}
-            
-            if 'coverage_type' in quote_coverage:
-                return quote_coverage['coverage_type']
-        
-        # 4. Default based on insurance_type
-        insurance_type = self.get_insurance_type(obj)
-        if insurance_type == 'A':
-            return 'comprehensive'
-        elif insurance_type == 'B':
-            return 'basic'
-        elif insurance_type == 'C':
-            return 'standard'
-        
-        return 'comprehensive'
-
     def get_due_amount(self, obj):
         """حساب المبلغ المستحق"""
         try:
@@ -845,9 +647,11 @@ class HealthPremiumCalculatorSerializer(serializers.Serializer):
     
     def calculate_premium(self):
         """احتساب القسط"""
-        from .calculations import quick_health_calculator
+        from saferatio.pricing_pool import price
         
-        result = quick_health_calculator(
+        # في مجمع التسعير عند تفعيله
+        result = price(
+            'health.quick',
             sector=self.validated_data['sector'],
             size_category=self.validated_data['size_category'],
             employee_count=self.validated_data['employee_count'],
@@ -868,7 +672,7 @@ class HealthPremiumCalculatorSerializer(serializers.Serializer):
                 coverage_plan = HealthCoveragePlan.objects.get(id=coverage_plan_id)
                 result['coverage_plan'] = {
                     'name': coverage_plan.name,
-                    'type': coverage_plan.get_plan_type_display
+                    'type': coverage_plan.get_plan_type_display()
                 }
             except HealthCoveragePlan.DoesNotExist:
                 pass
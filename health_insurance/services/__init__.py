@@ -1,4 +1,5 @@
 # health_insurance/services/__init__.py
 from .universal_pricing_engine import UniversalPricingEngine
+from .roster_pricing import calculate_roster_premium, bump_roster_version
 
-__all__ = ['UniversalPricingEngine']
\ No newline at end of file
+__all__ = ['UniversalPricingEngine', 'calculate_roster_premium', 'bump_roster_version']
@@ -0,0 +1,96 @@
+# health_insurance/services/bulk_issuance.py
+"""
+إصدار وثائق التأمين الصحي لعدة اقتباسات دفعة واحدة (تجديدات الشركات)
+
+داخل معاملة واحدة:
+- قفل الاقتباسات المختارة (select_for_update) حتى لا يصدرها طلبان معاً
+- bulk_create لكل الوثائق بأرقام مولدة مسبقاً (مع normalize_policy_fields لأن bulk_create يتجاوز save)
+- update واحد لحالة الاقتباسات
+- إشارات post_save لا تعمل مع bulk_create/update، فيُبطل ملخص لوحة التحكم مرة واحدة بعد الـ commit
+  وتُجدول تواريخ انتهاء الوثائق صراحة (schedule_policies)
+"""
+import logging
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from insurance.services.identifiers import reserve_numbers
+from insurance.services.policy_expiry import schedule_policies
+from ..models import HealthInsurancePolicy, HealthInsuranceQuote
+from .dashboard_snapshot import invalidate_dashboard
+from .policy_fields import normalize_policy_fields
+
+MAX_BULK_QUOTES = 500
+BULK_BATCH_SIZE = 500
+ACCEPTABLE_STATUSES = ('quoted', 'pending')
+
+logger = logging.getLogger('saferatio.policies')
+
+
+def build_policy(quote, policy_number, today):
+    """وثيقة (غير محفوظة) من الاقتباس بنفس قيم القبول الفردي"""
+    coverage_details = quote.coverage_details or {}
+    policy = HealthInsurancePolicy(
+        quote=quote,
+        company=quote.company,
+        user_id=quote.user_id,
+        policy_number=policy_number,
+        insurance_type=coverage_details.get('insurance_type', 'B'),
+        payment_method=coverage_details.get('payment_method', 'annual'),
+        total_employees=quote.insured_employees_count,
+        total_premium=quote.total_premium or 0,
+        annual_premium=quote.annual_premium or 0,
+        monthly_premium=quote.monthly_premium or 0,
+        due_amount=quote.total_premium or 0,
+        coverage_details=coverage_details,
+        calculation_data=quote.calculation_data or {},
+        family_members=coverage_details.get('family_members', {}),
+        coverage_options=coverage_details.get('coverage_options', {}),
+        inception_date=today,
+        expiry_date=today + timedelta(days=365),
+        status='active',
+        payment_status='pending',
+    )
+    return normalize_policy_fields(policy)
+
+
+def issue_policies(user, quote_ids):
+    """
+    قبول اقتباسات المستخدم القابلة للقبول وإصدار وثائقها
+    يعيد (الوثائق، المعرفات المتخطاة): المعرفات غير الموجودة أو بحالة أخرى لا تُفشل الدفعة
+    """
+    quote_ids = list(dict.fromkeys(quote_ids))
+    today = timezone.now().date()
+
+    with transaction.atomic():
+        quotes = list(
+            HealthInsuranceQuote.objects.select_for_update(of=('self',))
+            .select_related('company')
+            .filter(pk__in=quote_ids, user=user, status__in=ACCEPTABLE_STATUSES)
+            .order_by('pk')
+        )
+        if not quotes:
+            return [], quote_ids
+
+        numbers = reserve_numbers('health_policy', len(quotes))
+        policies = HealthInsurancePolicy.objects.bulk_create(
+            [build_policy(quote, number, today) for quote, number in zip(quotes, numbers)],
+            batch_size=BULK_BATCH_SIZE,
+        )
+        schedule_policies('health', policies)
+
+        HealthInsuranceQuote.objects.filter(pk__in=[quote.pk for quote in quotes]).update(
+            status='accepted', updated_at=timezone.now(),
+        )
+        for quote in quotes:
+            quote.status = 'accepted'
+
+        transaction.on_commit(lambda: invalidate_dashboard(user.pk))
+
+    issued = {quote.pk for quote in quotes}
+    skipped = [quote_id for quote_id in quote_ids if quote_id not in issued]
+    logger.info('health policies issued in bulk', extra={'data': {
+        'user_id': user.pk, 'issued': len(policies), 'skipped': len(skipped),
+    }})
+    return policies, skipped
@@ -0,0 +1,398 @@
+# health_insurance/services/calculation_log.py
+"""
+كاتب سجل حسابات التأمين الصحي (HealthCalculationLog) بدون حجب الطلب
+
+- السجلات تُضاف لمخزن مؤقت في الذاكرة وتُكتب بـ bulk_create كل BATCH_SIZE سجل
+  أو كل FLUSH_INTERVAL_MS من خيط خلفي.
+- كل سجل يُكتب أولاً سطر JSON في ملف spill محلي (write-ahead)، ويُحذف الملف بعد نجاح
+  الكتابة في قاعدة البيانات. عند فشل الكتابة يبقى الملف ويُعاد تشغيله لاحقاً، وملفات
+  العمليات التي توقفت فجأة تُستعاد عند بدء أي كاتب جديد.
+- عند الاستعادة تُعاد كتابة الدفعة الفاشلة سجلاً سجلاً: السجلات التي ترفضها قاعدة البيانات
+  تُنقل إلى spill_dir/quarantine (بنفس صيغة spill) حتى لا يوقف سجل واحد بقية الملفات،
+  وتُعاد المحاولة بعد تعطل قاعدة البيانات مرة كل RECOVERY_INTERVAL_MS لا بعد كل دفعة.
+- الضغط الخلفي: إذا تجاوز عدد السجلات المعلقة MAX_PENDING يكتب الطلب نفسه الدفعة فوراً.
+"""
+import atexit
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import InterfaceError, OperationalError, close_old_connections, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from ..models import HealthCalculationLog
+from .dashboard_snapshot import invalidate_dashboard
+
+LOG_FIELDS = [
+    'user_id', 'company_sector', 'company_size', 'employee_count', 'coverage_plan_name',
+    'calculated_premium', 'factors_used', 'ip_address', 'created_at',
+]
+DEFAULTS = {
+    'ASYNC': True,
+    'BATCH_SIZE': 100,
+    'FLUSH_INTERVAL_MS': 500,
+    'MAX_PENDING': 10000,
+    'SPILL_DIR': None,
+    'FSYNC': False,
+    'RECOVERY_INTERVAL_MS': 30000,
+}
+# الفرق المسموح بين وقت الحساب ووقت الإدراج قبل تصحيح created_at
+CREATED_AT_TOLERANCE = timedelta(seconds=1)
+# أخطاء الاتصال بقاعدة البيانات: السجل سليم ويُعاد لاحقاً بدل عزله
+TRANSIENT_ERRORS = (OperationalError, InterfaceError)
+
+logger = logging.getLogger('saferatio.calculation_log')
+
+
+def get_log_settings():
+    return dict(DEFAULTS, **getattr(settings, 'HEALTH_CALCULATION_LOG', {}))
+
+
+def serialize_log_record(fields):
+    """تحويل حقول السجل إلى قاموس JSON بسيط (نفس الشكل في الذاكرة وفي ملف spill)"""
+    unknown = set(fields) - set(LOG_FIELDS) - {'user'}
+    if unknown:
+        raise TypeError(f"حقول غير معروفة في سجل الحساب: {', '.join(sorted(unknown))}")
+    fields = dict(fields)
+    user = fields.pop('user', None)
+    if user is not None:
+        fields['user_id'] = user.pk
+    fields.setdefault('created_at', timezone.now())
+    return json.loads(json.dumps(fields, cls=DjangoJSONEncoder, ensure_ascii=False))
+
+
+def build_log_instances(records):
+    instances = []
+    for record in records:
+        values = dict(record)
+        values['created_at'] = parse_datetime(values['created_at'])
+        instances.append(HealthCalculationLog(**values))
+    return instances
+
+
+def write_log_records(records):
+    """إدراج دفعة سجلات (مع الحفاظ على وقت الحساب الأصلي وإبطال لوحات التحكم)"""
+    instances = build_log_instances(records)
+    intended = [instance.created_at for instance in instances]
+    # auto_now_add يستبدل created_at بوقت الإدراج
+    HealthCalculationLog.objects.bulk_create(instances)
+
+    late = []
+    for instance, created_at in zip(instances, intended):
+        if instance.pk and abs(instance.created_at - created_at) > CREATED_AT_TOLERANCE:
+            instance.created_at = created_at
+            late.append(instance)
+    if late:
+        HealthCalculationLog.objects.bulk_update(late, ['created_at'])
+
+    # bulk_create لا يطلق إشارات الحفظ
+    for user_id in {record.get('user_id') for record in records}:
+        invalidate_dashboard(user_id)
+    return len(instances)
+
+
+class CalculationLogWriter:
+    """مخزن مؤقت مع خيط كتابة خلفي وملف spill لكل عملية"""
+
+    def __init__(self, spill_dir, batch_size=100, flush_interval_ms=500, max_pending=10000,
+                 fsync=False, recovery_interval_ms=30000, autostart=True):
+        self.spill_dir = str(spill_dir)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_pending = max_pending
+        self.fsync = fsync
+        # ملف نشط لم يُعدَّل منذ هذه المدة يعود لعملية متوقفة
+        self.stale_after = max(60, self.flush_interval * 10)
+        self.recovery_interval = recovery_interval_ms / 1000
+        self.quarantine_dir = os.path.join(self.spill_dir, 'quarantine')
+
+        os.makedirs(self.spill_dir, exist_ok=True)
+        self.pid = os.getpid()
+        self._needs_recovery = False
+        self._recovery_after = 0.0
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._buffer = []
+        self._first_at = None
+        self._segment = None
+        self._segment_path = None
+        self._stopped = False
+        self._thread = None
+        self._metrics = {
+            'appended': 0,
+            'written': 0,
+            'batches': 0,
+            'failed_batches': 0,
+            'spilled_records': 0,
+            'recovered_records': 0,
+            'quarantined_records': 0,
+            'backpressure_flushes': 0,
+            'max_pending_seen': 0,
+            'last_flush_ms': 0.0,
+            'last_error': None,
+        }
+        if autostart:
+            self.start()
+
+    # ------------------------------------------------------------------
+    # ملفات spill
+    # ------------------------------------------------------------------
+    def _open_segment(self):
+        name = f'active-{os.getpid()}-{uuid.uuid4().hex[:12]}.jsonl'
+        self._segment_path = os.path.join(self.spill_dir, name)
+        self._segment = open(self._segment_path, 'a', encoding='utf-8')
+
+    def _spill(self, record):
+        if self._segment is None:
+            self._open_segment()
+        self._segment.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self._segment.flush()
+        if self.fsync:
+            os.fsync(self._segment.fileno())
+
+    def _claim(self, path):
+        """نقل الملف ذرياً حتى لا تعيد عمليتان تشغيله"""
+        claimed = f'{path}.replaying-{os.getpid()}'
+        try:
+            os.rename(path, claimed)
+        except OSError:
+            return None
+        return claimed
+
+    def _read_records(self, path):
+        records = []
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    # سطر مبتور من عملية توقفت أثناء الكتابة
+                    continue
+        return records
+
+    def _write_records(self, path, records, mode='w'):
+        with open(path, mode, encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    def _quarantine(self, name, records):
+        """عزل السجلات المرفوضة (يمكن إعادتها يدوياً إلى spill_dir بعد إصلاحها)"""
+        os.makedirs(self.quarantine_dir, exist_ok=True)
+        self._write_records(os.path.join(self.quarantine_dir, name), records, mode='a')
+        self._metrics['quarantined_records'] += len(records)
+
+    def _replay_records(self, records):
+        """
+        كتابة سجلات دفعة فاشلة سجلاً سجلاً
+
+        يعيد (المكتوب، المرفوض مع آخر خطأ، المتبقي لتعطل قاعدة البيانات).
+        """
+        written, rejected, error = 0, [], None
+        for index, record in enumerate(records):
+            try:
+                # savepoint: فشل سجل لا يفسد معاملة الاتصال لبقية السجلات
+                with transaction.atomic():
+                    write_log_records([record])
+            except TRANSIENT_ERRORS as e:
+                return written, rejected, e, records[index:]
+            except Exception as e:
+                rejected.append(record)
+                error = e
+            else:
+                written += 1
+        return written, rejected, error, []
+
+    def recover(self):
+        """إعادة كتابة الدفعات الفاشلة وملفات العمليات المتوقفة"""
+        recovered = 0
+        now = time.time()
+        for name in sorted(os.listdir(self.spill_dir)):
+            path = os.path.join(self.spill_dir, name)
+            if path == self._segment_path or '.replaying-' in name or not name.endswith('.jsonl'):
+                continue
+            if name.startswith('active-'):
+                try:
+                    if now - os.path.getmtime(path) < self.stale_after:
+                        continue
+                except OSError:
+                    continue
+            claimed = self._claim(path)
+            if claimed is None:
+                continue
+            records = self._read_records(claimed)
+            try:
+                if records:
+                    close_old_connections()
+                    # الدفعة كاملة أو لا شيء، حتى لا تُكرر الكتابة سجلاً سجلاً ما أُدرج منها
+                    with transaction.atomic():
+                        write_log_records(records)
+                written, rejected, error, remaining = len(records), [], None, []
+            except Exception as e:
+                logger.warning('calculation log batch replay failed, retrying per record', extra={'data': {
+                    'file': name, 'records': len(records), 'error': str(e),
+                }})
+                written, rejected, error, remaining = self._replay_records(records)
+
+            if rejected:
+                self._quarantine(name, rejected)
+                logger.error('calculation log records quarantined', extra={'data': {
+                    'file': name, 'records': len(rejected), 'error': str(error),
+                }})
+            if remaining:
+                # قاعدة البيانات غير متاحة: يبقى ما لم يُكتب في ملفه للمحاولة التالية
+                self._write_records(claimed, remaining)
+                os.rename(claimed, path)
+                self._needs_recovery = True
+                self._recovery_after = time.monotonic() + self.recovery_interval
+                self._metrics['last_error'] = str(error)
+                logger.warning('calculation log recovery deferred', extra={'data': {
+                    'file': name, 'pending': len(remaining), 'error': str(error),
+                }})
+            else:
+                os.remove(claimed)
+            recovered += written
+        if recovered:
+            self._metrics['recovered_records'] += recovered
+            logger.info('calculation log records recovered', extra={'data': {'records': recovered}})
+        return recovered
+
+    # ------------------------------------------------------------------
+    # الكتابة
+    # ------------------------------------------------------------------
+    def append(self, **fields):
+        """إضافة سجل بدون انتظار قاعدة البيانات"""
+        record = serialize_log_record(fields)
+        with self._condition:
+            self._spill(record)
+            self._buffer.append(record)
+            if self._first_at is None:
+                self._first_at = time.monotonic()
+            pending = len(self._buffer)
+            self._metrics['appended'] += 1
+            self._metrics['max_pending_seen'] = max(self._metrics['max_pending_seen'], pending)
+            if pending == 1 or pending >= self.batch_size:
+                self._condition.notify()
+
+        if pending >= self.max_pending:
+            # الخيط الخلفي متأخر: يكتب الطلب الحالي الدفعة بنفسه
+            self._metrics['backpressure_flushes'] += 1
+            self.flush()
+
+    def flush(self):
+        """كتابة كل السجلات المعلقة الآن"""
+        with self._flush_lock:
+            with self._condition:
+                records, self._buffer = self._buffer, []
+                path = self._segment_path
+                if self._segment is not None:
+                    self._segment.close()
+                self._segment = self._segment_path = None
+                self._first_at = None
+            if not records:
+                return 0
+
+            started = time.monotonic()
+            try:
+                close_old_connections()
+                with transaction.atomic():
+                    written = write_log_records(records)
+            except Exception as e:
+                # تبقى السجلات في ملف spill لإعادة كتابتها لاحقاً
+                os.rename(path, path.replace('active-', 'failed-', 1))
+                self._metrics['failed_batches'] += 1
+                self._metrics['spilled_records'] += len(records)
+                self._metrics['last_error'] = str(e)
+                self._needs_recovery = True
+                logger.warning('calculation log batch failed, kept in spill', extra={'data': {
+                    'records': len(records), 'error': str(e),
+                }})
+                return 0
+
+            os.remove(path)
+            self._metrics['written'] += written
+            self._metrics['batches'] += 1
+            self._metrics['last_flush_ms'] = round((time.monotonic() - started) * 1000, 2)
+
+        if self._needs_recovery and time.monotonic() >= self._recovery_after:
+            # قاعدة البيانات عادت: إعادة كتابة الدفعات الفاشلة (مرة كل recovery_interval بعد تعطل الاستعادة)
+            self._needs_recovery = False
+            self.recover()
+        return written
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._buffer and not self._stopped:
+                    self._condition.wait()
+                if self._stopped and not self._buffer:
+                    return
+                while len(self._buffer) < self.batch_size and not self._stopped:
+                    remaining = self._first_at + self.flush_interval - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('calculation log writer thread error')
+
+    def start(self):
+        if self._thread is None:
+            self.recover()
+            self._thread = threading.Thread(target=self._run, name='calculation-log-writer', daemon=True)
+            self._thread.start()
+
+    def close(self):
+        """إيقاف الخيط بعد كتابة ما تبقى"""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.flush()
+
+    def metrics(self):
+        with self._condition:
+            pending = len(self._buffer)
+        return dict(self._metrics, pending=pending, running=self._thread is not None)
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_calculation_log_writer():
+    """كاتب السجل الخاص بالعملية الحالية (يُنشأ عند أول استخدام، بعد fork)"""
+    global _writer
+    if _writer is None or _writer.pid != os.getpid():
+        with _writer_lock:
+            if _writer is None or _writer.pid != os.getpid():
+                options = get_log_settings()
+                writer = CalculationLogWriter(
+                    options['SPILL_DIR'] or os.path.join(tempfile.gettempdir(), 'saferatio_calculation_log'),
+                    batch_size=options['BATCH_SIZE'],
+                    flush_interval_ms=options['FLUSH_INTERVAL_MS'],
+                    max_pending=options['MAX_PENDING'],
+                    fsync=options['FSYNC'],
+                    recovery_interval_ms=options['RECOVERY_INTERVAL_MS'],
+                )
+                atexit.register(writer.close)
+                _writer = writer
+    return _writer
+
+
+def log_calculation(**fields):
+    """تسجيل حساب قسط (غير متزامن إلا إذا عُطل ASYNC)"""
+    if not get_log_settings()['ASYNC']:
+        write_log_records([serialize_log_record(fields)])
+        return
+    get_calculation_log_writer().append(**fields)
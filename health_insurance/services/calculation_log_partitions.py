@@ -0,0 +1,293 @@
+# health_insurance/services/calculation_log_partitions.py
+"""
+تخزين سجل الحسابات مقسماً شهرياً
+
+- PostgreSQL: الجدول مقسم بالنطاق (RANGE) على created_at، قسم لكل شهر
+  (health_calculation_log_pYYYYMM) وقسم افتراضي لأي صف خارج الأقسام الموجودة.
+- قواعد البيانات الأخرى (SQLite في الاختبارات): جدول عادي بنفس الفهارس.
+- الاستعلامات تمر عبر نافذة زمنية (filter_log_window) حتى يقتصر PostgreSQL على
+  الأقسام المعنية فقط (partition pruning).
+- الأرشفة: تصدير الأشهر القديمة إلى ملفات JSONL مضغوطة ثم فصل القسم وحذفه، في معاملة
+  واحدة حتى لا يُحذف صف لم يُصدَّر.
+"""
+import gzip
+import json
+import os
+from datetime import date, datetime, time as dt_time, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection as default_connection, transaction
+from django.utils.dateparse import parse_date
+
+from ..models import HealthCalculationLog
+
+TABLE = HealthCalculationLog._meta.db_table
+DEFAULT_PARTITION = f'{TABLE}_default'
+DEFAULT_RETENTION_MONTHS = 12
+PARTITIONS_AHEAD = 3
+DELETE_CHUNK_SIZE = 1000
+
+
+def month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_bounds(month):
+    """حدود الشهر [البداية، بداية الشهر التالي) بتوقيت UTC"""
+    start = datetime.combine(month, dt_time.min, tzinfo=dt_timezone.utc)
+    end = datetime.combine(add_months(month, 1), dt_time.min, tzinfo=dt_timezone.utc)
+    return start, end
+
+
+def partition_name(month):
+    return f'{TABLE}_p{month:%Y%m}'
+
+
+def get_retention_months():
+    options = getattr(settings, 'HEALTH_CALCULATION_LOG', {})
+    return options.get('RETENTION_MONTHS', DEFAULT_RETENTION_MONTHS)
+
+
+# ----------------------------------------------------------------------
+# النافذة الزمنية للاستعلامات
+# ----------------------------------------------------------------------
+def parse_log_window(params, today=None):
+    """
+    النافذة الزمنية من معاملات الطلب: from / to (تواريخ) أو months
+    الافتراضي: مدة الاحتفاظ بالسجلات (كل ما هو متاح فعلياً)
+    """
+    today = today or date.today()
+    start = parse_date(params.get('from') or '') if params.get('from') else None
+    end = parse_date(params.get('to') or '') if params.get('to') else None
+    if (params.get('from') and start is None) or (params.get('to') and end is None):
+        raise ValueError("صيغة التاريخ غير صحيحة (YYYY-MM-DD)")
+
+    if start is None:
+        try:
+            months = int(params.get('months') or get_retention_months())
+        except (TypeError, ValueError):
+            raise ValueError("عدد الأشهر غير صحيح")
+        if months < 1:
+            raise ValueError("عدد الأشهر يجب أن يكون 1 على الأقل")
+        start = add_months(month_start(today), -(months - 1))
+    if end is None:
+        end = today
+    if start > end:
+        raise ValueError("تاريخ البداية بعد تاريخ النهاية")
+    return start, end
+
+
+def filter_log_window(queryset, start, end):
+    """تقييد الاستعلام بنطاق created_at (يسمح بتقليم الأقسام)"""
+    return queryset.filter(
+        created_at__gte=datetime.combine(start, dt_time.min, tzinfo=dt_timezone.utc),
+        created_at__lt=datetime.combine(end + timedelta(days=1), dt_time.min, tzinfo=dt_timezone.utc),
+    )
+
+
+# ----------------------------------------------------------------------
+# الأقسام (PostgreSQL فقط)
+# ----------------------------------------------------------------------
+def is_partitioned(connection=None):
+    connection = connection or default_connection
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)", [TABLE]
+        )
+        return cursor.fetchone() is not None
+
+
+def list_partitions(connection=None):
+    """أسماء الأقسام الشهرية الموجودة"""
+    connection = connection or default_connection
+    if not is_partitioned(connection):
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(%s) ORDER BY c.relname", [TABLE]
+        )
+        return [row[0] for row in cursor.fetchall() if row[0] != DEFAULT_PARTITION]
+
+
+def create_month_partition(month, connection=None):
+    """
+    إنشاء قسم الشهر ونقل صفوفه من القسم الافتراضي إن وُجدت
+    (CREATE ... PARTITION OF يفشل إذا كان القسم الافتراضي يحتوي صفوفاً من نفس النطاق)
+    """
+    connection = connection or default_connection
+    name = partition_name(month)
+    if name in list_partitions(connection):
+        return False
+    start, end = month_bounds(month)
+    qn = connection.ops.quote_name
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        cursor.execute(f'CREATE TABLE {qn(name)} (LIKE {qn(TABLE)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+        cursor.execute(
+            f'WITH moved AS (DELETE FROM {qn(DEFAULT_PARTITION)} '
+            f'WHERE created_at >= %s AND created_at < %s RETURNING *) '
+            f'INSERT INTO {qn(name)} SELECT * FROM moved', [start, end]
+        )
+        # حدود القسم حرفية (PostgreSQL 11 لا يقبل تعبيرات فيها)
+        cursor.execute(
+            f"ALTER TABLE {qn(TABLE)} ATTACH PARTITION {qn(name)} "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )
+    return True
+
+
+def ensure_partitions(months_ahead=PARTITIONS_AHEAD, since=None, connection=None):
+    """إنشاء أقسام الأشهر من since (أو الشهر الحالي) حتى months_ahead شهراً قادماً"""
+    connection = connection or default_connection
+    if not is_partitioned(connection):
+        return []
+    current = month_start(date.today())
+    month = month_start(since) if since else current
+    created = []
+    while month <= add_months(current, months_ahead):
+        if create_month_partition(month, connection):
+            created.append(partition_name(month))
+        month = add_months(month, 1)
+    return created
+
+
+def convert_to_partitioned(connection):
+    """
+    تحويل الجدول العادي إلى جدول مقسم شهرياً (PostgreSQL 11+)
+
+    المفتاح الأساسي يصبح (id, created_at) لأن PostgreSQL يشترط أن يتضمن عمود التقسيم،
+    ويُستبدل تسلسل id بتسلسل يملكه الجدول الجديد. الفهارس والمفاتيح الأجنبية تُعاد كما هي.
+    """
+    if connection.vendor != 'postgresql' or is_partitioned(connection):
+        return False
+
+    qn = connection.ops.quote_name
+    legacy = f'{TABLE}_unpartitioned'
+    sequence = f'{TABLE}_partitioned_id_seq'
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT indexdef FROM pg_indexes WHERE schemaname = current_schema() AND tablename = %s AND indexname NOT IN "
+            "(SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(%s))", [TABLE, TABLE]
+        )
+        index_definitions = [row[0] for row in cursor.fetchall()]
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = to_regclass(%s) AND contype = 'f'", [TABLE]
+        )
+        foreign_keys = cursor.fetchall()
+        cursor.execute(f'SELECT min(created_at), max(id) FROM {qn(TABLE)}')
+        first_created, max_id = cursor.fetchone()
+
+        cursor.execute(f'ALTER TABLE {qn(TABLE)} RENAME TO {qn(legacy)}')
+        cursor.execute(
+            f'CREATE TABLE {qn(TABLE)} (LIKE {qn(legacy)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+            f'PARTITION BY RANGE (created_at)'
+        )
+        cursor.execute(f'ALTER TABLE {qn(TABLE)} ALTER COLUMN id DROP DEFAULT')
+        cursor.execute(f'CREATE SEQUENCE {qn(sequence)} OWNED BY {qn(TABLE)}.id')
+        cursor.execute(f"ALTER TABLE {qn(TABLE)} ALTER COLUMN id SET DEFAULT nextval('{sequence}')")
+        cursor.execute(f'CREATE TABLE {qn(DEFAULT_PARTITION)} PARTITION OF {qn(TABLE)} DEFAULT')
+
+    ensure_partitions(since=first_created, connection=connection)
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'INSERT INTO {qn(TABLE)} SELECT * FROM {qn(legacy)}')
+        if max_id:
+            cursor.execute('SELECT setval(%s, %s)', [sequence, max_id])
+        cursor.execute(f'DROP TABLE {qn(legacy)}')
+        cursor.execute(f'ALTER TABLE {qn(TABLE)} ADD CONSTRAINT {qn(TABLE + "_pkey")} PRIMARY KEY (id, created_at)')
+        for definition in index_definitions:
+            cursor.execute(definition)
+        for name, definition in foreign_keys:
+            cursor.execute(f'ALTER TABLE {qn(TABLE)} ADD CONSTRAINT {qn(name)} {definition}')
+    return True
+
+
+# ----------------------------------------------------------------------
+# الأرشفة
+# ----------------------------------------------------------------------
+def archive_path(month, archive_dir):
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, f'{TABLE}_{month:%Y-%m}.jsonl.gz')
+    if os.path.exists(path):
+        # أرشفة سابقة للشهر نفسه (صفوف وصلت بعدها): ملف جديد بدلاً من الكتابة فوقه
+        path = path.replace('.jsonl.gz', f'_{datetime.now():%Y%m%d%H%M%S}.jsonl.gz')
+    return path
+
+
+def archive_month(month, archive_dir, connection=None):
+    """
+    تصدير صفوف الشهر إلى ملف JSONL مضغوط وحذفها في معاملة واحدة
+
+    - قسم الشهر (PostgreSQL): قفل SHARE على القسم يمنع الكتابة فيه أثناء التصدير، ثم فصله وحذفه.
+    - القسم الافتراضي أو الجدول العادي: قفل صفوف الشهر (select_for_update) وحذف ما صُدِّر منها
+      فقط، فالصفوف التي تصل أثناء التصدير تبقى للأرشفة التالية.
+    الملف يُكتب مؤقتاً ويأخذ اسمه النهائي بعد الحذف: إذا فشلت أي خطوة تُلغى المعاملة ويُحذف
+    الملف المؤقت ولا تُفقد صفوف.
+    """
+    connection = connection or default_connection
+    start, end = month_bounds(month)
+    qn = connection.ops.quote_name
+    name = partition_name(month)
+    path = archive_path(month, archive_dir)
+    temp_path = f'{path}.tmp'
+
+    try:
+        with transaction.atomic(using=connection.alias):
+            queryset = HealthCalculationLog.objects.using(connection.alias).filter(
+                created_at__gte=start, created_at__lt=end
+            ).order_by('id')
+            partitioned = name in list_partitions(connection)
+            if partitioned:
+                with connection.cursor() as cursor:
+                    cursor.execute(f'LOCK TABLE {qn(name)} IN SHARE MODE')
+            else:
+                queryset = queryset.select_for_update()
+
+            ids = []
+            with gzip.open(temp_path, 'wt', encoding='utf-8') as f:
+                for values in queryset.values().iterator(chunk_size=2000):
+                    f.write(json.dumps(values, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n')
+                    ids.append(values['id'])
+
+            if partitioned:
+                with connection.cursor() as cursor:
+                    cursor.execute(f'ALTER TABLE {qn(TABLE)} DETACH PARTITION {qn(name)}')
+                    cursor.execute(f'DROP TABLE {qn(name)}')
+            else:
+                for index in range(0, len(ids), DELETE_CHUNK_SIZE):
+                    HealthCalculationLog.objects.using(connection.alias).filter(
+                        id__in=ids[index:index + DELETE_CHUNK_SIZE]
+                    ).delete()
+
+            if not ids:
+                os.remove(temp_path)
+                return None, 0
+            os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return path, len(ids)
+
+
+def months_to_archive(keep_months, today=None):
+    """الأشهر الأقدم من مدة الاحتفاظ التي تحتوي صفوفاً"""
+    first = HealthCalculationLog.objects.order_by('created_at').values_list('created_at', flat=True).first()
+    if first is None:
+        return []
+    cutoff = add_months(month_start(today or date.today()), -(keep_months - 1))
+    months = []
+    month = month_start(first)
+    while month < cutoff:
+        months.append(month)
+        month = add_months(month, 1)
+    return months
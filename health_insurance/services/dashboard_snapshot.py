@@ -0,0 +1,146 @@
+# health_insurance/services/dashboard_snapshot.py
+"""
+لقطة لوحة تحكم التأمين الصحي لكل مستخدم
+
+تُبنى مرة واحدة وتُخزن في الكاش المشترك حتى يعدّل المستخدم شركة أو اقتباساً أو وثيقة
+أو يسجل حساباً جديداً (الإشارات ترفع نسخة المستخدم)، أو يغيّر مجدول الانتهاء حالة إحدى وثائقه، أو يتغير اليوم.
+"""
+import hashlib
+import json
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+from django.utils.http import quote_etag
+from rest_framework.utils.encoders import JSONEncoder
+
+from insurance.services.policy_expiry import expiring_policy_ids
+from saferatio.cache import CacheNamespace
+from ..models import Company, HealthCalculationLog, HealthInsurancePolicy, HealthInsuranceQuote
+from ..serializers import (
+    HealthInsurancePolicySerializer, HealthInsurancePolicySimpleSerializer, HealthInsuranceQuoteSerializer,
+)
+
+DASHBOARD_CACHE_TIMEOUT = 60 * 60
+
+dashboard_snapshots = CacheNamespace('health:dashboard', timeout=DASHBOARD_CACHE_TIMEOUT)
+
+NEXT_ACTIONS = [
+    {'label': 'إنشاء شركة جديدة', 'url': '/api/companies/', 'method': 'POST'},
+    {'label': 'احتساب قسط جديد', 'url': '/api/health-premium/calculate/', 'method': 'POST'},
+    {'label': 'مشاهدة خطط التغطية', 'url': '/api/health-coverage-plans/', 'method': 'GET'},
+    {'label': 'تحميل تقرير', 'url': '/api/health-insurance/reports/?type=summary', 'method': 'GET'}
+]
+
+
+def invalidate_dashboard(user_id):
+    """إبطال لقطة لوحة التحكم للمستخدم"""
+    if user_id:
+        dashboard_snapshots.bump(scope=user_id)
+
+
+def build_dashboard_snapshot(user, today=None):
+    """بيانات لوحة التحكم (بدون بيانات المستخدم نفسه)"""
+    today = today or timezone.localdate()
+    companies = Company.objects.filter(user=user)
+    quotes = HealthInsuranceQuote.objects.filter(user=user).select_related('company', 'coverage_plan')
+    policies = HealthInsurancePolicy.objects.filter(user=user).select_related('company', 'quote', 'coverage_plan')
+
+    # العدادات والمجاميع في استعلام واحد لكل جدول
+    company_totals = companies.aggregate(count=Count('id'), employees=Sum('total_employees'))
+    quote_totals = quotes.aggregate(count=Count('id'), quoted=Count('id', filter=Q(status='quoted')))
+    policy_totals = policies.aggregate(
+        count=Count('id'),
+        active=Count('id', filter=Q(status='active')),
+        premium=Sum('total_premium'),
+        monthly=Sum('monthly_premium', filter=Q(status='active')),
+    )
+
+    quick_stats = {
+        'companies_count': company_totals['count'],
+        'total_employees': company_totals['employees'] or 0,
+        'quotes_count': quote_totals['count'],
+        'active_quotes': quote_totals['quoted'],
+        'policies_count': policy_totals['count'],
+        'active_policies': policy_totals['active'],
+        'total_premium': float(policy_totals['premium'] or 0),
+        'monthly_payment': float(policy_totals['monthly'] or 0)
+    }
+
+    recent_quotes = HealthInsuranceQuoteSerializer(quotes.order_by('-created_at')[:5], many=True).data
+    active_policies = HealthInsurancePolicySerializer(
+        policies.filter(status='active').order_by('-created_at')[:5], many=True
+    ).data
+
+    # التحذيرات والإشعارات
+    warnings = []
+    expiring = list(policies.filter(pk__in=expiring_policy_ids(user, 'health')))
+    if expiring:
+        warnings.append({
+            'type': 'warning',
+            'message': f'لديك {len(expiring)} وثيقة على وشك الانتهاء',
+            'items': HealthInsurancePolicySimpleSerializer(expiring, many=True).data
+        })
+
+    if quote_totals['quoted']:
+        warnings.append({
+            'type': 'info',
+            'message': f'لديك {quote_totals["quoted"]} اقتباس بانتظار القرار',
+            'items': HealthInsuranceQuoteSerializer(quotes.filter(status='quoted')[:3], many=True).data
+        })
+
+    # النشاط الأخير
+    recent_activity = [
+        {
+            'type': 'calculation',
+            'message': f'حساب قسط لقطاع {calc.company_sector}',
+            'details': f'{calc.employee_count} موظف، القسط: {calc.calculated_premium} ريال',
+            'timestamp': calc.created_at,
+            'premium': float(calc.calculated_premium)
+        }
+        for calc in HealthCalculationLog.objects.filter(user=user).order_by('-created_at')[:5]
+    ]
+
+    sector_distribution = list(companies.values('sector').annotate(
+        count=Count('id'),
+        total_employees=Sum('total_employees')
+    ))
+
+    return {
+        'quick_stats': quick_stats,
+        'sector_distribution': sector_distribution,
+        'recent_quotes': recent_quotes,
+        'active_policies': active_policies,
+        'warnings': warnings,
+        'recent_activity': recent_activity,
+        'next_actions': NEXT_ACTIONS,
+    }
+
+
+def _build_entry(user, today):
+    # تحويل البيانات إلى قيم JSON بسيطة مرة واحدة (نفس ترميز DRF) وحساب البصمة منها
+    body = json.dumps(build_dashboard_snapshot(user, today), cls=JSONEncoder, ensure_ascii=False)
+    return {
+        'data': json.loads(body),
+        'digest': hashlib.sha256(body.encode('utf-8')).hexdigest()[:32],
+    }
+
+
+def get_dashboard_snapshot(user):
+    """
+    لقطة لوحة التحكم المخزنة للمستخدم مع ETag
+
+    الـ ETag يشمل اسم المستخدم وبريده لأنهما يُضافان للاستجابة خارج اللقطة.
+    """
+    today = timezone.localdate()
+    entry, cached = dashboard_snapshots.fetch(
+        ('snapshot', today.isoformat()), lambda: _build_entry(user, today), scope=user.pk
+    )
+    user_data = {
+        'name': user.get_full_name() or user.username,
+        'email': user.email
+    }
+    user_digest = hashlib.sha256(json.dumps(user_data, ensure_ascii=False).encode('utf-8')).hexdigest()[:8]
+    return {
+        'data': dict(entry['data'], user=user_data),
+        'etag': quote_etag(f"{entry['digest']}-{user_digest}"),
+        'cached': cached,
+    }
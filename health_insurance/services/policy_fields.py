@@ -0,0 +1,162 @@
+# health_insurance/services/policy_fields.py
+"""
+توحيد حقول وثيقة التأمين الصحي المشتقة من JSON عند الكتابة
+
+نوع التأمين وطريقة الدفع ونوع التغطية واسم الخطة وأعداد أفراد العائلة كانت تُستخرج في
+السيريالايزر لكل وثيقة في كل طلب (عدة json.loads وتحميل الاقتباس). هنا تُحسب مرة واحدة
+بنفس ترتيب المصادر وتُخزن في أعمدة عادية:
+- HealthInsurancePolicy.save يستدعي normalize_policy_fields (ومنه قبول الاقتباس)
+- bulk_create يتجاوز save، فيستدعيها المستدعي قبل الإدراج
+- manage.py normalize_policy_fields يملأ الوثائق الموجودة
+
+قيمتا insurance_type و payment_method الحاليتان في العمود تسبقان الاقتباس والقيمة الافتراضية،
+فالتعديل المباشر (الإدارة، PATCH) لا يُستبدل عند الحفظ. الاستثناء: وثيقة جديدة بقيمة العمود
+الافتراضية، والملء الأولي (backfill) الذي يعيد الحساب من المصادر.
+"""
+import json
+
+from ..models import HealthInsurancePolicy
+
+NORMALIZED_FIELDS = [
+    'insurance_type', 'payment_method', 'coverage_type', 'coverage_plan_name',
+    'family_spouses', 'family_children', 'family_parents',
+]
+# تعديل أي منها عبر save(update_fields=...) يعيد التوحيد
+SOURCE_FIELDS = {'quote', 'policy_details', 'coverage_details', 'calculation_data', 'family_members', 'payment_method'}
+
+PLAN_NAMES = {
+    'A': 'التغطية الشاملة',
+    'B': 'التغطية المتوسطة',
+    'C': 'التغطية الأساسية',
+    'comprehensive': 'التغطية الشاملة',
+    'medium': 'التغطية المتوسطة',
+    'basic': 'التغطية الأساسية',
+}
+COVERAGE_TYPES = {'A': 'comprehensive', 'B': 'basic', 'C': 'standard'}
+FAMILY_KEYS = ('spouses', 'children', 'parents')
+
+
+def as_dict(value):
+    """حقل JSON قد يكون مخزناً كنص"""
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return {}
+    return value if isinstance(value, dict) else {}
+
+
+def as_count(value):
+    try:
+        return max(int(value), 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def current_insurance_type(policy):
+    """قيمة العمود إن كانت مقصودة: وثيقة محفوظة، أو وثيقة جديدة بقيمة غير الافتراضية"""
+    value = policy.insurance_type
+    default = HealthInsurancePolicy._meta.get_field('insurance_type').default
+    if not value or (policy._state.adding and value == default):
+        return None
+    return value
+
+
+def resolve_insurance_type(policy_details, coverage_details, quote, current=None):
+    if 'insurance_type' in policy_details:
+        return policy_details['insurance_type']
+    if 'insurance_type' in coverage_details:
+        return coverage_details['insurance_type']
+    insurance_data = coverage_details.get('insurance_type_data')
+    if isinstance(insurance_data, dict) and 'code' in insurance_data:
+        return insurance_data['code']
+    if current:
+        return current
+    if quote is not None:
+        notes = as_dict(quote.notes) if quote.notes else {}
+        if 'insurance_type' in notes:
+            return notes['insurance_type']
+        if quote.insurance_type:
+            return quote.insurance_type
+    return 'B'
+
+
+def resolve_family(policy):
+    """الأولوية: policy_details ثم coverage_details ثم calculation_data ثم family_members"""
+    family = dict.fromkeys(FAMILY_KEYS, 0)
+    family.update(as_dict(policy.family_members))
+    sources = [
+        as_dict(policy.calculation_data).get('family_data'),
+        as_dict(policy.coverage_details).get('family_members'),
+        as_dict(policy.policy_details).get('family_members'),
+    ]
+    for source in sources:
+        if isinstance(source, dict):
+            family.update({key: source[key] for key in FAMILY_KEYS if key in source})
+    return {key: as_count(family[key]) for key in FAMILY_KEYS}
+
+
+def normalize_policy_fields(policy, keep_current=True):
+    """
+    يملأ NORMALIZED_FIELDS من حقول JSON والاقتباس (بدون حفظ)
+    keep_current=False: تجاهل قيم الأعمدة الحالية (أعمدة لم تُوحد من قبل)
+    """
+    policy_details = as_dict(policy.policy_details)
+    coverage_details = as_dict(policy.coverage_details)
+    quote = policy.quote if policy.quote_id else None
+
+    current = current_insurance_type(policy) if keep_current else None
+    insurance_type = str(resolve_insurance_type(policy_details, coverage_details, quote, current))[:10]
+
+    payment_method = (
+        policy_details.get('payment_method')
+        or coverage_details.get('payment_method')
+        or (policy.payment_method if keep_current else None)
+        or 'annual'
+    )
+
+    if 'coverage_type' in policy_details:
+        coverage_type = policy_details['coverage_type']
+    elif 'coverage_type' in coverage_details:
+        coverage_type = coverage_details['coverage_type']
+    elif quote is not None and 'coverage_type' in as_dict(quote.coverage_details):
+        coverage_type = as_dict(quote.coverage_details)['coverage_type']
+    else:
+        coverage_type = COVERAGE_TYPES.get(insurance_type, 'comprehensive')
+
+    insurance_data = coverage_details.get('insurance_type_data')
+    if 'coverage_plan_name' in policy_details:
+        plan_name = policy_details['coverage_plan_name']
+    elif isinstance(insurance_data, dict) and 'name' in insurance_data:
+        plan_name = insurance_data['name']
+    else:
+        plan_name = PLAN_NAMES.get(insurance_type, f'خطة {insurance_type}')
+
+    family = resolve_family(policy)
+
+    policy.insurance_type = insurance_type
+    policy.payment_method = str(payment_method)[:20]
+    policy.coverage_type = str(coverage_type or '')[:30]
+    policy.coverage_plan_name = str(plan_name or '')[:200]
+    policy.family_spouses = family['spouses']
+    policy.family_children = family['children']
+    policy.family_parents = family['parents']
+    return policy
+
+
+def backfill_policy_fields(batch_size=1000, log=None):
+    """إعادة توحيد كل الوثائق الموجودة على دفعات؛ يعيد عدد الوثائق المحدثة"""
+    queryset = HealthInsurancePolicy.objects.select_related('quote').order_by('pk')
+    updated = 0
+    last_pk = 0
+    while True:
+        batch = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            return updated
+        for policy in batch:
+            normalize_policy_fields(policy, keep_current=False)
+        HealthInsurancePolicy.objects.bulk_update(batch, NORMALIZED_FIELDS)
+        updated += len(batch)
+        last_pk = batch[-1].pk
+        if log:
+            log(updated)
@@ -0,0 +1,181 @@
+# health_insurance/services/reference_data.py
+"""
+بيانات مرجعية (القطاعات وخطط التغطية) تُبنى مرة واحدة لكل عملية وتُخدم كبايتات جاهزة
+
+- القطاعات ثابتة حتى النشر التالي: تُبنى عند أول طلب ولا تتغير.
+- الخطط تتبع رقم نسخة في الكاش المشترك يُرفع عند تعديل أي HealthCoveragePlan،
+  فكل عملية تعيد بناء نسختها المحلية عند تغيّر الرقم فقط.
+"""
+import hashlib
+import json
+import threading
+
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import quote_etag
+
+from saferatio.cache import CacheNamespace
+
+from ..models import Company, HealthCoveragePlan
+
+SECTORS_MAX_AGE = 60 * 60 * 24
+PLANS_MAX_AGE = 60 * 5
+plans_reference = CacheNamespace('health:reference:plans')
+
+SECTOR_GROUP_LABELS = {
+    'health': 'قطاع صحي',
+    'tech': 'قطاع تكنولوجيا',
+    'construction': 'قطاع مقاولات',
+    'retail': 'قطاع تجارة',
+    'services': 'قطاع خدمات'
+}
+
+SECTOR_DESCRIPTIONS = {
+    'health_hospital': 'مؤسسة طبية توفر رعاية صحية شاملة ومتخصصة',
+    'tech_software': 'شركة متخصصة في تطوير البرمجيات والحلول التقنية',
+    'construction_civil': 'شركة مقاولات تنفذ مشاريع إنشائية وبنية تحتية',
+    'security_guarding': 'شركة توفر خدمات حراسة أمنية وحماية للمنشآت',
+    'retail_store': 'متجر يبيع منتجات للمستهلكين مباشرة',
+    'education_school': 'مؤسسة تعليمية تقدم التعليم النظامي',
+    'manufacturing_food': 'مصنع ينتج مواد غذائية ومعالجة',
+    'services_logistics': 'شركة متخصصة في الشحن والتوزيع واللوجستيات',
+}
+
+
+class ReferencePayload:
+    """حمولة JSON مُسلسلة مسبقاً مع ETag قوي"""
+
+    def __init__(self, data, max_age, version=None):
+        self.body = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        self.etag = quote_etag(hashlib.sha256(self.body).hexdigest()[:32])
+        self.max_age = max_age
+        self.version = version
+
+    def response(self, request):
+        """استجابة 304 إذا تطابق If-None-Match، وإلا البايتات الجاهزة"""
+        headers = {
+            'ETag': self.etag,
+            'Cache-Control': f'private, max-age={self.max_age}',
+        }
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH', '')
+        if self.etag in [tag.strip() for tag in if_none_match.split(',')]:
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(self.body, content_type='application/json; charset=utf-8')
+        for name, value in headers.items():
+            response[name] = value
+        return response
+
+
+_lock = threading.Lock()
+_payloads = {}
+
+
+def get_sector_description(sector):
+    """وصف القطاع"""
+    return SECTOR_DESCRIPTIONS.get(sector, 'شركة في هذا القطاع')
+
+
+def build_sectors_data():
+    """مجموعات القطاعات وتسمياتها وأوصافها والحقول الخاصة بكل قطاع"""
+    groups = {}
+    sectors = []
+    for value, label in Company.SECTOR_CHOICES:
+        group = value.split('_')[0]
+        if '_' in value and group not in groups:
+            groups[group] = SECTOR_GROUP_LABELS.get(group, 'أخرى')
+        sectors.append({
+            'value': value,
+            'label': label,
+            'group': group,
+            'description': get_sector_description(value)
+        })
+
+    return {
+        'success': True,
+        'groups': groups,
+        'sectors': sectors,
+        'sector_fields': dict(getattr(Company, 'SECTOR_SPECIFIC_FIELDS', {})),
+        'total_sectors': len(sectors)
+    }
+
+
+def serialize_plan_for_comparison(plan):
+    """بيانات خطة واحدة لمقارنة الخطط"""
+    return {
+        'id': plan.id,
+        'name': plan.name,
+        'type': plan.get_plan_type_display(),
+        'base_price': float(plan.base_price_per_employee),
+        'limits': {
+            'outpatient': float(plan.outpatient_limit),
+            'inpatient': float(plan.inpatient_limit),
+            'dental': float(plan.dental_limit),
+            'optical': float(plan.optical_limit),
+            'emergency': float(plan.emergency_limit),
+        },
+        'coverage': {
+            'outpatient': plan.outpatient_coverage,
+            'inpatient': plan.inpatient_coverage,
+            'dental': plan.dental_coverage,
+            'optical': plan.optical_coverage,
+        },
+        'features': {
+            'preventive_care': plan.includes_preventive_care,
+            'chronic_medication': plan.includes_chronic_medication,
+            'work_accidents': plan.includes_work_accidents,
+        },
+        'applicable_to': plan.get_applicable_to_display(),
+    }
+
+
+def build_plans_comparison(plans):
+    """مقارنة الخطط مع التوصية"""
+    comparison = [serialize_plan_for_comparison(plan) for plan in plans]
+    if not comparison:
+        recommendation = "لا توجد خطط متاحة"
+    elif any(p['type'] == 'قياسي' for p in comparison):
+        recommendation = "الخطة القياسية توفر أفضل قيمة مقابل السعر"
+    else:
+        recommendation = f"نوصي بخطة {comparison[0]['name']} كبداية جيدة"
+    return {
+        'plans': comparison,
+        'total_plans': len(comparison),
+        'recommendation': recommendation
+    }
+
+
+def get_plans_version():
+    return plans_reference.version()
+
+
+def invalidate_plans():
+    """إبطال حمولات الخطط في جميع العمليات"""
+    plans_reference.bump()
+
+
+def get_sectors_payload():
+    """حمولة القطاعات (تُبنى مرة واحدة لكل عملية)"""
+    payload = _payloads.get('sectors')
+    if payload is None:
+        with _lock:
+            payload = _payloads.get('sectors')
+            if payload is None:
+                payload = _payloads['sectors'] = ReferencePayload(build_sectors_data(), SECTORS_MAX_AGE)
+    return payload
+
+
+def get_plans_payload(queryset, variant='all'):
+    """
+    حمولة مقارنة الخطط لمجموعة خطط (variant يميز الفلاتر مثل القطاع)
+    تُعاد بناؤها فقط عند تغيّر نسخة الخطط
+    """
+    version = get_plans_version()
+    key = f'plans:{variant}'
+    payload = _payloads.get(key)
+    if payload is None or payload.version != version:
+        with _lock:
+            payload = _payloads.get(key)
+            if payload is None or payload.version != version:
+                payload = ReferencePayload(build_plans_comparison(queryset), PLANS_MAX_AGE, version)
+                _payloads[key] = payload
+    return payload
@@ -0,0 +1,90 @@
+# health_insurance/services/roster_pricing.py
+from app.utils.validators import InsuranceDataValidator
+from saferatio.cache import CacheNamespace, fingerprint
+from .roster_stats import get_roster_stats
+
+# نتائج الحساب لكل شركة، والنسخة (لكل شركة) تتغير مع كل تعديل على الموظفين
+PREMIUM_CACHE_TIMEOUT = 60 * 60 * 24
+roster_premiums = CacheNamespace('health:roster_premium', timeout=PREMIUM_CACHE_TIMEOUT)
+
+
+def get_roster_version(company_id):
+    """رقم نسخة قائمة موظفي الشركة (يتغير مع كل تعديل على الموظفين)"""
+    return roster_premiums.version(scope=company_id)
+
+
+def bump_roster_version(company_id):
+    """رفع رقم النسخة لإبطال الحسابات المخزنة للشركة"""
+    return roster_premiums.bump(scope=company_id)
+
+
+def aggregate_roster(company_id, insurance_type=None):
+    """
+    ملخص موظفي الشركة من سجل الإحصائيات المحدَّث تدريجياً
+    (أفراد العائلة، الأمراض المزمنة، الأعمار)
+    """
+    stats = get_roster_stats(company_id)
+    summary = {
+        'total_employees': stats.total_employees,
+        'spouses': stats.spouses_total,
+        'children': stats.children_total,
+        'parents': stats.parents_total,
+        'chronic_count': stats.chronic_count,
+        'married_count': stats.married_count,
+        'male_count': stats.male_count,
+        'female_count': stats.female_count,
+        'average_age': stats.average_age,
+        'min_age': min(map(int, stats.age_counts), default=None),
+        'max_age': max(map(int, stats.age_counts), default=None),
+        'chronic_ratio': stats.chronic_ratio,
+        'out_of_age_range': 0,
+    }
+
+    rules = InsuranceDataValidator.INSURANCE_RULES.get(insurance_type)
+    if rules:
+        age_min, age_max = rules['age_range']
+        summary['out_of_age_range'] = stats.total_employees - stats.count_ages(age_min, age_max)
+    return summary
+
+
+def _options_fingerprint(coverage_options):
+    """بصمة ثابتة لخيارات التغطية لاستخدامها في مفتاح الكاش"""
+    return fingerprint(sorted(k for k, v in (coverage_options or {}).items() if v))
+
+
+def calculate_roster_premium(company_id, insurance_type, coverage_options=None):
+    """
+    حساب القسط في الخادم من بيانات الموظفين المخزنة
+
+    النتيجة مخزنة حسب الشركة ونسخة قائمة الموظفين ونوع التأمين وخيارات التغطية،
+    لذلك إعادة الحساب التفاعلية لا تكلف سوى قراءة من الكاش.
+    """
+    if insurance_type not in InsuranceDataValidator.INSURANCE_RULES:
+        raise ValueError(f"نوع التأمين غير صحيح: {insurance_type}")
+
+    coverage_options = coverage_options or {}
+
+    def compute():
+        roster = aggregate_roster(company_id, insurance_type)
+        family_data = {
+            'spouses': roster['spouses'],
+            'children': roster['children'],
+            'parents': roster['parents'],
+        }
+
+        # calculate_premium_breakdown يحتاج عدد الموظفين فقط (len)، فلا داعي لتحميل الصفوف
+        breakdown = InsuranceDataValidator.calculate_premium_breakdown(
+            insurance_type,
+            range(roster['total_employees']),
+            family_data,
+            coverage_options,
+        )
+        breakdown['family_members'] = family_data
+        breakdown['roster_summary'] = roster
+        breakdown['roster_version'] = get_roster_version(company_id)
+        return breakdown
+
+    breakdown, cached = roster_premiums.fetch(
+        (insurance_type, _options_fingerprint(coverage_options)), compute, scope=company_id
+    )
+    return dict(breakdown, cached=cached)
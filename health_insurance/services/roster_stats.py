@@ -0,0 +1,78 @@
+# health_insurance/services/roster_stats.py
+import threading
+from contextlib import contextmanager
+
+from django.db import transaction
+
+from ..models import CompanyRosterStats, Employee
+
+# الحقول التي تحتاجها CompanyRosterStats.apply
+STATS_FIELDS = [
+    'gender', 'marital_status', 'chronic_diseases', 'wives_count',
+    'children_count', 'parents_count', 'age', 'base_salary',
+]
+
+_state = threading.local()
+
+
+@contextmanager
+def deferred_roster_stats():
+    """
+    إيقاف التحديث التلقائي عبر الإشارات داخل عملية مجمعة
+    (المستدعي مسؤول عن استدعاء apply_roster_changes و bump_roster_version مرة واحدة)
+    """
+    previous = getattr(_state, 'deferred', False)
+    _state.deferred = True
+    try:
+        yield
+    finally:
+        _state.deferred = previous
+
+
+def is_deferred():
+    return getattr(_state, 'deferred', False)
+
+
+def employee_stats_values(employee):
+    """استخراج قيم الإحصائيات من كائن Employee أو قاموس"""
+    if isinstance(employee, dict):
+        return {field: employee[field] for field in STATS_FIELDS}
+    return {field: getattr(employee, field) for field in STATS_FIELDS}
+
+
+def rebuild_roster_stats(company_id):
+    """إعادة بناء الإحصائيات بالكامل من جدول الموظفين"""
+    with transaction.atomic():
+        stats, _ = CompanyRosterStats.objects.select_for_update().get_or_create(company_id=company_id)
+        fresh = CompanyRosterStats(id=stats.id, company_id=company_id)
+        for values in Employee.objects.filter(company_id=company_id).values(*STATS_FIELDS).iterator():
+            fresh.apply(values)
+        fresh.save()
+    return fresh
+
+
+def apply_roster_changes(company_id, added=(), removed=()):
+    """تحديث الإحصائيات تدريجياً بإضافة/طرح مساهمات الموظفين"""
+    added, removed = list(added), list(removed)
+    if not added and not removed:
+        return None
+
+    with transaction.atomic():
+        stats = CompanyRosterStats.objects.select_for_update().filter(company_id=company_id).first()
+        if stats is None:
+            # لم تُبنَ بعد: ستُبنى كاملة عند أول قراءة عبر get_roster_stats
+            return None
+        for values in removed:
+            stats.apply(values, sign=-1)
+        for values in added:
+            stats.apply(values)
+        stats.save()
+    return stats
+
+
+def get_roster_stats(company_id):
+    """الحصول على إحصائيات الشركة (وبناؤها إذا لم تكن موجودة)"""
+    stats = CompanyRosterStats.objects.filter(company_id=company_id).first()
+    if stats is None:
+        stats = rebuild_roster_stats(company_id)
+    return stats
@@ -0,0 +1,241 @@
+# health_insurance/services/roster_sync.py
+import hashlib
+import json
+from collections import defaultdict
+
+import pandas as pd
+from django.db import transaction
+
+from ..models import Employee
+from .roster_pricing import bump_roster_version
+from .roster_stats import (
+    STATS_FIELDS, apply_roster_changes, deferred_roster_stats, employee_stats_values,
+)
+
+# الحقول التي تدخل في بصمة الصف وتُحدَّث عند تغيّره
+SYNCED_FIELDS = [
+    'name', 'gender', 'marital_status', 'age', 'base_salary', 'number_of_children',
+    'children_count', 'employee_number', 'wives_count', 'parents_count',
+    'include_parents', 'chronic_diseases',
+]
+BULK_BATCH_SIZE = 1000
+
+
+def _int_cell(row, column):
+    """قراءة خلية رقمية اختيارية (0 إذا كانت فارغة أو غير صالحة)"""
+    if column not in row.index or pd.isna(row.get(column)):
+        return 0
+    try:
+        raw = str(row[column]).strip()
+        return int(float(raw)) if raw else 0
+    except (TypeError, ValueError):
+        return 0
+
+
+def _flag_cell(row, column):
+    """قراءة خلية نعم/لا"""
+    if column not in row.index or pd.isna(row.get(column)):
+        return False
+    return str(row[column]).strip().lower() in ['نعم', 'yes', 'true', '1']
+
+
+def parse_employee_row(row, index):
+    """تحويل صف من ملف الموظفين إلى قيم حقول Employee"""
+    name = str(row['الاسم_الكامل']).strip()
+    gender_raw = str(row['الجنس']).strip()
+    marital_raw = str(row['الحالة_الاجتماعية']).strip()
+    salary = float(row['الراتب']) if pd.notna(row['الراتب']) else 0
+
+    gender = 'male' if gender_raw == 'ذكر' else 'female'
+    marital_status = 'married' if marital_raw == 'متزوج' else 'single'
+
+    # 🔹 حساب العمر
+    age = 30
+    if 'تاريخ_الميلاد' in row.index and pd.notna(row.get('تاريخ_الميلاد')):
+        try:
+            age = pd.Timestamp.today().year - pd.to_datetime(row['تاريخ_الميلاد']).year
+        except (TypeError, ValueError):
+            age = 30
+
+    children_count = _int_cell(row, 'عدد_الأبناء')
+    wives_count = _int_cell(row, 'عدد_الزوجات')
+    parents_count = _int_cell(row, 'عدد_الوالدان')
+    include_parents = _flag_cell(row, 'يشمل_الوالدين')
+
+    # نفس افتراضات Employee.save() لأن bulk_create لا يستدعيها
+    if marital_status == 'married' and wives_count == 0:
+        wives_count = 1
+    if include_parents and parents_count == 0:
+        parents_count = 2
+
+    employee_number = ''
+    if 'الرقم_الوظيفي' in row.index and pd.notna(row.get('الرقم_الوظيفي')):
+        employee_number = str(row['الرقم_الوظيفي']).strip()
+
+    return {
+        'name': name,
+        'gender': gender,
+        'marital_status': marital_status,
+        'age': age,
+        'base_salary': round(salary, 2),
+        'number_of_children': children_count,
+        'children_count': children_count,
+        'employee_number': employee_number,
+        'wives_count': wives_count,
+        'parents_count': parents_count,
+        'include_parents': include_parents,
+        'chronic_diseases': _flag_cell(row, 'الأمراض_المزمنة'),
+        'insurance_profile': {
+            'uploaded_from_excel': True,
+            'excel_row': index + 2,
+            'original_data': {
+                'الاسم': name,
+                'الجنس': gender_raw,
+                'الحالة': marital_raw,
+                'عدد_الزوجات_الأصلي': str(row.get('عدد_الزوجات', '')),
+                'عدد_الوالدان_الأصلي': str(row.get('عدد_الوالدان', '')),
+                'يشمل_الوالدين_الأصلي': str(row.get('يشمل_الوالدين', ''))
+            }
+        },
+    }
+
+
+# أنواع الحقول كما يعيدها parse_employee_row (قيم قاعدة البيانات تُحوَّل إليها قبل البصمة)
+_INT_FIELDS = {'age', 'number_of_children', 'children_count', 'wives_count', 'parents_count'}
+_BOOL_FIELDS = {'include_parents', 'chronic_diseases'}
+
+
+def _normalized(field, value):
+    if field == 'base_salary':
+        return round(float(value or 0), 2)
+    if field in _INT_FIELDS:
+        return int(value or 0)
+    if field in _BOOL_FIELDS:
+        return bool(value)
+    return value or ''
+
+
+def row_fingerprint(values):
+    """بصمة محتوى الموظف (بدون رقم الصف في الملف)؛ نفس البصمة لصف الملف وللموظف المخزن"""
+    payload = [str(_normalized(field, values[field])) for field in SYNCED_FIELDS]
+    return hashlib.sha1(json.dumps(payload, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def sync_company_roster(company, df):
+    """
+    مزامنة موظفي الشركة مع ملف مرفوع بدلاً من الحذف وإعادة الإنشاء
+
+    المطابقة بالرقم الوظيفي، أو ببصمة المحتوى للموظفين بدون رقم.
+    يُنشأ الجديد ويُحدَّث المتغير دفعة واحدة، ويُحذف فقط من لم يعد في الملف.
+    """
+    errors = []
+    incoming = []
+    kept_numbers = set()
+
+    for index, row in df.iterrows():
+        try:
+            values = parse_employee_row(row, index)
+        except Exception as e:
+            # لا نحذف موظفاً موجوداً بسبب خطأ في صفه
+            if 'الرقم_الوظيفي' in row.index and pd.notna(row.get('الرقم_الوظيفي')):
+                kept_numbers.add(str(row['الرقم_الوظيفي']).strip())
+            errors.append({
+                'row': index + 2,
+                'name': str(row.get('الاسم_الكامل', 'غير معروف')),
+                'error': str(e)
+            })
+            continue
+        values['row_hash'] = row_fingerprint(values)
+        incoming.append(values)
+
+    existing = {}
+    existing_by_number = {}
+    existing_by_hash = defaultdict(list)
+    rehashed = []
+    for values in Employee.objects.filter(company=company).values(
+        'id', 'row_hash', *dict.fromkeys(SYNCED_FIELDS + STATS_FIELDS)
+    ):
+        # البصمة من القيم الحالية: الموظفون قبل عمود row_hash أو المعدلون خارج الرفع
+        # يُطابَقون ولا يُحذفون ويُعاد إنشاؤهم (فتتغير معرفاتهم)
+        row_hash = row_fingerprint(values)
+        if values['row_hash'] != row_hash:
+            values['row_hash'] = row_hash
+            rehashed.append(Employee(id=values['id'], row_hash=row_hash))
+        existing[values['id']] = values
+        if values['employee_number']:
+            existing_by_number[values['employee_number']] = (values['id'], values['row_hash'])
+        else:
+            existing_by_hash[values['row_hash']].append(values['id'])
+
+    to_create, to_update = [], []
+    unchanged = 0
+    seen_numbers = set()
+
+    for values in incoming:
+        number = values['employee_number']
+        if number:
+            if number in seen_numbers:
+                errors.append({
+                    'row': values['insurance_profile']['excel_row'],
+                    'name': values['name'],
+                    'error': f'الرقم الوظيفي مكرر في الملف: {number}'
+                })
+                continue
+            seen_numbers.add(number)
+            match = existing_by_number.get(number)
+            if match is None:
+                to_create.append(Employee(company=company, **values))
+            elif match[1] != values['row_hash']:
+                to_update.append(Employee(id=match[0], company=company, **values))
+            else:
+                unchanged += 1
+        elif existing_by_hash.get(values['row_hash']):
+            existing_by_hash[values['row_hash']].pop()
+            unchanged += 1
+        else:
+            to_create.append(Employee(company=company, **values))
+
+    updated_ids = {emp.id for emp in to_update}
+    rehashed = [emp for emp in rehashed if emp.id not in updated_ids]
+    removed_ids = [
+        emp_id for number, (emp_id, _) in existing_by_number.items()
+        if number not in seen_numbers and number not in kept_numbers
+    ]
+    for ids in existing_by_hash.values():
+        removed_ids.extend(ids)
+
+    removed = set(removed_ids)
+    rehashed = [emp for emp in rehashed if emp.id not in removed]
+
+    # إشارات الموظفين متوقفة هنا (الإحصائيات والنسخة): فرق واحد للإحصائيات ورفع واحد للنسخة
+    with transaction.atomic(), deferred_roster_stats():
+        if removed_ids:
+            Employee.objects.filter(id__in=removed_ids).delete()
+        if rehashed:
+            Employee.objects.bulk_update(rehashed, ['row_hash'], batch_size=BULK_BATCH_SIZE)
+        if to_update:
+            Employee.objects.bulk_update(
+                to_update, SYNCED_FIELDS + ['insurance_profile', 'row_hash'], batch_size=BULK_BATCH_SIZE
+            )
+        if to_create:
+            Employee.objects.bulk_create(to_create, batch_size=BULK_BATCH_SIZE)
+
+        # تحديث إحصائيات الشركة بالفروقات فقط
+        apply_roster_changes(
+            company.id,
+            added=[employee_stats_values(emp) for emp in to_create + to_update],
+            removed=[existing[emp_id] for emp_id in removed_ids]
+                    + [existing[emp.id] for emp in to_update],
+        )
+
+    # العمليات المجمعة لا تطلق إشارات الحفظ
+    if to_create or to_update or removed_ids:
+        bump_roster_version(company.id)
+
+    return {
+        'created': len(to_create),
+        'updated': len(to_update),
+        'deleted': len(removed_ids),
+        'unchanged': unchanged,
+        'errors': errors,
+    }
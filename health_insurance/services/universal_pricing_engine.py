@@ -1,14 +1,35 @@
 # health_insurance/services/universal_pricing_engine.py
+import hashlib
+import io
+import numpy as np
 import pandas as pd
 from decimal import Decimal
 from datetime import datetime
+from django.utils.functional import cached_property
+from saferatio.cache import CacheNamespace
 from ..models import Company, HealthCoveragePlan, SectorPricingFactor
+from .roster_stats import get_roster_stats
+
+# تحليل ملفات الموظفين مخزن حسب بصمة المحتوى (sha256)
+ANALYSIS_CACHE_TIMEOUT = 60 * 60 * 24
+employees_file_analyses = CacheNamespace('health:employees_file_analysis', timeout=ANALYSIS_CACHE_TIMEOUT)
+
+# حدود الفئات (np.histogram: كل فئة [أدنى، أعلى) والأخيرة مغلقة)
+AGE_BINS = [-np.inf, 30, 40, 50, 60, np.inf]
+AGE_LABELS = ['under_30', '30_40', '40_50', '50_60', 'over_60']
+SALARY_BINS = [-np.inf, 50000, 150000, np.inf]
+SALARY_LABELS = ['low', 'medium', 'high']
+DEPENDENTS_BINS = [-np.inf, 1, 3, 5, np.inf]
+DEPENDENTS_LABELS = ['0', '1_2', '3_4', '5+']
+
 
 class UniversalPricingEngine:
     """محرك تسعير شامل لجميع أنواع الشركات"""
     
-    def __init__(self):
-        self.base_factors = self.load_base_factors()
+    @cached_property
+    def base_factors(self):
+        """العوامل تُحمَّل عند أول استخدام (تحليل الملفات لا يحتاج قاعدة البيانات)"""
+        return self.load_base_factors()
         
     def load_base_factors(self):
         """تحميل عوامل التسعير الأساسية"""
@@ -68,8 +89,9 @@ class UniversalPricingEngine:
             factors[sf.sector] = {
                 'base': sf.base_factor,
                 'risk_adjustment': sf.risk_adjustment,
-                'min': sf.min_premium_per_employee,
-                'max': sf.max_premium_per_employee
+                # حدود القسط للموظف غير موجودة في SectorPricingFactor حالياً
+                'min': getattr(sf, 'min_premium_per_employee', None),
+                'max': getattr(sf, 'max_premium_per_employee', None)
             }
         return factors
     
@@ -78,14 +100,16 @@ class UniversalPricingEngine:
         حساب القسط الإجمالي للشركة
         
         الخطوات:
-        1. تحليل ملف الموظفين
+        1. تحليل الموظفين (من الإحصائيات المخزنة، أو من الملف إذا لم يُرفع موظفون)
         2. حساب القسط الأساسي
         3. تطبيق العوامل
         4. حساب الإجمالي
         """
         try:
-            # 1. تحليل ملف الموظفين
-            employee_analysis = self.analyze_employees_file(employees_file_path)
+            # 1. تحليل الموظفين - لا نعيد قراءة الملف إذا كانت الإحصائيات متوفرة
+            employee_analysis = self.analyze_company_roster(company)
+            if employee_analysis is None:
+                employee_analysis = self.analyze_employees_file(employees_file_path)
             
             # 2. حساب القسط الأساسي حسب الخطة
             base_premium = self.calculate_base_premium(employee_analysis, coverage_plan)
@@ -115,66 +139,113 @@ class UniversalPricingEngine:
             # في حالة خطأ، ارجع حساباً بسيطاً
             return self.calculate_simple_premium(company, coverage_plan)
     
+    def analyze_company_roster(self, company):
+        """تحليل الموظفين من CompanyRosterStats (None إذا لم يُرفع موظفون بعد)"""
+        stats = get_roster_stats(company.id)
+        if not stats.total_employees:
+            return None
+        
+        analysis = stats.as_analysis()
+        analysis['age_risk_factor'] = self.calculate_age_risk_factor(analysis['age_distribution'])
+        analysis['risk_factors'] = {
+            'age_risk': Decimal(str(analysis['age_risk_factor'])),
+            'dependents_risk': self.calculate_dependents_risk(analysis['dependents_analysis']),
+        }
+        return analysis
+    
     def analyze_employees_file(self, file_path):
-        """تحليل ملف Excel للموظفين مع البيانات الجديدة"""
+        """
+        تحليل ملف Excel للموظفين مع البيانات الجديدة
+        
+        النتيجة مخزنة حسب بصمة محتوى الملف، فتكرار الحساب لنفس الملف لا يعيد التحليل.
+        """
         try:
-            df = pd.read_excel(file_path)
-            
-            # التحقق من الأعمدة المطلوبة
-            required_columns = ['الاسم', 'الجنس', 'تاريخ_الميلاد', 'الراتب', 'المعالين']
-            for col in required_columns:
-                if col not in df.columns:
-                    raise ValueError(f"العمود {col} غير موجود في الملف")
-            
-            analysis = {
-                'total_employees': len(df),
-                'male_count': len(df[df['الجنس'] == 'ذكر']),
-                'female_count': len(df[df['الجنس'] == 'أنثى']),
-                'total_dependents': int(df['المعالين'].sum()) if 'المعالين' in df.columns else 0,
-                'average_salary': float(df['الراتب'].mean()) if 'الراتب' in df.columns else 3000,
-                'average_age': self.calculate_average_age(df['تاريخ_الميلاد']),
-                'age_distribution': self.get_age_distribution(df['تاريخ_الميلاد']),
-                
-                # البيانات الجديدة
-                'marital_status_distribution': self.get_marital_distribution(df),
-                'job_title_distribution': self.get_job_title_distribution(df),
-                'department_distribution': self.get_department_distribution(df),
-                'dependents_analysis': self.analyze_dependents(df),
-                'salary_distribution': self.get_salary_distribution(df['الراتب'])
-            }
+            if hasattr(file_path, 'read'):
+                content = file_path.read()
+            else:
+                with open(file_path, 'rb') as f:
+                    content = f.read()
             
-            # حساب عوامل المخاطر
-            analysis['risk_factors'] = {
-                'age_risk': self.calculate_age_risk_factor(analysis['age_distribution']),
-                'dependents_risk': self.calculate_dependents_risk(analysis['dependents_analysis']),
-                'salary_risk': self.calculate_salary_risk(analysis['salary_distribution']),
-                'gender_risk': self.calculate_gender_risk(analysis['male_count'], analysis['female_count']),
-                'marital_risk': self.calculate_marital_risk(analysis['marital_status_distribution'])
-            }
-            
-            return analysis
+            return employees_file_analyses.get_or_set(
+                hashlib.sha256(content).hexdigest(),
+                lambda: self.analyze_employees_dataframe(pd.read_excel(io.BytesIO(content))),
+            )
             
         except Exception as e:
             raise ValueError(f"خطأ في تحليل ملف الموظفين: {str(e)}")
+    
+    def analyze_employees_dataframe(self, df):
+        """تحليل الموظفين في مرور واحد (value_counts / np.histogram بدلاً من الفلاتر المتكررة)"""
+        # التحقق من الأعمدة المطلوبة
+        required_columns = ['الاسم', 'الجنس', 'تاريخ_الميلاد', 'الراتب', 'المعالين']
+        for col in required_columns:
+            if col not in df.columns:
+                raise ValueError(f"العمود {col} غير موجود في الملف")
+        
+        total = len(df)
+        genders = df['الجنس'].value_counts()
+        
+        # تحويل تواريخ الميلاد مرة واحدة فقط
+        ages = self._ages_from_birth_dates(df['تاريخ_الميلاد'])
+        salaries = pd.to_numeric(df['الراتب'], errors='coerce').dropna().to_numpy()
+        
+        analysis = {
+            'total_employees': total,
+            'male_count': int(genders.get('ذكر', 0)),
+            'female_count': int(genders.get('أنثى', 0)),
+            'average_salary': float(salaries.mean()) if len(salaries) else 3000,
+            'average_age': float(ages.mean()) if len(ages) else 30.0,
+            'age_distribution': self._histogram(ages, AGE_BINS, AGE_LABELS),
+            'salary_distribution': self._histogram(salaries, SALARY_BINS, SALARY_LABELS),
+            'dependents_analysis': self.analyze_dependents(df),
+            
+            # البيانات الجديدة (أعمدة اختيارية)
+            'marital_status_distribution': self._value_counts(df, 'الحالة_الاجتماعية'),
+            'job_title_distribution': self._value_counts(df, 'المسمى_الوظيفي'),
+            'department_distribution': self._value_counts(df, 'القسم'),
+        }
+        analysis['total_dependents'] = analysis['dependents_analysis']['total']
+        analysis['age_risk_factor'] = self.calculate_age_risk_factor(analysis['age_distribution'])
+        
+        # حساب عوامل المخاطر
+        analysis['risk_factors'] = {
+            'age_risk': Decimal(str(analysis['age_risk_factor'])),
+            'dependents_risk': self.calculate_dependents_risk(analysis['dependents_analysis']),
+        }
+        
+        return analysis
+    
+    @staticmethod
+    def _ages_from_birth_dates(birth_dates):
+        """أعمار الموظفين (مصفوفة numpy) من عمود تواريخ الميلاد"""
+        years = pd.to_datetime(birth_dates, errors='coerce').dt.year.dropna()
+        return (datetime.now().year - years).to_numpy()
+    
+    @staticmethod
+    def _histogram(values, bins, labels):
+        counts, _ = np.histogram(values, bins=bins)
+        return {label: int(count) for label, count in zip(labels, counts)}
+    
+    @staticmethod
+    def _value_counts(df, column):
+        if column not in df.columns:
+            return {}
+        return {str(k): int(v) for k, v in df[column].value_counts().items()}
 
     def analyze_dependents(self, df):
         """تحليل بيانات المعالين"""
         if 'المعالين' not in df.columns:
             return {'total': 0, 'average': 0, 'distribution': {}}
         
-        dependents_series = df['المعالين'].fillna(0)
+        dependents = pd.to_numeric(df['المعالين'], errors='coerce').fillna(0).to_numpy()
+        with_dependents = int((dependents > 0).sum())
         
         return {
-            'total': int(dependents_series.sum()),
-            'average': float(dependents_series.mean()),
-            'distribution': {
-                '0': len(dependents_series[dependents_series == 0]),
-                '1_2': len(dependents_series[(dependents_series >= 1) & (dependents_series <= 2)]),
-                '3_4': len(dependents_series[(dependents_series >= 3) & (dependents_series <= 4)]),
-                '5+': len(dependents_series[dependents_series >= 5])
-            },
-            'employees_with_dependents': len(dependents_series[dependents_series > 0]),
-            'percentage_with_dependents': float(len(dependents_series[dependents_series > 0]) / len(df) * 100)
+            'total': int(dependents.sum()),
+            'average': float(dependents.mean()) if len(dependents) else 0,
+            'distribution': self._histogram(dependents, DEPENDENTS_BINS, DEPENDENTS_LABELS),
+            'employees_with_dependents': with_dependents,
+            'percentage_with_dependents': float(with_dependents / len(dependents) * 100) if len(dependents) else 0
         }
 
     def calculate_dependents_risk(self, dependents_analysis):
@@ -294,13 +365,10 @@ class UniversalPricingEngine:
         """تطبيق الحدود الدنيا والقصوى"""
         sector_data = self.base_factors['sector_factors'].get(company.sector)
         if sector_data:
-            min_premium = sector_data['min'] * company.total_employees
-            max_premium = sector_data['max'] * company.total_employees
-            
-            if premium < min_premium:
-                return min_premium
-            elif premium > max_premium:
-                return max_premium
+            if sector_data['min'] is not None and premium < sector_data['min'] * company.total_employees:
+                return sector_data['min'] * company.total_employees
+            if sector_data['max'] is not None and premium > sector_data['max'] * company.total_employees:
+                return sector_data['max'] * company.total_employees
         
         return premium
     
@@ -335,44 +403,12 @@ class UniversalPricingEngine:
     
     def calculate_average_age(self, birth_dates):
         """حساب متوسط العمر"""
-        try:
-            current_year = datetime.now().year
-            ages = []
-            for date in birth_dates:
-                if pd.isna(date):
-                    continue
-                ages.append(current_year - pd.to_datetime(date).year)
-            return sum(ages) / len(ages) if ages else 30.0  # متوسط 30 سنة إذا لم تكن البيانات متوفرة
-        except:
-            return 30.0
+        ages = self._ages_from_birth_dates(birth_dates)
+        return float(ages.mean()) if len(ages) else 30.0  # متوسط 30 سنة إذا لم تكن البيانات متوفرة
     
     def get_age_distribution(self, birth_dates):
         """توزيع الأعمار"""
-        try:
-            current_year = datetime.now().year
-            ages = []
-            for date in birth_dates:
-                if pd.isna(date):
-                    continue
-                ages.append(current_year - pd.to_datetime(date).year)
-            
-            distribution = {
-                'under_30': len([age for age in ages if age < 30]),
-                '30_40': len([age for age in ages if 30 <= age < 40]),
-                '40_50': len([age for age in ages if 40 <= age < 50]),
-                '50_60': len([age for age in ages if 50 <= age < 60]),
-                'over_60': len([age for age in ages if age >= 60])
-            }
-            
-            return distribution
-        except:
-            return {
-                'under_30': 0,
-                '30_40': 0,
-                '40_50': 0,
-                '50_60': 0,
-                'over_60': 0
-            }
+        return self._histogram(self._ages_from_birth_dates(birth_dates), AGE_BINS, AGE_LABELS)
     
     def calculate_age_risk_factor(self, age_distribution):
         """عامل المخاطر حسب توزيع الأعمار"""
@@ -400,25 +436,10 @@ class UniversalPricingEngine:
     
     def get_salary_distribution(self, salaries):
         """توزيع الرواتب"""
-        try:
-            valid_salaries = [s for s in salaries if not pd.isna(s)]
-            return {
-                'low': len([s for s in valid_salaries if s < 50000]),
-                'medium': len([s for s in valid_salaries if 50000 <= s < 150000]),
-                'high': len([s for s in valid_salaries if s >= 150000])
-            }
-        except:
-            return {'low': 0, 'medium': 0, 'high': 0}
+        values = pd.to_numeric(pd.Series(salaries), errors='coerce').dropna().to_numpy()
+        return self._histogram(values, SALARY_BINS, SALARY_LABELS)
     
     def get_dependents_distribution(self, dependents):
         """توزيع عدد المعالين"""
-        try:
-            valid_dependents = [d for d in dependents if not pd.isna(d)]
-            return {
-                '0': len([d for d in valid_dependents if d == 0]),
-                '1_2': len([d for d in valid_dependents if 1 <= d <= 2]),
-                '3_4': len([d for d in valid_dependents if 3 <= d <= 4]),
-                '5+': len([d for d in valid_dependents if d >= 5])
-            }
-        except:
-            return {'0': 0, '1_2': 0, '3_4': 0, '5+': 0}
\ No newline at end of file
+        values = pd.to_numeric(pd.Series(dependents), errors='coerce').dropna().to_numpy()
+        return self._histogram(values, DEPENDENTS_BINS, DEPENDENTS_LABELS)
\ No newline at end of file
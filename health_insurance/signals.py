@@ -0,0 +1,84 @@
+# health_insurance/signals.py
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import (
+    Company, Employee, HealthCalculationLog, HealthCoveragePlan, HealthInsurancePolicy, HealthInsuranceQuote,
+)
+from .services.dashboard_snapshot import invalidate_dashboard
+from .services.reference_data import invalidate_plans
+from .services.roster_pricing import bump_roster_version
+from .services.roster_stats import (
+    STATS_FIELDS, apply_roster_changes, employee_stats_values, is_deferred,
+)
+
+
+@receiver(post_save, sender=Employee)
+@receiver(post_delete, sender=Employee)
+def invalidate_roster_premium(sender, instance, **kwargs):
+    """إبطال حسابات القسط المخزنة عند تعديل أي موظف (العملية المجمعة ترفع النسخة مرة واحدة)"""
+    if is_deferred():
+        return
+    bump_roster_version(instance.company_id)
+
+
+@receiver(pre_save, sender=Employee)
+def remember_employee_stats(sender, instance, **kwargs):
+    """حفظ القيم القديمة قبل التعديل لطرحها من الإحصائيات"""
+    instance._previous_stats = None
+    if instance.pk and not is_deferred():
+        instance._previous_stats = (
+            Employee.objects.filter(pk=instance.pk).values(*STATS_FIELDS, 'company_id').first()
+        )
+
+
+@receiver(post_save, sender=Employee)
+def update_roster_stats_on_save(sender, instance, **kwargs):
+    """تحديث إحصائيات الشركة بعد إضافة/تعديل موظف"""
+    if is_deferred():
+        return
+    previous = getattr(instance, '_previous_stats', None)
+    if previous and previous['company_id'] != instance.company_id:
+        # نُقل الموظف إلى شركة أخرى
+        apply_roster_changes(previous['company_id'], removed=[previous])
+        previous = None
+    apply_roster_changes(
+        instance.company_id,
+        added=[employee_stats_values(instance)],
+        removed=[previous] if previous else [],
+    )
+
+
+@receiver(post_delete, sender=Employee)
+def update_roster_stats_on_delete(sender, instance, **kwargs):
+    """طرح الموظف المحذوف من إحصائيات الشركة"""
+    if is_deferred():
+        return
+    apply_roster_changes(instance.company_id, removed=[employee_stats_values(instance)])
+
+
+@receiver(post_save, sender=HealthCoveragePlan)
+@receiver(post_delete, sender=HealthCoveragePlan)
+def invalidate_plan_reference_data(sender, instance, **kwargs):
+    """إبطال حمولات مقارنة الخطط الجاهزة"""
+    invalidate_plans()
+
+
+@receiver(post_save, sender=HealthCoveragePlan)
+def sync_plan_sector_applicability(sender, instance, raw=False, **kwargs):
+    """إعادة بناء صفوف جدول الأهلية عند تعديل الخطة"""
+    if not raw:
+        instance.sync_sector_applicability()
+
+
+@receiver(post_save, sender=Company)
+@receiver(post_delete, sender=Company)
+@receiver(post_save, sender=HealthInsuranceQuote)
+@receiver(post_delete, sender=HealthInsuranceQuote)
+@receiver(post_save, sender=HealthInsurancePolicy)
+@receiver(post_delete, sender=HealthInsurancePolicy)
+@receiver(post_save, sender=HealthCalculationLog)
+@receiver(post_delete, sender=HealthCalculationLog)
+def invalidate_user_dashboard(sender, instance, **kwargs):
+    """إبطال لقطة لوحة التحكم لصاحب السجل"""
+    invalidate_dashboard(instance.user_id)
@@ -0,0 +1 @@
+# test package initializer for health_insurance tests
@@ -0,0 +1,81 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from health_insurance.models import Company, HealthInsurancePolicy, HealthInsuranceQuote
+from health_insurance.services.dashboard_snapshot import dashboard_snapshots
+from insurance.models import PolicyDueDate
+
+User = get_user_model()
+
+URL = '/api/health/health-insurance-quotes/bulk-accept/'
+
+
+class BulkIssuanceTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='renewals', email='renewals@example.com', password='TestPass123!')
+        self.company = Company.objects.create(
+            user=self.user, name='شركة التجديد', sector='tech_software', cr_number='CR-BULK',
+            address='صنعاء', phone='777000001', email='bulk@example.com',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def make_quotes(self, count, status='quoted'):
+        start = HealthInsuranceQuote.objects.count()
+        return [
+            HealthInsuranceQuote.objects.create(
+                company=self.company, user=self.user, quote_number=f'HQ-BULK-{i}', status=status,
+                insured_employees_count=10 + i, total_premium=Decimal('5000.00'),
+                annual_premium=Decimal('5000.00'), monthly_premium=Decimal('416.67'),
+                coverage_details={
+                    'insurance_type': 'A', 'payment_method': 'monthly',
+                    'family_members': {'spouses': 1, 'children': 2},
+                },
+            )
+            for i in range(start, start + count)
+        ]
+
+    def test_issues_policies_with_normalized_fields(self):
+        quotes = self.make_quotes(4)
+        rejected = self.make_quotes(1, status='rejected')[0]
+        version = dashboard_snapshots.version(scope=self.user.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(URL, {'quote_ids': [q.id for q in quotes] + [rejected.id]}, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['issued_count'], 4)
+        self.assertEqual(response.data['skipped_quote_ids'], [rejected.id])
+
+        policies = HealthInsurancePolicy.objects.filter(quote__in=quotes)
+        self.assertEqual(len({policy.policy_number for policy in policies}), 4)
+        for policy in policies:
+            self.assertEqual(policy.total_employees, policy.quote.insured_employees_count)
+            self.assertEqual(policy.coverage_plan_name, 'التغطية الشاملة')
+            self.assertEqual(policy.payment_method, 'monthly')
+            self.assertEqual(policy.family_counts, {'spouses': 1, 'children': 2, 'parents': 0})
+        # bulk_create يتجاوز الإشارات، فتُجدول تواريخ الانتهاء صراحة
+        self.assertEqual(
+            set(PolicyDueDate.objects.filter(line='health').values_list('policy_id', flat=True)),
+            {policy.pk for policy in policies},
+        )
+        self.assertEqual(
+            set(HealthInsuranceQuote.objects.filter(pk__in=[q.id for q in quotes]).values_list('status', flat=True)),
+            {'accepted'},
+        )
+        # bulk_create لا يطلق post_save، فالإبطال يتم صراحة بعد الـ commit
+        self.assertNotEqual(dashboard_snapshots.version(scope=self.user.id), version)
+
+    def test_query_count_does_not_grow_with_batch(self):
+        def issue(quotes):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(URL, {'quote_ids': [q.id for q in quotes]}, format='json')
+            self.assertEqual(response.status_code, 201)
+            return len(queries)
+
+        self.assertEqual(issue(self.make_quotes(2)), issue(self.make_quotes(15)))
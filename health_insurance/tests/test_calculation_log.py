@@ -0,0 +1,148 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import OperationalError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from health_insurance.models import HealthCalculationLog
+from health_insurance.services import calculation_log
+from health_insurance.services.calculation_log import CalculationLogWriter, log_calculation, serialize_log_record
+
+User = get_user_model()
+
+
+class CalculationLogWriterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='hr', email='hr@example.com', password='TestPass123!')
+        self.spill_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.spill_dir, True)
+        self.writer = CalculationLogWriter(self.spill_dir, batch_size=10, max_pending=5, autostart=False)
+
+    def fields(self, premium='1500.50'):
+        return {
+            'user': self.user,
+            'company_sector': 'tech_software',
+            'company_size': 'small',
+            'employee_count': 12,
+            'coverage_plan_name': 'قياسي',
+            'calculated_premium': Decimal(premium),
+            'factors_used': {'sector_factor': Decimal('1.10')},
+            'ip_address': '127.0.0.1',
+        }
+
+    def spill_lines(self):
+        lines = []
+        for name in os.listdir(self.spill_dir):
+            with open(os.path.join(self.spill_dir, name), encoding='utf-8') as f:
+                lines.extend(f.read().splitlines())
+        return lines
+
+    def test_records_are_spilled_then_written_in_one_batch(self):
+        for _ in range(3):
+            self.writer.append(**self.fields())
+        self.assertEqual(HealthCalculationLog.objects.count(), 0)
+        self.assertEqual(len(self.spill_lines()), 3)
+
+        self.assertEqual(self.writer.flush(), 3)
+        self.assertEqual(HealthCalculationLog.objects.filter(user=self.user).count(), 3)
+        self.assertEqual(os.listdir(self.spill_dir), [])
+        log = HealthCalculationLog.objects.first()
+        self.assertEqual(log.calculated_premium, Decimal('1500.50'))
+        self.assertEqual(log.factors_used, {'sector_factor': '1.10'})
+
+        metrics = self.writer.metrics()
+        self.assertEqual((metrics['appended'], metrics['written'], metrics['batches'], metrics['pending']), (3, 3, 1, 0))
+
+    def test_backpressure_flushes_in_caller(self):
+        for _ in range(5):
+            self.writer.append(**self.fields())
+        self.assertEqual(HealthCalculationLog.objects.count(), 5)
+        self.assertEqual(self.writer.metrics()['backpressure_flushes'], 1)
+
+    def test_failed_batch_stays_on_disk_until_recovered(self):
+        self.writer.append(**self.fields())
+        with mock.patch.object(calculation_log, 'write_log_records', side_effect=RuntimeError('db down')):
+            self.assertEqual(self.writer.flush(), 0)
+        self.assertEqual(HealthCalculationLog.objects.count(), 0)
+        self.assertEqual(self.writer.metrics()['spilled_records'], 1)
+        self.assertTrue(os.listdir(self.spill_dir)[0].startswith('failed-'))
+
+        # الدفعة التالية الناجحة تعيد كتابة الفاشلة
+        self.writer.append(**self.fields())
+        self.writer.flush()
+        self.assertEqual(HealthCalculationLog.objects.count(), 2)
+        self.assertEqual(self.writer.metrics()['recovered_records'], 1)
+        self.assertEqual(os.listdir(self.spill_dir), [])
+
+    def test_recovers_segments_of_crashed_process(self):
+        calculated_at = timezone.now() - timedelta(hours=2)
+        record = serialize_log_record(dict(self.fields(), created_at=calculated_at))
+        path = os.path.join(self.spill_dir, 'active-99999-deadbeef.jsonl')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(record) + '\n{"user_id": ')  # آخر سطر مبتور
+        old = time.time() - 3600
+        os.utime(path, (old, old))
+
+        self.assertEqual(self.writer.recover(), 1)
+        log = HealthCalculationLog.objects.get()
+        self.assertLess(abs(log.created_at - calculated_at), timedelta(seconds=1))
+        self.assertEqual(os.listdir(self.spill_dir), [])
+
+    def write_spill_file(self, name, records):
+        with open(os.path.join(self.spill_dir, name), 'w', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record) + '\n')
+
+    def test_rejected_records_are_quarantined_without_blocking_other_files(self):
+        good = serialize_log_record(self.fields())
+        poison = dict(good, employee_count='abc')
+        self.write_spill_file('failed-1-aaaa.jsonl', [good, poison])
+        self.write_spill_file('failed-1-bbbb.jsonl', [good])
+
+        self.assertEqual(self.writer.recover(), 2)
+        self.assertEqual(HealthCalculationLog.objects.count(), 2)
+        self.assertEqual(os.listdir(self.spill_dir), ['quarantine'])
+        with open(os.path.join(self.writer.quarantine_dir, 'failed-1-aaaa.jsonl'), encoding='utf-8') as f:
+            self.assertEqual([json.loads(line) for line in f], [poison])
+        self.assertEqual(self.writer.metrics()['quarantined_records'], 1)
+
+    def test_recovery_waits_for_interval_while_database_is_down(self):
+        self.write_spill_file('failed-1-aaaa.jsonl', [serialize_log_record(self.fields())])
+        with mock.patch.object(calculation_log, 'write_log_records', side_effect=OperationalError('db down')):
+            self.assertEqual(self.writer.recover(), 0)
+        self.assertEqual(os.listdir(self.spill_dir), ['failed-1-aaaa.jsonl'])
+        self.assertEqual(self.writer.metrics()['quarantined_records'], 0)
+
+        # دفعة ناجحة قبل انقضاء RECOVERY_INTERVAL_MS لا تعيد المحاولة
+        self.writer.append(**self.fields())
+        self.writer.flush()
+        self.assertEqual(HealthCalculationLog.objects.count(), 1)
+        self.assertEqual(os.listdir(self.spill_dir), ['failed-1-aaaa.jsonl'])
+
+        self.assertEqual(self.writer.recover(), 1)
+        self.assertEqual(os.listdir(self.spill_dir), [])
+
+    def test_recent_active_segments_belong_to_live_writers(self):
+        other = CalculationLogWriter(self.spill_dir, autostart=False)
+        other.append(**self.fields())
+        self.assertEqual(self.writer.recover(), 0)
+        self.assertEqual(HealthCalculationLog.objects.count(), 0)
+
+    def test_unknown_fields_are_rejected(self):
+        with self.assertRaises(TypeError):
+            self.writer.append(dependents_count=2, **self.fields())
+
+    @override_settings(HEALTH_CALCULATION_LOG={'ASYNC': False})
+    def test_synchronous_mode(self):
+        log_calculation(**self.fields())
+        self.assertEqual(HealthCalculationLog.objects.count(), 1)
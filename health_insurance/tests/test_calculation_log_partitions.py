@@ -0,0 +1,168 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from datetime import date, datetime, timezone as dt_timezone
+from io import StringIO
+from unittest import mock, skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from health_insurance.models import HealthCalculationLog
+from health_insurance.services import calculation_log_partitions
+from health_insurance.services.calculation_log_partitions import (
+    add_months, archive_month, convert_to_partitioned, list_partitions, months_to_archive, parse_log_window,
+    partition_name,
+)
+
+User = get_user_model()
+
+
+class CalculationLogPartitionTests(TestCase):
+    url = '/api/health/health-calculation-logs/statistics/'
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='hr', email='hr@example.com', password='TestPass123!')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.archive_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.archive_dir, True)
+
+    def add_log(self, created_at, sector='tech_software', premium=1000):
+        log = HealthCalculationLog.objects.create(
+            user=self.user, company_sector=sector, company_size='small', employee_count=5,
+            coverage_plan_name='قياسي', calculated_premium=premium,
+        )
+        # auto_now_add يتجاهل القيمة الممررة عند الإنشاء
+        HealthCalculationLog.objects.filter(pk=log.pk).update(created_at=created_at)
+        return log
+
+    def test_indexes_match_access_patterns(self):
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, HealthCalculationLog._meta.db_table)
+        self.assertEqual(
+            constraints['calc_log_user_stats_idx']['columns'],
+            ['user_id', 'created_at', 'company_sector', 'calculated_premium'],
+        )
+        self.assertEqual(constraints['calc_log_created_idx']['columns'], ['created_at'])
+
+    def test_window_parsing(self):
+        today = date(2026, 3, 15)
+        self.assertEqual(parse_log_window({'months': '3'}, today), (date(2026, 1, 1), today))
+        self.assertEqual(parse_log_window({}, today)[0], date(2025, 4, 1))
+        self.assertEqual(
+            parse_log_window({'from': '2025-12-01', 'to': '2026-01-31'}, today),
+            (date(2025, 12, 1), date(2026, 1, 31)),
+        )
+        for params in ({'from': '2026-13-01'}, {'months': '0'}, {'from': '2026-02-01', 'to': '2026-01-01'}):
+            with self.assertRaises(ValueError):
+                parse_log_window(params, today)
+        self.assertEqual(add_months(date(2026, 11, 1), 3), date(2027, 2, 1))
+
+    def test_statistics_only_cover_requested_window(self):
+        now = datetime.now(dt_timezone.utc)
+        self.add_log(now, premium=1000)
+        self.add_log(now, sector='retail_store', premium=3000)
+        self.add_log(now.replace(year=now.year - 3), premium=9000)
+
+        response = self.client.get(self.url, {'months': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total_calculations'], 2)
+        self.assertEqual(response.data['premium_range']['max'], 3000.0)
+        self.assertEqual(len(response.data['company_sectors']), 2)
+
+        self.assertEqual(self.client.get(self.url, {'from': 'yesterday'}).status_code, 400)
+
+    def test_recent_activity_is_grouped_per_day(self):
+        now = datetime.now(dt_timezone.utc).replace(hour=12)
+        self.add_log(now)
+        self.add_log(now.replace(hour=1))
+        response = self.client.get(self.url, {'months': 1})
+        self.assertEqual(response.data['recent_activity'], [{'created_at__date': now.date(), 'count': 2}])
+
+    def test_archive_command_exports_and_removes_old_months(self):
+        self.add_log(datetime(2024, 1, 10, tzinfo=dt_timezone.utc), premium=100)
+        self.add_log(datetime(2024, 1, 20, tzinfo=dt_timezone.utc), premium=200)
+        self.add_log(datetime(2024, 3, 5, tzinfo=dt_timezone.utc), premium=300)
+        recent = self.add_log(datetime.now(dt_timezone.utc), premium=400)
+
+        months = months_to_archive(12)
+        self.assertEqual(months[0], date(2024, 1, 1))
+
+        out = StringIO()
+        call_command('archive_calculation_logs', '--dry-run', stdout=out)
+        self.assertEqual(HealthCalculationLog.objects.count(), 4)
+
+        call_command('archive_calculation_logs', keep_months=12, archive_dir=self.archive_dir, stdout=StringIO())
+        self.assertEqual(list(HealthCalculationLog.objects.values_list('id', flat=True)), [recent.id])
+        self.assertEqual(
+            sorted(os.listdir(self.archive_dir)),
+            ['health_calculation_log_2024-01.jsonl.gz', 'health_calculation_log_2024-03.jsonl.gz'],
+        )
+        with gzip.open(os.path.join(self.archive_dir, 'health_calculation_log_2024-01.jsonl.gz'), 'rt') as f:
+            rows = [json.loads(line) for line in f]
+        self.assertEqual([row['calculated_premium'] for row in rows], ['100.00', '200.00'])
+        self.assertEqual(rows[0]['user_id'], self.user.id)
+
+    def test_archive_month_locks_exports_then_drops_partition(self):
+        self.add_log(datetime(2024, 1, 10, tzinfo=dt_timezone.utc), premium=100)
+        self.add_log(datetime(2024, 1, 20, tzinfo=dt_timezone.utc), premium=200)
+        month = date(2024, 1, 1)
+        name = partition_name(month)
+        pg_connection = mock.MagicMock(vendor='postgresql', alias=connection.alias, ops=connection.ops)
+        cursor = pg_connection.cursor.return_value.__enter__.return_value
+
+        with mock.patch.object(calculation_log_partitions, 'list_partitions', return_value=[name]):
+            path, rows = archive_month(month, self.archive_dir, connection=pg_connection)
+        self.assertEqual(rows, 2)
+        self.assertEqual(
+            [call.args[0] for call in cursor.execute.call_args_list],
+            [
+                f'LOCK TABLE "{name}" IN SHARE MODE',
+                f'ALTER TABLE "health_calculation_log" DETACH PARTITION "{name}"',
+                f'DROP TABLE "{name}"',
+            ],
+        )
+        with gzip.open(path, 'rt') as f:
+            self.assertEqual(len(f.read().splitlines()), 2)
+
+    def test_failed_archive_keeps_rows_and_removes_temp_file(self):
+        self.add_log(datetime(2024, 1, 10, tzinfo=dt_timezone.utc))
+        with mock.patch('django.db.models.query.QuerySet.delete', side_effect=RuntimeError('locked')):
+            with self.assertRaises(RuntimeError):
+                archive_month(date(2024, 1, 1), self.archive_dir)
+        self.assertEqual(HealthCalculationLog.objects.count(), 1)
+        self.assertEqual(os.listdir(self.archive_dir), [])
+
+
+@skipUnless(connection.vendor == 'postgresql', 'الأقسام مدعومة على PostgreSQL فقط')
+class PostgresPartitionArchiveTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='hr', email='hr@example.com', password='TestPass123!')
+        self.archive_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.archive_dir, True)
+
+    def test_archive_month_detaches_and_drops_partition(self):
+        month = date(2024, 1, 1)
+        convert_to_partitioned(connection)
+        calculation_log_partitions.create_month_partition(month)
+        self.assertIn(partition_name(month), list_partitions())
+        for created_at in (datetime(2024, 1, 10, tzinfo=dt_timezone.utc), datetime.now(dt_timezone.utc)):
+            log = HealthCalculationLog.objects.create(
+                user=self.user, company_sector='tech_software', company_size='small', employee_count=5,
+                coverage_plan_name='قياسي', calculated_premium=1000,
+            )
+            HealthCalculationLog.objects.filter(pk=log.pk).update(created_at=created_at)
+
+        path, rows = archive_month(month, self.archive_dir)
+        self.assertEqual(rows, 1)
+        self.assertTrue(os.path.exists(path))
+        self.assertNotIn(partition_name(month), list_partitions())
+        self.assertEqual(HealthCalculationLog.objects.count(), 1)
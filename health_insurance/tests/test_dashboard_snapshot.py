@@ -0,0 +1,65 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from health_insurance.models import Company, HealthCalculationLog, HealthInsuranceQuote
+
+User = get_user_model()
+
+
+class DashboardSnapshotTests(TestCase):
+    url = '/api/health/api/health-dashboard/'
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='hr', email='hr@example.com', password='TestPass123!')
+        self.other = User.objects.create_user(username='other', email='other@example.com', password='TestPass123!')
+        self.company = Company.objects.create(
+            user=self.user, name='شركة الاختبار', sector='tech_software',
+            cr_number='CR-3001', address='صنعاء', phone='777000000', email='co@example.com',
+        )
+        HealthInsuranceQuote.objects.create(company=self.company, user=self.user, status='quoted')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_snapshot_is_served_from_cache(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.data['quick_stats']['companies_count'], 1)
+        self.assertEqual(first.data['quick_stats']['active_quotes'], 1)
+        self.assertEqual(first.data['user']['email'], 'hr@example.com')
+        self.assertEqual(first.data['warnings'][0]['type'], 'info')
+
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second['ETag'], first['ETag'])
+
+    def test_conditional_get(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_writes_invalidate_only_owner_snapshot(self):
+        etag = self.client.get(self.url)['ETag']
+        other_client = APIClient()
+        other_client.force_authenticate(self.other)
+        other_etag = other_client.get(self.url)['ETag']
+
+        HealthCalculationLog.objects.create(
+            user=self.user, company_sector='tech_software', company_size='small', employee_count=10,
+            coverage_plan_name='قياسي', calculated_premium=5000,
+        )
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data['recent_activity'][0]['premium'], 5000.0)
+        self.assertEqual(other_client.get(self.url, HTTP_IF_NONE_MATCH=other_etag).status_code, 304)
+
+        Company.objects.create(
+            user=self.user, name='شركة ثانية', sector='retail_store',
+            cr_number='CR-3002', address='عدن', phone='777000001', email='co2@example.com',
+        )
+        self.assertEqual(self.client.get(self.url).data['quick_stats']['companies_count'], 2)
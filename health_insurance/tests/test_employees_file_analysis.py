@@ -0,0 +1,55 @@
+import io
+from unittest import mock
+
+import pandas as pd
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from health_insurance.services.universal_pricing_engine import UniversalPricingEngine
+
+
+class EmployeesFileAnalysisTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.engine = UniversalPricingEngine()
+        self.df = pd.DataFrame({
+            'الاسم': ['أحمد', 'سارة', 'خالد', 'منى'],
+            'الجنس': ['ذكر', 'أنثى', 'ذكر', 'أنثى'],
+            'تاريخ_الميلاد': ['1995-01-01', '1985-06-01', '1965-03-01', None],
+            'الراتب': [30000, 60000, 200000, 40000],
+            'المعالين': [0, 2, 5, None],
+            'القسم': ['المالية', 'التقنية', 'المالية', 'التقنية'],
+        })
+
+    def excel_bytes(self):
+        buffer = io.BytesIO()
+        self.df.to_excel(buffer, index=False)
+        return buffer.getvalue()
+
+    def test_distributions(self):
+        analysis = self.engine.analyze_employees_dataframe(self.df)
+        self.assertEqual(analysis['male_count'], 2)
+        self.assertEqual(analysis['female_count'], 2)
+        self.assertEqual(sum(analysis['age_distribution'].values()), 3)
+        self.assertEqual(analysis['age_distribution']['over_60'], 1)
+        self.assertEqual(analysis['salary_distribution'], {'low': 2, 'medium': 1, 'high': 1})
+        self.assertEqual(analysis['dependents_analysis']['distribution'], {'0': 2, '1_2': 1, '3_4': 0, '5+': 1})
+        self.assertEqual(analysis['total_dependents'], 7)
+        self.assertEqual(analysis['department_distribution'], {'المالية': 2, 'التقنية': 2})
+
+    def test_missing_column_raises(self):
+        with self.assertRaises(ValueError):
+            self.engine.analyze_employees_file(io.BytesIO(b'not an excel file'))
+        with self.assertRaises(ValueError):
+            self.engine.analyze_employees_dataframe(self.df.drop(columns=['الراتب']))
+
+    def test_same_file_content_is_analyzed_once(self):
+        content = self.excel_bytes()
+        with mock.patch.object(
+            UniversalPricingEngine, 'analyze_employees_dataframe',
+            wraps=self.engine.analyze_employees_dataframe,
+        ) as analyze:
+            first = self.engine.analyze_employees_file(io.BytesIO(content))
+            second = UniversalPricingEngine().analyze_employees_file(io.BytesIO(content))
+        self.assertEqual(analyze.call_count, 1)
+        self.assertEqual(first, second)
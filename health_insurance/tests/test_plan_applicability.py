@@ -0,0 +1,50 @@
+from django.contrib.auth import get_user_model
+from django.db.models import QuerySet
+from django.test import TestCase
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from health_insurance.models import Company, HealthCoveragePlan, PlanSectorApplicability
+from health_insurance.views import HealthCoveragePlanViewSet
+
+User = get_user_model()
+
+
+class PlanApplicabilityTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='plans', email='plans@example.com', password='TestPass123!')
+        self.general = HealthCoveragePlan.objects.create(name='عامة', base_price_per_employee=700)
+        self.medical = HealthCoveragePlan.objects.create(name='صحية', base_price_per_employee=900, applicable_to='healthcare')
+        self.custom = HealthCoveragePlan.objects.create(
+            name='مخصصة', base_price_per_employee=800, applicable_to='custom', custom_sectors=['tech_software'],
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_matrix_rows_follow_plan_changes(self):
+        self.assertEqual(
+            PlanSectorApplicability.objects.filter(plan=self.general).count(), len(Company.SECTOR_CHOICES)
+        )
+        self.custom.custom_sectors = ['tech_software', 'retail_store']
+        self.custom.save()
+        self.assertEqual(
+            set(self.custom.sector_applicability.values_list('sector', flat=True)), {'tech_software', 'retail_store'}
+        )
+
+    def test_sector_filter_is_queryset(self):
+        view = HealthCoveragePlanViewSet()
+        view.request = Request(APIRequestFactory().get('/', {'sector': 'health_clinic'}))
+        queryset = view.get_queryset()
+        self.assertIsInstance(queryset, QuerySet)
+        self.assertEqual(list(queryset.values_list('id', flat=True)), [self.general.id, self.medical.id])
+        self.assertTrue(self.medical.is_applicable_to_company(Company(sector='health_clinic')))
+        self.assertFalse(self.medical.is_applicable_to_company(Company(sector='tech_software')))
+
+    def test_company_filter(self):
+        company = Company.objects.create(
+            user=self.user, name='شركة البرمجيات', sector='tech_software',
+            cr_number='CR-5001', address='صنعاء', phone='777000000', email='co@example.com',
+        )
+        compare = self.client.get('/api/health/health-coverage-plans/compare/', {'company_id': company.id})
+        self.assertEqual(compare.status_code, 200)
+        self.assertEqual([p['id'] for p in compare.json()['plans']], [self.general.id, self.custom.id])
@@ -0,0 +1,136 @@
+import json
+from datetime import date, timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from health_insurance.models import Company, HealthInsurancePolicy, HealthInsuranceQuote
+
+User = get_user_model()
+
+
+class PolicyFieldsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='policy_owner', email='owner@example.com', password='TestPass123!')
+        self.company = Company.objects.create(
+            user=self.user, name='شركة الوثائق', sector='tech_software', cr_number='CR-POL',
+            address='صنعاء', phone='777000000', email='co@example.com',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def make_quote(self, number, **fields):
+        return HealthInsuranceQuote.objects.create(
+            company=self.company, user=self.user, quote_number=number, **fields
+        )
+
+    def make_policy(self, quote, number, **fields):
+        return HealthInsurancePolicy.objects.create(
+            quote=quote, user=self.user, company=self.company, policy_number=number,
+            inception_date=date.today(), expiry_date=date.today() + timedelta(days=365), **fields
+        )
+
+    def test_accept_materializes_fields(self):
+        quote = self.make_quote('HQ-ACC', status='quoted', insured_employees_count=4, coverage_details={
+            'insurance_type': 'A', 'payment_method': 'monthly',
+            'family_members': {'spouses': 2, 'children': 3, 'parents': 1},
+        })
+        response = self.client.post(f'/api/health/health-insurance-quotes/{quote.id}/accept/')
+        self.assertEqual(response.status_code, 200)
+
+        policy = HealthInsurancePolicy.objects.get(quote=quote)
+        self.assertEqual(policy.insurance_type, 'A')
+        self.assertEqual(policy.payment_method, 'monthly')
+        self.assertEqual(policy.coverage_type, 'comprehensive')
+        self.assertEqual(policy.coverage_plan_name, 'التغطية الشاملة')
+        self.assertEqual(policy.family_counts, {'spouses': 2, 'children': 3, 'parents': 1})
+
+    def test_source_precedence(self):
+        quote = self.make_quote(
+            'HQ-PREC', notes=json.dumps({'insurance_type': 'C'}), coverage_details={'coverage_type': 'gold'},
+        )
+        policy = self.make_policy(
+            quote, 'HP-PREC',
+            family_members=json.dumps({'spouses': 1, 'children': 1}),
+            calculation_data={'family_data': {'children': 4}},
+            policy_details={'family_members': {'parents': '2'}, 'payment_method': 'quarterly'},
+        )
+        self.assertEqual(policy.insurance_type, 'C')  # من ملاحظات الاقتباس
+        self.assertEqual(policy.coverage_type, 'gold')  # من تفاصيل تغطية الاقتباس
+        self.assertEqual(policy.coverage_plan_name, 'التغطية الأساسية')
+        self.assertEqual(policy.payment_method, 'quarterly')
+        self.assertEqual(policy.family_counts, {'spouses': 1, 'children': 4, 'parents': 2})
+
+        policy.policy_details = {'insurance_type': 'B', 'coverage_plan_name': 'خطة خاصة'}
+        policy.save(update_fields=['policy_details'])
+        policy.refresh_from_db()
+        self.assertEqual(policy.insurance_type, 'B')
+        self.assertEqual(policy.coverage_plan_name, 'خطة خاصة')
+        self.assertEqual(policy.coverage_type, 'gold')
+
+    def test_direct_column_changes_are_kept(self):
+        policy = self.make_policy(self.make_quote('HQ-DIR', insurance_type='C'), 'HP-DIR')
+        self.assertEqual(policy.insurance_type, 'C')
+
+        policy.insurance_type = 'A'
+        policy.payment_method = 'monthly'
+        policy.family_members = {'children': 2}
+        policy.save(update_fields=['insurance_type', 'payment_method', 'family_members'])
+        policy.refresh_from_db()
+        self.assertEqual((policy.insurance_type, policy.payment_method), ('A', 'monthly'))
+        self.assertEqual(policy.coverage_plan_name, 'التغطية الشاملة')
+        self.assertEqual(policy.family_children, 2)
+
+        policy.save()
+        policy.refresh_from_db()
+        self.assertEqual(policy.insurance_type, 'A')
+
+        # قيمة مقصودة لوثيقة جديدة تسبق الاقتباس
+        other = self.make_policy(self.make_quote('HQ-DIR2', insurance_type='C'), 'HP-DIR2', insurance_type='A')
+        self.assertEqual(other.insurance_type, 'A')
+
+    def test_list_reads_columns_without_extra_queries(self):
+        def list_policies():
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get('/api/health/health-insurance-policies/')
+            self.assertEqual(response.status_code, 200)
+            return response, len(queries)
+
+        self.make_policy(self.make_quote('HQ-L0'), 'HP-L0', coverage_details={'insurance_type': 'A'})
+        _, single = list_policies()
+        for i in range(1, 6):
+            self.make_policy(self.make_quote(f'HQ-L{i}'), f'HP-L{i}', coverage_details={'insurance_type': 'C'})
+        response, many = list_policies()
+
+        self.assertEqual(single, many)
+        rows = {row['policy_number']: row for row in response.data}
+        self.assertEqual(rows['HP-L0']['insurance_type'], 'A')
+        self.assertEqual(rows['HP-L1']['coverage_type'], 'standard')
+        self.assertEqual(rows['HP-L1']['family_members'], {'spouses': 0, 'children': 0, 'parents': 0})
+        self.assertEqual(rows['HP-L1']['quote_number'], 'HQ-L1')
+
+    def test_backfill_command(self):
+        quote = self.make_quote('HQ-BF', insurance_type='C')
+        HealthInsurancePolicy.objects.bulk_create([
+            HealthInsurancePolicy(
+                quote=quote, user=self.user, company=self.company, policy_number=f'HP-BF{i}',
+                inception_date=date.today(), expiry_date=date.today() + timedelta(days=365),
+                coverage_details={'family_members': {'children': i}},
+            )
+            for i in range(5)
+        ])
+        self.assertFalse(HealthInsurancePolicy.objects.exclude(coverage_plan_name='').exists())
+
+        out = StringIO()
+        call_command('normalize_policy_fields', batch_size=2, stdout=out)
+        self.assertIn('5', out.getvalue())
+        self.assertEqual(
+            list(HealthInsurancePolicy.objects.order_by('policy_number').values_list('insurance_type', 'family_children')),
+            [('C', i) for i in range(5)],
+        )
+        self.assertFalse(HealthInsurancePolicy.objects.filter(coverage_plan_name='').exists())
@@ -0,0 +1,52 @@
+import itertools
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from health_insurance.calculations import calculate_health_premium, calculate_premium_surface
+from health_insurance.models import Company, HealthCoveragePlan
+
+User = get_user_model()
+
+
+class PremiumSurfaceTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='uw', email='uw@example.com', password='TestPass123!')
+        self.company = Company.objects.create(
+            user=self.user, name='شركة السيناريوهات', sector='tech_software', total_employees=20,
+            cr_number='CR-4001', address='صنعاء', phone='777000000', email='co@example.com',
+        )
+        self.basic = HealthCoveragePlan.objects.create(name='أساسي', plan_type='basic', base_price_per_employee=800)
+        self.premium = HealthCoveragePlan.objects.create(name='متميز', plan_type='premium', base_price_per_employee=1500)
+
+    def test_surface_matches_single_calculations(self):
+        variations = {'city': ['صنعاء', 'عدن'], 'risk_level': ['low', 'high'], 'insured_count': [5, 20]}
+        surface = calculate_premium_surface(self.company, self.basic, 20, variations, [self.basic, self.premium])
+        self.assertEqual(surface['shape'], [2, 2, 2, 2])
+
+        grid = surface['annual_premium']
+        for (p, plan), (n, count), (c, city), (r, risk) in itertools.product(
+            enumerate([self.basic, self.premium]), enumerate([5, 20]),
+            enumerate(['صنعاء', 'عدن']), enumerate(['low', 'high']),
+        ):
+            self.company.city, self.company.risk_level = city, risk
+            expected = calculate_health_premium(self.company, plan, count)['annual_premium']
+            self.assertEqual(grid[p][n][c][r], expected)
+
+        self.assertEqual(surface['min']['cell'], [0, 0, 0, 0])
+        self.assertEqual(surface['max']['cell'], [1, 1, 1, 1])
+
+    def test_unknown_dimension_rejected(self):
+        with self.assertRaises(ValueError):
+            calculate_premium_surface(self.company, self.basic, 10, {'colour': ['red']})
+
+    def test_what_if_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        resp = client.post(f'/api/health/companies/{self.company.id}/what-if/', {
+            'coverage_plan_id': self.basic.id,
+            'variations': {'coverage_plan_id': [self.basic.id, self.premium.id], 'work_environment': ['office', 'field', 'hazardous']},
+        }, format='json')
+        self.assertEqual(resp.status_code, 200, resp.data)
+        self.assertEqual(resp.data['surface']['shape'], [2, 1, 3])
@@ -0,0 +1,109 @@
+from datetime import date, timedelta
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from health_insurance.models import Company, HealthInsurancePolicy, HealthInsuranceQuote
+
+User = get_user_model()
+
+STATUSES = ['active', 'expired', 'pending', 'cancelled']
+
+
+@skipUnless(connection.vendor in ('postgresql', 'sqlite'), 'خطط الاستعلام مدعومة على PostgreSQL و SQLite فقط')
+class PolicyQuoteQueryPlanTests(TestCase):
+    """التأكد من أن استعلامات القوائم والتحذيرات والإحصائيات تستخدم الفهارس المخصصة لها"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            User.objects.create_user(username=f'user{i}', email=f'user{i}@example.com', password='TestPass123!')
+            for i in range(5)
+        ]
+        today = date.today()
+        for user in cls.users:
+            company = Company.objects.create(
+                user=user, name=f'شركة {user.username}', sector='tech_software',
+                cr_number=f'CR-{user.username}', address='صنعاء', phone='777000000', email='co@example.com',
+            )
+            quotes = HealthInsuranceQuote.objects.bulk_create([
+                HealthInsuranceQuote(
+                    company=company, user=user, quote_number=f'HQ-{user.id}-{i}',
+                    status=['draft', 'quoted', 'accepted', 'rejected'][i % 4],
+                )
+                for i in range(40)
+            ])
+            HealthInsurancePolicy.objects.bulk_create([
+                HealthInsurancePolicy(
+                    quote=quote, user=user, company=company, policy_number=f'HP-{quote.quote_number}',
+                    status=STATUSES[i % len(STATUSES)],
+                    inception_date=today - timedelta(days=365 - i * 9),
+                    expiry_date=today + timedelta(days=i * 9),
+                )
+                for i, quote in enumerate(quotes)
+            ])
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def assertUsesIndex(self, queryset, index_name):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                # الجداول صغيرة في الاختبار: نتحقق أن الفهرس قابل للاستخدام وليس أن المسح الكامل أرخص
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = queryset.explain()
+        # PostgreSQL: الفهرس المخطط له بالضبط. مخطط SQLite قد يختار أي فهرس مطابق،
+        # لذلك يُرفض هناك المسح الكامل للجدول فقط.
+        if connection.vendor == 'postgresql':
+            self.assertIn(index_name, plan, f'الفهرس {index_name} غير مستخدم:\n{plan}')
+        else:
+            self.assertRegex(plan, r'USING (COVERING )?INDEX \w+_idx', f'الفهرس {index_name} غير مستخدم:\n{plan}')
+
+    def test_user_policies_list(self):
+        user = self.users[0]
+        self.assertUsesIndex(
+            HealthInsurancePolicy.objects.filter(user=user).order_by('-created_at'), 'hpolicy_user_created_idx'
+        )
+
+    def test_user_expiring_policies(self):
+        today = date.today()
+        self.assertUsesIndex(
+            HealthInsurancePolicy.objects.filter(
+                user=self.users[0], status='active', expiry_date__range=[today, today + timedelta(days=30)]
+            ),
+            'hpolicy_user_active_exp_idx',
+        )
+
+    def test_all_expiring_policies(self):
+        today = date.today()
+        self.assertUsesIndex(
+            HealthInsurancePolicy.objects.filter(status='active', expiry_date__lte=today + timedelta(days=30)),
+            'hpolicy_active_exp_idx',
+        )
+
+    def test_admin_status_counts(self):
+        self.assertUsesIndex(
+            HealthInsurancePolicy.objects.filter(status='pending', created_at__gte=timezone.now() - timedelta(days=30)),
+            'hpolicy_status_created_idx',
+        )
+
+    def test_financial_report_range(self):
+        self.assertUsesIndex(
+            HealthInsurancePolicy.objects.filter(
+                created_at__range=[timezone.now() - timedelta(days=90), timezone.now()]
+            ),
+            'hpolicy_created_idx',
+        )
+
+    def test_user_pending_quotes(self):
+        self.assertUsesIndex(
+            HealthInsuranceQuote.objects.filter(user=self.users[0], status='quoted'), 'hquote_user_status_idx'
+        )
+
+    def test_user_recent_quotes(self):
+        self.assertUsesIndex(
+            HealthInsuranceQuote.objects.filter(user=self.users[0]).order_by('-created_at')[:5],
+            'hquote_user_created_idx',
+        )
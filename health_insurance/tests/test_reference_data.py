@@ -0,0 +1,56 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from health_insurance.models import Company, HealthCoveragePlan
+from health_insurance.services import reference_data
+
+User = get_user_model()
+
+
+class ReferenceDataTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='ref', email='ref@example.com', password='TestPass123!')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_sectors_payload_etag(self):
+        resp = self.client.get('/api/health/sectors-data/')
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn('max-age=', resp['Cache-Control'])
+        data = resp.json()
+        self.assertEqual(data['total_sectors'], len(Company.SECTOR_CHOICES))
+
+        # نفس الحمولة من مسار CompanyViewSet
+        same = self.client.get('/api/health/companies/sectors_data/')
+        self.assertEqual(same['ETag'], resp['ETag'])
+
+        cached = self.client.get('/api/health/sectors-data/', HTTP_IF_NONE_MATCH=resp['ETag'])
+        self.assertEqual(cached.status_code, 304)
+
+    def test_plan_comparison_invalidated_on_plan_change(self):
+        plan = HealthCoveragePlan.objects.create(name='قياسي', plan_type='standard', base_price_per_employee=1000)
+        url = '/api/health/health-coverage-plans/compare/'
+
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.json()['total_plans'], 1)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+
+        plan.base_price_per_employee = 1200
+        plan.save()
+        second = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second['ETag'], first['ETag'])
+        self.assertEqual(second.json()['plans'][0]['base_price'], 1200)
+
+    def test_plan_comparison_rejects_unknown_sector(self):
+        HealthCoveragePlan.objects.create(name='قياسي', plan_type='standard', base_price_per_employee=1000)
+        url = '/api/health/health-coverage-plans/compare/'
+        self.assertEqual(self.client.get(url, {'sector': 'tech_software'}).status_code, 200)
+        self.assertEqual(self.client.get(url, {'sector': 'x' * 50}).status_code, 400)
+        # القيم العشوائية لا تضيف حمولات في ذاكرة العملية
+        self.assertIn('plans:sector:tech_software', reference_data._payloads)
+        self.assertFalse([key for key in reference_data._payloads if 'xxx' in key])
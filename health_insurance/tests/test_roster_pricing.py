@@ -0,0 +1,64 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from health_insurance.models import Company, Employee, HealthInsuranceQuote
+from health_insurance.services.roster_pricing import calculate_roster_premium
+
+User = get_user_model()
+
+
+class RosterPricingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='hr', email='hr@example.com', password='TestPass123!')
+        self.company = Company.objects.create(
+            user=self.user, name='شركة الاختبار', sector='tech_software',
+            cr_number='CR-1001', address='صنعاء', phone='777000000', email='co@example.com',
+        )
+        self.add_employee('أحمد', age=35, marital_status='married', children_count=2, chronic_diseases=True)
+        self.add_employee('سارة', age=28, gender='female', include_parents=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def add_employee(self, name, age=30, gender='male', marital_status='single', **extra):
+        return Employee.objects.create(
+            company=self.company, name=name, age=age, gender=gender, marital_status=marital_status,
+            position='موظف', department='عام', base_salary=1000, **extra,
+        )
+
+    def test_breakdown_uses_aggregated_roster(self):
+        result = calculate_roster_premium(self.company.id, 'A', {'dental': True})
+        # موظفان + زوجة + طفلان + والدان
+        self.assertEqual(result['total_employees'], 2)
+        self.assertEqual(result['family_members'], {'spouses': 1, 'children': 2, 'parents': 2})
+        self.assertEqual(result['total_insured'], 7)
+        self.assertEqual(result['roster_summary']['chronic_count'], 1)
+        self.assertEqual(result['total_premium'], 7 * 1800 * 0.9 + 7 * 100)
+        self.assertFalse(result['cached'])
+
+    def test_cached_until_roster_changes(self):
+        calculate_roster_premium(self.company.id, 'B')
+        with self.assertNumQueries(0):
+            self.assertTrue(calculate_roster_premium(self.company.id, 'B')['cached'])
+
+        self.add_employee('خالد')
+        result = calculate_roster_premium(self.company.id, 'B')
+        self.assertFalse(result['cached'])
+        self.assertEqual(result['total_employees'], 3)
+
+    def test_advanced_calculate_server_mode(self):
+        url = '/api/health/advanced-calculate/'
+        payload = {'company_id': self.company.id, 'insurance_type': 'B', 'calculation_mode': 'server'}
+
+        preview = self.client.post(url, dict(payload, preview=True), format='json')
+        self.assertEqual(preview.status_code, 200)
+        self.assertEqual(HealthInsuranceQuote.objects.count(), 0)
+
+        resp = self.client.post(url, payload, format='json')
+        self.assertEqual(resp.status_code, 201)
+        quote = HealthInsuranceQuote.objects.get()
+        self.assertEqual(quote.insured_employees_count, 2)
+        self.assertEqual(float(quote.total_premium), preview.data['premium_breakdown']['total_premium'])
+        self.assertFalse(resp.data['quote_details']['calculated_in_frontend'])
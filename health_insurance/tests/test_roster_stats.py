@@ -0,0 +1,81 @@
+import pandas as pd
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from health_insurance.models import Company, CompanyRosterStats, Employee
+from health_insurance.services.roster_stats import get_roster_stats, rebuild_roster_stats
+from health_insurance.services.roster_sync import sync_company_roster
+
+User = get_user_model()
+
+COUNTERS = [
+    'total_employees', 'male_count', 'female_count', 'married_count', 'chronic_count',
+    'spouses_total', 'children_total', 'parents_total', 'age_total', 'salary_total',
+    'age_counts', 'dependents_counts', 'salary_buckets',
+]
+
+
+class RosterStatsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='hr', email='hr@example.com', password='TestPass123!')
+        self.company = Company.objects.create(
+            user=self.user, name='شركة الإحصائيات', sector='tech_software',
+            cr_number='CR-3001', address='صنعاء', phone='777000000', email='co@example.com',
+        )
+
+    def add_employee(self, name, age, salary, **extra):
+        return Employee.objects.create(
+            company=self.company, name=name, age=age, gender=extra.pop('gender', 'male'),
+            marital_status=extra.pop('marital_status', 'single'), position='موظف',
+            department='عام', base_salary=salary, **extra,
+        )
+
+    def assertMatchesRebuild(self):
+        stats = CompanyRosterStats.objects.get(company=self.company)
+        fresh = rebuild_roster_stats(self.company.id)
+        for field in COUNTERS:
+            self.assertEqual(getattr(stats, field), getattr(fresh, field), field)
+
+    def test_incremental_updates_match_full_rebuild(self):
+        get_roster_stats(self.company.id)
+        ahmed = self.add_employee('أحمد', 35, 60000, marital_status='married', children_count=2)
+        sara = self.add_employee('سارة', 28, 30000, gender='female', chronic_diseases=True)
+        self.add_employee('خالد', 62, 200000, include_parents=True)
+
+        ahmed.base_salary = 80000
+        ahmed.age = 36
+        ahmed.save()
+        sara.delete()
+
+        stats = CompanyRosterStats.objects.get(company=self.company)
+        self.assertEqual(stats.total_employees, 2)
+        self.assertEqual(stats.total_dependents, 1 + 2 + 2)
+        self.assertEqual(stats.age_distribution()['over_60'], 1)
+        self.assertEqual(stats.chronic_ratio, 0)
+        self.assertMatchesRebuild()
+
+    def test_salary_quantiles_are_close(self):
+        for i in range(100):
+            self.add_employee(f'موظف {i}', 30, 1000 * (i + 1))
+        stats = get_roster_stats(self.company.id)
+        # عرض الشريحة 25% فالخطأ محدود بها
+        self.assertAlmostEqual(stats.salary_quantile(0.5), 50000, delta=50000 * 0.25)
+        self.assertEqual(stats.salary_distribution(), {'low': 49, 'medium': 51, 'high': 0})
+
+    def test_bulk_sync_applies_single_delta(self):
+        get_roster_stats(self.company.id)
+        df = pd.DataFrame({
+            'الاسم_الكامل': ['أحمد', 'سارة'],
+            'الجنس': ['ذكر', 'أنثى'],
+            'الحالة_الاجتماعية': ['متزوج', 'أعزب'],
+            'الراتب': [1000, 900],
+            'الرقم_الوظيفي': ['E1', 'E2'],
+        })
+        sync_company_roster(self.company, df)
+        sync_company_roster(self.company, df.iloc[:1].assign(الراتب=[1500]))
+
+        stats = CompanyRosterStats.objects.get(company=self.company)
+        self.assertEqual(stats.total_employees, 1)
+        self.assertEqual(stats.spouses_total, 1)
+        self.assertEqual(stats.salary_total, 1500)
+        self.assertMatchesRebuild()
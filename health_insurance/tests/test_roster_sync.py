@@ -0,0 +1,95 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from health_insurance.models import Company, Employee
+from health_insurance.services.roster_pricing import get_roster_version
+
+User = get_user_model()
+
+HEADER = 'الاسم_الكامل,الجنس,الحالة_الاجتماعية,الراتب,عدد_الأبناء,الرقم_الوظيفي\n'
+
+
+class RosterSyncTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='hr', email='hr@example.com', password='TestPass123!')
+        self.company = Company.objects.create(
+            user=self.user, name='شركة المزامنة', sector='tech_software',
+            cr_number='CR-2001', address='صنعاء', phone='777000000', email='co@example.com',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = f'/api/health/companies/{self.company.id}/upload-employees/'
+
+    def upload(self, rows):
+        csv = (HEADER + ''.join(rows)).encode('utf-8')
+        resp = self.client.post(
+            self.url, {'employees_file': SimpleUploadedFile('employees.csv', csv, content_type='text/csv')},
+            format='multipart',
+        )
+        self.assertEqual(resp.status_code, 200, resp.data)
+        return resp.data
+
+    def test_reupload_only_touches_changed_rows(self):
+        first = self.upload([
+            'أحمد,ذكر,متزوج,1000,2,E1\n',
+            'سارة,أنثى,أعزب,900,0,E2\n',
+            'خالد,ذكر,أعزب,800,0,\n',
+        ])
+        self.assertEqual(first['changes'], {'created': 3, 'updated': 0, 'deleted': 0, 'unchanged': 0})
+        ahmed_id = Employee.objects.get(employee_number='E1').id
+        khaled_id = Employee.objects.get(name='خالد').id
+
+        # تعديل راتب E1، حذف E2، إضافة E3، وخالد بدون رقم لم يتغير
+        second = self.upload([
+            'أحمد,ذكر,متزوج,1500,2,E1\n',
+            'خالد,ذكر,أعزب,800,0,\n',
+            'منى,أنثى,متزوج,1200,1,E3\n',
+        ])
+        self.assertEqual(second['changes'], {'created': 1, 'updated': 1, 'deleted': 1, 'unchanged': 1})
+
+        ahmed = Employee.objects.get(employee_number='E1')
+        self.assertEqual(ahmed.id, ahmed_id)
+        self.assertEqual(float(ahmed.base_salary), 1500)
+        self.assertEqual(ahmed.children_count, 2)
+        self.assertEqual(Employee.objects.get(name='خالد').id, khaled_id)
+        self.assertFalse(Employee.objects.filter(employee_number='E2').exists())
+        self.assertEqual(Employee.objects.get(employee_number='E3').wives_count, 1)
+        self.company.refresh_from_db()
+        self.assertEqual(self.company.total_employees, 3)
+
+    def test_duplicate_employee_number_is_reported(self):
+        data = self.upload(['أحمد,ذكر,أعزب,1000,0,E1\n', 'أحمد,ذكر,أعزب,1000,0,E1\n'])
+        self.assertEqual(data['changes']['created'], 1)
+        self.assertEqual(len(data['errors']), 1)
+
+    def test_employees_without_row_hash_are_matched(self):
+        # موظفون من قبل عمود row_hash (أو أضيفوا خارج الرفع) بصمتهم فارغة
+        legacy = [
+            Employee.objects.create(
+                company=self.company, name='خالد', age=30, gender='male', marital_status='single',
+                position='', department='', base_salary=800,
+            ),
+            Employee.objects.create(
+                company=self.company, name='أحمد', age=30, gender='male', marital_status='married',
+                position='', department='', base_salary=1000, children_count=2, number_of_children=2,
+                employee_number='E1',
+            ),
+        ]
+        self.assertEqual(set(Employee.objects.values_list('row_hash', flat=True)), {''})
+        version = get_roster_version(self.company.id)
+
+        with mock.patch('health_insurance.signals.bump_roster_version') as signal_bump:
+            data = self.upload(['خالد,ذكر,أعزب,800,0,\n', 'أحمد,ذكر,متزوج,1000,2,E1\n', 'منى,أنثى,أعزب,900,0,\n'])
+        self.assertEqual(data['changes'], {'created': 1, 'updated': 0, 'deleted': 0, 'unchanged': 2})
+        self.assertEqual(
+            set(Employee.objects.filter(name__in=['خالد', 'أحمد']).values_list('id', flat=True)),
+            {employee.id for employee in legacy},
+        )
+        self.assertFalse(Employee.objects.filter(row_hash='').exists())
+        # رفع واحد للنسخة من المزامنة نفسها، لا رفع لكل صف من الإشارات
+        signal_bump.assert_not_called()
+        self.assertEqual(get_roster_version(self.company.id), version + 1)
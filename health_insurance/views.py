@@ -8,7 +8,6 @@ from rest_framework.views import APIView
 from django.shortcuts import get_object_or_404
 from django.db.models import Count, Sum, Avg, Min, Max
 from datetime import datetime, timedelta
-import uuid
 from django.utils import timezone
 from datetime import timedelta
 import time
@@ -19,7 +18,6 @@ from .services.universal_pricing_engine import UniversalPricingEngine
 from django.http import JsonResponse
 import json
 from django.conf import settings
-from django.db import transaction
 import io
 from decimal import Decimal
 from django.db import IntegrityError
@@ -34,6 +32,8 @@ from .models import (
     HealthInsurancePolicy,
     HealthCalculationLog,
     SectorPricingFactor,
+    generate_health_policy_number,
+    generate_health_quote_number,
 )
 from .serializers import (
     CompanySerializer,  # تغيير
@@ -42,12 +42,20 @@ from .serializers import (
     HealthInsuranceQuoteSerializer,
     HealthInsuranceQuoteCreateSerializer,
     HealthInsurancePolicySerializer,
-    HealthInsurancePolicySimpleSerializer,
     HealthPremiumCalculatorSerializer,
     HealthCalculationLogSerializer,
 )
 from .services.universal_pricing_engine import UniversalPricingEngine  # جديد
-from .calculations import calculate_health_premium, quick_health_calculator
+from .calculations import calculate_health_premium, quick_health_calculator, calculate_premium_surface
+from .services.roster_pricing import calculate_roster_premium
+from .services.roster_sync import sync_company_roster
+from .services.roster_stats import get_roster_stats
+from .services.calculation_log import log_calculation
+from .services.calculation_log_partitions import filter_log_window, parse_log_window
+from .services.dashboard_snapshot import get_dashboard_snapshot
+from .services.reference_data import get_plans_payload, get_sector_description, get_sectors_payload
+from .services import bulk_issuance
+from insurance.services.policy_expiry import expiring_policy_ids
 
 # ============= Company Views (بدلاً من HealthEstablishment) =============
 class CompanyViewSet(viewsets.ModelViewSet):
@@ -120,7 +128,7 @@ class CompanyViewSet(viewsets.ModelViewSet):
     def policies(self, request, pk=None):
         """الحصول على جميع وثائق الشركة"""
         company = self.get_object()
-        policies = HealthInsurancePolicy.objects.filter(company=company)
+        policies = HealthInsurancePolicy.objects.filter(company=company).select_related('company', 'quote', 'coverage_plan')
         serializer = HealthInsurancePolicySerializer(policies, many=True)
         return Response(serializer.data)
     
@@ -200,8 +208,8 @@ class CompanyViewSet(viewsets.ModelViewSet):
                 insured_count=insured_count
             )
         
-        # تسجيل الحساب
-        HealthCalculationLog.objects.create(
+        # تسجيل الحساب (غير متزامن)
+        log_calculation(
             user=request.user,
             company_sector=company.sector,
             company_size=company.size_category,
@@ -235,6 +243,58 @@ class CompanyViewSet(viewsets.ModelViewSet):
             ]
         })
     
+    @action(detail=True, methods=['post'], url_path='what-if')
+    def what_if(self, request, pk=None):
+        """
+        سطح الأقساط لشبكة من تغييرات العوامل (المدينة، المخاطر، الخطة، العدد...) في طلب واحد
+        """
+        company = self.get_object()
+        
+        coverage_plan_id = request.data.get('coverage_plan_id')
+        variations = dict(request.data.get('variations') or {})
+        plan_ids = variations.pop('coverage_plan_id', None)
+        
+        if not coverage_plan_id:
+            return Response(
+                {'error': 'معرف خطة التغطية مطلوب'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            coverage_plan = HealthCoveragePlan.objects.get(id=coverage_plan_id, is_active=True)
+        except HealthCoveragePlan.DoesNotExist:
+            return Response(
+                {'error': 'خطة التغطية غير موجودة أو غير نشطة'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        plans = None
+        if plan_ids:
+            plans_by_id = HealthCoveragePlan.objects.filter(id__in=plan_ids, is_active=True).in_bulk()
+            missing = [pid for pid in plan_ids if int(pid) not in plans_by_id]
+            if missing:
+                return Response(
+                    {'error': f'خطط غير موجودة أو غير نشطة: {missing}'},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            plans = [plans_by_id[int(pid)] for pid in plan_ids]
+        
+        try:
+            insured_count = int(request.data.get('insured_employees', company.total_employees))
+            surface = calculate_premium_surface(company, coverage_plan, insured_count, variations, plans)
+        except (ValueError, TypeError) as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        return Response({
+            'success': True,
+            'company_id': company.id,
+            'coverage_plan_id': coverage_plan.id,
+            'surface': surface
+        })
+    
     @action(detail=True, methods=['post'], url_path='upload-employees')
     def upload_employees(self, request, pk=None):
         """
@@ -280,147 +340,35 @@ class CompanyViewSet(viewsets.ModelViewSet):
                     'available_columns': list(df.columns)
                 }, status=status.HTTP_400_BAD_REQUEST)
 
-            employees_created = 0
-            errors = []
-
-            with transaction.atomic():
-                Employee.objects.filter(company=company).delete()
-                for index, row in df.iterrows():
-                    try:
-                        # 🔹 البيانات الأساسية
-                        name = str(row['الاسم_الكامل']).strip()
-                        gender_raw = str(row['الجنس']).strip()
-                        marital_raw = str(row['الحالة_الاجتماعية']).strip()
-                        salary = float(row['الراتب']) if pd.notna(row['الراتب']) else 0
-
-                        # 🔹 تحويل الجنس
-                        gender = 'male' if gender_raw == 'ذكر' else 'female'
+            # 🔹 مزامنة الموظفين مع الملف (إنشاء/تحديث/حذف المتغير فقط)
+            changes = sync_company_roster(company, df)
+            errors = changes.pop('errors')
+            employees_created = changes['created']
+            print(f"✅ مزامنة الموظفين: {changes}")
 
-                        # 🔹 تحويل الحالة الاجتماعية
-                        marital_status = 'married' if marital_raw == 'متزوج' else 'single'
-
-                        # 🔹 حساب العمر
-                        age = 30
-                        if 'تاريخ_الميلاد' in df.columns and pd.notna(row.get('تاريخ_الميلاد')):
-                            try:
-                                birth = pd.to_datetime(row['تاريخ_الميلاد'])
-                                today = pd.Timestamp.today()
-                                age = today.year - birth.year
-                            except:
-                                age = 30
-
-                        # 🔹 عدد الأبناء
-                        children_count = 0
-                        if 'عدد_الأبناء' in df.columns and pd.notna(row.get('عدد_الأبناء')):
-                            try:
-                                children_count = int(float(row['عدد_الأبناء']))
-                            except:
-                                children_count = 0
-                        
-                        # 🔹 عدد الزوجات - مهم جداً!
-                        wives_count = 0
-                        if 'عدد_الزوجات' in df.columns and pd.notna(row.get('عدد_الزوجات')):
-                            try:
-                                wives_raw = str(row['عدد_الزوجات']).strip()
-                                # تحويل القيم المختلفة
-                                if wives_raw == '':
-                                    wives_count = 0
-                                else:
-                                    wives_count = int(float(row['عدد_الزوجات']))
-                            except:
-                                wives_count = 0
-                            
-                        # إذا كان متزوجاً ولم يُدخل عدد زوجات، نفترض زوجة واحدة
-                        if marital_status == 'married' and wives_count == 0:
-                            wives_count = 1
-                        
-                        # 🔹 عدد الوالدين - مهم جداً!
-                        parents_count = 0
-                        if 'عدد_الوالدان' in df.columns and pd.notna(row.get('عدد_الوالدان')):
-                            try:
-                                parents_raw = str(row['عدد_الوالدان']).strip()
-                                if parents_raw == '':
-                                    parents_count = 0
-                                else:
-                                    parents_count = int(float(row['عدد_الوالدان']))
-                            except:
-                                parents_count = 0
-
-                        # 🔹 يشمل الوالدين
-                        include_parents = False
-                        if 'يشمل_الوالدين' in df.columns and pd.notna(row.get('يشمل_الوالدين')):
-                            include_value = str(row['يشمل_الوالدين']).strip().lower()
-                            include_parents = include_value in ['نعم', 'yes', 'true', '1']
-
-                        # 🔹 الأمراض المزمنة
-                        chronic_diseases = False
-                        if 'الأمراض_المزمنة' in df.columns and pd.notna(row.get('الأمراض_المزمنة')):
-                            chronic_value = str(row['الأمراض_المزمنة']).strip().lower()
-                            chronic_diseases = chronic_value in ['نعم', 'yes', 'true', '1']
-
-                        # 🔹 الرقم الوظيفي
-                        employee_number = ''
-                        if 'الرقم_الوظيفي' in df.columns and pd.notna(row.get('الرقم_الوظيفي')):
-                            employee_number = str(row['الرقم_الوظيفي']).strip()
-
-
-                        # 🔹 إنشاء الموظف (فقط الحقول الموجودة في المودل)
-                        Employee.objects.create(
-                            company=company,
-                            name=name,
-                            gender=gender,
-                            marital_status=marital_status,
-                            age=age,
-                            base_salary=salary,
-                            number_of_children=children_count,
-                            employee_number=str(row.get('الرقم_الوظيفي', '')).strip(),
-                            wives_count=wives_count,  # ✅ حفظ عدد الزوجات
-                            parents_count=parents_count,  # ✅ حفظ عدد الوالدين
-                            include_parents=include_parents,  # ✅ حفظ يشمل الوالدين
-                            chronic_diseases=chronic_diseases,  # ✅ حفظ الأمراض المزمنة
-                            insurance_profile={
-                                'uploaded_from_excel': True,
-                                'excel_row': index + 2,
-                                'original_data': {
-                                    'الاسم': name,
-                                    'الجنس': gender_raw,
-                                    'الحالة': marital_raw,
-                                    'عدد_الزوجات_الأصلي': str(row.get('عدد_الزوجات', '')),
-                                    'عدد_الوالدان_الأصلي': str(row.get('عدد_الوالدان', '')),
-                                    'يشمل_الوالدين_الأصلي': str(row.get('يشمل_الوالدين', ''))
-                                }
-                            }
-                        )
-
-                        employees_created += 1
-                        print(f"✅ موظف محفوظ: {name} - زوجات: {wives_count} - والدين: {parents_count}")
-
-                    except Exception as e:
-                        errors.append({
-                            'row': index + 2,
-                            'name': name if 'name' in locals() else 'غير معروف',
-                            'error': str(e)
-                        })
-                        print(f"❌ خطأ في الصف {index + 2}: {e}")
-
-            # 🔹 تحديث عدد الموظفين
-            company.total_employees = Employee.objects.filter(company=company).count()
+            # 🔹 تحديث عدد الموظفين (من الإحصائيات المحدثة تدريجياً)
+            roster_stats = get_roster_stats(company.id)
+            company.total_employees = roster_stats.total_employees
             company.save()
 
             return Response({
                 'success': True,
-                'message': f'تم رفع {employees_created} موظف بنجاح',
+                'message': (
+                    f"تمت مزامنة الموظفين: {changes['created']} جديد، "
+                    f"{changes['updated']} محدث، {changes['deleted']} محذوف"
+                ),
                 'employees_created': employees_created,
                 'total_employees': company.total_employees,
+                'changes': changes,
                 'errors': errors if errors else [],
                 'statistics': {
                     'total_processed': len(df),
-                    'male_count': len(df[df['الجنس'] == 'ذكر']),
-                    'female_count': len(df[df['الجنس'] == 'أنثى']),
-                    'married_count': len(df[df['الحالة_الاجتماعية'] == 'متزوج']),
-                    'total_children': df['عدد_الأبناء'].sum() if 'عدد_الأبناء' in df.columns else 0,
-                    'total_wives': df['عدد_الزوجات'].sum() if 'عدد_الزوجات' in df.columns else 0,
-                    'total_parents': df['عدد_الوالدان'].sum() if 'عدد_الوالدان' in df.columns else 0,
+                    'male_count': roster_stats.male_count,
+                    'female_count': roster_stats.female_count,
+                    'married_count': roster_stats.married_count,
+                    'total_children': roster_stats.children_total,
+                    'total_wives': roster_stats.spouses_total,
+                    'total_parents': roster_stats.parents_total,
                     'include_parents_count': len(df[df['يشمل_الوالدين'] == 'نعم']) if 'يشمل_الوالدين' in df.columns else 0
                 }
             })
@@ -433,6 +381,20 @@ class CompanyViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    @action(detail=True, methods=['get'], url_path='roster-stats')
+    def roster_stats(self, request, pk=None):
+        """
+        إحصائيات موظفي الشركة (أعداد، توزيع الأعمار والمعالين، شرائح الرواتب، نسبة الأمراض المزمنة)
+        """
+        company = self.get_object()
+        stats = get_roster_stats(company.id)
+        return Response({
+            'success': True,
+            'company_id': company.id,
+            'statistics': stats.as_analysis(),
+            'updated_at': stats.updated_at
+        })
+
     @action(detail=True, methods=['get'], url_path='employees')
     def employees(self, request, pk=None):
         """
@@ -645,31 +607,8 @@ class CompanyViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def sectors_data(self, request):
-        """الحصول على بيانات القطاعات"""
-        # مجموعات القطاعات
-        groups = dict(Company.SECTOR_GROUPS)
-        
-        # جميع القطاعات
-        sectors = []
-        for value, label in Company.SECTOR_CHOICES:
-            group = value.split('_')[0]
-            sectors.append({
-                'value': value,
-                'label': label,
-                'group': group,
-                'description': self._get_sector_description(value)
-            })
-        
-        # الحقول الخاصة بكل قطاع
-        sector_fields = {}
-        for sector in Company.SECTOR_SPECIFIC_FIELDS:
-            sector_fields[sector] = Company.SECTOR_SPECIFIC_FIELDS[sector]
-        
-        return Response({
-            'groups': groups,
-            'sectors': sectors,
-            'sector_fields': sector_fields
-        })
+        """الحصول على بيانات القطاعات (حمولة جاهزة مع ETag)"""
+        return get_sectors_payload().response(request)
     
     def _validate_employees_file(self, file_path):
         """التحقق من صحة ملف الموظفين"""
@@ -737,17 +676,7 @@ class CompanyViewSet(viewsets.ModelViewSet):
     
     def _get_sector_description(self, sector):
         """الحصول على وصف القطاع"""
-        descriptions = {
-            'health_hospital': 'مؤسسة طبية توفر رعاية صحية شاملة ومتخصصة',
-            'tech_software': 'شركة متخصصة في تطوير البرمجيات والحلول التقنية',
-            'construction_civil': 'شركة مقاولات تنفذ مشاريع إنشائية وبنية تحتية',
-            'security_guarding': 'شركة توفر خدمات حراسة أمنية وحماية للمنشآت',
-            'retail_store': 'متجر يبيع منتجات للمستهلكين مباشرة',
-            'education_school': 'مؤسسة تعليمية تقدم التعليم النظامي',
-            'manufacturing_food': 'مصنع ينتج مواد غذائية ومعالجة',
-            'services_logistics': 'شركة متخصصة في الشحن والتوزيع واللوجستيات',
-        }
-        return descriptions.get(sector, 'شركة في هذا القطاع')
+        return get_sector_description(sector)
     
     def _get_client_ip(self, request):
         """الحصول على عنوان IP الخاص بالعميل"""
@@ -816,87 +745,30 @@ class HealthCoveragePlanViewSet(viewsets.ReadOnlyModelViewSet):
         sector = self.request.query_params.get('sector')
         company_id = self.request.query_params.get('company_id')
         
-        if sector:
-            filtered_plans = []
-            for plan in queryset:
-                # محاكاة كائن شركة للتحقق
-                class MockCompany:
-                    def __init__(self, sector_value):
-                        self.sector = sector_value
-                        self.is_healthcare_sector = sector_value.startswith('health_')
-                        self.work_environment = 'office'  # قيمة افتراضية
-                        self.is_high_risk_sector = any(sector_value.startswith(risk) 
-                        for risk in ['construction', 'manufacturing', 'security_guarding'])
-                        self.risk_level = 'medium'
-                
-                mock_company = MockCompany(sector)
-                if plan.is_applicable_to_company(mock_company):
-                    filtered_plans.append(plan)
-            return filtered_plans
+        if not sector and company_id:
+            sector = Company.objects.filter(id=company_id, user=self.request.user).values_list(
+                'sector', flat=True
+            ).first()
         
-        elif company_id:
-            try:
-                company = Company.objects.get(id=company_id, user=self.request.user)
-                filtered_plans = [plan for plan in queryset if plan.is_applicable_to_company(company)]
-                return filtered_plans
-            except Company.DoesNotExist:
-                return queryset
+        if sector:
+            # ربط واحد مع جدول الأهلية المفهرس (قطاع، خطة)
+            queryset = queryset.filter(sector_applicability__sector=sector)
         
         return queryset
     
     @action(detail=False, methods=['get'])
     def compare(self, request):
-        """مقارنة خطط التغطية"""
-        plans = self.get_queryset()
-        
-        comparison_data = []
-        for plan in plans:
-            comparison_data.append({
-                'id': plan.id,
-                'name': plan.name,
-                'type': plan.get_plan_type_display,
-                'base_price': float(plan.base_price_per_employee),
-                'limits': {
-                    'outpatient': float(plan.outpatient_limit),
-                    'inpatient': float(plan.inpatient_limit),
-                    'dental': float(plan.dental_limit),
-                    'optical': float(plan.optical_limit),
-                    'emergency': float(plan.emergency_limit),
-                    'work_accident': float(plan.work_accident_limit) if plan.includes_work_accidents else 0
-                },
-                'coverage': {
-                    'outpatient': plan.outpatient_coverage,
-                    'inpatient': plan.inpatient_coverage,
-                    'dental': plan.dental_coverage,
-                    'optical': plan.optical_coverage,
-                    'work_accident': plan.work_accident_coverage if plan.includes_work_accidents else 0
-                },
-                'features': {
-                    'preventive_care': plan.includes_preventive_care,
-                    'chronic_medication': plan.includes_chronic_medication,
-                    'work_accidents': plan.includes_work_accidents,
-                    'occupational_diseases': plan.includes_occupational_diseases
-                },
-                'applicable_to': plan.get_applicable_to_display()
-            })
-        
-        return Response({
-            'plans': comparison_data,
-            'total_plans': len(comparison_data),
-            'recommendation': self._get_recommendation(comparison_data)
-        })
-    
-    def _get_recommendation(self, plans):
-        """توصية بأفضل خطة"""
-        if not plans:
-            return "لا توجد خطط متاحة"
-        
-        # توصية حسب السعر والتغطية
-        balanced_plans = [p for p in plans if p['type'] == 'قياسي']
-        if balanced_plans:
-            return f"الخطة القياسية توفر أفضل قيمة مقابل السعر"
-        
-        return f"نوصي بخطة {plans[0]['name']} كبداية جيدة"
+        """مقارنة خطط التغطية (حمولة جاهزة تُبطل عند تعديل الخطط)"""
+        variant = request.query_params.get('sector') or 'all'
+        # القطاع جزء من مفتاح الحمولة المخزنة في العملية: قيم القائمة فقط
+        if variant != 'all' and variant not in dict(Company.SECTOR_CHOICES):
+            return Response({'error': 'قطاع غير معروف'}, status=status.HTTP_400_BAD_REQUEST)
+        company_id = request.query_params.get('company_id')
+        if company_id and variant == 'all':
+            variant = Company.objects.filter(id=company_id, user=request.user).values_list(
+                'sector', flat=True
+            ).first() or 'all'
+        return get_plans_payload(self.get_queryset(), variant=f'sector:{variant}').response(request)
 
 # ============= Health Insurance Quote Views =============
 class HealthInsuranceQuoteViewSet(viewsets.ModelViewSet):
@@ -914,6 +786,39 @@ class HealthInsuranceQuoteViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
     
+    @action(detail=False, methods=['post'], url_path='bulk-accept')
+    def bulk_accept(self, request):
+        """قبول عدة اقتباسات وإصدار وثائقها في معاملة واحدة (quote_ids: قائمة معرفات)"""
+        quote_ids = request.data.get('quote_ids')
+        if not isinstance(quote_ids, list) or not quote_ids:
+            return Response({'error': 'quote_ids يجب أن تكون قائمة غير فارغة'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            quote_ids = [int(quote_id) for quote_id in quote_ids]
+        except (TypeError, ValueError):
+            return Response({'error': 'معرفات الاقتباسات يجب أن تكون أرقاماً صحيحة'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(quote_ids) > bulk_issuance.MAX_BULK_QUOTES:
+            return Response(
+                {'error': f'الحد الأقصى {bulk_issuance.MAX_BULK_QUOTES} اقتباس في الطلب الواحد'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        policies, skipped = bulk_issuance.issue_policies(request.user, quote_ids)
+        return Response({
+            'success': True,
+            'issued_count': len(policies),
+            'policies': [
+                {
+                    'id': policy.id,
+                    'quote_id': policy.quote_id,
+                    'policy_number': policy.policy_number,
+                    'total_premium': float(policy.total_premium),
+                    'status': policy.status,
+                }
+                for policy in policies
+            ],
+            'skipped_quote_ids': skipped,
+        }, status=status.HTTP_201_CREATED if policies else status.HTTP_200_OK)
+
     # health_insurance/views.py - Updated accept method
     @action(detail=True, methods=['post'])
     def accept(self, request, pk=None):
@@ -953,7 +858,7 @@ class HealthInsuranceQuoteViewSet(viewsets.ModelViewSet):
                 'user': quote.user,
                 
                 # Basic info
-                'policy_number': f"HP-{uuid.uuid4().hex[:8].upper()}",
+                'policy_number': generate_health_policy_number(),
                 'insurance_type': insurance_type,
                 'payment_method': payment_method,
                 'total_employees': total_employees,
@@ -1139,7 +1044,9 @@ class HealthInsurancePolicyViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         # الحصول على وثائق المستخدم
-        return HealthInsurancePolicy.objects.filter(user=self.request.user).order_by('-created_at')
+        return HealthInsurancePolicy.objects.filter(user=self.request.user).select_related(
+            'company', 'quote', 'coverage_plan'
+        ).order_by('-created_at')
     
     @action(detail=True, methods=['get'])
     def generate_certificate(self, request, pk=None):
@@ -1209,15 +1116,8 @@ class HealthInsurancePolicyViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def expiring_soon(self, request):
-        """الوثائق التي على وشك الانتهاء"""
-        from datetime import date, timedelta
-        today = date.today()
-        next_month = today + timedelta(days=30)
-        
-        expiring_policies = self.get_queryset().filter(
-            status='active',
-            expiry_date__range=[today, next_month]
-        )
+        """الوثائق التي على وشك الانتهاء (المجموعة يحسبها مجدول الانتهاء مسبقاً)"""
+        expiring_policies = self.get_queryset().filter(pk__in=expiring_policy_ids(request.user, 'health'))
         serializer = self.get_serializer(expiring_policies, many=True)
         return Response(serializer.data)
     
@@ -1831,13 +1731,12 @@ class HealthPremiumCalculatorView(APIView):
             # احتساب القسط
             calculation_result = serializer.calculate_premium()
             
-            # تسجيل الحساب
-            HealthCalculationLog.objects.create(
+            # تسجيل الحساب (غير متزامن)
+            log_calculation(
                 user=request.user,
                 company_sector=serializer.validated_data.get('sector', 'other'),
                 company_size=serializer.validated_data.get('size_category', 'small'),
                 employee_count=serializer.validated_data['employee_count'],
-                dependents_count=serializer.validated_data.get('dependents_count', 0),
                 coverage_plan_name='حاسبة سريعة',
                 calculated_premium=calculation_result['total_premium'],
                 factors_used=calculation_result['factors'],
@@ -1853,13 +1752,18 @@ class HealthPremiumCalculatorView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
     def get(self, request):
-        """الحصول على إحصائيات الحسابات"""
-        user_calculations = HealthCalculationLog.objects.filter(user=request.user)
+        """الحصول على إحصائيات الحسابات (ضمن نافذة زمنية: from / to أو months)"""
+        try:
+            start, end = parse_log_window(request.query_params)
+        except ValueError as e:
+            return Response({'success': False, 'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        user_calculations = filter_log_window(HealthCalculationLog.objects.filter(user=request.user), start, end)
         
         stats = {
+            'period': {'from': start, 'to': end},
             'total_calculations': user_calculations.count(),
             'average_premium': float(user_calculations.aggregate(Avg('calculated_premium'))['calculated_premium__avg'] or 0),
-            'company_sectors': list(user_calculations.values('company_sector').annotate(
+            'company_sectors': list(user_calculations.order_by().values('company_sector').annotate(
                 count=Count('id'),
                 avg_premium=Avg('calculated_premium')
             )),
@@ -1925,95 +1829,15 @@ class HealthInsuranceDashboardView(APIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
-        """الحصول على بيانات لوحة التحكم"""
-        # البيانات الأساسية
-        companies = Company.objects.filter(user=request.user)
-        quotes = HealthInsuranceQuote.objects.filter(user=request.user)
-        policies = HealthInsurancePolicy.objects.filter(user=request.user)
-        
-        # الاقتباسات الأخيرة
-        recent_quotes = HealthInsuranceQuoteSerializer(
-            quotes.order_by('-created_at')[:5], 
-            many=True
-        ).data
-        
-        # السياسات النشطة
-        active_policies = HealthInsurancePolicySerializer(
-            policies.filter(status='active').order_by('-created_at')[:5],
-            many=True
-        ).data
-        
-        # الإحصائيات السريعة
-        quick_stats = {
-            'companies_count': companies.count(),
-            'total_employees': companies.aggregate(Sum('total_employees'))['total_employees__sum'] or 0,
-            'quotes_count': quotes.count(),
-            'active_quotes': quotes.filter(status='quoted').count(),
-            'policies_count': policies.count(),
-            'active_policies': policies.filter(status='active').count(),
-            'total_premium': float(policies.aggregate(Sum('total_premium'))['total_premium__sum'] or 0),
-            'monthly_payment': float(
-                policies.filter(status='active').aggregate(Sum('monthly_premium'))['monthly_premium__sum'] or 0
-            )
-        }
-        
-        # التحذيرات والإشعارات
-        warnings = []
-        expiring_policies = policies.filter(status='active', expiry_date__lte=datetime.now().date() + timedelta(days=30))
-        if expiring_policies.exists():
-            warnings.append({
-                'type': 'warning',
-                'message': f'لديك {expiring_policies.count()} وثيقة على وشك الانتهاء',
-                'items': HealthInsurancePolicySimpleSerializer(expiring_policies, many=True).data
-            })
-        
-        pending_quotes = quotes.filter(status='quoted')
-        if pending_quotes.exists():
-            warnings.append({
-                'type': 'info',
-                'message': f'لديك {pending_quotes.count()} اقتباس بانتظار القرار',
-                'items': HealthInsuranceQuoteSerializer(pending_quotes[:3], many=True).data
-            })
-        
-        # النشاط الأخير
-        recent_activity = []
-        recent_calculations = HealthCalculationLog.objects.filter(
-            user=request.user
-        ).order_by('-created_at')[:5]
-        
-        for calc in recent_calculations:
-            recent_activity.append({
-                'type': 'calculation',
-                'message': f'حساب قسط لقطاع {calc.company_sector}',
-                'details': f'{calc.employee_count} موظف، القسط: {calc.calculated_premium} ريال',
-                'timestamp': calc.created_at,
-                'premium': float(calc.calculated_premium)
-            })
-        
-        # توزيع القطاعات
-        sector_distribution = list(companies.values('sector').annotate(
-            count=Count('id'),
-            total_employees=Sum('total_employees')
-        ))
-        
-        return Response({
-            'user': {
-                'name': request.user.get_full_name() or request.user.username,
-                'email': request.user.email
-            },
-            'quick_stats': quick_stats,
-            'sector_distribution': sector_distribution,
-            'recent_quotes': recent_quotes,
-            'active_policies': active_policies,
-            'warnings': warnings,
-            'recent_activity': recent_activity,
-            'next_actions': [
-                {'label': 'إنشاء شركة جديدة', 'url': '/api/companies/', 'method': 'POST'},
-                {'label': 'احتساب قسط جديد', 'url': '/api/health-premium/calculate/', 'method': 'POST'},
-                {'label': 'مشاهدة خطط التغطية', 'url': '/api/health-coverage-plans/', 'method': 'GET'},
-                {'label': 'تحميل تقرير', 'url': '/api/health-insurance/reports/?type=summary', 'method': 'GET'}
-            ]
-        })
+        """الحصول على بيانات لوحة التحكم (لقطة مخزنة لكل مستخدم مع ETag)"""
+        snapshot = get_dashboard_snapshot(request.user)
+        headers = {'ETag': snapshot['etag'], 'Cache-Control': 'private, no-cache'}
+
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH', '')
+        if snapshot['etag'] in [tag.strip() for tag in if_none_match.split(',')]:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        return Response(snapshot['data'], headers=headers)
 
 # ============= Health Calculation Log Views =============
 class HealthCalculationLogViewSet(viewsets.ReadOnlyModelViewSet):
@@ -2026,23 +1850,36 @@ class HealthCalculationLogViewSet(viewsets.ReadOnlyModelViewSet):
     
     @action(detail=False, methods=['get'])
     def statistics(self, request):
-        """إحصائيات الحسابات"""
-        calculations = self.get_queryset()
+        """إحصائيات الحسابات (ضمن نافذة زمنية: from / to أو months، لتقتصر على الأقسام المعنية)"""
+        try:
+            start, end = parse_log_window(request.query_params)
+        except ValueError as e:
+            return Response({'success': False, 'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        calculations = filter_log_window(self.get_queryset(), start, end)
+        totals = calculations.aggregate(
+            count=Count('id'),
+            first=Min('created_at'),
+            last=Max('created_at'),
+            min_premium=Min('calculated_premium'),
+            max_premium=Max('calculated_premium'),
+            avg_premium=Avg('calculated_premium'),
+        )
         
         stats = {
-            'total_calculations': calculations.count(),
-            'first_calculation': calculations.last().created_at if calculations.exists() else None,
-            'last_calculation': calculations.first().created_at if calculations.exists() else None,
-            'company_sectors': list(calculations.values('company_sector').annotate(
+            'period': {'from': start, 'to': end},
+            'total_calculations': totals['count'],
+            'first_calculation': totals['first'],
+            'last_calculation': totals['last'],
+            'company_sectors': list(calculations.order_by().values('company_sector').annotate(
                 count=Count('id'),
                 avg_premium=Avg('calculated_premium')
             )),
             'premium_range': {
-                'min': float(calculations.aggregate(Min('calculated_premium'))['calculated_premium__min'] or 0),
-                'max': float(calculations.aggregate(Max('calculated_premium'))['calculated_premium__max'] or 0),
-                'average': float(calculations.aggregate(Avg('calculated_premium'))['calculated_premium__avg'] or 0)
+                'min': float(totals['min_premium'] or 0),
+                'max': float(totals['max_premium'] or 0),
+                'average': float(totals['avg_premium'] or 0)
             },
-            'recent_activity': list(calculations.values('created_at__date').annotate(
+            'recent_activity': list(calculations.order_by().values('created_at__date').annotate(
                 count=Count('id')
             ).order_by('-created_at__date')[:7])
         }
@@ -2106,19 +1943,24 @@ class HealthInsuranceReportsView(APIView):
                 'active_policies': policies.filter(status='active').count(),
                 'total_premium': float(policies.aggregate(Sum('total_premium'))['total_premium__sum'] or 0)
             },
-            'calculations': {
-                'total': HealthCalculationLog.objects.filter(user=request.user).count(),
-                'average_premium': float(
-                    HealthCalculationLog.objects.filter(user=request.user).aggregate(
-                        Avg('calculated_premium')
-                    )['calculated_premium__avg'] or 0
-                )
-            },
+            'calculations': self._get_calculations_summary(request),
             'generated_at': datetime.now().isoformat()
         }
         
         return Response(report)
     
+    def _get_calculations_summary(self, request):
+        """ملخص الحسابات خلال مدة الاحتفاظ (استعلام واحد على الأقسام المعنية فقط)"""
+        start, end = parse_log_window({})
+        totals = filter_log_window(
+            HealthCalculationLog.objects.filter(user=request.user), start, end
+        ).aggregate(total=Count('id'), average_premium=Avg('calculated_premium'))
+        return {
+            'total': totals['total'],
+            'average_premium': float(totals['average_premium'] or 0),
+            'period': {'from': start.isoformat(), 'to': end.isoformat()}
+        }
+    
     def _get_company_report(self, request):
         """تقرير الشركات"""
         companies = Company.objects.filter(user=request.user)
@@ -2179,61 +2021,12 @@ class HealthInsuranceReportsView(APIView):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_sectors_data(request):
-    """الحصول على بيانات القطاعات"""
-    from .models import Company
-    
-    # مجموعات القطاعات
-    groups = {}
-    for value, _ in Company.SECTOR_CHOICES:
-        if '_' in value:
-            group = value.split('_')[0]
-            if group not in groups:
-                # تسمية المجموعات
-                group_labels = {
-                    'health': 'قطاع صحي',
-                    'tech': 'قطاع تكنولوجيا',
-                    'construction': 'قطاع مقاولات',
-                    'retail': 'قطاع تجارة',
-                    'services': 'قطاع خدمات'
-                }
-                groups[group] = group_labels.get(group, 'أخرى')
-    
-    # جميع القطاعات
-    sectors = []
-    for value, label in Company.SECTOR_CHOICES:
-        group = value.split('_')[0]
-        sectors.append({
-            'value': value,
-            'label': label,
-            'group': group,
-            'description': _get_sector_description(value)
-        })
-    
-    # الحقول الخاصة بكل قطاع
-    sector_fields = {}
-    for sector in Company.SECTOR_SPECIFIC_FIELDS:
-        sector_fields[sector] = Company.SECTOR_SPECIFIC_FIELDS[sector]
-    
-    return Response({
-        'success': True,
-        'groups': groups,
-        'sectors': sectors,
-        'total_sectors': len(sectors)
-    })
+    """الحصول على بيانات القطاعات (حمولة جاهزة مع ETag)"""
+    return get_sectors_payload().response(request)
 
 def _get_sector_description(sector):
     """الحصول على وصف القطاع (دالة مساعدة)"""
-    descriptions = {
-        'health_hospital': 'مؤسسة طبية توفر رعاية صحية شاملة ومتخصصة',
-        'tech_software': 'شركة متخصصة في تطوير البرمجيات والحلول التقنية',
-        'construction_civil': 'شركة مقاولات تنفذ مشاريع إنشائية وبنية تحتية',
-        'security_guarding': 'شركة توفر خدمات حراسة أمنية وحماية للمنشآت',
-        'retail_store': 'متجر يبيع منتجات للمستهلكين مباشرة',
-        'education_school': 'مؤسسة تعليمية تقدم التعليم النظامي',
-        'manufacturing_food': 'مصنع ينتج مواد غذائية ومعالجة',
-        'services_logistics': 'شركة متخصصة في الشحن والتوزيع واللوجستيات',
-    }
-    return descriptions.get(sector, 'شركة في هذا القطاع')
+    return get_sector_description(sector)
 
 def normalize_insurance_data(data):
     """
@@ -2281,13 +2074,6 @@ def normalize_insurance_data(data):
     
     return normalized
 
-def generate_quote_number_uuid():
-    """إنشاء رقم اقتباس فريد باستخدام UUID"""
-    timestamp = datetime.now().strftime('%Y%m%d')
-    unique_id = uuid.uuid4().hex[:8].upper()
-    return f"HQ-{timestamp}-{unique_id}"
-
-
 class AdvancedPremiumCalculationView(APIView):
     permission_classes = [IsAuthenticated]
     
@@ -2327,19 +2113,55 @@ class AdvancedPremiumCalculationView(APIView):
             calculation_data = data.get('calculation_data', {})
             employees_data = data.get('employees', [])
             
-            # 🔧 التحقق من وجود بيانات الحساب الأساسية
-            if not calculation_data or 'total_premium' not in calculation_data:
+            # 🔧 وضع الحساب: server = الحساب في الخادم من بيانات الموظفين المخزنة
+            calculation_mode = data.get('calculation_mode')
+            if calculation_mode is None:
+                calculation_mode = 'client' if calculation_data.get('total_premium') is not None else 'server'
+            
+            if calculation_mode == 'server':
+                try:
+                    calculation_data = calculate_roster_premium(
+                        company.id, insurance_type, coverage_options
+                    )
+                except ValueError as e:
+                    return Response({
+                        'success': False,
+                        'error': str(e)
+                    }, status=status.HTTP_400_BAD_REQUEST)
+                
+                if calculation_data['total_employees'] == 0:
+                    return Response({
+                        'success': False,
+                        'error': 'لا يوجد موظفون مسجلون لهذه الشركة. يرجى رفع ملف الموظفين أولاً'
+                    }, status=status.HTTP_400_BAD_REQUEST)
+                
+                family_members = calculation_data['family_members']
+                employees_count = calculation_data['total_employees']
+                print(f"🧮 حساب في الخادم (نسخة {calculation_data['roster_version']}, كاش: {calculation_data['cached']})")
+                
+                # معاينة فقط لإعادة الحساب التفاعلية بدون إنشاء اقتباس
+                if data.get('preview'):
+                    return Response({
+                        'success': True,
+                        'calculation_mode': 'server',
+                        'premium_breakdown': calculation_data
+                    })
+            elif not calculation_data or 'total_premium' not in calculation_data:
+                # 🔧 التحقق من وجود بيانات الحساب الأساسية
                 return Response({
                     'success': False,
                     'error': 'بيانات الحساب غير مكتملة. يرجى إعادة الحساب في Frontend'
                 }, status=status.HTTP_400_BAD_REQUEST)
+            else:
+                employees_count = len(employees_data)
             
             total_premium = calculation_data.get('total_premium', 0)
             base_premium = calculation_data.get('base_premium', 0)
             monthly_premium = total_premium / 12 if total_premium > 0 else 0
+            calculated_in_frontend = calculation_mode != 'server'
             
             # 🔧 إنشاء رقم الاقتباس
-            quote_number = generate_quote_number_uuid()
+            quote_number = generate_health_quote_number()
             print(f"✅ رقم الاقتباس المُولد: {quote_number}")
             
             # 🔧 إعداد تفاصيل التغطية
@@ -2353,9 +2175,9 @@ class AdvancedPremiumCalculationView(APIView):
                     'C': {'name': 'التغطية الأساسية', 'base_rate': 1200}
                 }.get(insurance_type, {}),
                 'family_members': family_members,
-                'employees_count': len(employees_data),
+                'employees_count': employees_count,
                 'calculation_summary': {
-                    'total_employees': len(employees_data),
+                    'total_employees': employees_count,
                     'total_family': family_members.get('spouses', 0) + 
                                     family_members.get('children', 0) + 
                                     family_members.get('parents', 0),
@@ -2370,7 +2192,7 @@ class AdvancedPremiumCalculationView(APIView):
                 company=company,  # ✅ Now company is defined!
                 user=request.user,
                 insurance_type=insurance_type,
-                insured_employees_count=len(employees_data),
+                insured_employees_count=employees_count,
                 coverage_period=365,
                 base_premium=Decimal(str(base_premium)),
                 total_premium=Decimal(str(total_premium)),
@@ -2381,14 +2203,15 @@ class AdvancedPremiumCalculationView(APIView):
                 status='pending',
                 valid_until=timezone.now() + timedelta(days=30),
                 notes=json.dumps({
-                    'source': 'advanced_calculator_frontend',
+                    'source': 'advanced_calculator_server' if not calculated_in_frontend else 'advanced_calculator_frontend',
                     'created_at': timezone.now().isoformat(),
                     'insurance_type': insurance_type,
                     'payment_method': payment_method,
-                    'total_employees': len(employees_data),
+                    'total_employees': employees_count,
                     'family_members': family_members,
                     'coverage_options': coverage_options,
-                    'message': 'تم الحساب بالكامل في Frontend بواسطة الآلة الحاسبة المتقدمة'
+                    'message': 'تم الحساب في الخادم من بيانات الموظفين المخزنة' if not calculated_in_frontend
+                               else 'تم الحساب بالكامل في Frontend بواسطة الآلة الحاسبة المتقدمة'
                 }, ensure_ascii=False)
             )
             
@@ -2396,7 +2219,7 @@ class AdvancedPremiumCalculationView(APIView):
             print(f"📊 تفاصيل الاقتباس:")
             print(f"   - الشركة: {company.name}")
             print(f"   - نوع التأمين: {insurance_type}")
-            print(f"   - عدد الموظفين: {len(employees_data)}")
+            print(f"   - عدد الموظفين: {employees_count}")
             print(f"   - القسط السنوي: ${total_premium}")
             print(f"   - القسط الشهري: ${monthly_premium}")
             print(f"   - أفراد العائلة: {family_members}")
@@ -2411,12 +2234,12 @@ class AdvancedPremiumCalculationView(APIView):
                     'company_id': company.id,
                     'insurance_type': insurance_type,
                     'insurance_type_name': self.get_insurance_type_name(insurance_type),
-                    'total_employees': len(employees_data),
+                    'total_employees': employees_count,
                     'annual_premium': float(quote.annual_premium),
                     'monthly_premium': float(quote.monthly_premium),
                     'status': quote.status,
                     'valid_until': quote.valid_until.isoformat(),
-                    'calculated_in_frontend': True,
+                    'calculated_in_frontend': calculated_in_frontend,
                     'family_members': family_members,
                     'coverage_options': coverage_options
                 },
@@ -2646,18 +2469,10 @@ class AdminViewSet(viewsets.ViewSet):
     
     @action(detail=False, methods=['get'])
     def system_logs(self, request):
-        """سجلات النظام"""
-        import logging
-        from django.core.paginator import Paginator
-        
-        # قراءة سجلات النظام
-        logs = []
-        try:
-            with open('logs/system.log', 'r') as f:
-                logs = f.readlines()[-100:]  # آخر 100 سطر
-        except:
-            logs = ["لا توجد سجلات متاحة"]
-        
+        """سجلات النظام (آخر 100 سطر من SYSTEM_LOG_FILE)"""
+        from saferatio.request_metrics import read_system_log
+
+        logs = read_system_log(100) or ["لا توجد سجلات متاحة"]
         return Response({'logs': logs})
 
         
\ No newline at end of file
@@ -1,3 +1,29 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import Notification, OutboundEmail, PolicyDueDate
+
+
+@admin.register(PolicyDueDate)
+class PolicyDueDateAdmin(admin.ModelAdmin):
+    list_display = ['policy_number', 'line', 'user', 'expiry_date', 'state', 'warned_at', 'expired_at']
+    list_filter = ['line', 'state']
+    search_fields = ['policy_number', 'user__username']
+    readonly_fields = ['updated_at']
+    raw_id_fields = ['user']
+
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ['title', 'user', 'kind', 'created_at', 'read_at']
+    list_filter = ['kind']
+    search_fields = ['title', 'message', 'user__username']
+    readonly_fields = ['created_at']
+    raw_id_fields = ['user']
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'kind', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at']
+    list_filter = ['status', 'kind']
+    search_fields = ['subject', 'to']
+    readonly_fields = ['created_at', 'sent_at', 'last_error']
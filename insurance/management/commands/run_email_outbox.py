@@ -0,0 +1,34 @@
+# insurance/management/commands/run_email_outbox.py
+from django.core.management.base import BaseCommand, CommandError
+
+from insurance.services.email_outbox import get_outbox_settings, run_sender, sender_stats
+
+
+class Command(BaseCommand):
+    help = 'مرسل البريد الصادر: يرسل رسائل صندوق الصادر على دفعات عبر اتصال واحد مع إعادة المحاولة'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='إرسال كل المستحق ثم الخروج (للتشغيل من cron)')
+        parser.add_argument('--interval', type=int, default=None, help='الثواني بين الدورات')
+        parser.add_argument('--batch-size', type=int, default=None, help='عدد الرسائل في كل اتصال')
+
+    def handle(self, *args, **options):
+        config = get_outbox_settings()
+        batch_size = options['batch_size'] or config['BATCH_SIZE']
+        interval = options['interval'] or config['INTERVAL_SECONDS']
+        if batch_size < 1 or interval < 1:
+            raise CommandError('--batch-size و --interval يجب أن يكونا 1 على الأقل')
+
+        if not options['once']:
+            self.stdout.write(f'📮 مرسل البريد يعمل كل {interval} ثانية')
+
+        def log(result):
+            stats = sender_stats()
+            self.stdout.write(
+                f"✉️ أُرسلت {result['sent']} رسالة، إعادة {result['retrying']}، فشل {result['failed']} "
+                f"({stats['messages_per_second']} رسالة/ث)"
+            )
+
+        result = run_sender(interval=interval, batch_size=batch_size, once=options['once'], log=log)
+        if options['once'] and not any(result.values()):
+            self.stdout.write('📭 لا توجد رسائل مستحقة')
@@ -0,0 +1,36 @@
+# insurance/management/commands/run_expiry_scheduler.py
+from django.core.management.base import BaseCommand, CommandError
+
+from insurance.services.policy_expiry import get_expiry_settings, rebuild_due_dates, run_scheduler
+
+
+class Command(BaseCommand):
+    help = 'مجدول انتهاء الوثائق: ينهي الوثائق المنتهية ويحذّر من القريبة من الانتهاء على دفعات'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='دورة واحدة ثم الخروج (للتشغيل من cron)')
+        parser.add_argument('--interval', type=int, default=None, help='الثواني بين الدورات')
+        parser.add_argument('--batch-size', type=int, default=None, help='عدد الوثائق في كل دفعة')
+        parser.add_argument('--rebuild', action='store_true', help='تعبئة الطابور من الوثائق النشطة الحالية أولاً')
+
+    def handle(self, *args, **options):
+        config = get_expiry_settings()
+        batch_size = options['batch_size'] or config['BATCH_SIZE']
+        interval = options['interval'] or config['INTERVAL_SECONDS']
+        if batch_size < 1 or interval < 1:
+            raise CommandError('--batch-size و --interval يجب أن يكونا 1 على الأقل')
+
+        if options['rebuild']:
+            total = rebuild_due_dates(batch_size=batch_size)
+            self.stdout.write(f'📅 تمت جدولة {total} وثيقة نشطة')
+
+        if not options['once']:
+            self.stdout.write(f'⏰ المجدول يعمل كل {interval} ثانية')
+        run_scheduler(
+            interval=interval,
+            batch_size=batch_size,
+            once=options['once'],
+            log=lambda result: self.stdout.write(
+                f"✅ انتهت {result['expired']} وثيقة، تحذير {result['warned']} وثيقة"
+            ),
+        )
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.8 on 2026-10-19 04:11
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Notification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('policy_expiring', 'وثيقة قريبة من الانتهاء'), ('policy_expired', 'وثيقة منتهية')], max_length=30)),
+                ('title', models.CharField(max_length=200)),
+                ('message', models.TextField()),
+                ('data', models.JSONField(blank=True, default=dict)),
+                ('read_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'insurance_notification',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['user', '-created_at'], name='notification_user_created_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='PolicyDueDate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('line', models.CharField(choices=[('health', 'تأمين صحي'), ('car', 'تأمين سيارات')], max_length=10)),
+                ('policy_id', models.BigIntegerField()),
+                ('policy_number', models.CharField(max_length=100)),
+                ('expiry_date', models.DateField()),
+                ('state', models.CharField(choices=[('scheduled', 'مجدولة'), ('expiring', 'قريبة من الانتهاء'), ('expired', 'منتهية')], default='scheduled', max_length=10)),
+                ('warned_at', models.DateTimeField(blank=True, null=True)),
+                ('expired_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'insurance_policy_due_date',
+                'indexes': [models.Index(condition=models.Q(('expired_at__isnull', True)), fields=['expiry_date'], name='due_date_pending_idx'), models.Index(condition=models.Q(('state', 'expiring')), fields=['user', 'line', 'expiry_date'], name='due_date_user_expiring_idx')],
+                'constraints': [models.UniqueConstraint(fields=('line', 'policy_id'), name='due_date_line_policy_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.8 on 2026-10-19 04:14
+
+from django.db import migrations, models
+
+# نسخة ثابتة من insurance.services.identifiers وقت كتابة الترحيل (لا تتغير مع الخدمة)
+SEQUENCE_KINDS = ['car_quote', 'car_policy', 'claim', 'health_quote', 'health_policy']
+
+
+def create_number_sequences(apps, schema_editor):
+    """تسلسلات أرقام الاقتباسات والوثائق في PostgreSQL (لا شيء في قواعد البيانات الأخرى)"""
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        for kind in SEQUENCE_KINDS:
+            cursor.execute(f'CREATE SEQUENCE IF NOT EXISTS {connection.ops.quote_name(f"insurance_number_{kind}_seq")}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('insurance', '0001_policy_due_dates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NumberSequence',
+            fields=[
+                ('name', models.CharField(max_length=30, primary_key=True, serialize=False)),
+                ('next_value', models.BigIntegerField(default=1)),
+            ],
+            options={
+                'db_table': 'insurance_number_sequence',
+            },
+        ),
+        migrations.RunPython(create_number_sequences, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,137 @@
+# insurance/models.py
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
-# Create your models here.
+
+class PolicyDueDate(models.Model):
+    """
+    طابور تواريخ انتهاء الوثائق النشطة (صحي وسيارات) يخدم مجدول الانتهاء
+
+    صف لكل وثيقة نشطة لها تاريخ انتهاء، يُحدَّث عند حفظ الوثيقة. المجدول ينقله من
+    scheduled إلى expiring عند دخوله فترة التحذير ثم إلى expired بعد انتهائه، فقراءة
+    "الوثائق القريبة من الانتهاء" تصبح بحثاً بالمستخدم والحالة بدل فحص مدى التواريخ.
+    """
+    LINES = (
+        ('health', 'تأمين صحي'),
+        ('car', 'تأمين سيارات'),
+    )
+    STATES = (
+        ('scheduled', 'مجدولة'),
+        ('expiring', 'قريبة من الانتهاء'),
+        ('expired', 'منتهية'),
+    )
+
+    line = models.CharField(max_length=10, choices=LINES)
+    policy_id = models.BigIntegerField()
+    policy_number = models.CharField(max_length=100)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, db_index=False)
+    expiry_date = models.DateField()
+    state = models.CharField(max_length=10, choices=STATES, default='scheduled')
+    warned_at = models.DateTimeField(null=True, blank=True)
+    expired_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'insurance_policy_due_date'
+        constraints = [
+            models.UniqueConstraint(fields=['line', 'policy_id'], name='due_date_line_policy_uniq'),
+        ]
+        indexes = [
+            # دفعات المجدول: الوثائق غير المنتهية حسب التاريخ (expired_at يُملأ مع حالة expired)
+            models.Index(
+                fields=['expiry_date'], name='due_date_pending_idx',
+                condition=models.Q(expired_at__isnull=True),
+            ),
+            # مجموعة "قريبة من الانتهاء" لكل مستخدم (expiring_soon، تحذيرات لوحة التحكم)
+            models.Index(
+                fields=['user', 'line', 'expiry_date'], name='due_date_user_expiring_idx',
+                condition=models.Q(state='expiring'),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.line}:{self.policy_number} ({self.expiry_date}, {self.state})"
+
+
+class Notification(models.Model):
+    """إشعار داخل التطبيق للمستخدم"""
+    KINDS = (
+        ('policy_expiring', 'وثيقة قريبة من الانتهاء'),
+        ('policy_expired', 'وثيقة منتهية'),
+    )
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, db_index=False)
+    kind = models.CharField(max_length=30, choices=KINDS)
+    title = models.CharField(max_length=200)
+    message = models.TextField()
+    data = models.JSONField(default=dict, blank=True)
+    read_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'insurance_notification'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='notification_user_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}: {self.title}"
+
+
+class NumberSequence(models.Model):
+    """
+    عداد أرقام الاقتباسات والوثائق والمطالبات (insurance/services/identifiers.py)
+
+    يُستخدم على قواعد البيانات التي لا تدعم SEQUENCE (SQLite في التطوير والاختبارات)؛
+    على PostgreSQL تُستخدم تسلسلات قاعدة البيانات نفسها.
+    """
+    name = models.CharField(max_length=30, primary_key=True)
+    next_value = models.BigIntegerField(default=1)
+
+    class Meta:
+        db_table = 'insurance_number_sequence'
+
+    def __str__(self):
+        return f"{self.name}: {self.next_value}"
+
+
+class OutboundEmail(models.Model):
+    """
+    صندوق البريد الصادر (insurance/services/email_outbox.py)
+
+    الطلب يضيف الرسالة فقط، والمرسل الخلفي (manage.py run_email_outbox) يرسلها على دفعات
+    عبر اتصال واحد ويعيد المحاولة بتأخير متزايد. نص الرسالة يُحذف بعد إرسالها لأنه قد يحمل
+    روابط استعادة أو كلمات مرور مؤقتة.
+    """
+    STATUSES = (
+        ('pending', 'بانتظار الإرسال'),
+        ('sent', 'أُرسلت'),
+        ('failed', 'فشلت'),
+    )
+
+    kind = models.CharField(max_length=30, blank=True)
+    to = models.JSONField(default=list)
+    from_email = models.CharField(max_length=254, blank=True)
+    subject = models.CharField(max_length=255)
+    body = models.TextField(blank=True)
+    status = models.CharField(max_length=10, choices=STATUSES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'insurance_outbound_email'
+        ordering = ['-created_at']
+        indexes = [
+            # دفعات المرسل: الرسائل المستحقة حسب موعد المحاولة
+            models.Index(fields=['next_attempt_at'], name='outbox_due_idx', condition=models.Q(status='pending')),
+            # معدل الإرسال في لوحة المسؤول
+            models.Index(fields=['sent_at'], name='outbox_sent_idx', condition=models.Q(status='sent')),
+        ]
+
+    def __str__(self):
+        return f"{self.kind or 'email'} → {', '.join(self.to)} ({self.status})"
@@ -0,0 +1,15 @@
+# insurance/serializers.py
+from rest_framework import serializers
+
+from .models import Notification
+
+
+class NotificationSerializer(serializers.ModelSerializer):
+    is_read = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Notification
+        fields = ['id', 'kind', 'title', 'message', 'data', 'is_read', 'read_at', 'created_at']
+
+    def get_is_read(self, obj):
+        return obj.read_at is not None
@@ -0,0 +1,218 @@
+# insurance/services/email_outbox.py
+"""
+صندوق البريد الصادر: الطلب يضيف الرسالة، والمرسل الخلفي يرسلها
+
+- enqueue_email / aenqueue_email بدل send_mail في الطلب: صف واحد في OutboundEmail،
+  فبطء خادم SMTP أو تعطله لا يظهر في زمن التسجيل أو استعادة كلمة المرور.
+- deliver_pending() (manage.py run_email_outbox كل INTERVAL_SECONDS) يحجز دفعة من الرسائل
+  المستحقة بـ select_for_update(skip_locked) فيعمل أكثر من مرسل دون تكرار، ثم يرسلها كلها
+  عبر اتصال واحد من EMAIL_BACKEND (SMTP، أو locmem/console في الاختبارات والتطوير).
+- الحجز يؤجل موعد المحاولة LEASE_SECONDS: إذا توقف المرسل أثناء الدفعة تعود الرسائل مستحقة.
+- فشل رسالة يؤجلها RETRY_BASE_SECONDS × 2^(المحاولات-1) (حتى RETRY_MAX_SECONDS)،
+  وبعد MAX_ATTEMPTS محاولة تصبح failed مع آخر خطأ.
+- outbox_metrics() للوحة المسؤول: حجم الطابور، عمر أقدم رسالة، معدل الإرسال وزمن الانتظار.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Avg, Count, DurationField, ExpressionWrapper, F, Min, Q
+from django.utils import timezone
+
+from ..models import OutboundEmail
+
+logger = logging.getLogger('saferatio.email')
+
+DEFAULTS = {
+    'BATCH_SIZE': 50,
+    'INTERVAL_SECONDS': 5,
+    'MAX_ATTEMPTS': 5,
+    'RETRY_BASE_SECONDS': 60,
+    'RETRY_MAX_SECONDS': 3600,
+    'LEASE_SECONDS': 300,
+}
+
+_stats = {'batches': 0, 'sent': 0, 'retrying': 0, 'failed': 0, 'send_seconds': 0.0}
+_stats_lock = threading.Lock()
+
+
+def get_outbox_settings():
+    return dict(DEFAULTS, **getattr(settings, 'EMAIL_OUTBOX', {}))
+
+
+def _fields(subject, body, to, from_email, kind):
+    return {
+        'kind': kind,
+        'to': list(to),
+        'from_email': from_email or settings.DEFAULT_FROM_EMAIL,
+        'subject': subject,
+        'body': body,
+    }
+
+
+def enqueue_email(subject, body, to, from_email=None, kind=''):
+    """إضافة رسالة لصندوق الصادر (نفس معاملات send_mail)"""
+    return OutboundEmail.objects.create(**_fields(subject, body, to, from_email, kind))
+
+
+async def aenqueue_email(subject, body, to, from_email=None, kind=''):
+    return await OutboundEmail.objects.acreate(**_fields(subject, body, to, from_email, kind))
+
+
+def retry_delay(attempts, config=None):
+    config = config or get_outbox_settings()
+    return min(config['RETRY_BASE_SECONDS'] * 2 ** max(attempts - 1, 0), config['RETRY_MAX_SECONDS'])
+
+
+def claim_batch(batch_size, now=None, lease_seconds=None):
+    """حجز دفعة من الرسائل المستحقة (تُحسب المحاولة عند الحجز)"""
+    now = now or timezone.now()
+    lease_seconds = lease_seconds or get_outbox_settings()['LEASE_SECONDS']
+    with transaction.atomic():
+        rows = list(
+            OutboundEmail.objects.select_for_update(skip_locked=True)
+            .filter(status='pending', next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'pk')[:batch_size]
+        )
+        if rows:
+            OutboundEmail.objects.filter(pk__in=[row.pk for row in rows]).update(
+                attempts=F('attempts') + 1, next_attempt_at=now + timezone.timedelta(seconds=lease_seconds),
+            )
+    for row in rows:
+        row.attempts += 1
+    return rows
+
+
+def send_batch(rows, connection=None):
+    """إرسال الرسائل عبر اتصال واحد؛ يعيد (المرسلة، [(الرسالة، الخطأ)])"""
+    connection = connection or get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as e:  # تعذر الاتصال بالخادم: كل الدفعة تُعاد لاحقاً
+        return [], [(row, e) for row in rows]
+
+    sent, errors = [], []
+    try:
+        for row in rows:
+            message = EmailMessage(row.subject, row.body, row.from_email or None, row.to, connection=connection)
+            try:
+                if message.send():
+                    sent.append(row)
+                else:
+                    errors.append((row, 'لم تُرسل الرسالة'))
+            except Exception as e:
+                errors.append((row, e))
+    finally:
+        try:
+            connection.close()
+        except Exception:
+            pass
+    return sent, errors
+
+
+def _record(sent, errors, now, config):
+    if sent:
+        OutboundEmail.objects.filter(pk__in=[row.pk for row in sent]).update(
+            status='sent', sent_at=now, body='', last_error='',
+        )
+    retrying = failed = 0
+    for row, error in errors:
+        if row.attempts >= config['MAX_ATTEMPTS']:
+            OutboundEmail.objects.filter(pk=row.pk).update(status='failed', last_error=str(error))
+            failed += 1
+        else:
+            OutboundEmail.objects.filter(pk=row.pk).update(
+                next_attempt_at=now + timezone.timedelta(seconds=retry_delay(row.attempts, config)),
+                last_error=str(error),
+            )
+            retrying += 1
+    return retrying, failed
+
+
+def deliver_pending(batch_size=None, now=None):
+    """دفعة واحدة من صندوق الصادر؛ يعيد {'sent', 'retrying', 'failed'}"""
+    config = get_outbox_settings()
+    now = now or timezone.now()
+    rows = claim_batch(batch_size or config['BATCH_SIZE'], now=now, lease_seconds=config['LEASE_SECONDS'])
+    if not rows:
+        return {'sent': 0, 'retrying': 0, 'failed': 0}
+
+    started = time.perf_counter()
+    sent, errors = send_batch(rows)
+    elapsed = time.perf_counter() - started
+    retrying, failed = _record(sent, errors, now, config)
+
+    with _stats_lock:
+        _stats['batches'] += 1
+        _stats['sent'] += len(sent)
+        _stats['retrying'] += retrying
+        _stats['failed'] += failed
+        _stats['send_seconds'] += elapsed
+    if errors:
+        logger.warning('email batch errors', extra={'data': {
+            'sent': len(sent), 'retrying': retrying, 'failed': failed, 'error': str(errors[0][1]),
+        }})
+    return {'sent': len(sent), 'retrying': retrying, 'failed': failed}
+
+
+def drain(batch_size=None, now=None):
+    """دفعات متتالية حتى لا يبقى مستحق؛ يعيد المجموع"""
+    batch_size = batch_size or get_outbox_settings()['BATCH_SIZE']
+    totals = {'sent': 0, 'retrying': 0, 'failed': 0}
+    while True:
+        result = deliver_pending(batch_size=batch_size, now=now)
+        for key in totals:
+            totals[key] += result[key]
+        if sum(result.values()) < batch_size:
+            return totals
+
+
+def sender_stats():
+    """عدادات المرسل في العملية الحالية (الرسائل/الثانية أثناء الإرسال الفعلي)"""
+    with _stats_lock:
+        stats = dict(_stats)
+    stats['send_seconds'] = round(stats['send_seconds'], 3)
+    stats['messages_per_second'] = round(stats['sent'] / stats['send_seconds'], 2) if stats['send_seconds'] else 0.0
+    return stats
+
+
+def run_sender(interval=None, batch_size=None, log=None, once=False):
+    interval = interval or get_outbox_settings()['INTERVAL_SECONDS']
+    while True:
+        result = drain(batch_size=batch_size)
+        if log and any(result.values()):
+            log(result)
+        if once:
+            return result
+        time.sleep(interval)
+
+
+def outbox_metrics(minutes=60, now=None):
+    """حالة صندوق الصادر من قاعدة البيانات (يشمل كل المرسلين)"""
+    now = now or timezone.now()
+    since = now - timezone.timedelta(minutes=minutes)
+    counts = dict(OutboundEmail.objects.values_list('status').annotate(count=Count('pk')).order_by())
+    pending = OutboundEmail.objects.filter(status='pending').aggregate(
+        due=Count('pk', filter=Q(next_attempt_at__lte=now)),
+        retrying=Count('pk', filter=Q(attempts__gt=0)),
+        oldest=Min('created_at'),
+    )
+    recent = OutboundEmail.objects.filter(status='sent', sent_at__gte=since).aggregate(
+        sent=Count('pk'),
+        wait=Avg(ExpressionWrapper(F('sent_at') - F('created_at'), output_field=DurationField())),
+    )
+    return {
+        'window_minutes': minutes,
+        'pending': counts.get('pending', 0),
+        'due': pending['due'],
+        'retrying': pending['retrying'],
+        'sent': counts.get('sent', 0),
+        'failed': counts.get('failed', 0),
+        'oldest_pending_seconds': round((now - pending['oldest']).total_seconds(), 1) if pending['oldest'] else None,
+        'sent_in_window': recent['sent'],
+        'sent_per_minute': round(recent['sent'] / minutes, 2) if minutes else 0.0,
+        'avg_queue_seconds': round(recent['wait'].total_seconds(), 2) if recent['wait'] is not None else None,
+    }
@@ -0,0 +1,137 @@
+# insurance/services/identifiers.py
+"""
+أرقام الاقتباسات والوثائق والمطالبات: تسلسلية، مقروءة، مع رقم تحقق
+
+الشكل: PREFIX-YY-NNNNNNN-C (مثال POL-26-0000042-3)
+- NNNNNNN من تسلسل خاص بكل نوع، فلا تتكرر الأرقام بين العمليات (بدل uuid4().hex[:8]
+  الذي يعطي 32 بت فقط ويصطدم بقيود unique مع تزايد الحجم)
+- YY سنة الإصدار للقراءة فقط (التسلسل لا يُصفَّر سنوياً)
+- C رقم تحقق Luhn على أرقام YY+NNNNNNN يكشف أخطاء الإدخال اليدوي (is_valid_number)
+
+على PostgreSQL تُستخدم تسلسلات قاعدة البيانات (nextval خارج المعاملة ولا يُقفل شيئاً)،
+وتحجز كل عملية كتلة من BLOCK_SIZE رقماً بطلب واحد وتوزعها من الذاكرة. الأرقام المحجوزة
+التي لم تُستخدم عند إيقاف العملية تضيع (فجوات مقبولة).
+على قواعد البيانات الأخرى (SQLite) يُستخدم جدول NumberSequence داخل المعاملة الحالية بدون كتل،
+حتى لا تعيد ذاكرة العملية أرقاماً تراجعت عنها المعاملة.
+
+reserve_numbers(kind, count) للإصدار الجماعي: عدد الطلبات لقاعدة البيانات لا يزيد بعدد الأرقام.
+"""
+import os
+import threading
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from ..models import NumberSequence
+
+DEFAULTS = {
+    'BLOCK_SIZE': 50,
+}
+PREFIXES = {
+    'car_quote': 'QTE',
+    'car_policy': 'POL',
+    'claim': 'CLM',
+    'health_quote': 'HQ',
+    'health_policy': 'HP',
+}
+SERIAL_DIGITS = 7
+
+_blocks = {}
+_blocks_lock = threading.Lock()
+_blocks_pid = None
+
+
+def get_identifier_settings():
+    return dict(DEFAULTS, **getattr(settings, 'IDENTIFIERS', {}))
+
+
+def sequence_name(kind):
+    return f'insurance_number_{kind}_seq'
+
+
+def luhn_digit(digits):
+    """رقم تحقق Luhn لسلسلة أرقام"""
+    total = 0
+    for index, char in enumerate(reversed(digits)):
+        value = int(char)
+        if index % 2 == 0:
+            value *= 2
+            if value > 9:
+                value -= 9
+        total += value
+    return str((10 - total % 10) % 10)
+
+
+def format_number(kind, value, year=None):
+    year = year if year is not None else timezone.localdate().year
+    body = f'{year % 100:02d}{value:0{SERIAL_DIGITS}d}'
+    return f'{PREFIXES[kind]}-{body[:2]}-{body[2:]}-{luhn_digit(body)}'
+
+
+def is_valid_number(number):
+    """التحقق من شكل الرقم ورقم التحقق (الأرقام القديمة بصيغة uuid تعيد False)"""
+    parts = number.split('-')
+    if len(parts) != 4 or parts[0] not in PREFIXES.values():
+        return False
+    _, year, serial, check = parts
+    body = year + serial
+    return body.isdigit() and len(year) == 2 and len(check) == 1 and luhn_digit(body) == check
+
+
+def create_sequences(connection):
+    """إنشاء تسلسلات PostgreSQL لكل الأنواع (لا شيء في قواعد البيانات الأخرى)"""
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        for kind in PREFIXES:
+            cursor.execute(f'CREATE SEQUENCE IF NOT EXISTS {connection.ops.quote_name(sequence_name(kind))}')
+
+
+def _fetch_values(kind, count):
+    """count قيمة جديدة من التسلسل"""
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT nextval(%s) FROM generate_series(1, %s)', [sequence_name(kind), count])
+            return [row[0] for row in cursor.fetchall()]
+
+    # UPDATE أولاً يقفل الصف حتى نهاية المعاملة فلا يقرأ طلبان نفس القيمة
+    with transaction.atomic():
+        sequences = NumberSequence.objects.filter(name=kind)
+        if not sequences.update(next_value=F('next_value') + count):
+            NumberSequence.objects.create(name=kind, next_value=1 + count)
+            return list(range(1, 1 + count))
+        next_value = sequences.values_list('next_value', flat=True).get()
+    return list(range(next_value - count, next_value))
+
+
+def _take(kind, count):
+    if connection.vendor != 'postgresql':
+        return _fetch_values(kind, count)
+
+    global _blocks_pid
+    with _blocks_lock:
+        if _blocks_pid != os.getpid():  # بعد fork لا تتقاسم العمليات الكتل نفسها
+            _blocks.clear()
+            _blocks_pid = os.getpid()
+        cached = _blocks.setdefault(kind, [])
+        if len(cached) < count:
+            block_size = get_identifier_settings()['BLOCK_SIZE']
+            cached.extend(_fetch_values(kind, max(block_size, count - len(cached))))
+        values, cached[:count] = cached[:count], []
+    return values
+
+
+def reserve_numbers(kind, count):
+    """count رقماً فريداً من نوع kind (للإصدار الجماعي)"""
+    if kind not in PREFIXES:
+        raise ValueError(f'نوع رقم غير معروف: {kind}')
+    if count <= 0:
+        return []
+    year = timezone.localdate().year
+    return [format_number(kind, value, year) for value in _take(kind, count)]
+
+
+def next_number(kind):
+    return reserve_numbers(kind, 1)[0]
@@ -0,0 +1,211 @@
+# insurance/services/policy_expiry.py
+"""
+مجدول انتهاء الوثائق (صحي وسيارات) عبر جدول تواريخ الاستحقاق PolicyDueDate
+
+- حفظ الوثيقة (إشارة post_save) أو الإدراج الجماعي (schedule_policies) يُحدّث صفها في الجدول
+  وحالته المحسوبة من التاريخ: scheduled أو expiring (داخل فترة التحذير).
+- tick() كل INTERVAL_SECONDS (manage.py run_expiry_scheduler) على دفعات:
+  * الوثائق التي مضى تاريخ انتهائها تصبح expired في جدول الوثائق والطابور معاً مع إشعار
+  * الوثائق التي دخلت فترة التحذير تصبح expiring مع إشعار (مرة واحدة لكل تاريخ انتهاء)
+- القراءة (expiring_soon، تحذيرات لوحة التحكم) تستخدم expiring_policy_ids بدل فحص مدى التواريخ.
+
+إشارات الحفظ لا تعمل مع update()، لذلك تُبطل لقطات لوحة تحكم التأمين الصحي هنا صراحة.
+"""
+import time
+from itertools import groupby
+
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import Notification, PolicyDueDate
+
+DEFAULTS = {
+    'WARNING_DAYS': 30,
+    'INTERVAL_SECONDS': 300,
+    'BATCH_SIZE': 1000,
+}
+POLICY_MODELS = {
+    'health': 'health_insurance.HealthInsurancePolicy',
+    'car': 'car_insurance.CarPolicy',
+}
+LINE_NAMES = {'health': 'التأمين الصحي', 'car': 'تأمين السيارات'}
+
+
+def get_expiry_settings():
+    return dict(DEFAULTS, **getattr(settings, 'POLICY_EXPIRY', {}))
+
+
+def policy_model(line):
+    return apps.get_model(POLICY_MODELS[line])
+
+
+def due_state(expiry_date, today=None):
+    today = today or timezone.localdate()
+    warning_limit = today + timezone.timedelta(days=get_expiry_settings()['WARNING_DAYS'])
+    return 'expiring' if expiry_date <= warning_limit else 'scheduled'
+
+
+def _is_scheduled(policy):
+    return policy.status == 'active' and policy.expiry_date and policy.user_id
+
+
+def sync_policy_due_date(line, policy):
+    """تحديث صف الوثيقة بعد حفظها (حذفه إذا لم تعد نشطة)"""
+    if not _is_scheduled(policy):
+        PolicyDueDate.objects.filter(line=line, policy_id=policy.pk).delete()
+        return None
+
+    row = PolicyDueDate.objects.filter(line=line, policy_id=policy.pk).first()
+    if (
+        row is not None and row.state != 'expired' and row.expiry_date == policy.expiry_date
+        and row.user_id == policy.user_id and row.policy_number == policy.policy_number
+    ):
+        return row  # أغلب عمليات الحفظ لا تغير التاريخ
+
+    row, _ = PolicyDueDate.objects.update_or_create(line=line, policy_id=policy.pk, defaults={
+        'user_id': policy.user_id,
+        'policy_number': policy.policy_number,
+        'expiry_date': policy.expiry_date,
+        'state': due_state(policy.expiry_date),
+        'warned_at': None,
+        'expired_at': None,
+    })
+    return row
+
+
+def schedule_policies(line, policies):
+    """جدولة وثائق أُدرجت بـ bulk_create (بدون إشارات)"""
+    today = timezone.localdate()
+    PolicyDueDate.objects.bulk_create([
+        PolicyDueDate(
+            line=line, policy_id=policy.pk, policy_number=policy.policy_number, user_id=policy.user_id,
+            expiry_date=policy.expiry_date, state=due_state(policy.expiry_date, today),
+        )
+        for policy in policies if _is_scheduled(policy)
+    ], ignore_conflicts=True)
+
+
+def rebuild_due_dates(batch_size=1000, log=None):
+    """إعادة بناء الجدول من الوثائق النشطة الحالية؛ يعيد عدد الصفوف"""
+    total = 0
+    for line in POLICY_MODELS:
+        queryset = policy_model(line).objects.filter(
+            status='active', expiry_date__isnull=False, user__isnull=False,
+        ).order_by('pk')
+        last_pk = 0
+        while True:
+            batch = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            schedule_policies(line, batch)
+            total += len(batch)
+            last_pk = batch[-1].pk
+            if log:
+                log(line, total)
+    return total
+
+
+def expiring_policy_ids(user, line):
+    """معرفات وثائق المستخدم القريبة من الانتهاء (للاستخدام كـ subquery)"""
+    return PolicyDueDate.objects.filter(user=user, line=line, state='expiring').values('policy_id')
+
+
+def _notifications(rows, kind, title, message):
+    return [
+        Notification(
+            user_id=row.user_id,
+            kind=kind,
+            title=title,
+            message=message.format(line=LINE_NAMES[row.line], number=row.policy_number, date=row.expiry_date),
+            data={
+                'line': row.line, 'policy_id': row.policy_id, 'policy_number': row.policy_number,
+                'expiry_date': row.expiry_date.isoformat(),
+            },
+        )
+        for row in rows
+    ]
+
+
+def _invalidate_health_dashboards(rows):
+    health_users = {row.user_id for row in rows if row.line == 'health'}
+    if health_users:
+        from health_insurance.services.dashboard_snapshot import invalidate_dashboard
+
+        def invalidate():
+            for user_id in health_users:
+                invalidate_dashboard(user_id)
+        transaction.on_commit(invalidate)
+
+
+def _process_batches(queryset, handle, batch_size):
+    total = 0
+    while True:
+        with transaction.atomic():
+            rows = list(queryset.select_for_update(skip_locked=True).order_by('expiry_date', 'pk')[:batch_size])
+            if not rows:
+                return total
+            handle(rows)
+            _invalidate_health_dashboards(rows)
+        total += len(rows)
+
+
+def expire_due_policies(today=None, batch_size=None):
+    """الوثائق النشطة التي مضى تاريخ انتهائها ← expired (مع إشعار)"""
+    today = today or timezone.localdate()
+    now = timezone.now()
+
+    def handle(rows):
+        for line, line_rows in groupby(sorted(rows, key=lambda row: row.line), key=lambda row: row.line):
+            policy_model(line).objects.filter(
+                pk__in=[row.policy_id for row in line_rows], status='active',
+            ).update(status='expired', updated_at=now)
+        PolicyDueDate.objects.filter(pk__in=[row.pk for row in rows]).update(state='expired', expired_at=now)
+        Notification.objects.bulk_create(_notifications(
+            rows, 'policy_expired', 'انتهت صلاحية وثيقة', 'انتهت وثيقة {line} رقم {number} بتاريخ {date}',
+        ))
+
+    return _process_batches(
+        PolicyDueDate.objects.filter(expired_at__isnull=True, expiry_date__lt=today),
+        handle, batch_size or get_expiry_settings()['BATCH_SIZE'],
+    )
+
+
+def warn_expiring_policies(today=None, batch_size=None):
+    """الوثائق التي دخلت فترة التحذير ← expiring (مع إشعار مرة واحدة)"""
+    today = today or timezone.localdate()
+    now = timezone.now()
+    warning_limit = today + timezone.timedelta(days=get_expiry_settings()['WARNING_DAYS'])
+
+    def handle(rows):
+        PolicyDueDate.objects.filter(pk__in=[row.pk for row in rows]).update(state='expiring', warned_at=now)
+        Notification.objects.bulk_create(_notifications(
+            rows, 'policy_expiring', 'وثيقة على وشك الانتهاء', 'وثيقة {line} رقم {number} تنتهي بتاريخ {date}',
+        ))
+
+    return _process_batches(
+        PolicyDueDate.objects.filter(
+            expired_at__isnull=True, expiry_date__range=(today, warning_limit), warned_at__isnull=True,
+        ),
+        handle, batch_size or get_expiry_settings()['BATCH_SIZE'],
+    )
+
+
+def tick(today=None, batch_size=None):
+    """دورة واحدة للمجدول (الانتهاء أولاً حتى لا يُحذَّر من وثيقة منتهية)"""
+    return {
+        'expired': expire_due_policies(today=today, batch_size=batch_size),
+        'warned': warn_expiring_policies(today=today, batch_size=batch_size),
+    }
+
+
+def run_scheduler(interval=None, batch_size=None, log=None, once=False):
+    interval = interval or get_expiry_settings()['INTERVAL_SECONDS']
+    while True:
+        result = tick(batch_size=batch_size)
+        if log:
+            log(result)
+        if once:
+            return result
+        time.sleep(interval)
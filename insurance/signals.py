@@ -0,0 +1,25 @@
+# insurance/signals.py
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from car_insurance.models import CarPolicy
+from health_insurance.models import HealthInsurancePolicy
+
+from .models import PolicyDueDate
+from .services.policy_expiry import sync_policy_due_date
+
+POLICY_LINES = {HealthInsurancePolicy: 'health', CarPolicy: 'car'}
+
+
+@receiver(post_save, sender=HealthInsurancePolicy)
+@receiver(post_save, sender=CarPolicy)
+def schedule_policy_expiry(sender, instance, **kwargs):
+    """تحديث طابور تواريخ الانتهاء عند حفظ وثيقة"""
+    sync_policy_due_date(POLICY_LINES[sender], instance)
+
+
+@receiver(post_delete, sender=HealthInsurancePolicy)
+@receiver(post_delete, sender=CarPolicy)
+def unschedule_policy_expiry(sender, instance, **kwargs):
+    """حذف صف الوثيقة المحذوفة من الطابور"""
+    PolicyDueDate.objects.filter(line=POLICY_LINES[sender], policy_id=instance.pk).delete()
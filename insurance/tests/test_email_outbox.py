@@ -0,0 +1,158 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.mail.backends import locmem
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from insurance.models import OutboundEmail
+from insurance.services import email_outbox
+
+User = get_user_model()
+
+
+class CountingBackend(locmem.EmailBackend):
+    """locmem يعد الاتصالات ويرفض عناوين bounce@"""
+
+    opened = 0
+
+    def open(self):
+        CountingBackend.opened += 1
+        return super().open()
+
+    def send_messages(self, messages):
+        if any(address.startswith('bounce@') for message in messages for address in message.to):
+            raise OSError('550 mailbox unavailable')
+        return super().send_messages(messages)
+
+
+class BrokenBackend(locmem.EmailBackend):
+    def open(self):
+        raise ConnectionRefusedError('smtp down')
+
+
+@override_settings(EMAIL_BACKEND='insurance.tests.test_email_outbox.CountingBackend')
+class EmailOutboxTests(TestCase):
+    def setUp(self):
+        CountingBackend.opened = 0
+        self.user = User.objects.create_user(username='outbox', email='outbox@example.com', password='Pass12345!')
+
+    def test_request_only_enqueues(self):
+        response = APIClient().post('/api/auth/send-reset/', {'email': 'outbox@example.com'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(mail.outbox, [])
+        queued = OutboundEmail.objects.get()
+        self.assertEqual((queued.kind, queued.status, queued.to), ('password_reset', 'pending', ['outbox@example.com']))
+        self.assertIn('reset-password', queued.body)
+
+        self.assertEqual(email_outbox.deliver_pending(), {'sent': 1, 'retrying': 0, 'failed': 0})
+        self.assertEqual(mail.outbox[0].subject, 'Reset your SafeRatio password')
+        self.assertIn('reset-password', mail.outbox[0].body)
+        queued.refresh_from_db()
+        # الرابط لا يبقى في قاعدة البيانات بعد الإرسال
+        self.assertEqual((queued.status, queued.attempts, queued.body), ('sent', 1, ''))
+        self.assertIsNotNone(queued.sent_at)
+
+    def test_admin_welcome_email_is_queued(self):
+        admin = User.objects.create_user(username='boss', password='Pass12345!', is_staff=True)
+        client = APIClient()
+        client.force_authenticate(admin)
+        with self.assertLogs('saferatio.email', 'INFO') as logs:
+            response = client.post('/api/admin/users/create/', {
+                'username': 'newbie', 'email': 'newbie@example.com', 'first_name': 'New', 'last_name': 'User',
+                'user_type': 'individual', 'send_email': True,
+            }, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual([record.getMessage() for record in logs.records], ['welcome email queued'])
+        queued = OutboundEmail.objects.get(kind='welcome')
+        self.assertEqual(queued.to, ['newbie@example.com'])
+        self.assertIn(response.data['password'], queued.body)
+        self.assertEqual(mail.outbox, [])
+
+    def test_batch_uses_one_connection(self):
+        for i in range(5):
+            email_outbox.enqueue_email(f'subject {i}', 'body', [f'user{i}@example.com'])
+
+        self.assertEqual(email_outbox.drain(batch_size=10), {'sent': 5, 'retrying': 0, 'failed': 0})
+        self.assertEqual(CountingBackend.opened, 1)
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(email_outbox.deliver_pending(), {'sent': 0, 'retrying': 0, 'failed': 0})
+
+        for i in range(5):
+            email_outbox.enqueue_email(f'again {i}', 'body', [f'user{i}@example.com'])
+        email_outbox.drain(batch_size=2)
+        self.assertEqual(CountingBackend.opened, 4)
+        self.assertEqual(len(mail.outbox), 10)
+
+    @override_settings(EMAIL_OUTBOX={'MAX_ATTEMPTS': 3, 'RETRY_BASE_SECONDS': 60, 'RETRY_MAX_SECONDS': 90})
+    def test_failed_message_backs_off_then_fails(self):
+        bounced = email_outbox.enqueue_email('bad', 'body', ['bounce@example.com'])
+        email_outbox.enqueue_email('good', 'body', ['good@example.com'])
+        now = timezone.now()
+
+        with self.assertLogs('saferatio.email', level='WARNING'):
+            self.assertEqual(email_outbox.deliver_pending(now=now), {'sent': 1, 'retrying': 1, 'failed': 0})
+        bounced.refresh_from_db()
+        self.assertEqual((bounced.status, bounced.attempts), ('pending', 1))
+        self.assertEqual(bounced.next_attempt_at, now + timedelta(seconds=60))
+        self.assertIn('550', bounced.last_error)
+
+        # قبل موعد المحاولة لا شيء مستحق
+        self.assertEqual(email_outbox.deliver_pending(now=now + timedelta(seconds=59))['retrying'], 0)
+        later = now + timedelta(seconds=60)
+        with self.assertLogs('saferatio.email', level='WARNING'):
+            self.assertEqual(email_outbox.deliver_pending(now=later)['retrying'], 1)
+        bounced.refresh_from_db()
+        self.assertEqual(bounced.next_attempt_at, later + timedelta(seconds=90))
+
+        with self.assertLogs('saferatio.email', level='WARNING'):
+            self.assertEqual(email_outbox.deliver_pending(now=later + timedelta(seconds=90))['failed'], 1)
+        bounced.refresh_from_db()
+        self.assertEqual((bounced.status, bounced.attempts), ('failed', 3))
+        self.assertEqual(bounced.body, 'body')
+
+    @override_settings(EMAIL_BACKEND='insurance.tests.test_email_outbox.BrokenBackend')
+    def test_connection_failure_retries_whole_batch(self):
+        for i in range(3):
+            email_outbox.enqueue_email('s', 'b', [f'u{i}@example.com'])
+        with self.assertLogs('saferatio.email', level='WARNING'):
+            self.assertEqual(email_outbox.deliver_pending(), {'sent': 0, 'retrying': 3, 'failed': 0})
+        self.assertEqual(set(OutboundEmail.objects.values_list('last_error', flat=True)), {'smtp down'})
+
+    def test_claimed_messages_are_leased(self):
+        email_outbox.enqueue_email('s', 'b', ['u@example.com'])
+        now = timezone.now()
+        self.assertEqual(len(email_outbox.claim_batch(10, now=now, lease_seconds=300)), 1)
+        # مرسل آخر لا يأخذ الرسالة المحجوزة حتى انتهاء المهلة (توقف المرسل الأول)
+        self.assertEqual(email_outbox.claim_batch(10, now=now), [])
+        self.assertEqual(len(email_outbox.claim_batch(10, now=now + timedelta(seconds=301))), 1)
+
+    def test_metrics_and_command(self):
+        admin = User.objects.create_user(username='metrics_admin', password='Pass12345!', is_staff=True)
+        for i in range(3):
+            email_outbox.enqueue_email('s', 'b', [f'u{i}@example.com'], kind='verification')
+        email_outbox.enqueue_email('s', 'b', ['bounce@example.com'])
+
+        out = StringIO()
+        with self.assertLogs('saferatio.email', level='WARNING'):
+            call_command('run_email_outbox', once=True, stdout=out)
+        self.assertIn('3', out.getvalue())
+
+        metrics = email_outbox.outbox_metrics(minutes=60)
+        self.assertEqual((metrics['sent'], metrics['pending'], metrics['retrying'], metrics['due']), (3, 1, 1, 0))
+        self.assertEqual(metrics['sent_in_window'], 3)
+        self.assertIsNotNone(metrics['avg_queue_seconds'])
+        self.assertGreater(email_outbox.sender_stats()['sent'], 0)
+
+        client = APIClient()
+        client.force_authenticate(admin)
+        response = client.get('/api/admin/email-outbox/?minutes=30')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['metrics']['sent'], 3)
+        self.assertEqual(response.data['recent_failures'], [])
+        client.force_authenticate(self.user)
+        self.assertEqual(client.get('/api/admin/email-outbox/').status_code, 403)
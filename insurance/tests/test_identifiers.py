@@ -0,0 +1,102 @@
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from car_insurance.calculations import create_quote_from_vehicle
+from car_insurance.models import CarInsuranceQuote, CarPolicy, Vehicle
+from health_insurance.models import Company, HealthInsuranceQuote
+from insurance.services import identifiers
+
+User = get_user_model()
+
+
+class IdentifierFormatTests(TestCase):
+    def test_format_and_check_digit(self):
+        number = identifiers.format_number('car_policy', 42, year=2026)
+        self.assertEqual(number, 'POL-26-0000042-' + identifiers.luhn_digit('260000042'))
+        self.assertTrue(identifiers.is_valid_number(number))
+
+        # أي خطأ في رقم واحد يُكشف
+        for index, char in enumerate(number):
+            if char.isdigit():
+                typo = number[:index] + str((int(char) + 1) % 10) + number[index + 1:]
+                self.assertFalse(identifiers.is_valid_number(typo), typo)
+        self.assertFalse(identifiers.is_valid_number('POL-1A2B3C4D'))
+        self.assertFalse(identifiers.is_valid_number('XYZ-26-0000042-0'))
+
+    def test_luhn_reference_value(self):
+        self.assertEqual(identifiers.luhn_digit('7992739871'), '3')
+
+    def test_serial_grows_past_padding(self):
+        self.assertEqual(identifiers.format_number('claim', 123456789, year=2026)[:17], 'CLM-26-123456789-')
+
+
+class IdentifierAllocationTests(TestCase):
+    def test_sequential_unique_numbers_per_kind(self):
+        first = identifiers.next_number('car_quote')
+        batch = identifiers.reserve_numbers('car_quote', 300)
+        other = identifiers.next_number('health_quote')
+
+        numbers = [first] + batch
+        self.assertEqual(len(set(numbers)), 301)
+        self.assertEqual([int(n.split('-')[2]) for n in numbers], list(range(1, 302)))
+        self.assertTrue(all(identifiers.is_valid_number(n) for n in numbers))
+        self.assertTrue(other.startswith('HQ-') and other.split('-')[2] == '0000001')
+
+        self.assertEqual(identifiers.reserve_numbers('car_policy', 0), [])
+        with self.assertRaises(ValueError):
+            identifiers.next_number('invoice')
+
+    def test_bulk_reservation_is_constant_queries(self):
+        with CaptureQueriesContext(connection) as small:
+            identifiers.reserve_numbers('claim', 2)
+        with CaptureQueriesContext(connection) as large:
+            identifiers.reserve_numbers('claim', 500)
+        self.assertEqual(len(small), len(large))
+
+    def test_postgres_blocks_are_cached_per_process(self):
+        fetched = []
+
+        def fake_fetch(kind, count):
+            start = sum(fetched) + 1
+            fetched.append(count)
+            return list(range(start, start + count))
+
+        with mock.patch.object(identifiers, 'connection', mock.Mock(vendor='postgresql')), \
+                mock.patch.object(identifiers, '_fetch_values', side_effect=fake_fetch), \
+                mock.patch.dict(identifiers._blocks, clear=True), \
+                self.settings(IDENTIFIERS={'BLOCK_SIZE': 10}):
+            numbers = [identifiers.next_number('car_policy') for _ in range(12)]
+            numbers += identifiers.reserve_numbers('car_policy', 25)
+
+        self.assertEqual(fetched, [10, 10, 17])
+        self.assertEqual(len(set(numbers)), 37)
+
+
+class IdentifierCallSiteTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='numbers', password='pass')
+
+    def test_models_and_services_use_sequence(self):
+        vehicle = Vehicle.objects.create(user=self.user, license_plate='NUM-1', current_value=Decimal('15000.00'))
+        quote, _ = create_quote_from_vehicle(vehicle, self.user)
+        policy = CarPolicy.objects.create(
+            quote=quote, user=self.user, vehicle=vehicle, policy_number='', inception_date=date.today(),
+        )
+        company = Company.objects.create(
+            user=self.user, name='شركة الأرقام', sector='tech_software', cr_number='CR-NUM',
+            address='صنعاء', phone='777000003', email='num@example.com',
+        )
+        health_quote = HealthInsuranceQuote.objects.create(company=company, user=self.user)
+
+        self.assertTrue(quote.quote_number.startswith('QTE-'))
+        self.assertTrue(policy.policy_number.startswith('POL-'))
+        self.assertTrue(health_quote.quote_number.startswith('HQ-'))
+        for number in (quote.quote_number, policy.policy_number, health_quote.quote_number):
+            self.assertTrue(identifiers.is_valid_number(number), number)
+        self.assertTrue(CarInsuranceQuote.objects.filter(quote_number=quote.quote_number).exists())
@@ -0,0 +1,215 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from car_insurance.models import CarInsuranceQuote, CarPolicy, Vehicle
+from health_insurance.models import Company, HealthInsurancePolicy, HealthInsuranceQuote
+from health_insurance.services.dashboard_snapshot import dashboard_snapshots
+from insurance.models import Notification, PolicyDueDate
+from insurance.services import policy_expiry
+
+User = get_user_model()
+
+
+class PolicyExpiryTestMixin:
+    def setUp(self):
+        self.today = date.today()
+        self.user = User.objects.create_user(username='expiry_owner', password='pass')
+        self.company = Company.objects.create(
+            user=self.user, name='شركة الانتهاء', sector='tech_software', cr_number='CR-EXP',
+            address='صنعاء', phone='777000002', email='expiry@example.com',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def make_car_policy(self, days, status='active', user=None):
+        user = user or self.user
+        index = CarPolicy.objects.count()
+        vehicle = Vehicle.objects.create(user=user, license_plate=f'EXP-{index}', current_value=Decimal('20000.00'))
+        quote = CarInsuranceQuote.objects.create(
+            vehicle=vehicle, user=user, quote_number=f'CQ-EXP-{index}', status='accepted',
+        )
+        return CarPolicy.objects.create(
+            quote=quote, user=user, vehicle=vehicle, policy_number=f'CP-EXP-{index}', status=status,
+            expiry_date=self.today + timedelta(days=days),
+        )
+
+    def make_health_policy(self, days, status='active'):
+        index = HealthInsurancePolicy.objects.count()
+        quote = HealthInsuranceQuote.objects.create(
+            company=self.company, user=self.user, quote_number=f'HQ-EXP-{index}', status='accepted',
+        )
+        return HealthInsurancePolicy.objects.create(
+            quote=quote, user=self.user, company=self.company, policy_number=f'HP-EXP-{index}', status=status,
+            inception_date=self.today - timedelta(days=365), expiry_date=self.today + timedelta(days=days),
+        )
+
+
+class DueDateSyncTests(PolicyExpiryTestMixin, TestCase):
+    def test_saving_policies_schedules_them(self):
+        car = self.make_car_policy(10)
+        health = self.make_health_policy(90)
+        self.make_car_policy(5, status='pending')
+
+        self.assertEqual(
+            set(PolicyDueDate.objects.values_list('line', 'policy_id', 'state')),
+            {('car', car.pk, 'expiring'), ('health', health.pk, 'scheduled')},
+        )
+
+        health.expiry_date = self.today + timedelta(days=3)
+        health.save()
+        self.assertEqual(PolicyDueDate.objects.get(line='health').state, 'expiring')
+
+        car.status = 'cancelled'
+        car.save()
+        health.delete()
+        self.assertFalse(PolicyDueDate.objects.exists())
+
+    def test_rebuild_command_backfills_bulk_inserted_policies(self):
+        policy = self.make_car_policy(100)
+        PolicyDueDate.objects.all().delete()
+
+        out = StringIO()
+        call_command('run_expiry_scheduler', rebuild=True, once=True, stdout=out)
+        row = PolicyDueDate.objects.get()
+        self.assertEqual((row.line, row.policy_id, row.state), ('car', policy.pk, 'scheduled'))
+        self.assertIn('1', out.getvalue())
+
+
+class SchedulerTickTests(PolicyExpiryTestMixin, TestCase):
+    def test_tick_expires_warns_and_notifies_once(self):
+        expired = [self.make_car_policy(-1), self.make_health_policy(-20)]
+        soon = [self.make_car_policy(0), self.make_health_policy(30)]
+        later = self.make_car_policy(31)
+        version = dashboard_snapshots.version(scope=self.user.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            result = policy_expiry.tick(batch_size=1)
+        self.assertEqual(result, {'expired': 2, 'warned': 2})
+        self.assertNotEqual(dashboard_snapshots.version(scope=self.user.pk), version)
+
+        for policy in expired:
+            policy.refresh_from_db()
+            self.assertEqual(policy.status, 'expired')
+        for policy in soon + [later]:
+            policy.refresh_from_db()
+            self.assertEqual(policy.status, 'active')
+
+        self.assertEqual(
+            set(PolicyDueDate.objects.values_list('policy_number', 'state')),
+            {(p.policy_number, 'expired') for p in expired}
+            | {(p.policy_number, 'expiring') for p in soon}
+            | {(later.policy_number, 'scheduled')},
+        )
+        self.assertEqual(
+            sorted(Notification.objects.filter(user=self.user).values_list('kind', flat=True)),
+            ['policy_expired'] * 2 + ['policy_expiring'] * 2,
+        )
+        notification = Notification.objects.get(kind='policy_expiring', data__line='car')
+        self.assertEqual(notification.data['policy_id'], soon[0].pk)
+        self.assertIn(soon[0].policy_number, notification.message)
+
+        # دورة ثانية في نفس اليوم لا تكرر شيئاً
+        self.assertEqual(policy_expiry.tick(), {'expired': 0, 'warned': 0})
+        self.assertEqual(Notification.objects.count(), 4)
+
+        # بعد يوم تدخل الوثيقة التالية فترة التحذير وتنتهي وثيقة اليوم
+        self.assertEqual(policy_expiry.tick(today=self.today + timedelta(days=1)), {'expired': 1, 'warned': 1})
+
+    def test_expired_policy_is_rescheduled_when_extended(self):
+        policy = self.make_car_policy(-1)
+        policy_expiry.tick()
+        policy.refresh_from_db()
+
+        policy.status = 'active'
+        policy.expiry_date = self.today + timedelta(days=365)
+        policy.save()
+        row = PolicyDueDate.objects.get()
+        self.assertEqual((row.state, row.warned_at, row.expired_at), ('scheduled', None, None))
+
+
+class ExpiringReadTests(PolicyExpiryTestMixin, TestCase):
+    def test_expiring_soon_reads_precomputed_set(self):
+        soon = self.make_car_policy(5)
+        self.make_car_policy(60)
+        self.make_car_policy(5, user=User.objects.create_user(username='other_driver', password='pass'))
+        health_soon = self.make_health_policy(12)
+        self.make_health_policy(200)
+
+        response = self.client.get('/api/car-insurance/policies/expiring_soon/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['id'] for item in response.data], [soon.pk])
+
+        response = self.client.get('/api/health/health-insurance-policies/expiring_soon/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['id'] for item in response.data], [health_soon.pk])
+
+        # وثيقة انتهت لم تعد ضمن المجموعة بعد دورة المجدول
+        CarPolicy.objects.filter(pk=soon.pk).update(expiry_date=self.today - timedelta(days=1))
+        PolicyDueDate.objects.filter(policy_id=soon.pk, line='car').update(expiry_date=self.today - timedelta(days=1))
+        policy_expiry.tick()
+        self.assertEqual(self.client.get('/api/car-insurance/policies/expiring_soon/').data, [])
+
+    def test_notifications_endpoint(self):
+        self.make_car_policy(2)
+        policy_expiry.tick()
+
+        response = self.client.get('/api/notifications/unread-count/')
+        self.assertEqual(response.data['unread_count'], 1)
+        response = self.client.get('/api/notifications/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0]['kind'], 'policy_expiring')
+        self.assertFalse(response.data[0]['is_read'])
+
+        response = self.client.post('/api/notifications/mark-read/', {'ids': 'all'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post('/api/notifications/mark-read/', {}, format='json')
+        self.assertEqual(response.data['updated'], 1)
+        self.assertEqual(self.client.get('/api/notifications/?unread=1').data, [])
+
+
+@skipUnless(connection.vendor in ('postgresql', 'sqlite'), 'Query plans are only checked on PostgreSQL and SQLite')
+class DueDateQueryPlanTests(PolicyExpiryTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        users = [self.user] + [User.objects.create_user(username=f'due{i}', password='pass') for i in range(4)]
+        PolicyDueDate.objects.bulk_create([
+            PolicyDueDate(
+                line=['car', 'health'][i % 2], policy_id=i, policy_number=f'P-{i}', user=users[i % len(users)],
+                expiry_date=self.today + timedelta(days=i % 400 - 30),
+                state=['scheduled', 'expiring', 'expired', 'expired'][i % 4],
+                expired_at=timezone.now() if i % 4 > 1 else None,
+            )
+            for i in range(400)
+        ])
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def assertUsesIndex(self, queryset, index_name):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = queryset.explain()
+        if connection.vendor == 'postgresql':
+            self.assertIn(index_name, plan, f'{index_name} not used:\n{plan}')
+        else:
+            self.assertRegex(plan, r'USING (COVERING )?INDEX \w+_idx', f'{index_name} not used:\n{plan}')
+
+    def test_user_expiring_set(self):
+        self.assertUsesIndex(policy_expiry.expiring_policy_ids(self.user, 'car'), 'due_date_user_expiring_idx')
+
+    def test_scheduler_batches(self):
+        self.assertUsesIndex(
+            PolicyDueDate.objects.filter(
+                expired_at__isnull=True, expiry_date__lt=self.today,
+            ).order_by('expiry_date', 'pk'),
+            'due_date_pending_idx',
+        )
@@ -1,3 +1,40 @@
-from django.shortcuts import render
+# insurance/views.py
+from django.utils import timezone
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 
-# Create your views here.
+from .models import Notification
+from .serializers import NotificationSerializer
+
+
+class NotificationViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """إشعارات المستخدم (انتهاء الوثائق وغيرها)"""
+    permission_classes = [IsAuthenticated]
+    serializer_class = NotificationSerializer
+
+    def get_queryset(self):
+        queryset = Notification.objects.filter(user=self.request.user)
+        if self.request.query_params.get('unread') in ('1', 'true'):
+            queryset = queryset.filter(read_at__isnull=True)
+        return queryset
+
+    @action(detail=False, methods=['get'], url_path='unread-count')
+    def unread_count(self, request):
+        """عدد الإشعارات غير المقروءة"""
+        count = Notification.objects.filter(user=request.user, read_at__isnull=True).count()
+        return Response({'success': True, 'unread_count': count})
+
+    @action(detail=False, methods=['post'], url_path='mark-read')
+    def mark_read(self, request):
+        """تعليم إشعارات كمقروءة (ids، أو الكل إذا لم تُرسل)"""
+        ids = request.data.get('ids')
+        if ids is not None and not isinstance(ids, list):
+            return Response({'success': False, 'error': 'ids يجب أن تكون قائمة'}, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = Notification.objects.filter(user=request.user, read_at__isnull=True)
+        if ids is not None:
+            queryset = queryset.filter(pk__in=ids)
+        updated = queryset.update(read_at=timezone.now())
+        return Response({'success': True, 'updated': updated})
@@ -12,4 +12,6 @@ urlpatterns = [
     path('reports/', views.admin_generate_report, name='admin-generate-report'),
     path('companies-stats/', views.admin_companies_stats, name='admin-companies-stats'),
     path('system-logs/', views.admin_system_logs, name='admin-system-logs'),
+    path('request-metrics/', views.admin_request_metrics, name='admin-request-metrics'),
+    path('email-outbox/', views.admin_email_outbox, name='admin-email-outbox'),
 ]
\ No newline at end of file
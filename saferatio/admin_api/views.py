@@ -9,8 +9,10 @@ from django.contrib.auth import get_user_model
 from django.utils import timezone
 from datetime import timedelta
 import json
+import logging
 
 User = get_user_model()
+logger = logging.getLogger('saferatio.email')
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -311,7 +313,7 @@ def admin_create_user(request):
         )
     
     try:
-        from users.serializers import UserRegistrationSerializer
+        from users.serializers import UserProfileSerializer, UserRegistrationSerializer
         
         data = request.data.copy()
         
@@ -481,10 +483,10 @@ def get_recent_activities():
         return []
 
 def send_welcome_email(user, password):
-    """إرسال بريد ترحيبي للمستخدم الجديد"""
+    """إضافة بريد ترحيبي للمستخدم الجديد إلى صندوق الصادر"""
     try:
-        from django.core.mail import send_mail
         from django.conf import settings
+        from insurance.services.email_outbox import enqueue_email
         
         subject = 'مرحباً بك في SafeRatio'
         message = f"""
@@ -503,18 +505,13 @@ def send_welcome_email(user, password):
         فريق SafeRatio
         """
         
-        send_mail(
-            subject,
-            message,
-            settings.DEFAULT_FROM_EMAIL,
-            [user.email],
-            fail_silently=True,
-        )
+        enqueue_email(subject, message, [user.email], kind='welcome')
         
-        print(f"Welcome email sent to {user.email}")
+        logger.info('welcome email queued', extra={'data': {'user_id': user.pk}})
         
-    except Exception as e:
-        print(f"Error sending welcome email: {str(e)}")
+    except Exception:
+        # إنشاء المستخدم لا يفشل بسبب البريد
+        logger.exception('welcome email could not be queued', extra={'data': {'user_id': user.pk}})
 
 # ============= Admin Dashboard Endpoints =============
 # @api_view(['GET'])
@@ -1048,9 +1045,95 @@ def admin_companies_stats(request):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def admin_system_logs(request):
-    """سجلات النظام (دالة بسيطة أولاً)"""
+    """سجلات النظام: آخر أسطر SYSTEM_LOG_FILE (JSON لكل طلب) ومقاييس كاتب سجل الحسابات"""
+    from health_insurance.services.calculation_log import get_calculation_log_writer
+    from saferatio.request_metrics import read_system_log
+
+    if not (request.user.is_staff or request.user.is_superuser or getattr(request.user, 'user_type', None) == 'admin'):
+        return Response(
+            {'error': 'غير مصرح بالوصول'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    try:
+        limit = min(max(int(request.query_params.get('limit', 100)), 1), 1000)
+    except ValueError:
+        limit = 100
+
+    return Response({
+        'logs': read_system_log(limit),
+        'calculation_log_writer': get_calculation_log_writer().metrics(),
+        'timestamp': timezone.now().isoformat()
+    })
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def admin_request_metrics(request):
+    """
+    مقاييس الطلبات لكل مسار خلال آخر minutes دقيقة (من كل العمليات)
+    ?minutes=15&route=health&sort=total_ms|p95_ms|count|avg_queries|errors
+    """
+    from saferatio.request_metrics import collect_route_metrics
+
+    if not (request.user.is_staff or request.user.is_superuser or getattr(request.user, 'user_type', None) == 'admin'):
+        return Response(
+            {'error': 'غير مصرح بالوصول'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    try:
+        minutes = int(request.query_params.get('minutes', 0)) or None
+    except ValueError:
+        return Response({'success': False, 'error': 'minutes يجب أن يكون رقماً'}, status=status.HTTP_400_BAD_REQUEST)
+
+    sort = request.query_params.get('sort', 'total_ms')
+    if sort not in ('total_ms', 'p95_ms', 'p99_ms', 'count', 'avg_queries', 'errors', 'avg_db_ms'):
+        return Response({'success': False, 'error': f'ترتيب غير مدعوم: {sort}'}, status=status.HTTP_400_BAD_REQUEST)
+
+    metrics = collect_route_metrics(minutes)
+    routes = metrics['routes']
+    route_filter = request.query_params.get('route')
+    if route_filter:
+        routes = [row for row in routes if route_filter in row['route']]
+    routes.sort(key=lambda row: row[sort] or 0, reverse=True)
+
+    return Response({
+        'success': True,
+        'window_minutes': metrics['window_minutes'],
+        'workers': metrics['workers'],
+        'totals': metrics['totals'],
+        'routes': routes,
+        'timestamp': timezone.now().isoformat()
+    })
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def admin_email_outbox(request):
+    """
+    حالة صندوق البريد الصادر: حجم الطابور، معدل الإرسال خلال آخر minutes دقيقة وآخر الرسائل الفاشلة
+    ?minutes=60
+    """
+    from insurance.models import OutboundEmail
+    from insurance.services.email_outbox import outbox_metrics
+
+    if not (request.user.is_staff or request.user.is_superuser or getattr(request.user, 'user_type', None) == 'admin'):
+        return Response(
+            {'error': 'غير مصرح بالوصول'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    try:
+        minutes = min(max(int(request.query_params.get('minutes', 60)), 1), 24 * 60)
+    except ValueError:
+        return Response({'success': False, 'error': 'minutes يجب أن يكون رقماً'}, status=status.HTTP_400_BAD_REQUEST)
+
+    failures = OutboundEmail.objects.filter(status='failed').values(
+        'id', 'kind', 'to', 'subject', 'attempts', 'last_error', 'created_at',
+    )[:20]
     return Response({
-        'logs': ['System is running', 'Admin dashboard accessed'],
+        'success': True,
+        'metrics': outbox_metrics(minutes),
+        'recent_failures': list(failures),
         'timestamp': timezone.now().isoformat()
     })
 
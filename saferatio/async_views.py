@@ -0,0 +1,139 @@
+# saferatio/async_views.py
+"""
+واجهات async لنقاط النهاية التي تنتظر I/O (البريد، التخزين)
+
+DRF لا يدعم الـ views غير المتزامنة، لذلك async_api_view تغلف دالة async بما يلزم من DRF:
+- Request بنفس المحللات والمصادقات الافتراضية (request.data / request.user / force_authenticate)
+- Response تُعرض بـ JSONRenderer (نفس شكل الاستجابات و resp.data في الاختبارات)
+- التحليل والمصادقة (قاعدة بيانات) في sync_to_async، والباقي في حلقة الأحداث
+
+run_io ينفذ الاستدعاءات المتزامنة البطيئة (SMTP، التخزين) في مجمع خيوط محدود
+(ASYNC_VIEWS['MAX_CONCURRENT_IO']) مع مهلة، فلا يحجز الانتظار عامل الخادم:
+تحت ASGI (SERVER_MODE=asgi في gunicorn.conf.py) تخدم العملية طلبات أخرى أثناء الانتظار،
+وتحت WSGI تعمل نفس الـ views كما كانت.
+
+كل وسيط متزامن فقط في MIDDLEWARE يجبر ما بعده تحت ASGI على خيط Django المتزامن الوحيد
+(فتتسلسل الطلبات)، لذلك AsyncWhiteNoiseMiddleware بدل WhiteNoiseMiddleware.
+"""
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions, status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+DEFAULTS = {
+    'MAX_CONCURRENT_IO': 20,
+    'IO_TIMEOUT_SECONDS': 30,
+}
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def get_async_settings():
+    return dict(DEFAULTS, **getattr(settings, 'ASYNC_VIEWS', {}))
+
+
+def get_io_executor():
+    """مجمع خيوط I/O الخاص بالعملية الحالية"""
+    global _executor, _executor_pid
+    if _executor is None or _executor_pid != os.getpid():
+        with _executor_lock:
+            if _executor is None or _executor_pid != os.getpid():
+                _executor = ThreadPoolExecutor(
+                    max_workers=get_async_settings()['MAX_CONCURRENT_IO'], thread_name_prefix='async-io',
+                )
+                _executor_pid = os.getpid()
+    return _executor
+
+
+async def run_io(func, *args, **kwargs):
+    """تنفيذ استدعاء I/O متزامن خارج حلقة الأحداث (asyncio.TimeoutError عند تجاوز المهلة)"""
+    call = sync_to_async(func, thread_sensitive=False, executor=get_io_executor())
+    return await asyncio.wait_for(call(*args, **kwargs), timeout=get_async_settings()['IO_TIMEOUT_SECONDS'])
+
+
+def _prepare(request, authenticated):
+    request.data  # noqa: B018 - التحليل هنا لا داخل حلقة الأحداث
+    if authenticated and not (request.user and request.user.is_authenticated):
+        raise exceptions.NotAuthenticated()
+
+
+def _finalize(request, response):
+    response.accepted_renderer = JSONRenderer()
+    response.accepted_media_type = JSONRenderer.media_type
+    response.renderer_context = {'request': request, 'response': response}
+    return response
+
+
+def async_api_view(http_method_names, authenticated=False):
+    """مثل @api_view + @permission_classes لكن للدوال async (AllowAny أو IsAuthenticated)"""
+    allowed = [method.upper() for method in http_method_names]
+
+    def decorator(func):
+        @csrf_exempt  # مثل api_view: SessionAuthentication تفرض CSRF بنفسها
+        @functools.wraps(func)
+        async def view(request, *args, **kwargs):
+            drf_request = Request(
+                request,
+                parsers=[parser() for parser in api_settings.DEFAULT_PARSER_CLASSES],
+                authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES],
+            )
+            if request.method not in allowed:
+                response = Response(
+                    {'detail': f'Method "{request.method}" not allowed.'}, status=status.HTTP_405_METHOD_NOT_ALLOWED,
+                )
+                response['Allow'] = ', '.join(allowed)
+                return _finalize(drf_request, response)
+            try:
+                await sync_to_async(_prepare)(drf_request, authenticated)
+            except exceptions.APIException as e:
+                response = Response({'detail': e.detail}, status=e.status_code)
+                if isinstance(e, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+                    authenticators = drf_request.authenticators
+                    header = authenticators[0].authenticate_header(drf_request) if authenticators else None
+                    if header:
+                        response['WWW-Authenticate'] = header
+                    else:
+                        response.status_code = status.HTTP_403_FORBIDDEN
+                return _finalize(drf_request, response)
+            return _finalize(drf_request, await func(drf_request, *args, **kwargs))
+        return view
+    return decorator
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """WhiteNoise مع مسار async: الملفات الثابتة تُخدم في خيط، وباقي الطلبات تمر مباشرة"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None):
+        super().__init__(get_response)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file, thread_sensitive=False)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve, thread_sensitive=False)(static_file, request)
+        return await self.get_response(request)
@@ -0,0 +1,113 @@
+# saferatio/background.py
+"""
+تنفيذ مهام خفيفة بعد الطلب في خيط خلفي داخل العملية
+
+مهام ما بعد الكتابة (توليد مستندات الوثائق مثلاً) لا يجب أن تطيل الطلب أو أن تعمل على
+بيانات لم تُثبت بعد، لذلك:
+- run_after_commit تضيف المهمة للطابور فقط بعد نجاح المعاملة الحالية (transaction.on_commit)
+- خيط واحد لكل عملية ينفذ المهام بالترتيب ويغلق اتصالات قاعدة البيانات المنتهية
+- ASYNC=False ينفذ المهمة مباشرة عند الـ commit (الاختبارات وأوامر الإدارة)
+
+المهام يجب أن تكون قابلة للإعادة يدوياً: الطابور في الذاكرة ويضيع عند إيقاف العملية.
+"""
+import atexit
+import logging
+import os
+import queue
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger('saferatio.background')
+
+DEFAULTS = {
+    'ASYNC': True,
+    'MAX_QUEUE': 1000,
+}
+
+
+def get_background_settings():
+    return dict(DEFAULTS, **getattr(settings, 'BACKGROUND_TASKS', {}))
+
+
+def run_task(func, *args, **kwargs):
+    try:
+        return func(*args, **kwargs)
+    except Exception:
+        logger.exception('background task failed', extra={'data': {'task': getattr(func, '__name__', repr(func))}})
+
+
+class BackgroundWorker:
+    """طابور مهام يخدمه خيط daemon واحد"""
+
+    def __init__(self, max_queue=1000):
+        self.pid = os.getpid()
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, func, *args, **kwargs):
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait((func, args, kwargs))
+        except queue.Full:
+            # الطابور ممتلئ: ينفذ الطلب المهمة بنفسه بدل إسقاطها
+            logger.warning('background queue full, running inline')
+            run_task(func, *args, **kwargs)
+
+    def _ensure_thread(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='background-tasks', daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            task = self._queue.get()
+            if task is None:
+                return
+            func, args, kwargs = task
+            run_task(func, *args, **kwargs)
+            # اتصال الخيط نفسه فقط (إغلاقه في خيط الطلب يقطع معاملته)
+            close_old_connections()
+            self._queue.task_done()
+
+    def join(self):
+        """انتظار انتهاء المهام الحالية"""
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self):
+        if self._thread is not None:
+            try:
+                self._queue.put(None, timeout=5)
+            except queue.Full:
+                return
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def get_background_worker():
+    """العامل الخاص بالعملية الحالية (يُنشأ عند أول استخدام، بعد fork)"""
+    global _worker
+    if _worker is None or _worker.pid != os.getpid():
+        with _worker_lock:
+            if _worker is None or _worker.pid != os.getpid():
+                worker = BackgroundWorker(max_queue=get_background_settings()['MAX_QUEUE'])
+                atexit.register(worker.close)
+                _worker = worker
+    return _worker
+
+
+def run_after_commit(func, *args, **kwargs):
+    """جدولة func بعد نجاح المعاملة الحالية (أو فوراً خارج أي معاملة)"""
+    if get_background_settings()['ASYNC']:
+        transaction.on_commit(lambda: get_background_worker().submit(func, *args, **kwargs))
+    else:
+        transaction.on_commit(lambda: run_task(func, *args, **kwargs))
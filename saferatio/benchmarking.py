@@ -0,0 +1,152 @@
+# saferatio/benchmarking.py
+"""
+مشغل قياسات دقيقة (microbenchmarks) مع خطوط أساس JSON وبوابة تراجع
+
+- كل حالة (case) دالة setup(size) تعيد دالة بدون معاملات تُقاس، لكل حجم من أحجامها.
+- المعايرة: عدد التكرارات في الجولة يُضاعف حتى تستغرق الجولة min_time على الأقل،
+  ثم تُقاس rounds جولة ويُسجل زمن الاستدعاء الواحد (الأدنى، الوسيط، المتوسط، الانحراف).
+- المقارنة بالوسيط: الحالة تراجعت إذا زاد وسيطها عن وسيط خط الأساس بأكثر من threshold.
+
+خطوط الأساس تعتمد على الجهاز: تُحفظ وتُقارن على نفس الجهاز/بيئة CI.
+"""
+import json
+import platform
+import statistics
+import time
+from datetime import datetime
+
+DEFAULT_ROUNDS = 7
+DEFAULT_MIN_TIME = 0.05
+DEFAULT_THRESHOLD = 0.25
+
+
+class BenchmarkSuite:
+    """مجموعة حالات قياس مسماة"""
+
+    def __init__(self, name):
+        self.name = name
+        self.cases = {}
+
+    def case(self, name, sizes=(None,)):
+        """مزخرف لتسجيل دالة setup(size) كحالة قياس"""
+        def register(setup):
+            self.cases[name] = (setup, tuple(sizes))
+            return setup
+        return register
+
+    def keys(self, selected=None):
+        """مفاتيح النتائج بصيغة name[size]"""
+        return [
+            result_key(name, size)
+            for name, (_, sizes) in self.cases.items()
+            if not selected or any(pattern in name for pattern in selected)
+            for size in sizes
+        ]
+
+    def run(self, selected=None, rounds=DEFAULT_ROUNDS, min_time=DEFAULT_MIN_TIME, log=None):
+        results = {}
+        for name, (setup, sizes) in self.cases.items():
+            if selected and not any(pattern in name for pattern in selected):
+                continue
+            for size in sizes:
+                key = result_key(name, size)
+                results[key] = measure(setup(size), rounds=rounds, min_time=min_time)
+                if log:
+                    log(format_result(key, results[key]))
+        return {
+            'suite': self.name,
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'machine': {'python': platform.python_version(), 'platform': platform.platform()},
+            'rounds': rounds,
+            'results': results,
+        }
+
+
+def result_key(name, size):
+    return name if size is None else f'{name}[{size}]'
+
+
+def measure(func, rounds=DEFAULT_ROUNDS, min_time=DEFAULT_MIN_TIME):
+    """زمن الاستدعاء الواحد بالميكروثانية"""
+    func()  # إحماء (الاستيرادات، الكاش، الاتصالات)
+
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time or loops >= 1_000_000:
+            break
+        loops *= 2
+
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        timings.append((time.perf_counter() - started) / loops * 1e6)
+
+    return {
+        'loops': loops,
+        'min_us': round(min(timings), 3),
+        'median_us': round(statistics.median(timings), 3),
+        'mean_us': round(statistics.fmean(timings), 3),
+        'stdev_us': round(statistics.stdev(timings), 3) if len(timings) > 1 else 0.0,
+    }
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    مقارنة النتائج الحالية بخط الأساس
+
+    Returns:
+        list: صف لكل حالة مشتركة {key, baseline_us, current_us, change, regressed}
+        الحالات الجديدة أو المحذوفة تظهر مع change = None
+    """
+    base_results = baseline.get('results', {})
+    rows = []
+    for key in sorted(set(base_results) | set(current.get('results', {}))):
+        before = base_results.get(key, {}).get('median_us')
+        after = current.get('results', {}).get(key, {}).get('median_us')
+        change = (after - before) / before if before and after is not None else None
+        rows.append({
+            'key': key,
+            'baseline_us': before,
+            'current_us': after,
+            'change': None if change is None else round(change, 4),
+            'regressed': change is not None and change > threshold,
+        })
+    return rows
+
+
+def load_baseline(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_baseline(report, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def format_result(key, result):
+    return (f"{key:<62} {result['median_us']:>12.1f} µs  "
+            f"(min {result['min_us']:.1f}, ±{result['stdev_us']:.1f}, {result['loops']} loops)")
+
+
+def format_comparison(rows, threshold=DEFAULT_THRESHOLD):
+    lines = [f"{'benchmark':<62} {'baseline':>12} {'current':>12} {'change':>9}"]
+    for row in rows:
+        before = '-' if row['baseline_us'] is None else f"{row['baseline_us']:.1f}"
+        after = '-' if row['current_us'] is None else f"{row['current_us']:.1f}"
+        change = 'new/removed' if row['change'] is None else f"{row['change'] * 100:+.1f}%"
+        marker = '  ❌' if row['regressed'] else ''
+        lines.append(f"{row['key']:<62} {before:>12} {after:>12} {change:>9}{marker}")
+    regressed = sum(row['regressed'] for row in rows)
+    lines.append(
+        f"❌ {regressed} حالة تراجعت بأكثر من {threshold * 100:.0f}%" if regressed
+        else f"✅ لا تراجع أكبر من {threshold * 100:.0f}%"
+    )
+    return '\n'.join(lines)
@@ -0,0 +1,174 @@
+# saferatio/cache.py
+"""
+طبقة كاش مشتركة (cache-aside) للتأمين الصحي والسيارات ولوحة المسؤول
+
+- المفاتيح داخل مساحات أسماء مع رقم نسخة: رفع النسخة يبطل كل مفاتيح المساحة
+  (أو نطاقاً منها مثل شركة واحدة) دون البحث عنها أو حذفها.
+- الحماية من التدافع (stampede):
+  * قفل single-flight عبر cache.add: عملية واحدة تعيد الحساب، والبقية تعيد القيمة
+    الحالية إن وُجدت أو تنتظر النتيجة. cache.add ذري في Redis وقاعدة البيانات وlocmem،
+    لكنه في FileBasedCache (الافتراضي، CACHE_URL=file://) فحص ثم كتابة بين العمليات:
+    قد يأخذ عاملان القفل معاً فيحسبان القيمة مرتين (تقليل للتدافع لا ضمان).
+  * انتهاء مبكر احتمالي (XFetch): كلما اقترب انتهاء الصلاحية وطال زمن الحساب زاد احتمال
+    أن يعيد طلب واحد الحساب مبكراً، فلا ينتهي مفتاح ساخن لجميع الطلبات في اللحظة نفسها.
+
+مثال:
+    quotes = CacheNamespace('car:quotes', timeout=600)
+    data = quotes.get_or_set(('summary', user.id), lambda: build_summary(user), scope=user.id)
+    quotes.bump(scope=user.id)  # إبطال كل مفاتيح المستخدم
+
+مفاتيح النسخ بلا مهلة لكن الكاش قد يخرجها (MAX_ENTRIES في FileBasedCache، maxmemory في
+Redis)، لذلك النسخة الجديدة تبدأ من time.time_ns() لا من 1: عداد يبدأ من جديد يعيد أرقام
+نسخ قديمة فتُقدَّم قيم مخزنة تحتها (حتى 24 ساعة) على أنها حالية.
+"""
+import hashlib
+import json
+import math
+import random
+import time
+import uuid
+from typing import Callable, Generic, Optional, Sequence, Tuple, TypeVar, Union
+
+from django.core.cache import caches
+
+T = TypeVar('T')
+KeyParts = Union[str, int, Sequence[Union[str, int]]]
+
+DEFAULT_TIMEOUT = 300
+LOCK_TIMEOUT = 30
+LOCK_POLL_INTERVAL = 0.05
+
+
+def fingerprint(value) -> str:
+    """بصمة قصيرة ثابتة لقيمة قابلة للتحويل إلى JSON (لاستخدامها داخل المفاتيح)"""
+    payload = json.dumps(value, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.md5(payload.encode('utf-8')).hexdigest()[:12]
+
+
+class CacheNamespace(Generic[T]):
+    """
+    مساحة أسماء في الكاش بنمط cache-aside
+
+    القيم تُخزن كـ (value, expires_at, delta) حيث delta زمن الحساب بالثواني،
+    لذلك يمكن تخزين None ويمكن تقدير الانتهاء المبكر.
+    """
+
+    def __init__(self, name: str, timeout: Optional[int] = DEFAULT_TIMEOUT, alias: str = 'default',
+                 beta: float = 1.0, lock_timeout: int = LOCK_TIMEOUT):
+        self.name = name
+        self.timeout = timeout
+        self.alias = alias
+        self.beta = beta
+        self.lock_timeout = lock_timeout
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    # ------------------------------------------------------------------
+    # المفاتيح والنسخ
+    # ------------------------------------------------------------------
+    def _prefix(self, scope) -> str:
+        return self.name if scope is None else f'{self.name}:{scope}'
+
+    def version(self, scope=None) -> int:
+        """رقم النسخة الحالي للمساحة (أو لنطاق منها)"""
+        key = f'{self._prefix(scope)}:version'
+        version = self.cache.get(key)
+        if version is None:
+            version = time.time_ns()
+            if not self.cache.add(key, version, None):
+                version = self.cache.get(key, version)
+        return version
+
+    def bump(self, scope=None) -> int:
+        """رفع رقم النسخة لإبطال كل المفاتيح المخزنة تحتها"""
+        key = f'{self._prefix(scope)}:version'
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            # المفتاح غير موجود (لم يُقرأ بعد أو أُخرج من الكاش): نسخة لم تُستخدم من قبل
+            version = time.time_ns()
+            self.cache.set(key, version, None)
+            return version
+
+    def key(self, parts: KeyParts, scope=None, version: Optional[int] = None) -> str:
+        """المفتاح الكامل: name[:scope]:v<version>:part1:part2..."""
+        if isinstance(parts, (str, int)):
+            parts = [parts]
+        if version is None:
+            version = self.version(scope)
+        return ':'.join([self._prefix(scope), f'v{version}', *map(str, parts)])
+
+    # ------------------------------------------------------------------
+    # القراءة والكتابة
+    # ------------------------------------------------------------------
+    def _should_refresh(self, entry) -> bool:
+        """XFetch: إعادة الحساب قبل الانتهاء باحتمال يزيد مع اقتراب الموعد"""
+        _, expires_at, delta = entry
+        if expires_at is None:
+            return False
+        # 1 - random() في (0, 1] لتجنب log(0)
+        return time.time() - delta * self.beta * math.log(1.0 - random.random()) >= expires_at
+
+    def _store(self, key: str, value: T, delta: float, timeout: Optional[int]) -> None:
+        timeout = self.timeout if timeout is None else timeout
+        expires_at = None if timeout is None else time.time() + timeout
+        self.cache.set(key, (value, expires_at, delta), timeout)
+
+    def _compute_and_store(self, key: str, compute: Callable[[], T], timeout: Optional[int]) -> T:
+        started = time.monotonic()
+        value = compute()
+        self._store(key, value, time.monotonic() - started, timeout)
+        return value
+
+    def get(self, parts: KeyParts, default: Optional[T] = None, scope=None) -> Optional[T]:
+        entry = self.cache.get(self.key(parts, scope))
+        return default if entry is None else entry[0]
+
+    def set(self, parts: KeyParts, value: T, scope=None, timeout: Optional[int] = None) -> None:
+        self._store(self.key(parts, scope), value, 0.0, timeout)
+
+    def delete(self, parts: KeyParts, scope=None) -> None:
+        self.cache.delete(self.key(parts, scope))
+
+    def fetch(self, parts: KeyParts, compute: Callable[[], T], scope=None,
+              timeout: Optional[int] = None) -> Tuple[T, bool]:
+        """
+        قراءة القيمة أو حسابها مرة واحدة فقط بين العمليات المتزامنة
+
+        تعيد (القيمة، هل جاءت من الكاش).
+        """
+        key = self.key(parts, scope)
+        entry = self.cache.get(key)
+        if entry is not None and not self._should_refresh(entry):
+            return entry[0], True
+
+        lock_key = f'{key}:lock'
+        token = uuid.uuid4().hex
+        if self.cache.add(lock_key, token, self.lock_timeout):
+            try:
+                return self._compute_and_store(key, compute, timeout), False
+            finally:
+                if self.cache.get(lock_key) == token:
+                    self.cache.delete(lock_key)
+
+        if entry is not None:
+            # عملية أخرى تعيد الحساب مبكراً والقيمة الحالية ما زالت صالحة
+            return entry[0], True
+
+        # انتظار نتيجة العملية التي تحمل القفل
+        deadline = time.monotonic() + self.lock_timeout
+        while time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_INTERVAL)
+            entry = self.cache.get(key)
+            if entry is not None:
+                return entry[0], True
+            if self.cache.get(lock_key) is None:
+                # صاحب القفل فشل قبل التخزين
+                break
+        return self._compute_and_store(key, compute, timeout), False
+
+    def get_or_set(self, parts: KeyParts, compute: Callable[[], T], scope=None,
+                   timeout: Optional[int] = None) -> T:
+        return self.fetch(parts, compute, scope, timeout)[0]
@@ -0,0 +1,509 @@
+# saferatio/loadtest.py
+"""
+اختبار حمل محلي يعيد تشغيل سيناريوهات المستخدمين على تطبيق WSGI داخل نفس العملية
+
+- كل تكرار = مستخدم افتراضي (من البيانات الاصطناعية) ينفذ السيناريوهات المختارة بالترتيب.
+- الطلبات تُبنى كبيئات WSGI حقيقية وتُمرر لـ saferatio.wsgi.application (نفس الـ middleware
+  والمصادقة بـ JWT) دون خادم HTTP، لذلك الأرقام تقيس التطبيق وقاعدة البيانات فقط.
+- التقرير لكل نقطة نهاية: p50/p95/p99، المتوسط، الإنتاجية (طلب/ثانية)، الأخطاء وعدد الاستعلامات.
+- التزامن بالخيوط (concurrency): لكل خيط اتصال قاعدة بيانات خاص يبقى مفتوحاً طوال التشغيل.
+- IoLoadTestRunner (manage.py run_io_loadtest): نقطة نهاية تنتظر التخزين عبر WSGI بخيوط محدودة
+  مقابل ASGI في حلقة أحداث واحدة، لقياس أثر الـ views غير المتزامنة (saferatio.async_views).
+"""
+import asyncio
+import json
+import math
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.storage import InMemoryStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.signals import request_finished, request_started
+from django.db import close_old_connections, connection, connections
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, RequestFactory, encode_multipart
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from car_insurance.models import CarInsuranceQuote, CarPolicy
+from health_insurance.models import Company
+from health_insurance.services.calculation_log import get_calculation_log_writer, get_log_settings
+
+from .synthetic_data import DEFAULT_PASSWORD, DEFAULT_PREFIX
+
+SCENARIOS = ['login', 'dashboard', 'calculate', 'upload', 'compare', 'pdf']
+# الأقسام المستخدمة في طلبات الحساب
+CALCULATION_SECTORS = ['tech_software', 'health_clinic', 'construction_civil', 'retail_store', 'services_logistics']
+EMPLOYEES_CSV_HEADER = 'الاسم_الكامل,الجنس,الحالة_الاجتماعية,الراتب,عدد_الأبناء,الرقم_الوظيفي\n'
+
+
+def percentile(sorted_values, pct):
+    """النسبة المئوية بطريقة الرتبة الأقرب"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class VirtualUser:
+    """جلسة مستخدم افتراضي: ترسل الطلبات وتسجل الزمن وعدد الاستعلامات"""
+
+    def __init__(self, runner, user, rng):
+        self.runner = runner
+        self.user = user
+        self.rng = rng
+        self.token = None
+
+    def request(self, label, method, path, data=None, **extra):
+        if self.token:
+            extra.setdefault('HTTP_AUTHORIZATION', f'Bearer {self.token}')
+        if method == 'get':
+            request = self.runner.factory.get(path, data, **extra)
+        elif isinstance(data, dict) and any(isinstance(v, SimpleUploadedFile) for v in data.values()):
+            request = self.runner.factory.post(path, data, **extra)
+        else:
+            request = self.runner.factory.generic(
+                method.upper(), path, json.dumps(data or {}), content_type='application/json', **extra
+            )
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = dict(headers)
+
+        db = connections['default']
+        with CaptureQueriesContext(db) as queries:
+            started = time.perf_counter()
+            result = self.runner.application(request.environ, start_response)
+            try:
+                body = b''.join(result)
+            finally:
+                if hasattr(result, 'close'):
+                    result.close()
+            elapsed = time.perf_counter() - started
+
+        self.runner.record(label, elapsed, response['status'], len(queries))
+        return response['status'], response['headers'], body
+
+    def json(self, body):
+        try:
+            return json.loads(body)
+        except ValueError:
+            return {}
+
+    # ------------------------------------------------------------------
+    # السيناريوهات
+    # ------------------------------------------------------------------
+    def login(self):
+        status, _, body = self.request('POST /api/auth/login/', 'post', '/api/auth/login/', {
+            'username': self.user.username, 'password': self.runner.password,
+        })
+        if status == 200:
+            self.token = self.json(body).get('access')
+
+    def ensure_token(self):
+        if self.token is None:
+            # بدون قياس: السيناريو المطلوب لا يشمل تسجيل الدخول
+            from rest_framework_simplejwt.tokens import RefreshToken
+            self.token = str(RefreshToken.for_user(self.user).access_token)
+
+    def dashboard(self):
+        path = '/api/health/api/health-dashboard/'
+        _, headers, _ = self.request('GET health-dashboard', 'get', path)
+        etag = headers.get('ETag')
+        if etag:
+            # إعادة التحميل من المتصفح (If-None-Match)
+            self.request('GET health-dashboard (revalidate)', 'get', path, HTTP_IF_NONE_MATCH=etag)
+
+    def calculate(self):
+        self.request('POST health-premium/calculate', 'post', '/api/health/api/health-premium/calculate/', {
+            'sector': self.rng.choice(CALCULATION_SECTORS),
+            'size_category': self.rng.choice(['micro', 'small', 'medium', 'large']),
+            'employee_count': self.rng.randint(5, 500),
+            'city': 'صنعاء',
+        })
+        self.request('POST car calculator', 'post', '/api/car-insurance/calculator/', {
+            'vehicle_type': 'car',
+            'year': self.rng.randint(2008, 2024),
+            'current_value': self.rng.randint(5000, 40000),
+            'coverage_type': self.rng.choice(['comprehensive', 'third_party']),
+            'driver_age': self.rng.randint(20, 65),
+        })
+
+    def upload(self):
+        company_id = self.runner.pick('companies', self.user.id, self.rng)
+        if company_id is None:
+            return
+        rows = ''.join(
+            f"موظف {n},{self.rng.choice(['ذكر', 'أنثى'])},{self.rng.choice(['متزوج', 'أعزب'])},"
+            f"{self.rng.randint(500, 3000)},{self.rng.randint(0, 4)},LT{n}\n"
+            for n in range(self.runner.upload_rows)
+        )
+        upload = SimpleUploadedFile('employees.csv', (EMPLOYEES_CSV_HEADER + rows).encode('utf-8'), 'text/csv')
+        self.request(
+            'POST companies/<id>/upload-employees', 'post',
+            f'/api/health/companies/{company_id}/upload-employees/', {'employees_file': upload},
+        )
+
+    def compare(self):
+        params = {}
+        company_id = self.runner.pick('companies', self.user.id, self.rng)
+        if company_id is not None:
+            params['company_id'] = company_id
+        self.request('GET health-coverage-plans/compare', 'get', '/api/health/health-coverage-plans/compare/', params)
+        quote_ids = self.runner.related['car_quotes'].get(self.user.id, [])[:3]
+        if quote_ids:
+            self.request(
+                'GET vehicles/compare_quotes', 'get', '/api/car-insurance/vehicles/compare_quotes/',
+                {'quote_ids': ','.join(map(str, quote_ids))},
+            )
+
+    def pdf(self):
+        policy_id = self.runner.pick('car_policies', self.user.id, self.rng)
+        if policy_id is not None:
+            self.request(
+                'GET policies/<id>/certificate (PDF)', 'get', f'/api/car-insurance/policies/{policy_id}/certificate/'
+            )
+
+    def run(self, scenarios):
+        for name in scenarios:
+            if name != 'login':
+                self.ensure_token()
+            getattr(self, name)()
+
+
+class LoadTestRunner:
+    """تشغيل السيناريوهات وتجميع النتائج لكل نقطة نهاية"""
+
+    def __init__(self, scenarios=None, iterations=50, concurrency=1, prefix=DEFAULT_PREFIX,
+                 password=DEFAULT_PASSWORD, host='localhost', upload_rows=20, seed=1, application=None):
+        scenarios = list(scenarios or SCENARIOS)
+        unknown = set(scenarios) - set(SCENARIOS)
+        if unknown:
+            raise ValueError(f"سيناريوهات غير معروفة: {', '.join(sorted(unknown))}")
+        self.scenarios = scenarios
+        self.iterations = iterations
+        self.concurrency = max(1, concurrency)
+        self.prefix = prefix
+        self.password = password
+        self.upload_rows = upload_rows
+        self.seed = seed
+        self.factory = RequestFactory(SERVER_NAME=host, HTTP_HOST=host)
+        if application is None:
+            from saferatio.wsgi import application
+        self.application = application
+        self._lock = threading.Lock()
+        self.samples = {}
+
+    def load_users(self):
+        users = list(get_user_model().objects.filter(
+            username__startswith=f'{self.prefix}_user_', is_active=True
+        ).order_by('id'))
+        if not users:
+            raise ValueError(f"لا يوجد مستخدمون اصطناعيون بالبادئة '{self.prefix}' (شغّل seed_synthetic_data أولاً)")
+        ids = [user.id for user in users]
+        self.related = {'companies': {}, 'car_quotes': {}, 'car_policies': {}}
+        for user_id, company_id in Company.objects.filter(user_id__in=ids).values_list('user_id', 'id'):
+            self.related['companies'].setdefault(user_id, []).append(company_id)
+        for user_id, quote_id in CarInsuranceQuote.objects.filter(user_id__in=ids).values_list('user_id', 'id'):
+            self.related['car_quotes'].setdefault(user_id, []).append(quote_id)
+        # CarPolicyViewSet يعرض وثائق اقتباسات المستخدم فقط
+        for user_id, policy_id in CarPolicy.objects.filter(quote__user_id__in=ids).values_list('quote__user_id', 'id'):
+            self.related['car_policies'].setdefault(user_id, []).append(policy_id)
+        return users
+
+    def pick(self, kind, user_id, rng):
+        values = self.related[kind].get(user_id)
+        return rng.choice(values) if values else None
+
+    def record(self, label, elapsed, status, queries):
+        with self._lock:
+            self.samples.setdefault(label, []).append((elapsed, status, queries))
+
+    def _session(self, user, iteration):
+        try:
+            VirtualUser(self, user, random.Random(self.seed * 100003 + iteration)).run(self.scenarios)
+        finally:
+            if threading.current_thread() is not threading.main_thread():
+                connections.close_all()
+
+    def run(self):
+        users = self.load_users()
+        self.samples = {}
+        # مثل django.test.Client: إغلاق الاتصالات بعد كل طلب يكسر المعاملات المفتوحة (الاختبارات)
+        # ويقيس إعادة الاتصال بدلاً من التطبيق
+        request_started.disconnect(close_old_connections)
+        request_finished.disconnect(close_old_connections)
+        # داخل معاملة مفتوحة (الاختبارات) خيط سجل الحسابات لا يرى البيانات: الكتابة في خيط الطلب
+        log_settings = get_log_settings()
+        in_transaction = connection.in_atomic_block
+        calculation_log = override_settings(HEALTH_CALCULATION_LOG=dict(log_settings, ASYNC=False))
+        if in_transaction:
+            calculation_log.enable()
+        started = time.perf_counter()
+        try:
+            sessions = [(users[i % len(users)], i) for i in range(self.iterations)]
+            if self.concurrency == 1:
+                for user, iteration in sessions:
+                    self._session(user, iteration)
+            else:
+                with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+                    list(pool.map(lambda args: self._session(*args), sessions))
+        finally:
+            wall_time = time.perf_counter() - started
+            if in_transaction:
+                calculation_log.disable()
+            elif log_settings['ASYNC']:
+                # لا سجلات معلقة في الذاكرة بعد انتهاء التشغيل
+                get_calculation_log_writer().flush()
+            request_started.connect(close_old_connections)
+            request_finished.connect(close_old_connections)
+        return self.report(wall_time)
+
+    def report(self, wall_time):
+        endpoints = []
+        total = 0
+        for label, samples in self.samples.items():
+            durations = sorted(elapsed * 1000 for elapsed, _, _ in samples)
+            queries = [count for _, _, count in samples]
+            total += len(samples)
+            endpoints.append({
+                'endpoint': label,
+                'requests': len(samples),
+                'errors': sum(1 for _, status, _ in samples if status >= 400),
+                'statuses': sorted({status for _, status, _ in samples}),
+                'p50_ms': round(percentile(durations, 50), 2),
+                'p95_ms': round(percentile(durations, 95), 2),
+                'p99_ms': round(percentile(durations, 99), 2),
+                'mean_ms': round(sum(durations) / len(durations), 2),
+                'throughput_rps': round(len(samples) / wall_time, 2) if wall_time else 0.0,
+                'queries_avg': round(sum(queries) / len(queries), 1),
+                'queries_max': max(queries),
+            })
+        return {
+            'scenarios': self.scenarios,
+            'iterations': self.iterations,
+            'concurrency': self.concurrency,
+            'database': connection.vendor,
+            'wall_time_s': round(wall_time, 3),
+            'requests': total,
+            'throughput_rps': round(total / wall_time, 2) if wall_time else 0.0,
+            'endpoints': endpoints,
+        }
+
+
+def format_report(report):
+    """جدول نصي للتقرير"""
+    lines = [
+        f"{'endpoint':<42} {'n':>5} {'err':>4} {'p50':>8} {'p95':>8} {'p99':>8} {'rps':>7} {'q avg':>6} {'q max':>6}"
+    ]
+    for row in report['endpoints']:
+        lines.append(
+            f"{row['endpoint']:<42} {row['requests']:>5} {row['errors']:>4} {row['p50_ms']:>8.1f} "
+            f"{row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} {row['throughput_rps']:>7.1f} "
+            f"{row['queries_avg']:>6.1f} {row['queries_max']:>6}"
+        )
+    lines.append(
+        f"{report['requests']} طلب في {report['wall_time_s']} ث ({report['throughput_rps']} طلب/ث، "
+        f"تزامن {report['concurrency']}، {report['database']})"
+    )
+    return '\n'.join(lines)
+
+
+# ----------------------------------------------------------------------
+# نقاط النهاية المنتظرة لـ I/O: WSGI (خيوط) مقابل ASGI (حلقة أحداث)
+# ----------------------------------------------------------------------
+IO_ENDPOINT = '/api/auth/upload-avatar/'
+IO_MODES = ['wsgi', 'asgi']
+
+
+class LatencyStorage(InMemoryStorage):
+    """تخزين في الذاكرة مع تأخير ثابت لكل حفظ (يحاكي تخزيناً بعيداً مثل S3)"""
+
+    latency = 0.2
+
+    def _save(self, name, content):
+        time.sleep(self.latency)
+        return super()._save(name, content)
+
+
+def sample_image_bytes(size=(64, 64), color=(40, 120, 200)):
+    """صورة PNG صغيرة صالحة لطلبات رفع الصورة الشخصية"""
+    from PIL import Image
+
+    buffer = BytesIO()
+    Image.new('RGB', size, color).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+class IoLoadTestRunner:
+    """
+    نفس عدد طلبات رفع الصورة الشخصية عبر saferatio.wsgi بعدد خيوط ثابت (مثل عامل gthread)
+    ثم عبر saferatio.asgi في حلقة أحداث واحدة (مثل عامل uvicorn)، مع تأخير تخزين مصطنع
+    """
+
+    def __init__(self, requests=40, concurrency=4, latency=0.2, username=None, prefix=DEFAULT_PREFIX,
+                 host='localhost'):
+        self.requests = requests
+        self.concurrency = max(1, concurrency)
+        self.latency = latency
+        self.username = username
+        self.prefix = prefix
+        self.host = host
+        self.factory = RequestFactory(SERVER_NAME=host, HTTP_HOST=host)
+
+    def load_user(self):
+        users = get_user_model().objects.filter(is_active=True)
+        if self.username:
+            user = users.filter(username=self.username).first()
+        else:
+            user = users.filter(username__startswith=f'{self.prefix}_user_').order_by('id').first()
+        if user is None:
+            raise ValueError(f"لا يوجد مستخدمون اصطناعيون بالبادئة '{self.prefix}' (شغّل seed_synthetic_data أولاً)")
+        return user
+
+    def _wsgi_request(self, application, body, token):
+        request = self.factory.generic(
+            'POST', IO_ENDPOINT, body, content_type=MULTIPART_CONTENT, HTTP_AUTHORIZATION=f'Bearer {token}',
+        )
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split(' ', 1)[0])
+
+        started = time.perf_counter()
+        result = application(request.environ, start_response)
+        try:
+            b''.join(result)
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        return time.perf_counter() - started, response['status']
+
+    def run_wsgi(self, bodies, token):
+        # نفس تطبيق saferatio.wsgi بدون django.setup() ثانية (تعيد إعداد السجلات)
+        application = WSGIHandler()
+
+        def worker(body):
+            try:
+                return self._wsgi_request(application, body, token)
+            finally:
+                if threading.current_thread() is not threading.main_thread():
+                    connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            return list(pool.map(worker, bodies))
+
+    async def _asgi_request(self, application, body, token):
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'scheme': 'http',
+            'method': 'POST', 'path': IO_ENDPOINT, 'raw_path': IO_ENDPOINT.encode(), 'query_string': b'',
+            'root_path': '', 'client': ('127.0.0.1', 0), 'server': (self.host, 80),
+            'headers': [
+                (b'host', self.host.encode()), (b'content-type', MULTIPART_CONTENT.encode()),
+                (b'content-length', str(len(body)).encode()), (b'authorization', f'Bearer {token}'.encode()),
+            ],
+        }
+        messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+        response = {}
+
+        async def receive():
+            if messages:
+                return messages.pop()
+            await asyncio.Event().wait()  # لا قطع اتصال؛ Django يلغي المستمع بعد الاستجابة
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                response['status'] = message['status']
+
+        started = time.perf_counter()
+        await application(scope, receive, send)
+        return time.perf_counter() - started, response['status']
+
+    def run_asgi(self, bodies, token):
+        application = ASGIHandler()
+
+        async def run_all():
+            return await asyncio.gather(*(self._asgi_request(application, body, token) for body in bodies))
+
+        return async_to_sync(run_all)()
+
+    def run(self, modes=None):
+        from rest_framework_simplejwt.tokens import RefreshToken
+
+        modes = list(modes or IO_MODES)
+        unknown = set(modes) - set(IO_MODES)
+        if unknown:
+            raise ValueError(f"أوضاع غير معروفة: {', '.join(sorted(unknown))}")
+        token = str(RefreshToken.for_user(self.load_user()).access_token)
+        results = []
+        LatencyStorage.latency = self.latency
+        storages = dict(settings.STORAGES, default={'BACKEND': 'saferatio.loadtest.LatencyStorage'})
+        # الصور المصغرة خارج القياس: بدون أحجام ومباشرة عند الـ commit (لا كتابة من خيط آخر)
+        avatars = dict(getattr(settings, 'AVATAR_IMAGES', {}), SIZES={})
+        request_started.disconnect(close_old_connections)
+        request_finished.disconnect(close_old_connections)
+        try:
+            with override_settings(STORAGES=storages, AVATAR_IMAGES=avatars, BACKGROUND_TASKS={'ASYNC': False}):
+                for mode in modes:
+                    run_mode = getattr(self, f'run_{mode}')
+                    run_mode(self.upload_bodies(1), token)  # تحميل التطبيق والخيوط خارج القياس
+                    bodies = self.upload_bodies(self.requests)
+                    started = time.perf_counter()
+                    samples = run_mode(bodies, token)
+                    results.append(self.summarize(mode, samples, time.perf_counter() - started))
+        finally:
+            request_started.connect(close_old_connections)
+            request_finished.connect(close_old_connections)
+        return {
+            'endpoint': f'POST {IO_ENDPOINT}',
+            'requests': self.requests,
+            'latency_ms': round(self.latency * 1000, 1),
+            'database': connection.vendor,
+            'modes': results,
+        }
+
+    @staticmethod
+    def upload_bodies(count):
+        """صورة مختلفة لكل طلب: الصور المتطابقة يُعاد استخدامها (بصمة المحتوى) بدون تخزين"""
+        rng = random.Random()
+        bodies = []
+        for _ in range(count):
+            color = tuple(rng.randrange(256) for _ in range(3))
+            upload = SimpleUploadedFile('avatar.png', sample_image_bytes(color=color), content_type='image/png')
+            bodies.append(encode_multipart(BOUNDARY, {'avatar': upload}))
+        return bodies
+
+    def summarize(self, mode, samples, wall_time):
+        durations = sorted(elapsed * 1000 for elapsed, _ in samples)
+        return {
+            'mode': mode,
+            # ASGI: كل الطلبات في حلقة واحدة والحد هو ASYNC_VIEWS['MAX_CONCURRENT_IO']
+            'concurrency': self.concurrency if mode == 'wsgi' else len(samples),
+            'errors': sum(1 for _, status in samples if status >= 400),
+            'statuses': sorted({status for _, status in samples}),
+            'p50_ms': round(percentile(durations, 50), 2),
+            'p95_ms': round(percentile(durations, 95), 2),
+            'wall_time_s': round(wall_time, 3),
+            'throughput_rps': round(len(samples) / wall_time, 2) if wall_time else 0.0,
+        }
+
+
+def format_io_report(report):
+    lines = [f"{'mode':<6} {'conc':>5} {'err':>4} {'p50':>8} {'p95':>8} {'wall s':>8} {'rps':>8}"]
+    for row in report['modes']:
+        lines.append(
+            f"{row['mode']:<6} {row['concurrency']:>5} {row['errors']:>4} {row['p50_ms']:>8.1f} "
+            f"{row['p95_ms']:>8.1f} {row['wall_time_s']:>8.3f} {row['throughput_rps']:>8.1f}"
+        )
+    lines.append(
+        f"{report['requests']} طلب لكل وضع على {report['endpoint']} (تأخير البريد {report['latency_ms']} ms، "
+        f"{report['database']})"
+    )
+    return '\n'.join(lines)
@@ -0,0 +1,240 @@
+# saferatio/pricing_pool.py
+"""
+مجمع عمليات التسعير (اختياري): حساب الأقساط خارج خيط الطلب
+
+حاسبات الأقساط (السيارات والصحي السريعة) تستهلك المعالج داخل عامل gunicorn. عند تفعيل
+PRICING_POOL['ENABLED']:
+- كل عملية ويب تملك مجمعاً من WORKERS عملية طويلة العمر (spawn)، كل منها يهيئ Django
+  ويحمّل جداول التسعير والعوامل مرة واحدة عند البدء (warm_pricing_caches، WARMUP=False يلغيها:
+  العملية تقرأ إعدادات المشروع لا إعدادات الاختبار، فالتهيئة فيها تتصل بقاعدة البيانات الحقيقية)
+- الطلب يضيف المهمة إلى طابور محلي وينتظر النتيجة (الانتظار يحرر الـ GIL لباقي خيوط gthread)
+- خيط توزيع يجمع المهام الواصلة خلال BATCH_WAIT_MS (حتى MAX_BATCH مهمة) ويرسلها دفعة
+  واحدة لعملية تسعير، فتكلفة التسلسل بين العمليات تُدفع مرة لكل دفعة لا لكل طلب
+
+المعطّل (الافتراضي والاختبارات) أو عند تعطل المجمع: تُنفذ المهمة مباشرة في خيط الطلب.
+خطأ قاعدة بيانات داخل عملية التسعير (اتصال انقطع مثلاً) يعامل كتعطل للمجمع: يُسعَّر الطلب
+مباشرة، ويُغلق الاتصال المعطوب في العملية قبل الدفعة التالية.
+المهام مسجلة بالاسم في PRICING_JOBS، ومدخلاتها ونتائجها قيم بسيطة قابلة للـ pickle.
+"""
+import atexit
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.db import Error as DatabaseError, close_old_connections
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger('saferatio.pricing')
+
+DEFAULTS = {
+    'ENABLED': False,
+    'WORKERS': 2,
+    'MAX_BATCH': 32,
+    'BATCH_WAIT_MS': 2,
+    'TIMEOUT_SECONDS': 10,
+    'WARMUP': True,
+}
+PRICING_JOBS = {
+    'car.premium': 'car_insurance.calculations.calculate_vehicle_premium',
+    'health.quick': 'health_insurance.calculations.quick_health_calculator',
+}
+WARMUP_HOOKS = [
+    'car_insurance.calculations.warm_pricing_caches',
+    'health_insurance.calculations.warm_pricing_caches',
+]
+
+_job_functions = {}
+
+
+class PricingPoolUnavailable(Exception):
+    """المجمع متوقف أو تعذر إرسال الدفعة إليه"""
+
+
+def get_pricing_settings():
+    return dict(DEFAULTS, **getattr(settings, 'PRICING_POOL', {}))
+
+
+def resolve_job(name):
+    if name not in _job_functions:
+        if name not in PRICING_JOBS:
+            raise ValueError(f'مهمة تسعير غير معروفة: {name}')
+        _job_functions[name] = import_string(PRICING_JOBS[name])
+    return _job_functions[name]
+
+
+def run_job(name, kwargs):
+    return resolve_job(name)(**kwargs)
+
+
+# ----------------------------------------------------------------------
+# داخل عملية التسعير
+# ----------------------------------------------------------------------
+def _init_worker(warmup_hooks):
+    import django
+
+    django.setup()
+    for job in PRICING_JOBS:
+        resolve_job(job)
+    for hook in warmup_hooks:
+        try:
+            import_string(hook)()
+        except Exception:
+            logger.exception('pricing warmup failed', extra={'data': {'hook': hook}})
+
+
+def run_batch(jobs):
+    """تنفيذ دفعة [(name, kwargs)]؛ خطأ مهمة لا يُفشل باقي الدفعة"""
+    # عملية التسعير طويلة العمر ولا تمر بإشارات بداية/نهاية الطلب
+    close_old_connections()
+    results = []
+    try:
+        for name, kwargs in jobs:
+            try:
+                results.append((True, run_job(name, kwargs)))
+            except DatabaseError as e:
+                # ليس خطأ في المدخلات: المستدعي يعيد الحساب مباشرة
+                results.append((False, PricingPoolUnavailable(f'database error: {e!r}')))
+            except Exception as e:
+                results.append((False, e))
+    finally:
+        close_old_connections()
+    return results
+
+
+# ----------------------------------------------------------------------
+# داخل عملية الويب
+# ----------------------------------------------------------------------
+class PricingPool:
+    """مجمع عمليات تسعير مع خيط توزيع يجمع المهام في دفعات"""
+
+    def __init__(self, workers=2, max_batch=32, batch_wait_ms=2, warmup_hooks=()):
+        self.pid = os.getpid()
+        self.max_batch = max_batch
+        self.batch_wait = batch_wait_ms / 1000
+        self.stats = {'jobs': 0, 'batches': 0}
+        self._queue = queue.Queue()
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context('spawn'), initializer=_init_worker,
+            initargs=(list(warmup_hooks),),
+        )
+        self._thread = threading.Thread(target=self._dispatch, name='pricing-dispatch', daemon=True)
+        self._thread.start()
+
+    def submit(self, name, kwargs):
+        future = Future()
+        self._queue.put((name, kwargs, future))
+        return future
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.batch_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)  # الإيقاف بعد إرسال الدفعة الحالية
+                break
+            batch.append(item)
+        return batch
+
+    def _dispatch(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            self.stats['jobs'] += len(batch)
+            self.stats['batches'] += 1
+            futures = [future for _, _, future in batch]
+            try:
+                result = self._executor.submit(run_batch, [(name, kwargs) for name, kwargs, _ in batch])
+            except Exception as e:  # المجمع متوقف أو معطل
+                for future in futures:
+                    future.set_exception(PricingPoolUnavailable(repr(e)))
+                continue
+            result.add_done_callback(lambda done, futures=futures: self._resolve(done, futures))
+
+    @staticmethod
+    def _resolve(done, futures):
+        try:
+            outcomes = done.result()
+        except BrokenProcessPool as e:
+            for future in futures:
+                future.set_exception(e)
+            return
+        except Exception as e:  # نتيجة الدفعة لم تصل (pickle مثلاً)
+            for future in futures:
+                future.set_exception(PricingPoolUnavailable(repr(e)))
+            return
+        for future, (ok, value) in zip(futures, outcomes):
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pricing_pool():
+    """مجمع العملية الحالية (يُنشأ عند أول استخدام، بعد fork عامل gunicorn)"""
+    global _pool
+    if _pool is None or _pool.pid != os.getpid():
+        with _pool_lock:
+            if _pool is None or _pool.pid != os.getpid():
+                config = get_pricing_settings()
+                pool = PricingPool(
+                    workers=config['WORKERS'], max_batch=config['MAX_BATCH'], batch_wait_ms=config['BATCH_WAIT_MS'],
+                    warmup_hooks=WARMUP_HOOKS if config['WARMUP'] else (),
+                )
+                atexit.register(pool.close)
+                _pool = pool
+    return _pool
+
+
+def reset_pricing_pool():
+    """إيقاف مجمع العملية الحالية (الاختبارات أو بعد تغيير الإعدادات)"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool.pid == os.getpid():
+            _pool.close()
+        _pool = None
+
+
+def price(name, **kwargs):
+    """
+    تنفيذ مهمة تسعير مسجلة في PRICING_JOBS وإرجاع نتيجتها
+
+    أخطاء المهمة نفسها (ValueError مثلاً) تصل للمستدعي كما هي في الوضعين.
+    """
+    config = get_pricing_settings()
+    if not config['ENABLED']:
+        return run_job(name, kwargs)
+
+    resolve_job(name)  # اسم خاطئ يفشل هنا لا في عملية التسعير
+    try:
+        return get_pricing_pool().submit(name, kwargs).result(timeout=config['TIMEOUT_SECONDS'])
+    except (BrokenProcessPool, FutureTimeoutError, PricingPoolUnavailable) as e:
+        # المجمع معطل أو مزدحم: الطلب يحسب بنفسه بدل أن يفشل
+        logger.warning('pricing pool unavailable, pricing inline', extra={'data': {'job': name, 'error': repr(e)}})
+        if isinstance(e, BrokenProcessPool):
+            reset_pricing_pool()
+        return run_job(name, kwargs)
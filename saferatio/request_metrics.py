@@ -0,0 +1,463 @@
+# saferatio/request_metrics.py
+"""
+قياس كل طلب HTTP: الزمن الكلي، زمن قاعدة البيانات، عدد الاستعلامات، الاستعلامات المكررة
+(بصمات N+1) وحجم الاستجابة
+
+- RequestMetricsMiddleware يلف كل اتصالات قاعدة البيانات بـ execute_wrapper طوال الطلب،
+  فيعمل بدون DEBUG ولا يحتفظ بنصوص الاستعلامات الكاملة.
+- النتيجة تُرسل في ترويسة Server-Timing، وسطر JSON في المسجل saferatio.requests
+  (WARNING للطلبات البطيئة أو التي فيها استعلامات مكررة)، ومدرج تكراري متجدد لكل مسار.
+- المدرجات تُجمع في الذاكرة بشرائح دقيقة، وتُنشر كل PUBLISH_INTERVAL ثانية في الكاش المشترك
+  ليجمع /api/admin/request-metrics/ أرقام كل العمليات (workers).
+"""
+import json
+import logging
+import math
+import os
+import re
+import socket
+import threading
+import time
+from collections import Counter, deque
+from contextlib import ExitStack
+from datetime import datetime, timezone as dt_timezone
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils.functional import empty
+
+from .cache import CacheNamespace
+
+logger = logging.getLogger('saferatio.requests')
+
+DEFAULTS = {
+    'ENABLED': True,
+    'SLOW_REQUEST_MS': 1000,
+    'DUPLICATE_QUERY_THRESHOLD': 3,
+    'WINDOW_MINUTES': 60,
+    'PUBLISH_INTERVAL': 10,
+    'SERVER_TIMING': True,
+}
+
+# حدود المدرج التكراري بالملي ثانية (الخانة الأخيرة لما يتجاوز آخر حد)
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+SLOT_SECONDS = 60
+MAX_DUPLICATES_REPORTED = 5
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'(?<![\w"])-?\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%s|\?')
+_IN_LIST = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.IGNORECASE)
+_SPACE = re.compile(r'\s+')
+_ROUTE_GROUP = re.compile(r'\(\?P<(\w+)>[^)]*\)')
+
+
+def get_metrics_settings():
+    return dict(DEFAULTS, **getattr(settings, 'REQUEST_METRICS', {}))
+
+
+def normalize_sql(sql):
+    """بصمة الاستعلام: القيم الحرفية والمعاملات تصبح ? وقوائم IN تُختصر، لتتطابق استعلامات N+1"""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+
+def route_name(request):
+    """المسار المطابق بدل الرابط الفعلي (companies/<pk>/... بدل companies/17/...)"""
+    match = getattr(request, 'resolver_match', None)
+    if match is None or match.route is None:
+        return f'{request.method} <unmatched>'
+    route = _ROUTE_GROUP.sub(r'<\1>', match.route).replace('^', '').replace('$', '')
+    return f'{request.method} /{route}'
+
+
+class QueryRecorder:
+    """execute_wrapper يجمع عدد الاستعلامات وزمنها وتكرار البصمات"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+        self.fingerprint_time = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            fingerprint = normalize_sql(sql)
+            self.count += 1
+            self.duration += elapsed
+            self.fingerprints[fingerprint] += 1
+            self.fingerprint_time[fingerprint] += elapsed
+
+    def duplicates(self, threshold):
+        """البصمات التي تكررت threshold مرة أو أكثر (الأكثر تكراراً أولاً)"""
+        return [
+            {
+                'sql': fingerprint[:300],
+                'count': count,
+                'time_ms': round(self.fingerprint_time[fingerprint] * 1000, 2),
+            }
+            for fingerprint, count in self.fingerprints.most_common()
+            if count >= threshold
+        ][:MAX_DUPLICATES_REPORTED]
+
+
+# ----------------------------------------------------------------------
+# المدرجات التكرارية لكل مسار
+# ----------------------------------------------------------------------
+def empty_stats():
+    return {
+        'count': 0,
+        'errors': 0,
+        'slow': 0,
+        'duplicate_requests': 0,
+        'duration_ms_sum': 0.0,
+        'duration_ms_max': 0.0,
+        'db_ms_sum': 0.0,
+        'queries_sum': 0,
+        'queries_max': 0,
+        'bytes_sum': 0,
+        'buckets': [0] * (len(LATENCY_BUCKETS_MS) + 1),
+    }
+
+
+def merge_stats(target, source):
+    for key in ('count', 'errors', 'slow', 'duplicate_requests', 'duration_ms_sum', 'db_ms_sum',
+                'queries_sum', 'bytes_sum'):
+        target[key] += source[key]
+    target['duration_ms_max'] = max(target['duration_ms_max'], source['duration_ms_max'])
+    target['queries_max'] = max(target['queries_max'], source['queries_max'])
+    target['buckets'] = [a + b for a, b in zip(target['buckets'], source['buckets'])]
+    return target
+
+
+def bucket_index(duration_ms):
+    for index, bound in enumerate(LATENCY_BUCKETS_MS):
+        if duration_ms <= bound:
+            return index
+    return len(LATENCY_BUCKETS_MS)
+
+
+def histogram_percentile(stats, fraction):
+    """تقدير النسبة المئوية بالحد الأعلى للخانة التي تقع فيها (لا يتجاوز أقصى زمن مسجل)"""
+    if not stats['count']:
+        return None
+    rank = max(1, math.ceil(fraction * stats['count']))
+    seen = 0
+    for index, count in enumerate(stats['buckets']):
+        seen += count
+        if seen >= rank:
+            bound = LATENCY_BUCKETS_MS[index] if index < len(LATENCY_BUCKETS_MS) else stats['duration_ms_max']
+            return round(min(bound, stats['duration_ms_max']), 2)
+    return round(stats['duration_ms_max'], 2)
+
+
+def summarize_route(route, stats):
+    count = stats['count'] or 1
+    return {
+        'route': route,
+        'count': stats['count'],
+        'errors': stats['errors'],
+        'error_rate': round(stats['errors'] / count, 4),
+        'slow_requests': stats['slow'],
+        'duplicate_query_requests': stats['duplicate_requests'],
+        'avg_ms': round(stats['duration_ms_sum'] / count, 2),
+        'p50_ms': histogram_percentile(stats, 0.50),
+        'p95_ms': histogram_percentile(stats, 0.95),
+        'p99_ms': histogram_percentile(stats, 0.99),
+        'max_ms': round(stats['duration_ms_max'], 2),
+        'total_ms': round(stats['duration_ms_sum'], 2),
+        'avg_db_ms': round(stats['db_ms_sum'] / count, 2),
+        'db_share': round(stats['db_ms_sum'] / stats['duration_ms_sum'], 4) if stats['duration_ms_sum'] else 0.0,
+        'avg_queries': round(stats['queries_sum'] / count, 2),
+        'max_queries': stats['queries_max'],
+        'avg_bytes': round(stats['bytes_sum'] / count),
+        'histogram': [
+            {'le_ms': bound, 'count': stats['buckets'][index]}
+            for index, bound in enumerate(LATENCY_BUCKETS_MS + (None,))
+        ],
+    }
+
+
+class RouteMetrics:
+    """مدرجات متجددة لكل مسار: شريحة لكل دقيقة، وتُحذف الشرائح الأقدم من النافذة"""
+
+    def __init__(self, window_minutes=DEFAULTS['WINDOW_MINUTES']):
+        self.window_minutes = window_minutes
+        self.slots = {}  # بداية الدقيقة -> {route: stats}
+        self.lock = threading.Lock()
+
+    def record(self, route, sample, now=None):
+        slot = int((time.time() if now is None else now) // SLOT_SECONDS) * SLOT_SECONDS
+        with self.lock:
+            routes = self.slots.get(slot)
+            if routes is None:
+                routes = self.slots[slot] = {}
+                self._prune(slot)
+            stats = routes.get(route)
+            if stats is None:
+                stats = routes[route] = empty_stats()
+            stats['count'] += 1
+            stats['errors'] += sample['status'] >= 500
+            stats['slow'] += sample['slow']
+            stats['duplicate_requests'] += bool(sample['duplicates'])
+            stats['duration_ms_sum'] += sample['duration_ms']
+            stats['duration_ms_max'] = max(stats['duration_ms_max'], sample['duration_ms'])
+            stats['db_ms_sum'] += sample['db_ms']
+            stats['queries_sum'] += sample['queries']
+            stats['queries_max'] = max(stats['queries_max'], sample['queries'])
+            stats['bytes_sum'] += sample['response_bytes'] or 0
+            stats['buckets'][bucket_index(sample['duration_ms'])] += 1
+
+    def _prune(self, current_slot):
+        oldest = current_slot - self.window_minutes * SLOT_SECONDS
+        for slot in [slot for slot in self.slots if slot <= oldest]:
+            del self.slots[slot]
+
+    def export(self):
+        """نسخة قابلة للتحويل إلى JSON من كل الشرائح (للنشر في الكاش)"""
+        with self.lock:
+            return {
+                slot: {route: dict(stats, buckets=list(stats['buckets'])) for route, stats in routes.items()}
+                for slot, routes in self.slots.items()
+            }
+
+    def reset(self):
+        with self.lock:
+            self.slots.clear()
+
+
+def merge_slots(slot_maps, minutes, now=None):
+    """دمج شرائح عدة عمليات ضمن آخر minutes دقيقة في إحصائيات لكل مسار"""
+    oldest = (int((time.time() if now is None else now) // SLOT_SECONDS) - minutes) * SLOT_SECONDS
+    merged = {}
+    for slots in slot_maps:
+        for slot, routes in slots.items():
+            if int(slot) <= oldest:
+                continue
+            for route, stats in routes.items():
+                merge_stats(merged.setdefault(route, empty_stats()), stats)
+    return merged
+
+
+# ----------------------------------------------------------------------
+# التخزين الخاص بالعملية والنشر في الكاش المشترك
+# ----------------------------------------------------------------------
+_shared = CacheNamespace('metrics:requests', timeout=None)
+_store = None
+_store_pid = None
+_last_publish = 0.0
+_store_lock = threading.Lock()
+
+
+def worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def get_route_metrics():
+    """مدرجات العملية الحالية (تُنشأ من جديد بعد fork)"""
+    global _store, _store_pid
+    if _store is None or _store_pid != os.getpid():
+        with _store_lock:
+            if _store is None or _store_pid != os.getpid():
+                _store = RouteMetrics(get_metrics_settings()['WINDOW_MINUTES'])
+                _store_pid = os.getpid()
+    return _store
+
+
+def publish_route_metrics(force=False):
+    """نشر شرائح العملية الحالية في الكاش وتسجيلها في قائمة العمليات"""
+    global _last_publish
+    options = get_metrics_settings()
+    now = time.monotonic()
+    if not force and now - _last_publish < options['PUBLISH_INTERVAL']:
+        return False
+    _last_publish = now
+
+    timeout = options['WINDOW_MINUTES'] * SLOT_SECONDS + SLOT_SECONDS
+    me = worker_id()
+    try:
+        _shared.set(('worker', me), get_route_metrics().export(), timeout=timeout)
+        workers = _shared.get('workers') or []
+        if me not in workers:
+            alive = [worker for worker in workers if _shared.get(('worker', worker)) is not None]
+            _shared.set('workers', alive + [me], timeout=timeout)
+    except Exception as e:
+        # تعذر الوصول للكاش لا يجب أن يفشل الطلب
+        logger.warning('request metrics publish failed', extra={'data': {'worker': me, 'error': str(e)}})
+        return False
+    return True
+
+
+def collect_route_metrics(minutes=None, now=None):
+    """
+    إحصائيات كل المسارات من كل العمليات خلال آخر minutes دقيقة
+
+    Returns:
+        dict: {window_minutes, workers, totals, routes} والمسارات مرتبة بإجمالي الزمن
+    """
+    options = get_metrics_settings()
+    minutes = min(int(minutes or options['WINDOW_MINUTES']), options['WINDOW_MINUTES'])
+    publish_route_metrics(force=True)
+
+    slot_maps = []
+    workers = []
+    for worker in _shared.get('workers') or []:
+        slots = _shared.get(('worker', worker))
+        if slots is not None:
+            workers.append(worker)
+            slot_maps.append(slots)
+    if not slot_maps:  # الكاش غير متاح: أرقام هذه العملية فقط
+        workers = [worker_id()]
+        slot_maps = [get_route_metrics().export()]
+
+    merged = merge_slots(slot_maps, minutes, now)
+    totals = empty_stats()
+    for stats in merged.values():
+        merge_stats(totals, stats)
+    routes = sorted(
+        (summarize_route(route, stats) for route, stats in merged.items()),
+        key=lambda row: row['total_ms'], reverse=True,
+    )
+    return {
+        'window_minutes': minutes,
+        'workers': workers,
+        'totals': summarize_route('*', totals),
+        'routes': routes,
+    }
+
+
+# ----------------------------------------------------------------------
+# الوسيط والسجل
+# ----------------------------------------------------------------------
+def _user_id(request):
+    # لا نقيّم request.user الكسول هنا حتى لا نضيف استعلام جلسة بعد القياس
+    user = getattr(request, 'user', None)
+    user = getattr(user, '_wrapped', user)
+    if user is None or user is empty:
+        return None
+    return getattr(user, 'pk', None)
+
+
+def _response_size(response):
+    if getattr(response, 'streaming', False):
+        length = response.get('Content-Length')
+        return int(length) if length and length.isdigit() else None
+    return len(response.content)
+
+
+def server_timing(sample):
+    parts = [
+        f"total;dur={sample['duration_ms']:.1f}",
+        f"db;dur={sample['db_ms']:.1f};desc=\"{sample['queries']} queries\"",
+    ]
+    if sample['duplicates']:
+        repeated = sum(item['count'] for item in sample['duplicates'])
+        parts.append(f"dup;desc=\"{repeated} repeated queries\"")
+    return ', '.join(parts)
+
+
+class RequestMetricsMiddleware:
+    """وسيط القياس؛ يوضع بعد WhiteNoise حتى لا تُقاس الملفات الثابتة (متزامن وغير متزامن)"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.options = get_metrics_settings()
+        if not self.options['ENABLED']:
+            raise MiddlewareNotUsed
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    @staticmethod
+    def _recording(recorder):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        return stack
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with self._recording(recorder):
+            response = self.get_response(request)
+        return self.finish(request, response, recorder, started)
+
+    async def __acall__(self, request):
+        # تحت ASGI: وسيط متزامن هنا يجبر كل الـ views بعده على خيط واحد. استعلامات الـ view
+        # تعمل في خيط الطلب المتزامن (ThreadSensitiveContext) باتصالاته هو، فيُلف هناك
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        recording = await sync_to_async(self._recording)(recorder)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(recording.close)()
+        return self.finish(request, response, recorder, started)
+
+    def finish(self, request, response, recorder, started):
+        duration_ms = (time.perf_counter() - started) * 1000
+
+        duplicates = recorder.duplicates(self.options['DUPLICATE_QUERY_THRESHOLD'])
+        sample = {
+            'method': request.method,
+            'path': request.path,
+            'route': route_name(request),
+            'status': response.status_code,
+            'duration_ms': round(duration_ms, 2),
+            'db_ms': round(recorder.duration * 1000, 2),
+            'queries': recorder.count,
+            'duplicates': duplicates,
+            'response_bytes': _response_size(response),
+            'slow': duration_ms >= self.options['SLOW_REQUEST_MS'],
+            'user_id': _user_id(request),
+        }
+
+        if self.options['SERVER_TIMING']:
+            existing = response.get('Server-Timing')
+            timing = server_timing(sample)
+            response['Server-Timing'] = f'{existing}, {timing}' if existing else timing
+
+        level = logging.WARNING if sample['slow'] or duplicates or sample['status'] >= 500 else logging.INFO
+        logger.log(level, 'request', extra={'data': sample})
+
+        get_route_metrics().record(sample['route'], sample)
+        publish_route_metrics()
+        return response
+
+
+class JsonFormatter(logging.Formatter):
+    """سطر JSON لكل سجل؛ الحقول الإضافية تُمرر عبر extra={'data': {...}}"""
+
+    def format(self, record):
+        payload = {
+            'time': datetime.fromtimestamp(record.created, tz=dt_timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        payload.update(getattr(record, 'data', None) or {})
+        if record.exc_info:
+            payload['exception'] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+def read_system_log(limit=100):
+    """آخر limit سطر من ملف سجل النظام (SYSTEM_LOG_FILE)"""
+    path = getattr(settings, 'SYSTEM_LOG_FILE', None)
+    if not path or not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8', errors='replace') as f:
+        return [line.rstrip('\n') for line in deque(f, maxlen=limit)]
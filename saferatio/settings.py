@@ -1,5 +1,6 @@
 # saferatio/settings.py - الإصدار النهائي المصحح
 import os
+import tempfile
 from pathlib import Path
 from datetime import timedelta
 import dj_database_url
@@ -35,7 +36,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'saferatio.async_views.AsyncWhiteNoiseMiddleware',
+    'saferatio.request_metrics.RequestMetricsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -86,6 +88,141 @@ else:
         }
     }
 
+# Cache
+# CACHE_URL يحدد الخلفية المشتركة بين العمليات:
+#   file:///path/to/dir   ملفات (افتراضي، خادم واحد)
+#   db://table_name       جدول في قاعدة البيانات (يتطلب manage.py createcachetable)
+#   redis://host:6379/0   Redis أو أي خادم متوافق (rediss:// للاتصال المشفر)
+#   locmem://             ذاكرة العملية فقط (تطوير)
+# CACHE_BACKEND يسمح بخلفية مخصصة (مسار Python) مع CACHE_URL كـ LOCATION
+CACHE_URL = os.environ.get('CACHE_URL', 'file://' + os.path.join(tempfile.gettempdir(), 'saferatio_cache'))
+CACHE_BACKENDS = {
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'db': 'django.core.cache.backends.db.DatabaseCache',
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+    'rediss': 'django.core.cache.backends.redis.RedisCache',
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'dummy': 'django.core.cache.backends.dummy.DummyCache',
+}
+_cache_scheme, _, _cache_location = CACHE_URL.partition('://')
+_cache_options = {'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', 10000))}
+if _cache_scheme in ('redis', 'rediss'):
+    # خيارات RedisCache تُمرر لعميل redis مباشرة، والحد الأقصى يضبطه الخادم (maxmemory)
+    _cache_location = CACHE_URL
+    _cache_options = {}
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND') or CACHE_BACKENDS[_cache_scheme],
+        'LOCATION': _cache_location,
+        'TIMEOUT': int(os.environ.get('CACHE_TIMEOUT', 300)),
+        'KEY_PREFIX': os.environ.get('CACHE_KEY_PREFIX', 'saferatio'),
+        'OPTIONS': _cache_options,
+    }
+}
+
+# سجل حسابات التأمين الصحي (كتابة مجمعة في خيط خلفي مع ملف spill محلي)
+HEALTH_CALCULATION_LOG = {
+    'ASYNC': os.environ.get('HEALTH_CALC_LOG_ASYNC', 'True').lower() == 'true',
+    'BATCH_SIZE': int(os.environ.get('HEALTH_CALC_LOG_BATCH_SIZE', 100)),
+    'FLUSH_INTERVAL_MS': int(os.environ.get('HEALTH_CALC_LOG_FLUSH_MS', 500)),
+    'MAX_PENDING': int(os.environ.get('HEALTH_CALC_LOG_MAX_PENDING', 10000)),
+    'SPILL_DIR': os.environ.get('HEALTH_CALC_LOG_SPILL_DIR', str(BASE_DIR / 'var' / 'calculation_log_spill')),
+    'FSYNC': os.environ.get('HEALTH_CALC_LOG_FSYNC', 'False').lower() == 'true',
+    'RECOVERY_INTERVAL_MS': int(os.environ.get('HEALTH_CALC_LOG_RECOVERY_MS', 30000)),
+    # manage.py archive_calculation_logs ينقل الأشهر الأقدم إلى ARCHIVE_DIR (ملفات jsonl.gz)
+    'RETENTION_MONTHS': int(os.environ.get('HEALTH_CALC_LOG_RETENTION_MONTHS', 12)),
+    'ARCHIVE_DIR': os.environ.get('HEALTH_CALC_LOG_ARCHIVE_DIR', str(BASE_DIR / 'var' / 'calculation_log_archive')),
+}
+
+# الاختبارات: سجل الحسابات متزامن وملفاته في مجلد مؤقت (saferatio/test_runner.py)
+TEST_RUNNER = 'saferatio.test_runner.SafeRatioTestRunner'
+
+# مهام ما بعد الـ commit (saferatio/background.py): توليد مستندات الوثائق بعد الإصدار الجماعي
+BACKGROUND_TASKS = {
+    'ASYNC': os.environ.get('BACKGROUND_TASKS_ASYNC', 'True').lower() == 'true',
+    'MAX_QUEUE': int(os.environ.get('BACKGROUND_TASKS_MAX_QUEUE', 1000)),
+}
+
+# مجدول انتهاء الوثائق (insurance/services/policy_expiry.py، manage.py run_expiry_scheduler)
+POLICY_EXPIRY = {
+    'WARNING_DAYS': int(os.environ.get('POLICY_EXPIRY_WARNING_DAYS', 30)),
+    'INTERVAL_SECONDS': int(os.environ.get('POLICY_EXPIRY_INTERVAL_SECONDS', 300)),
+    'BATCH_SIZE': int(os.environ.get('POLICY_EXPIRY_BATCH_SIZE', 1000)),
+}
+
+# أرقام الاقتباسات والوثائق (insurance/services/identifiers.py): عدد الأرقام التي تحجزها كل عملية من تسلسل PostgreSQL
+IDENTIFIERS = {
+    'BLOCK_SIZE': int(os.environ.get('IDENTIFIERS_BLOCK_SIZE', 50)),
+}
+
+# مجمع عمليات التسعير (saferatio/pricing_pool.py): حاسبات الأقساط خارج خيط الطلب، مع gthread في Procfile
+PRICING_POOL = {
+    'ENABLED': os.environ.get('PRICING_POOL_ENABLED', 'False').lower() == 'true',
+    'WORKERS': int(os.environ.get('PRICING_POOL_WORKERS', 2)),
+    'MAX_BATCH': int(os.environ.get('PRICING_POOL_MAX_BATCH', 32)),
+    'BATCH_WAIT_MS': int(os.environ.get('PRICING_POOL_BATCH_WAIT_MS', 2)),
+    'TIMEOUT_SECONDS': int(os.environ.get('PRICING_POOL_TIMEOUT_SECONDS', 10)),
+    'WARMUP': os.environ.get('PRICING_POOL_WARMUP', 'True').lower() == 'true',
+}
+
+# الصور الشخصية: نسخة منظفة + صور مصغرة بأحجام ثابتة في العامل الخلفي (users/services/avatars.py)
+AVATAR_IMAGES = {
+    'SIZES': {'small': 64, 'medium': 256},
+    'FORMATS': ['webp', 'jpeg'],
+    'URL_FORMAT': os.environ.get('AVATAR_URL_FORMAT', 'webp'),
+    'MAX_DIMENSION': int(os.environ.get('AVATAR_MAX_DIMENSION', 1024)),
+    'QUALITY': int(os.environ.get('AVATAR_QUALITY', 82)),
+}
+
+# views غير متزامنة لنقاط النهاية المنتظرة لـ I/O (البريد، رفع الصور) — تستفيد منها SERVER_MODE=asgi
+ASYNC_VIEWS = {
+    'MAX_CONCURRENT_IO': int(os.environ.get('ASYNC_VIEWS_MAX_CONCURRENT_IO', 20)),
+    'IO_TIMEOUT_SECONDS': int(os.environ.get('ASYNC_VIEWS_IO_TIMEOUT_SECONDS', 30)),
+}
+
+# قياس الطلبات (Server-Timing + سجل JSON + مدرجات لكل مسار في /api/admin/request-metrics/)
+REQUEST_METRICS = {
+    'ENABLED': os.environ.get('REQUEST_METRICS_ENABLED', 'True').lower() == 'true',
+    'SLOW_REQUEST_MS': int(os.environ.get('REQUEST_METRICS_SLOW_MS', 1000)),
+    'DUPLICATE_QUERY_THRESHOLD': int(os.environ.get('REQUEST_METRICS_DUPLICATE_THRESHOLD', 3)),
+    'WINDOW_MINUTES': int(os.environ.get('REQUEST_METRICS_WINDOW_MINUTES', 60)),
+    'PUBLISH_INTERVAL': int(os.environ.get('REQUEST_METRICS_PUBLISH_INTERVAL', 10)),
+    'SERVER_TIMING': os.environ.get('REQUEST_METRICS_SERVER_TIMING', 'True').lower() == 'true',
+}
+
+# السجلات: أسطر JSON في SYSTEM_LOG_FILE (تقرأه لوحة المسؤول)، والتحذيرات فقط على stderr
+SYSTEM_LOG_FILE = os.environ.get('SYSTEM_LOG_FILE', str(BASE_DIR / 'var' / 'logs' / 'system.log'))
+os.makedirs(os.path.dirname(SYSTEM_LOG_FILE), exist_ok=True)
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'json': {'()': 'saferatio.request_metrics.JsonFormatter'},
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'level': os.environ.get('SYSTEM_LOG_CONSOLE_LEVEL', 'WARNING'),
+            'formatter': 'json',
+        },
+        'system_file': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': SYSTEM_LOG_FILE,
+            'maxBytes': int(os.environ.get('SYSTEM_LOG_MAX_BYTES', 10 * 1024 * 1024)),
+            'backupCount': int(os.environ.get('SYSTEM_LOG_BACKUPS', 5)),
+            'encoding': 'utf-8',
+            'formatter': 'json',
+        },
+    },
+    'loggers': {
+        'saferatio': {
+            'handlers': ['console', 'system_file'],
+            'level': os.environ.get('SYSTEM_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -154,6 +291,17 @@ CORS_ALLOW_CREDENTIALS = True
 
 # Email
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+FRONTEND_URL = os.environ.get('FRONTEND_URL', 'http://localhost:3000')
+
+# صندوق البريد الصادر: الطلبات تضيف الرسائل فقط، ويرسلها manage.py run_email_outbox على دفعات
+EMAIL_OUTBOX = {
+    'BATCH_SIZE': int(os.environ.get('EMAIL_OUTBOX_BATCH_SIZE', 50)),
+    'INTERVAL_SECONDS': int(os.environ.get('EMAIL_OUTBOX_INTERVAL_SECONDS', 5)),
+    'MAX_ATTEMPTS': int(os.environ.get('EMAIL_OUTBOX_MAX_ATTEMPTS', 5)),
+    'RETRY_BASE_SECONDS': int(os.environ.get('EMAIL_OUTBOX_RETRY_BASE_SECONDS', 60)),
+    'RETRY_MAX_SECONDS': int(os.environ.get('EMAIL_OUTBOX_RETRY_MAX_SECONDS', 3600)),
+    'LEASE_SECONDS': int(os.environ.get('EMAIL_OUTBOX_LEASE_SECONDS', 300)),
+}
 
 # Gemini API
 GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY', '')
\ No newline at end of file
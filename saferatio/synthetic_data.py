@@ -0,0 +1,404 @@
+# saferatio/synthetic_data.py
+"""
+مولد بيانات اصطناعية بأحجام واقعية لاختبارات الحمل والقياس
+
+ينشئ مستخدمين (مع ملفات شخصية)، شركات وموظفيها، مركبات، اقتباسات ووثائق صحية وسيارات،
+مطالبات وسجلات حسابات بتوزيعات محددة وبذرة عشوائية ثابتة (نفس المعاملات = نفس البيانات).
+
+- كل السجلات تُدرج بـ bulk_create على دفعات (الإشارات لا تُطلق، وإحصائيات الموظفين
+  تُبنى عند أول قراءة عبر get_roster_stats).
+- كل المعرفات النصية تبدأ بالبادئة (prefix) لتمييز البيانات الاصطناعية وحذفها لاحقاً.
+- تواريخ الإنشاء موزعة على آخر months شهراً (تُضبط بعد الإدراج لأن created_at تلقائي).
+"""
+import itertools
+import math
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from car_insurance.models import CarInsuranceQuote, CarPolicy, Claim, Vehicle
+from health_insurance.models import (
+    Company, Employee, HealthCalculationLog, HealthCoveragePlan, HealthInsurancePolicy, HealthInsuranceQuote,
+)
+from health_insurance.services.policy_fields import normalize_policy_fields
+from users.models import Profile
+
+DEFAULT_PREFIX = 'synthetic'
+DEFAULT_PASSWORD = 'LoadTest123!'
+
+DEFAULT_VOLUMES = {
+    'users': 100,
+    'companies_per_user': 1.5,
+    'employees_per_company': 40,
+    'max_employees': 2000,
+    'vehicles_per_user': 1.2,
+    'quotes_per_company': 3,
+    'quotes_per_vehicle': 2,
+    'policy_ratio': 0.5,
+    'claims_per_policy': 0.3,
+    'calc_logs_per_user': 20,
+    'months': 12,
+}
+
+# التوزيعات (القيمة: الوزن)
+USER_TYPES = {'individual': 70, 'organization': 30}
+HEALTH_QUOTE_STATUSES = {'draft': 15, 'pending': 10, 'quoted': 35, 'accepted': 30, 'rejected': 7, 'expired': 3}
+CAR_QUOTE_STATUSES = {'draft': 15, 'pending': 10, 'quoted': 35, 'accepted': 30, 'rejected': 7, 'expired': 3}
+POLICY_STATUSES = {'active': 60, 'expired': 25, 'pending': 10, 'cancelled': 5}
+CLAIM_STATUSES = {'submitted': 30, 'under_review': 25, 'approved': 20, 'rejected': 10, 'paid': 15}
+COVERAGE_TYPES = {'comprehensive': 55, 'third_party_fire_theft': 25, 'third_party': 20}
+VEHICLE_TYPES = {'car': 65, 'suv': 20, 'truck': 10, 'motorcycle': 5}
+FUEL_TYPES = {'petrol': 70, 'diesel': 20, 'hybrid': 7, 'electric': 3}
+MAKES = ['Toyota', 'Hyundai', 'Kia', 'Nissan', 'Mitsubishi', 'Honda', 'Ford', 'Mercedes']
+CITIES = ['صنعاء', 'عدن', 'تعز', 'الحديدة', 'المكلا', 'إب']
+POSITIONS = ['محاسب', 'مهندس', 'مبرمج', 'سائق', 'فني', 'مدير', 'موظف استقبال', 'عامل']
+DEPARTMENTS = ['المالية', 'التقنية', 'العمليات', 'المبيعات', 'الموارد البشرية']
+
+# حدود فئات حجم الشركة (الحد الأعلى لعدد الموظفين)
+SIZE_LIMITS = [(5, 'micro'), (50, 'small'), (250, 'medium'), (1000, 'large')]
+
+
+def size_category(employee_count):
+    for limit, category in SIZE_LIMITS:
+        if employee_count <= limit:
+            return category
+    return 'enterprise'
+
+
+class SyntheticDataGenerator:
+    """توليد البيانات على دفعات مع عدادات لكل نموذج"""
+
+    def __init__(self, prefix=DEFAULT_PREFIX, seed=42, batch_size=2000, password=DEFAULT_PASSWORD,
+                 log=None, **volumes):
+        unknown = set(volumes) - set(DEFAULT_VOLUMES)
+        if unknown:
+            raise TypeError(f"معاملات غير معروفة: {', '.join(sorted(unknown))}")
+        self.volumes = dict(DEFAULT_VOLUMES, **volumes)
+        self.prefix = prefix
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.password = password
+        self.log = log or (lambda message: None)
+        self.now = timezone.now()
+        self.counts = {}
+
+    # ------------------------------------------------------------------
+    # التوزيعات
+    # ------------------------------------------------------------------
+    def choice(self, weights):
+        return self.rng.choices(list(weights), weights=list(weights.values()))[0]
+
+    def poisson(self, mean):
+        """عدد عشوائي بمتوسط mean (Knuth للمتوسطات الصغيرة، تقريب طبيعي للكبيرة)"""
+        if mean <= 0:
+            return 0
+        if mean > 30:
+            return max(0, round(self.rng.gauss(mean, math.sqrt(mean))))
+        limit, k, p = math.exp(-mean), 0, 1.0
+        while True:
+            p *= self.rng.random()
+            if p <= limit:
+                return k
+            k += 1
+
+    def lognormal(self, median, sigma):
+        return median * math.exp(self.rng.gauss(0, sigma))
+
+    def past_datetime(self):
+        """وقت عشوائي خلال آخر months شهراً"""
+        return self.now - timedelta(seconds=self.rng.randint(0, self.volumes['months'] * 30 * 24 * 3600))
+
+    def money(self, value):
+        return Decimal(str(round(value, 2)))
+
+    # ------------------------------------------------------------------
+    # الإدراج
+    # ------------------------------------------------------------------
+    def insert(self, model, objects):
+        created = model.objects.bulk_create(objects, batch_size=self.batch_size)
+        self.counts[model.__name__] = self.counts.get(model.__name__, 0) + len(created)
+        return created
+
+    def sequence(self, model, **lookup):
+        """أرقام المعرفات النصية بعد البيانات الاصطناعية الموجودة بنفس البادئة"""
+        return itertools.count(model.objects.filter(**lookup).count())
+
+    def backdate(self, model, objects, dates):
+        """ضبط created_at بعد الإدراج (auto_now_add يتجاهل القيم المُمررة)"""
+        for obj, created_at in zip(objects, dates):
+            obj.created_at = created_at
+        model.objects.bulk_update(objects, ['created_at'], batch_size=self.batch_size)
+
+    # ------------------------------------------------------------------
+    # النماذج
+    # ------------------------------------------------------------------
+    def create_users(self, start):
+        User = get_user_model()
+        # تجزئة كلمة المرور مرة واحدة لكل المستخدمين (التجزئة مكلفة عمداً)
+        password_hash = make_password(self.password)
+        users = [
+            User(
+                username=f'{self.prefix}_user_{start + i}',
+                email=f'{self.prefix}_user_{start + i}@example.com',
+                password=password_hash,
+                first_name='مستخدم',
+                last_name=str(start + i),
+                user_type=self.choice(USER_TYPES),
+            )
+            for i in range(self.volumes['users'])
+        ]
+        users = self.insert(User, users)
+        self.insert(Profile, [
+            Profile(
+                user=user,
+                date_of_birth=(self.now - timedelta(days=365 * self.rng.randint(20, 65))).date(),
+                gender=self.rng.choice(['male', 'female']),
+            )
+            for user in users
+        ])
+        return users
+
+    def create_companies(self, users):
+        companies, numbers = [], self.sequence(Company, cr_number__startswith=f'{self.prefix}-CR-')
+        sectors = [code for code, _ in Company.SECTOR_CHOICES]
+        for user in users:
+            if user.user_type == 'individual' and self.rng.random() < 0.5:
+                continue
+            for _ in range(max(1, self.poisson(self.volumes['companies_per_user']))):
+                index = next(numbers)
+                employee_count = min(
+                    self.volumes['max_employees'],
+                    max(1, round(self.lognormal(self.volumes['employees_per_company'], 0.9))),
+                )
+                companies.append(Company(
+                    user=user,
+                    name=f'{self.prefix} شركة {index}',
+                    sector=self.rng.choice(sectors),
+                    size_category=size_category(employee_count),
+                    total_employees=employee_count,
+                    cr_number=f'{self.prefix}-CR-{index}',
+                    address='شارع الزبيري',
+                    city=self.rng.choice(CITIES),
+                    phone='777000000',
+                    email=f'company{index}@example.com',
+                ))
+        return self.insert(Company, companies)
+
+    def create_employees(self, companies):
+        batch = []
+        for company in companies:
+            for n in range(company.total_employees):
+                married = self.rng.random() < 0.6
+                include_parents = self.rng.random() < 0.15
+                batch.append(Employee(
+                    company=company,
+                    name=f'موظف {company.id}-{n}',
+                    age=min(64, max(18, round(self.rng.gauss(36, 9)))),
+                    gender='male' if self.rng.random() < 0.65 else 'female',
+                    marital_status='married' if married else 'single',
+                    position=self.rng.choice(POSITIONS),
+                    department=self.rng.choice(DEPARTMENTS),
+                    base_salary=self.money(self.lognormal(90000, 0.6)),
+                    wives_count=1 if married else 0,
+                    children_count=self.poisson(1.8) if married else 0,
+                    include_parents=include_parents,
+                    parents_count=2 if include_parents else 0,
+                    chronic_diseases=self.rng.random() < 0.08,
+                    employee_number=f'{self.prefix}-E{company.id}-{n}',
+                ))
+                if len(batch) >= self.batch_size:
+                    self.insert(Employee, batch)
+                    batch = []
+        if batch:
+            self.insert(Employee, batch)
+
+    def create_health_business(self, companies):
+        plans = list(HealthCoveragePlan.objects.filter(is_active=True))
+        quotes = []
+        numbers = self.sequence(HealthInsuranceQuote, quote_number__startswith=f'{self.prefix[:4]}-HQ')
+        for company in companies:
+            for _ in range(self.poisson(self.volumes['quotes_per_company'])):
+                plan = self.rng.choice(plans) if plans else None
+                per_employee = float(plan.base_price_per_employee) if plan else 1000.0
+                annual = per_employee * company.total_employees * self.rng.uniform(0.85, 1.3)
+                quotes.append(HealthInsuranceQuote(
+                    company=company,
+                    user_id=company.user_id,
+                    coverage_plan=plan,
+                    quote_number=f'{self.prefix[:4]}-HQ{next(numbers)}',
+                    insured_employees_count=company.total_employees,
+                    base_premium=self.money(annual * 0.9),
+                    total_premium=self.money(annual),
+                    annual_premium=self.money(annual),
+                    monthly_premium=self.money(annual / 12),
+                    status=self.choice(HEALTH_QUOTE_STATUSES),
+                ))
+        quotes = self.insert(HealthInsuranceQuote, quotes)
+        quote_dates = [self.past_datetime() for _ in quotes]
+        self.backdate(HealthInsuranceQuote, quotes, quote_dates)
+
+        policies, policy_dates = [], []
+        numbers = self.sequence(HealthInsurancePolicy, policy_number__startswith=f'{self.prefix}-HP-')
+        for quote, quoted_at in zip(quotes, quote_dates):
+            if quote.status != 'accepted' and self.rng.random() >= self.volumes['policy_ratio']:
+                continue
+            inception = (quoted_at + timedelta(days=self.rng.randint(0, 14))).date()
+            policies.append(HealthInsurancePolicy(
+                quote=quote,
+                user_id=quote.user_id,
+                company=quote.company,
+                policy_number=f'{self.prefix}-HP-{next(numbers)}',
+                total_premium=quote.total_premium,
+                annual_premium=quote.annual_premium,
+                monthly_premium=quote.monthly_premium,
+                status=self.choice(POLICY_STATUSES),
+                inception_date=inception,
+                expiry_date=inception + timedelta(days=365),
+                total_employees=quote.insured_employees_count,
+            ))
+            normalize_policy_fields(policies[-1])  # bulk_create لا يستدعي save
+            policy_dates.append(quoted_at)
+        policies = self.insert(HealthInsurancePolicy, policies)
+        self.backdate(HealthInsurancePolicy, policies, policy_dates)
+
+    def create_car_business(self, users):
+        vehicles, numbers = [], self.sequence(Vehicle, license_plate__startswith=f'{self.prefix[:4]}-')
+        for user in users:
+            for _ in range(self.poisson(self.volumes['vehicles_per_user'])):
+                vehicles.append(Vehicle(
+                    user=user,
+                    make=self.rng.choice(MAKES),
+                    year=self.rng.randint(2005, self.now.year),
+                    license_plate=f'{self.prefix[:4]}-{next(numbers)}',
+                    vehicle_type=self.choice(VEHICLE_TYPES),
+                    fuel_type=self.choice(FUEL_TYPES),
+                    current_value=self.money(self.lognormal(15000, 0.5)),
+                    annual_mileage=self.rng.randint(5000, 40000),
+                ))
+        vehicles = self.insert(Vehicle, vehicles)
+
+        quotes = []
+        numbers = self.sequence(CarInsuranceQuote, quote_number__startswith=f'{self.prefix[:4]}-CQ')
+        for vehicle in vehicles:
+            for _ in range(self.poisson(self.volumes['quotes_per_vehicle'])):
+                base = float(vehicle.current_value) * self.rng.uniform(0.03, 0.07)
+                discount = base * self.rng.choice([0, 0, 0.05, 0.1])
+                quotes.append(CarInsuranceQuote(
+                    vehicle=vehicle,
+                    user_id=vehicle.user_id,
+                    quote_number=f'{self.prefix[:4]}-CQ{next(numbers)}',
+                    coverage_type=self.choice(COVERAGE_TYPES),
+                    base_premium=self.money(base),
+                    discount_amount=self.money(discount),
+                    premium_amount=self.money(base - discount),
+                    final_premium=self.money(base - discount),
+                    claims_history=self.poisson(0.4),
+                    no_claims_years=self.rng.randint(0, 8),
+                    status=self.choice(CAR_QUOTE_STATUSES),
+                ))
+        quotes = self.insert(CarInsuranceQuote, quotes)
+        quote_dates = [self.past_datetime() for _ in quotes]
+        self.backdate(CarInsuranceQuote, quotes, quote_dates)
+
+        policies, policy_dates = [], []
+        numbers = self.sequence(CarPolicy, policy_number__startswith=f'{self.prefix}-CP-')
+        for quote, quoted_at in zip(quotes, quote_dates):
+            if quote.status != 'accepted' and self.rng.random() >= self.volumes['policy_ratio']:
+                continue
+            policies.append(CarPolicy(
+                quote=quote,
+                user_id=quote.user_id,
+                vehicle_id=quote.vehicle_id,
+                policy_number=f'{self.prefix}-CP-{next(numbers)}',
+                status=self.choice(POLICY_STATUSES),
+                expiry_date=(quoted_at + timedelta(days=365)).date(),
+                total_premium=quote.final_premium,
+            ))
+            policy_dates.append(quoted_at)
+        policies = self.insert(CarPolicy, policies)
+        self.backdate(CarPolicy, policies, policy_dates)
+
+        claims, numbers = [], self.sequence(Claim, claim_number__startswith=f'{self.prefix[:4]}-CL')
+        for policy in policies:
+            for _ in range(self.poisson(self.volumes['claims_per_policy'])):
+                claim_status = self.choice(CLAIM_STATUSES)
+                estimated = self.money(self.lognormal(1500, 0.8))
+                claims.append(Claim(
+                    policy=policy,
+                    claim_number=f'{self.prefix[:4]}-CL{next(numbers)}',
+                    estimated_amount=estimated,
+                    approved_amount=estimated if claim_status in ('approved', 'paid') else None,
+                    status=claim_status,
+                    third_party_involved=self.rng.random() < 0.3,
+                    police_report=self.rng.random() < 0.5,
+                ))
+        self.insert(Claim, claims)
+
+    def create_calculation_logs(self, users, companies):
+        sectors_by_user = {}
+        for company in companies:
+            sectors_by_user.setdefault(company.user_id, []).append(company)
+        plans = list(HealthCoveragePlan.objects.values_list('name', flat=True)) or ['الخطة الأساسية']
+
+        logs, dates = [], []
+        for user in users:
+            user_companies = sectors_by_user.get(user.id)
+            for _ in range(self.poisson(self.volumes['calc_logs_per_user'])):
+                company = self.rng.choice(user_companies) if user_companies else None
+                employee_count = company.total_employees if company else self.rng.randint(1, 200)
+                premium = employee_count * self.lognormal(1200, 0.3)
+                logs.append(HealthCalculationLog(
+                    user=user,
+                    company_sector=company.sector if company else 'other',
+                    company_size=company.size_category if company else size_category(employee_count),
+                    employee_count=employee_count,
+                    coverage_plan_name=self.rng.choice(plans),
+                    calculated_premium=self.money(min(premium, 99999999)),
+                    factors_used={'synthetic': True},
+                    ip_address='127.0.0.1',
+                ))
+                dates.append(self.past_datetime())
+        logs = self.insert(HealthCalculationLog, logs)
+        self.backdate(HealthCalculationLog, logs, dates)
+
+    # ------------------------------------------------------------------
+    def run(self):
+        """توليد كل البيانات، كل مرحلة في معاملة مستقلة"""
+        start = get_user_model().objects.filter(username__startswith=f'{self.prefix}_user_').count()
+        with transaction.atomic():
+            users = self.create_users(start)
+        self.log(f"👤 {len(users)} مستخدم")
+        with transaction.atomic():
+            companies = self.create_companies(users)
+        self.log(f"🏢 {len(companies)} شركة")
+        with transaction.atomic():
+            self.create_employees(companies)
+        self.log(f"👥 {self.counts.get('Employee', 0)} موظف")
+        with transaction.atomic():
+            self.create_health_business(companies)
+        self.log(f"📄 {self.counts.get('HealthInsuranceQuote', 0)} اقتباس صحي، "
+                 f"{self.counts.get('HealthInsurancePolicy', 0)} وثيقة صحية")
+        with transaction.atomic():
+            self.create_car_business(users)
+        self.log(f"🚗 {self.counts.get('Vehicle', 0)} مركبة، {self.counts.get('CarInsuranceQuote', 0)} اقتباس، "
+                 f"{self.counts.get('CarPolicy', 0)} وثيقة، {self.counts.get('Claim', 0)} مطالبة")
+        with transaction.atomic():
+            self.create_calculation_logs(users, companies)
+        self.log(f"🧮 {self.counts.get('HealthCalculationLog', 0)} سجل حساب")
+        return self.counts
+
+
+def seed_synthetic_data(**options):
+    """توليد البيانات الاصطناعية وإرجاع عدد السجلات لكل نموذج"""
+    return SyntheticDataGenerator(**options).run()
+
+
+def delete_synthetic_data(prefix=DEFAULT_PREFIX):
+    """حذف كل البيانات الاصطناعية (الحذف المتتالي يشمل كل ما يتبع المستخدمين)"""
+    deleted, per_model = get_user_model().objects.filter(username__startswith=f'{prefix}_user_').delete()
+    return deleted, per_model
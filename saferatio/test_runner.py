@@ -0,0 +1,36 @@
+# saferatio/test_runner.py
+"""
+مشغل الاختبارات: لا كتابة من خيوط خلفية ولا ملفات في مجلدات المشروع
+
+- خيط سجل الحسابات لا يرى معاملة الاختبار، فتفشل كتابته وتُحفظ السجلات في SPILL_DIR
+  ثم يعيدها أول كاتب في عملية التطوير أو الإنتاج إلى قاعدة البيانات الحقيقية.
+  لذلك السجل متزامن وملفات spill والأرشيف في مجلد مؤقت يُحذف بعد التشغيل.
+- مهام ما بعد الـ commit تُنفذ مباشرة (BACKGROUND_TASKS['ASYNC'] = False).
+"""
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class SafeRatioTestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._temp_dir = tempfile.mkdtemp(prefix='saferatio-tests-')
+        self._overrides = override_settings(
+            HEALTH_CALCULATION_LOG=dict(
+                getattr(settings, 'HEALTH_CALCULATION_LOG', {}),
+                ASYNC=False,
+                SPILL_DIR=f'{self._temp_dir}/calculation_log_spill',
+                ARCHIVE_DIR=f'{self._temp_dir}/calculation_log_archive',
+            ),
+            BACKGROUND_TASKS=dict(getattr(settings, 'BACKGROUND_TASKS', {}), ASYNC=False),
+        )
+        self._overrides.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._overrides.disable()
+        shutil.rmtree(self._temp_dir, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,100 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import AsyncClient, TestCase, TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+
+from insurance.models import OutboundEmail
+from saferatio.loadtest import IoLoadTestRunner, sample_image_bytes
+
+User = get_user_model()
+
+
+class AsyncApiViewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='asyncuser', email='async@example.com', password='Pass12345!')
+        self.client = APIClient()
+        # الصور المرفوعة خارج media/ في المستودع
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, True)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def test_async_view_keeps_drf_behaviour(self):
+        response = self.client.post('/api/auth/send-verification/', {'email': 'async@example.com'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'detail': 'Verification email sent.'})
+        self.assertEqual(OutboundEmail.objects.get().to, ['async@example.com'])
+
+        response = self.client.post('/api/auth/send-reset/', {}, format='json')
+        self.assertEqual((response.status_code, response.data), (400, {'error': 'Email is required.'}))
+
+        response = self.client.get('/api/auth/send-verification/')
+        self.assertEqual(response.status_code, 405)
+        self.assertEqual(response['Allow'], 'POST')
+
+        response = self.client.post('/api/auth/send-verification/', 'not json', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    async def test_async_middleware_chain(self):
+        # AsyncClient يشغل الوسطاء بوضع async كما تحت ASGI
+        response = await AsyncClient().post(
+            '/api/auth/send-verification/', {'email': 'async@example.com'}, content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('2 queries', response['Server-Timing'])
+
+    def test_authenticated_async_view(self):
+        response = self.client.post('/api/auth/upload-avatar/', {}, format='multipart')
+        self.assertEqual(response.status_code, 401)
+        self.assertIn('Bearer', response['WWW-Authenticate'])
+
+        self.client.force_authenticate(self.user)
+        response = self.client.post('/api/auth/upload-avatar/', {}, format='multipart')
+        self.assertEqual((response.status_code, response.data), (400, {'error': 'No avatar provided.'}))
+
+        avatar = SimpleUploadedFile('me.png', sample_image_bytes(), content_type='image/png')
+        response = self.client.post('/api/auth/upload-avatar/', {'avatar': avatar}, format='multipart')
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.avatar.name, self.user.avatar_image.image.name)
+        self.assertTrue(self.user.avatar.path.startswith(self.media_root))
+
+
+class IoLoadTestTests(TransactionTestCase):
+    def setUp(self):
+        User.objects.create_user(username='synthetic_user_io', email='io@example.com', password='Pass12345!')
+
+    def test_runner_reports_both_modes(self):
+        # خيط WSGI واحد: قاعدة SQLite المشتركة في الذاكرة تقفل الجدول عند كتابتين متزامنتين
+        with self.assertLogs('saferatio.requests', level='INFO'):
+            report = IoLoadTestRunner(requests=4, concurrency=1, latency=0.01).run()
+        self.assertEqual([(row['mode'], row['concurrency']) for row in report['modes']], [('wsgi', 1), ('asgi', 4)])
+        for row in report['modes']:
+            self.assertEqual((row['errors'], row['statuses']), (0, [200]))
+
+    @skipUnless(os.environ.get('RUN_BENCHMARKS'), 'قياس زمني: RUN_BENCHMARKS=1 لتشغيله')
+    @skipUnless(connection.vendor != 'sqlite', 'WSGI المتزامن يحتاج قاعدة تقبل الكتابة من عدة خيوط')
+    def test_asgi_overlaps_storage_latency(self):
+        # الطلبات المتزامنة هنا تتشارك خيط الاختبار واتصاله فتتداخل عدادات الاستعلامات في السجل
+        with self.assertLogs('saferatio.requests', level='INFO'):
+            report = IoLoadTestRunner(requests=8, concurrency=2, latency=0.1).run()
+        wsgi, asgi = report['modes']
+        for row in (wsgi, asgi):
+            self.assertEqual((row['errors'], row['statuses']), (0, [200]))
+        # WSGI: 8 طلبات على خيطين ≈ 4 × 100ms؛ ASGI: الانتظار متداخل ≈ 100ms
+        self.assertGreaterEqual(wsgi['wall_time_s'], 0.4)
+        self.assertLess(asgi['wall_time_s'], wsgi['wall_time_s'] / 2)
+
+    def test_command(self):
+        out = StringIO()
+        call_command('run_io_loadtest', '--requests', '2', '--latency-ms', '1', '--modes', 'asgi', stdout=out)
+        self.assertIn('asgi', out.getvalue())
@@ -0,0 +1,63 @@
+import os
+import tempfile
+
+from django.test import SimpleTestCase
+
+from saferatio.benchmarking import (
+    BenchmarkSuite, compare, format_comparison, load_baseline, measure, save_baseline,
+)
+
+
+def report(**medians):
+    return {'results': {key: {'median_us': value} for key, value in medians.items()}}
+
+
+class BenchmarkingTests(SimpleTestCase):
+    def test_measure_calibrates_loops(self):
+        calls = []
+        result = measure(lambda: calls.append(1), rounds=3, min_time=0.001)
+        self.assertGreater(result['loops'], 1)
+        # إحماء + جولات المعايرة (1 + 2 + ... + loops) + الجولات المقاسة
+        self.assertEqual(len(calls), 1 + (2 * result['loops'] - 1) + 3 * result['loops'])
+        self.assertLessEqual(result['min_us'], result['median_us'])
+
+    def test_suite_runs_each_size_and_filters(self):
+        suite = BenchmarkSuite('tests')
+        sizes_seen = []
+
+        @suite.case('pricing.small', sizes=(1, 10))
+        def small(size):
+            sizes_seen.append(size)
+            return lambda: sum(range(size))
+
+        @suite.case('other')
+        def other(size):
+            return lambda: None
+
+        self.assertEqual(suite.keys(), ['pricing.small[1]', 'pricing.small[10]', 'other'])
+        result = suite.run(selected=['pricing'], rounds=2, min_time=0.0001)
+        self.assertEqual(list(result['results']), ['pricing.small[1]', 'pricing.small[10]'])
+        self.assertEqual(sizes_seen, [1, 10])
+        self.assertEqual(result['suite'], 'tests')
+
+    def test_compare_flags_regressions_over_threshold(self):
+        rows = {row['key']: row for row in compare(
+            report(fast=100.0, slow=100.0, removed=5.0), report(fast=110.0, slow=140.0, added=1.0), threshold=0.25,
+        )}
+        self.assertFalse(rows['fast']['regressed'])
+        self.assertEqual(rows['fast']['change'], 0.1)
+        self.assertTrue(rows['slow']['regressed'])
+        self.assertIsNone(rows['added']['change'])
+        self.assertIsNone(rows['removed']['current_us'])
+        self.assertIn('❌ 1', format_comparison(list(rows.values()), 0.25))
+
+    def test_improvement_is_not_regression(self):
+        rows = compare(report(a=100.0), report(a=40.0), threshold=0.0)
+        self.assertFalse(rows[0]['regressed'])
+
+    def test_baseline_roundtrip(self):
+        data = dict(report(a=1.5), suite='pricing')
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'baseline.json')
+            save_baseline(data, path)
+            self.assertEqual(load_baseline(path), data)
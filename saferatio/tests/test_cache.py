@@ -0,0 +1,101 @@
+import threading
+import time
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from saferatio.cache import CacheNamespace, fingerprint
+
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'cache-tests'}}
+
+
+@override_settings(CACHES=LOCMEM)
+class CacheNamespaceTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+
+    def compute(self, value='fresh'):
+        def inner():
+            self.calls += 1
+            return value
+        return inner
+
+    def test_cache_aside_computes_once(self):
+        ns = CacheNamespace('tests:aside')
+        self.assertEqual(ns.fetch('k', self.compute()), ('fresh', False))
+        self.assertEqual(ns.fetch('k', self.compute()), ('fresh', True))
+        self.assertEqual(self.calls, 1)
+
+    def test_none_is_cached(self):
+        ns = CacheNamespace('tests:none')
+        ns.get_or_set('k', self.compute(None))
+        self.assertEqual(ns.fetch('k', self.compute(None)), (None, True))
+        self.assertEqual(self.calls, 1)
+
+    def test_bump_invalidates_only_its_scope(self):
+        ns = CacheNamespace('tests:scoped')
+        ns.set(('summary',), 'a1', scope=1)
+        ns.set(('summary',), 'b1', scope=2)
+        version = ns.version(scope=1)
+        self.assertEqual(ns.bump(scope=1), version + 1)
+        self.assertIsNone(ns.get(('summary',), scope=1))
+        self.assertEqual(ns.get(('summary',), scope=2), 'b1')
+        self.assertEqual(ns.key(('summary', 'x'), scope=1), f'tests:scoped:1:v{version + 1}:summary:x')
+
+    def test_evicted_version_does_not_revive_old_entries(self):
+        ns = CacheNamespace('tests:evicted')
+        ns.set('k', 'v1')
+        ns.bump()
+        ns.set('k', 'v2')
+        # إخراج مفتاح النسخة من الكاش (MAX_ENTRIES / maxmemory)
+        cache.delete('tests:evicted:version')
+        self.assertIsNone(ns.get('k'))
+        cache.delete('tests:evicted:version')
+        ns.bump()
+        self.assertIsNone(ns.get('k'))
+
+    def test_probabilistic_early_refresh(self):
+        # beta كبير جداً: أي قيمة لها زمن حساب تُعاد قبل انتهائها
+        ns = CacheNamespace('tests:early', timeout=60, beta=1e9)
+        ns._store(ns.key('k'), 'old', 1.0, None)
+        self.assertEqual(ns.fetch('k', self.compute('new')), ('new', False))
+        # القيم المحسوبة فوراً (delta≈0) لا تُعاد مبكراً
+        ns.set('k2', 'kept')
+        self.assertEqual(ns.fetch('k2', self.compute()), ('kept', True))
+
+    def test_stale_value_served_while_another_process_refreshes(self):
+        ns = CacheNamespace('tests:stale', timeout=60, beta=1e9)
+        key = ns.key('k')
+        ns._store(key, 'old', 1.0, None)
+        cache.add(f'{key}:lock', 'other', 30)
+        self.assertEqual(ns.fetch('k', self.compute('new')), ('old', True))
+        self.assertEqual(self.calls, 0)
+
+    def test_waiter_computes_when_lock_holder_fails(self):
+        ns = CacheNamespace('tests:failed', lock_timeout=5)
+        key = ns.key('k')
+        cache.add(f'{key}:lock', 'other', 30)
+        threading.Timer(0.1, cache.delete, [f'{key}:lock']).start()
+        self.assertEqual(ns.fetch('k', self.compute()), ('fresh', False))
+
+    def test_single_flight_between_threads(self):
+        ns = CacheNamespace('tests:flight')
+        results = []
+
+        def slow():
+            self.calls += 1
+            time.sleep(0.2)
+            return 42
+
+        threads = [threading.Thread(target=lambda: results.append(ns.get_or_set('k', slow))) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, [42] * 5)
+        self.assertEqual(self.calls, 1)
+
+    def test_fingerprint_is_order_independent(self):
+        self.assertEqual(fingerprint({'a': 1, 'b': 2}), fingerprint({'b': 2, 'a': 1}))
+        self.assertNotEqual(fingerprint(['a']), fingerprint(['b']))
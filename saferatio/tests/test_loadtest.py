@@ -0,0 +1,110 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db.models import F
+from django.test import TestCase, override_settings
+
+from car_insurance.models import CarInsuranceQuote, CarPolicy, Claim, Vehicle
+from health_insurance.models import Company, Employee, HealthCalculationLog, HealthInsurancePolicy, HealthInsuranceQuote
+from saferatio.loadtest import LoadTestRunner, format_report, percentile
+from saferatio.synthetic_data import delete_synthetic_data, seed_synthetic_data
+
+User = get_user_model()
+
+SMALL = dict(users=6, employees_per_company=8, max_employees=20, calc_logs_per_user=3, months=6, batch_size=50)
+
+
+class SyntheticDataTests(TestCase):
+    def test_seed_creates_linked_records_with_counts(self):
+        counts = seed_synthetic_data(**SMALL)
+
+        self.assertEqual(User.objects.filter(username__startswith='synthetic_user_').count(), 6)
+        for model in [Company, Employee, HealthInsuranceQuote, HealthInsurancePolicy, Vehicle,
+                      CarInsuranceQuote, CarPolicy, Claim, HealthCalculationLog]:
+            self.assertEqual(model.objects.count(), counts.get(model.__name__, 0), model.__name__)
+        self.assertGreater(counts['Employee'], 0)
+        for company in Company.objects.all():
+            self.assertEqual(company.employees.count(), company.total_employees)
+        # الوثائق والاقتباسات لنفس مستخدم الشركة/المركبة
+        self.assertFalse(HealthInsurancePolicy.objects.exclude(user_id=F('company__user_id')).exists())
+        self.assertFalse(CarInsuranceQuote.objects.exclude(user_id=F('vehicle__user_id')).exists())
+
+    def test_seed_is_reproducible_and_repeatable(self):
+        first = seed_synthetic_data(prefix='runa', **SMALL)
+        statuses = list(HealthInsuranceQuote.objects.order_by('id').values_list('status', flat=True))
+        delete_synthetic_data('runa')
+        self.assertEqual(seed_synthetic_data(prefix='runa', **SMALL), first)
+        self.assertEqual(list(HealthInsuranceQuote.objects.order_by('id').values_list('status', flat=True)), statuses)
+
+        # تشغيل ثانٍ بنفس البادئة يضيف بيانات بمعرفات جديدة
+        seed_synthetic_data(prefix='runa', **SMALL)
+        self.assertEqual(User.objects.filter(username__startswith='runa_user_').count(), 12)
+
+    def test_delete_removes_only_prefix(self):
+        seed_synthetic_data(prefix='keep', **SMALL)
+        seed_synthetic_data(prefix='drop', **SMALL)
+        delete_synthetic_data('drop')
+        self.assertFalse(User.objects.filter(username__startswith='drop_user_').exists())
+        self.assertEqual(User.objects.filter(username__startswith='keep_user_').count(), 6)
+
+    def test_created_at_spread_over_months(self):
+        seed_synthetic_data(**dict(SMALL, calc_logs_per_user=15))
+        dates = HealthCalculationLog.objects.values_list('created_at', flat=True)
+        self.assertGreater(len({value.strftime('%Y-%m') for value in dates}), 1)
+
+
+class LoadTestRunnerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed_synthetic_data(**dict(SMALL, users=3, vehicles_per_user=2, policy_ratio=1.0))
+
+    def test_percentile_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7], 95), 7)
+        self.assertEqual(percentile([], 95), 0.0)
+
+    def test_scenarios_report_latency_and_queries(self):
+        report = LoadTestRunner(iterations=3, upload_rows=5).run()
+        endpoints = {row['endpoint']: row for row in report['endpoints']}
+
+        login = endpoints['POST /api/auth/login/']
+        self.assertEqual((login['requests'], login['errors']), (3, 0))
+        dashboard = endpoints['GET health-dashboard']
+        self.assertEqual(dashboard['errors'], 0)
+        self.assertGreater(dashboard['queries_avg'], 0)
+        # إعادة التحقق بـ ETag لا تعيد بناء اللقطة
+        self.assertEqual(endpoints['GET health-dashboard (revalidate)']['statuses'], [304])
+        self.assertIn('POST health-premium/calculate', endpoints)
+        self.assertIn('GET health-coverage-plans/compare', endpoints)
+        for row in report['endpoints']:
+            self.assertLessEqual(row['p50_ms'], row['p95_ms'])
+            self.assertLessEqual(row['p95_ms'], row['p99_ms'])
+        self.assertEqual(report['requests'], sum(row['requests'] for row in report['endpoints']))
+        self.assertIn('POST /api/auth/login/', format_report(report))
+
+    def test_calculation_log_is_written_inside_the_test_transaction(self):
+        spill_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, spill_dir, True)
+        before = HealthCalculationLog.objects.count()
+        with override_settings(HEALTH_CALCULATION_LOG={'ASYNC': True, 'SPILL_DIR': spill_dir}):
+            LoadTestRunner(scenarios=['calculate'], iterations=2).run()
+        # لا كتابة من خيط السجل الخلفي (لا يرى بيانات الاختبار) ولا ملفات spill
+        self.assertEqual(HealthCalculationLog.objects.count(), before + 2)
+        self.assertEqual(os.listdir(spill_dir), [])
+
+    def test_unknown_scenario_rejected(self):
+        with self.assertRaises(ValueError):
+            LoadTestRunner(scenarios=['login', 'checkout'])
+
+    def test_management_commands(self):
+        call_command('seed_synthetic_data', '--users', '2', '--prefix', 'cmd', '--employees-per-company', '3',
+                     stdout=StringIO())
+        self.assertEqual(User.objects.filter(username__startswith='cmd_user_').count(), 2)
+        call_command('run_loadtest', '--prefix', 'cmd', '--iterations', '2', '--scenarios', 'login,dashboard',
+                     stdout=StringIO())
@@ -0,0 +1,133 @@
+import threading
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from types import SimpleNamespace
+from unittest import mock
+
+from django.db import OperationalError
+from django.test import SimpleTestCase, override_settings
+
+from car_insurance.calculations import calculate_premium
+from health_insurance.calculations import quick_health_calculator
+from saferatio import pricing_pool
+
+VEHICLE = {'vehicle_type': 'suv', 'year': 2018, 'current_value': 42000.0, 'engine_size': 3.0}
+# العمليات تهيئ Django بإعدادات المشروع: بدون WARMUP لا تتصل بقاعدة البيانات الحقيقية
+POOL = {'ENABLED': True, 'WORKERS': 1, 'MAX_BATCH': 64, 'BATCH_WAIT_MS': 50, 'TIMEOUT_SECONDS': 60, 'WARMUP': False}
+
+
+def expected(driver_age):
+    return calculate_premium(
+        vehicle=SimpleNamespace(**VEHICLE), coverage_type='comprehensive', driver_age=driver_age,
+        claims_history=1, no_claims_years=2,
+    )
+
+
+class PricingInlineTests(SimpleTestCase):
+    def test_disabled_pool_prices_inline(self):
+        result = pricing_pool.price(
+            'car.premium', vehicle=VEHICLE, coverage_type='comprehensive', driver_age=22,
+            claims_history=1, no_claims_years=2,
+        )
+        self.assertEqual(result, expected(22))
+
+    def test_unknown_job(self):
+        with self.assertRaises(ValueError):
+            pricing_pool.price('car.unknown')
+
+    @override_settings(PRICING_POOL=POOL)
+    def test_broken_pool_falls_back_inline(self):
+        broken = Future()
+        broken.set_exception(BrokenProcessPool('worker died'))
+        fake_pool = mock.Mock(submit=mock.Mock(return_value=broken))
+        with mock.patch.object(pricing_pool, 'get_pricing_pool', return_value=fake_pool), \
+                mock.patch.object(pricing_pool, 'reset_pricing_pool') as reset, \
+                self.assertLogs('saferatio.pricing', 'WARNING'):
+            result = pricing_pool.price(
+                'car.premium', vehicle=VEHICLE, coverage_type='comprehensive', driver_age=40,
+                claims_history=1, no_claims_years=2,
+            )
+        self.assertEqual(result, expected(40))
+        reset.assert_called_once()
+
+    def test_database_error_in_worker_is_reported_as_unavailable(self):
+        with mock.patch.object(pricing_pool, 'run_job', side_effect=OperationalError('connection closed')), \
+                mock.patch.object(pricing_pool, 'close_old_connections') as close_old_connections:
+            ((ok, error),) = pricing_pool.run_batch([('health.quick', {})])
+        self.assertFalse(ok)
+        self.assertIsInstance(error, pricing_pool.PricingPoolUnavailable)
+        self.assertEqual(close_old_connections.call_count, 2)
+
+    @override_settings(PRICING_POOL=POOL)
+    def test_database_error_in_pool_falls_back_inline(self):
+        failed = Future()
+        failed.set_exception(pricing_pool.PricingPoolUnavailable('database error'))
+        fake_pool = mock.Mock(submit=mock.Mock(return_value=failed))
+        with mock.patch.object(pricing_pool, 'get_pricing_pool', return_value=fake_pool), \
+                self.assertLogs('saferatio.pricing', 'WARNING'):
+            result = pricing_pool.price(
+                'car.premium', vehicle=VEHICLE, coverage_type='comprehensive', driver_age=40,
+                claims_history=1, no_claims_years=2,
+            )
+        self.assertEqual(result, expected(40))
+
+    def test_quick_health_calculator_does_not_hide_database_errors(self):
+        with mock.patch('django.db.models.query.QuerySet.first', side_effect=OperationalError('db down')):
+            with self.assertRaises(OperationalError):
+                quick_health_calculator()
+
+
+@override_settings(PRICING_POOL=POOL)
+class PricingPoolTests(SimpleTestCase):
+    def tearDown(self):
+        pricing_pool.reset_pricing_pool()
+
+    def test_workers_skip_warmup_when_disabled(self):
+        with mock.patch.object(pricing_pool, 'ProcessPoolExecutor') as executor:
+            pricing_pool.get_pricing_pool()
+        self.assertEqual(executor.call_args.kwargs['initargs'], ([],))
+        pricing_pool.reset_pricing_pool()
+
+        with override_settings(PRICING_POOL=dict(POOL, WARMUP=True)), \
+                mock.patch.object(pricing_pool, 'ProcessPoolExecutor') as executor:
+            pricing_pool.get_pricing_pool()
+        self.assertEqual(executor.call_args.kwargs['initargs'], (pricing_pool.WARMUP_HOOKS,))
+
+    def test_concurrent_requests_are_micro_batched(self):
+        pricing_pool.price(
+            'car.premium', vehicle=VEHICLE, coverage_type='comprehensive', driver_age=30,
+            claims_history=1, no_claims_years=2,
+        )  # تشغيل العملية وتهيئتها قبل القياس
+        pool = pricing_pool.get_pricing_pool()
+        before = dict(pool.stats)
+
+        ages = list(range(18, 58))
+        results = {}
+        barrier = threading.Barrier(len(ages))
+
+        def request(age):
+            barrier.wait()
+            results[age] = pricing_pool.price(
+                'car.premium', vehicle=VEHICLE, coverage_type='comprehensive', driver_age=age,
+                claims_history=1, no_claims_years=2,
+            )
+
+        threads = [threading.Thread(target=request, args=(age,)) for age in ages]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, {age: expected(age) for age in ages})
+        self.assertEqual(pool.stats['jobs'] - before['jobs'], len(ages))
+        self.assertLess(pool.stats['batches'] - before['batches'], len(ages) // 2)
+
+    def test_job_errors_reach_the_caller(self):
+        with self.assertRaises(TypeError):
+            pricing_pool.price('car.premium', vehicle=VEHICLE, colour='red')
+        # العملية نفسها ما زالت تعمل
+        result = pricing_pool.price(
+            'car.premium', vehicle=VEHICLE, coverage_type='comprehensive', driver_age=50,
+            claims_history=1, no_claims_years=2,
+        )
+        self.assertEqual(result, expected(50))
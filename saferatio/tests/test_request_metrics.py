@@ -0,0 +1,155 @@
+import json
+import logging
+import os
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from health_insurance.models import HealthCoveragePlan
+from saferatio import request_metrics
+from saferatio.request_metrics import (
+    JsonFormatter, RequestMetricsMiddleware, RouteMetrics, get_route_metrics, merge_slots, normalize_sql,
+    publish_route_metrics, summarize_route,
+)
+
+User = get_user_model()
+
+
+def sample(duration_ms, status=200, queries=1, duplicates=()):
+    return {
+        'status': status, 'slow': False, 'duplicates': list(duplicates), 'duration_ms': duration_ms,
+        'db_ms': duration_ms / 2, 'queries': queries, 'response_bytes': 100,
+    }
+
+
+class NormalizeSqlTests(TestCase):
+    def test_literals_and_in_lists_share_fingerprint(self):
+        first = normalize_sql('SELECT * FROM "t" WHERE "t"."id" = 17 AND "t"."name" = \'x\'')
+        second = normalize_sql('SELECT  *  FROM "t" WHERE "t"."id" = %s AND "t"."name" = \'it\'\'s\'')
+        self.assertEqual(first, second)
+        self.assertEqual(
+            normalize_sql('SELECT 1 FROM "t2" WHERE "t2"."id" IN (%s, %s, %s)'),
+            normalize_sql('SELECT 1 FROM "t2" WHERE "t2"."id" IN (4)'),
+        )
+        self.assertIn('"t2"', normalize_sql('SELECT 1 FROM "t2"'))
+
+
+class MiddlewareTests(TestCase):
+    def setUp(self):
+        get_route_metrics().reset()
+        cache.clear()
+        self.plans = [
+            HealthCoveragePlan.objects.create(name=f'خطة {i}', base_price_per_employee=100 + i) for i in range(4)
+        ]
+
+    def test_counts_queries_detects_duplicates_and_sets_headers(self):
+        def view(request):
+            # N+1: استعلام لكل خطة
+            names = [HealthCoveragePlan.objects.get(pk=plan.pk).name for plan in self.plans]
+            return HttpResponse(','.join(names))
+
+        middleware = RequestMetricsMiddleware(view)
+        with self.assertLogs('saferatio.requests', level='INFO') as logs:
+            response = middleware(RequestFactory().get('/plans/'))
+
+        self.assertIn('db;dur=', response['Server-Timing'])
+        self.assertIn('desc="4 queries"', response['Server-Timing'])
+        self.assertIn('dup;desc="4 repeated queries"', response['Server-Timing'])
+
+        record = logs.records[0]
+        self.assertEqual(record.levelno, logging.WARNING)
+        self.assertEqual(record.data['queries'], 4)
+        self.assertEqual(record.data['response_bytes'], len(response.content))
+        self.assertEqual(record.data['duplicates'][0]['count'], 4)
+        self.assertEqual(record.data['route'], 'GET <unmatched>')
+
+        line = json.loads(JsonFormatter().format(record))
+        self.assertEqual(line['message'], 'request')
+        self.assertEqual(line['queries'], 4)
+
+    @override_settings(REQUEST_METRICS={'DUPLICATE_QUERY_THRESHOLD': 10})
+    def test_below_threshold_is_info(self):
+        middleware = RequestMetricsMiddleware(lambda request: HttpResponse(HealthCoveragePlan.objects.count()))
+        with self.assertLogs('saferatio.requests', level='INFO') as logs:
+            response = middleware(RequestFactory().get('/count/'))
+        self.assertEqual(logs.records[0].levelno, logging.INFO)
+        self.assertNotIn('dup;', response['Server-Timing'])
+
+
+class RouteMetricsTests(TestCase):
+    def test_histogram_percentiles(self):
+        metrics = RouteMetrics(window_minutes=5)
+        for duration in [3] * 90 + [40] * 9 + [7000]:
+            metrics.record('GET /x', sample(duration), now=1000)
+        metrics.record('GET /x', sample(12, status=500), now=1000)
+
+        row = summarize_route('GET /x', merge_slots([metrics.export()], 5, now=1000)['GET /x'])
+        self.assertEqual(row['count'], 101)
+        self.assertEqual(row['errors'], 1)
+        self.assertEqual(row['p50_ms'], 5)
+        self.assertEqual(row['p95_ms'], 50)
+        self.assertEqual(row['p99_ms'], 50)
+        self.assertEqual(row['max_ms'], 7000)
+        self.assertEqual(sum(bucket['count'] for bucket in row['histogram']), 101)
+
+    def test_window_drops_old_slots(self):
+        metrics = RouteMetrics(window_minutes=5)
+        metrics.record('GET /x', sample(3), now=60)
+        metrics.record('GET /x', sample(3), now=240)
+        self.assertEqual(merge_slots([metrics.export()], 5, now=300)['GET /x']['count'], 2)
+        self.assertEqual(merge_slots([metrics.export()], 2, now=300)['GET /x']['count'], 1)
+
+        metrics.record('GET /x', sample(3), now=600)  # شريحة جديدة تحذف ما خرج من النافذة
+        self.assertEqual(len(metrics.export()), 1)
+
+    def test_publish_failure_is_logged(self):
+        with mock.patch.object(request_metrics._shared, 'set', side_effect=ConnectionError('cache down')), \
+                self.assertLogs('saferatio.requests', 'WARNING') as logs:
+            self.assertFalse(publish_route_metrics(force=True))
+        self.assertEqual(logs.records[0].getMessage(), 'request metrics publish failed')
+        self.assertEqual(logs.records[0].data['error'], 'cache down')
+
+
+class AdminEndpointTests(TestCase):
+    def setUp(self):
+        get_route_metrics().reset()
+        cache.clear()
+        self.admin = User.objects.create_user(username='metrics_admin', password='x', is_staff=True)
+        self.user = User.objects.create_user(username='metrics_user', password='x')
+        self.client = APIClient()
+
+    def test_request_metrics_per_route(self):
+        self.client.force_authenticate(self.admin)
+        for _ in range(3):
+            response = self.client.get('/api/health/health-coverage-plans/')
+            self.assertIn('Server-Timing', response)
+
+        response = self.client.get('/api/admin/request-metrics/', {'route': 'health-coverage-plans'})
+        self.assertEqual(response.status_code, 200)
+        routes = {row['route']: row for row in response.data['routes']}
+        self.assertEqual(routes['GET /api/health/health-coverage-plans/']['count'], 3)
+        self.assertEqual(response.data['totals']['count'], 3)
+        self.assertEqual(len(response.data['workers']), 1)
+
+        self.assertEqual(self.client.get('/api/admin/request-metrics/', {'sort': 'bogus'}).status_code, 400)
+
+    def test_requires_admin(self):
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.get('/api/admin/request-metrics/').status_code, 403)
+        self.assertEqual(self.client.get('/api/admin/system-logs/').status_code, 403)
+
+    def test_system_logs_reads_log_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'system.log')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write('\n'.join(json.dumps({'n': n}) for n in range(5)) + '\n')
+            self.client.force_authenticate(self.admin)
+            with override_settings(SYSTEM_LOG_FILE=path):
+                response = self.client.get('/api/admin/system-logs/', {'limit': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([json.loads(line)['n'] for line in response.data['logs']], [3, 4])
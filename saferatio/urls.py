@@ -37,6 +37,7 @@ urlpatterns = [
     path('api/car-insurance/', include('car_insurance.urls')),
     path('api/health/', include('health_insurance.urls')),  # أضف هذا
     path('api/admin/', include('saferatio.admin_api.urls')),    
+    path('api/', include('insurance.urls')),
     
     # path('auth/login/', auth_views.LoginView.as_view(template_name='users/login.html'), name='login'),
     # path('auth/logout/', auth_views.LogoutView.as_view(next_page='home'), name='logout'),
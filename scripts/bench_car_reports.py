@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+"""
+قياس زمن وحجم تقارير HTML لاقتباسات ووثائق السيارات (StaticReportGenerator)
+
+الحالات:
+  car.report.quote      generate_comprehensive_report لاقتباسات بأنواع تغطية ومركبات مختلفة
+  car.report.policy     generate_policy_report
+ويُطبع متوسط حجم HTML لكل تقرير (بالبايت) وحجم ملف CSS المشترك إن وُجد.
+
+ينشئ قاعدة بيانات اختبار مؤقتة (بنفس محرك الإعدادات الحالية) ثم يحذفها.
+Usage:
+  python scripts/bench_car_reports.py [--save [path]] [--compare [path]] [--threshold 0.2]
+"""
+import argparse
+import os
+import sys
+from datetime import date, timedelta
+from decimal import Decimal
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines', 'bench_car_reports.json')
+
+VEHICLES = [
+    ('Toyota', 'Corolla', 2021, '18000', 'third_party'),
+    ('Toyota', 'Prado', 2012, '55000', 'third_party_fire_theft'),
+    ('Mercedes', 'S500', 2019, '120000', 'comprehensive'),
+    ('Isuzu', 'Pickup', 2008, '22000', 'comprehensive'),
+]
+
+
+def build_fixtures():
+    from car_insurance.models import CarInsuranceQuote, CarPolicy, Vehicle
+    from users.models import CustomUser
+
+    user = CustomUser.objects.create(username='bench_reports', email='bench@example.com', first_name='قياس')
+    quotes = []
+    for i, (make, model, year, value, coverage) in enumerate(VEHICLES):
+        vehicle = Vehicle.objects.create(
+            user=user, make=make, model=model, year=year, license_plate=f'BR-{i}', current_value=Decimal(value),
+        )
+        quotes.append(CarInsuranceQuote.objects.create(
+            vehicle=vehicle, user=user, quote_number=f'CQ-BR-{i}', coverage_type=coverage,
+            claims_history=i % 3, no_claims_years=i, final_premium=Decimal('950.00') + i * 300,
+        ))
+    policy = CarPolicy.objects.create(
+        quote=quotes[0], user=user, vehicle=quotes[0].vehicle, status='active',
+        expiry_date=date.today() + timedelta(days=200), total_premium=Decimal('1200.00'),
+    )
+    quotes = list(CarInsuranceQuote.objects.select_related('vehicle', 'user').filter(pk__in=[q.pk for q in quotes]))
+    policy = CarPolicy.objects.select_related('quote', 'vehicle', 'user').get(pk=policy.pk)
+    return quotes, policy
+
+
+def build_suite(quotes, policy):
+    from car_insurance.static_reports import StaticReportGenerator
+    from saferatio.benchmarking import BenchmarkSuite
+
+    suite = BenchmarkSuite('car_reports')
+
+    @suite.case('car.report.quote')
+    def quote_report(size):
+        return lambda: [StaticReportGenerator.generate_comprehensive_report(quote) for quote in quotes]
+
+    @suite.case('car.report.policy')
+    def policy_report(size):
+        return lambda: StaticReportGenerator.generate_policy_report(policy)
+
+    return suite
+
+
+def report_sizes(quotes, policy):
+    from django.contrib.staticfiles import finders
+
+    from car_insurance.static_reports import StaticReportGenerator
+
+    quote_bytes = [
+        len(StaticReportGenerator.generate_comprehensive_report(quote)['report_html'].encode('utf-8'))
+        for quote in quotes
+    ]
+    sizes = {
+        'quote_html_bytes': round(sum(quote_bytes) / len(quote_bytes)),
+        'policy_html_bytes': len(StaticReportGenerator.generate_policy_report(policy)['report_html'].encode('utf-8')),
+    }
+    stylesheet = finders.find('car_insurance/reports.css')
+    if stylesheet:
+        sizes['shared_css_bytes'] = os.path.getsize(stylesheet)
+    return sizes
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Car report rendering benchmark')
+    parser.add_argument('--save', nargs='?', const=DEFAULT_BASELINE, help='حفظ النتائج كخط أساس')
+    parser.add_argument('--compare', nargs='?', const=DEFAULT_BASELINE, help='المقارنة بخط الأساس')
+    parser.add_argument('--threshold', type=float, default=None, help='نسبة التراجع المسموحة (0.25 = 25%%)')
+    parser.add_argument('--rounds', type=int, default=None)
+    parser.add_argument('--min-time', type=float, default=None, help='أدنى زمن للجولة بالثواني')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    args = parse_args()
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'saferatio.settings')
+    import django
+    django.setup()
+
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+
+    from saferatio.benchmarking import (
+        DEFAULT_MIN_TIME, DEFAULT_ROUNDS, DEFAULT_THRESHOLD, compare, format_comparison, load_baseline,
+        save_baseline,
+    )
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0)
+    try:
+        quotes, policy = build_fixtures()
+        report = build_suite(quotes, policy).run(
+            rounds=args.rounds or DEFAULT_ROUNDS,
+            min_time=args.min_time or DEFAULT_MIN_TIME,
+            log=print,
+        )
+        report['sizes'] = report_sizes(quotes, policy)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    for key, value in report['sizes'].items():
+        print(f'{key:<62} {value:>12,} B')
+    print(f'(car.report.quote = {len(VEHICLES)} تقارير في كل استدعاء)')
+
+    exit_code = 0
+    if args.compare:
+        threshold = args.threshold if args.threshold is not None else float(
+            os.environ.get('BENCH_REGRESSION_THRESHOLD', DEFAULT_THRESHOLD)
+        )
+        baseline = load_baseline(args.compare)
+        rows = compare(baseline, report, threshold)
+        print(format_comparison(rows, threshold))
+        for key, value in report['sizes'].items():
+            before = baseline.get('sizes', {}).get(key)
+            if before:
+                print(f'{key:<62} {before:>12,} → {value:,} B ({(value - before) / before * 100:+.1f}%)')
+        exit_code = 1 if any(row['regressed'] for row in rows) else 0
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        save_baseline(report, args.save)
+        print(f'💾 {args.save}')
+    sys.exit(exit_code)
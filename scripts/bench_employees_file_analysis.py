@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+"""
+قياس أداء UniversalPricingEngine.analyze_employees_file على ملف اصطناعي
+
+Usage: python scripts/bench_employees_file_analysis.py [rows]   (الافتراضي 50000)
+"""
+import io
+import os
+import sys
+import time
+
+if __name__ == '__main__':
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'saferatio.settings')
+    import django
+    django.setup()
+
+    import numpy as np
+    import pandas as pd
+    from health_insurance.services.universal_pricing_engine import UniversalPricingEngine
+
+    rng = np.random.default_rng(42)
+    df = pd.DataFrame({
+        'الاسم': [f'موظف {i}' for i in range(rows)],
+        'الجنس': rng.choice(['ذكر', 'أنثى'], rows),
+        'تاريخ_الميلاد': pd.to_datetime('1960-01-01') + pd.to_timedelta(rng.integers(0, 365 * 40, rows), unit='D'),
+        'الراتب': rng.integers(20000, 300000, rows),
+        'المعالين': rng.integers(0, 7, rows),
+        'الحالة_الاجتماعية': rng.choice(['متزوج', 'أعزب'], rows),
+        'القسم': rng.choice(['المالية', 'المبيعات', 'التقنية', 'الموارد البشرية'], rows),
+    })
+    buffer = io.BytesIO()
+    df.to_excel(buffer, index=False)
+    content = buffer.getvalue()
+
+    engine = UniversalPricingEngine()
+
+    def timed(label, func, repeat=1):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        elapsed = (time.perf_counter() - start) / repeat
+        print(f'{label:<40} {elapsed * 1000:10.2f} ms')
+
+    print(f'rows={rows} file_size={len(content) / 1024:.0f}KB')
+    timed('analyze_employees_dataframe', lambda: engine.analyze_employees_dataframe(df), repeat=5)
+    timed('analyze_employees_file (cold)', lambda: engine.analyze_employees_file(io.BytesIO(content)))
+    timed('analyze_employees_file (cached)', lambda: engine.analyze_employees_file(io.BytesIO(content)), repeat=5)
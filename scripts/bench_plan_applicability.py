@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+"""
+قياس فلترة خطط التغطية حسب القطاع: حلقة بايثون (الطريقة القديمة) مقابل جدول الأهلية المفهرس
+
+ينشئ قاعدة بيانات اختبار مؤقتة ويملؤها بعدد من الخطط ثم يحذفها.
+Usage: python scripts/bench_plan_applicability.py [plans]   (الافتراضي 300)
+"""
+import os
+import sys
+import time
+
+if __name__ == '__main__':
+    plans_count = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'saferatio.settings')
+    import django
+    django.setup()
+
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0)
+    try:
+        from health_insurance.models import Company, HealthCoveragePlan
+
+        kinds = [value for value, _ in HealthCoveragePlan.APPLICABLE_TO_CHOICES]
+        sectors = [value for value, _ in Company.SECTOR_CHOICES]
+        for i in range(plans_count):
+            kind = kinds[i % len(kinds)]
+            HealthCoveragePlan.objects.create(
+                name=f'خطة {i}', base_price_per_employee=500 + i, applicable_to=kind,
+                custom_sectors=sectors[i % len(sectors)::7] if kind == 'custom' else [],
+            )
+
+        class SectorOnly:
+            def __init__(self, sector):
+                self.sector = sector
+
+        def python_loop():
+            for sector in sectors:
+                company = SectorOnly(sector)
+                [plan for plan in HealthCoveragePlan.objects.filter(is_active=True)
+                 if plan.is_applicable_to_company(company)]
+
+        def indexed_join():
+            for sector in sectors:
+                list(HealthCoveragePlan.objects.filter(is_active=True, sector_applicability__sector=sector))
+
+        for label, func in [('python loop (all sectors)', python_loop), ('indexed join (all sectors)', indexed_join)]:
+            func()
+            start = time.perf_counter()
+            for _ in range(3):
+                func()
+            elapsed = (time.perf_counter() - start) / 3
+            print(f'{label:<30} {elapsed * 1000:10.2f} ms   ({len(sectors)} sectors, {plans_count} plans)')
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+"""
+قياس استعلامات الوثائق والاقتباسات (قوائم المستخدم، القريبة من الانتهاء، إحصائيات الإدارة)
+مع الفهارس المركبة/الجزئية وبدونها على بيانات مولدة
+
+ينشئ قاعدة بيانات اختبار مؤقتة (بنفس محرك الإعدادات الحالية) ويملؤها ثم يحذفها.
+Usage: python scripts/bench_policy_indexes.py [policies] [users]   (الافتراضي 1000000 وثيقة، 2000 مستخدم)
+"""
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+BATCH_SIZE = 5000
+STATUSES = ['active', 'expired', 'pending', 'cancelled']
+
+
+def seed(policies_count, users_count):
+    from django.contrib.auth import get_user_model
+    from django.utils import timezone
+
+    from car_insurance.models import CarInsuranceQuote, CarPolicy, Vehicle
+    from health_insurance.models import Company, HealthInsurancePolicy, HealthInsuranceQuote
+
+    User = get_user_model()
+    rng = random.Random(42)
+    today = date.today()
+    now = timezone.now()
+
+    users = User.objects.bulk_create([
+        User(username=f'bench{i}', email=f'bench{i}@example.com') for i in range(users_count)
+    ], batch_size=BATCH_SIZE)
+    companies = Company.objects.bulk_create([
+        Company(user=user, name=f'شركة {i}', sector='tech_software', cr_number=f'CR-B{i}',
+                address='صنعاء', phone='777000000', email='co@example.com')
+        for i, user in enumerate(users)
+    ], batch_size=BATCH_SIZE)
+    vehicles = Vehicle.objects.bulk_create([
+        Vehicle(user=user, license_plate=f'B-{i}', current_value=Decimal('15000.00'))
+        for i, user in enumerate(users)
+    ], batch_size=BATCH_SIZE)
+
+    half = policies_count // 2
+    for start in range(0, half, BATCH_SIZE):
+        size = min(BATCH_SIZE, half - start)
+        owners = [rng.randrange(users_count) for _ in range(size)]
+        statuses = [rng.choices(STATUSES, weights=[25, 55, 10, 10])[0] for _ in range(size)]
+        expiries = [today + timedelta(days=rng.randint(-720, 365)) for _ in range(size)]
+        created = [now - timedelta(days=rng.randint(0, 1000)) for _ in range(size)]
+
+        h_quotes = HealthInsuranceQuote.objects.bulk_create([
+            HealthInsuranceQuote(company=companies[u], user=users[u], quote_number=f'HQB-{start + i}',
+                                 status=rng.choice(['draft', 'quoted', 'accepted', 'rejected']))
+            for i, u in enumerate(owners)
+        ])
+        h_policies = HealthInsurancePolicy.objects.bulk_create([
+            HealthInsurancePolicy(
+                quote=quote, user=users[u], company=companies[u], policy_number=f'HPB-{start + i}',
+                status=statuses[i], inception_date=expiries[i] - timedelta(days=365), expiry_date=expiries[i],
+            )
+            for i, (quote, u) in enumerate(zip(h_quotes, owners))
+        ])
+        c_quotes = CarInsuranceQuote.objects.bulk_create([
+            CarInsuranceQuote(vehicle=vehicles[u], user=users[u], quote_number=f'CQB-{start + i}',
+                              status=rng.choice(['draft', 'pending', 'accepted', 'rejected']))
+            for i, u in enumerate(owners)
+        ])
+        c_policies = CarPolicy.objects.bulk_create([
+            CarPolicy(quote=quote, user=users[u], vehicle=vehicles[u], policy_number=f'CPB-{start + i}',
+                      status=statuses[i], expiry_date=expiries[i])
+            for i, (quote, u) in enumerate(zip(c_quotes, owners))
+        ])
+
+        # created_at (auto_now_add) يُضبط بعد الإدراج لتوزيع التواريخ
+        for model, rows in [(HealthInsurancePolicy, h_policies), (CarPolicy, c_policies)]:
+            for row, created_at in zip(rows, created):
+                row.created_at = created_at
+            model.objects.bulk_update(rows, ['created_at'], batch_size=BATCH_SIZE)
+        print(f'  ... {start + size:,} / {half:,} لكل نوع', end='\r')
+    print()
+    return users
+
+
+def benchmark_queries(users):
+    from django.utils import timezone
+
+    from car_insurance.models import CarInsuranceQuote, CarPolicy
+    from health_insurance.models import HealthInsurancePolicy, HealthInsuranceQuote
+
+    today = date.today()
+    soon = today + timedelta(days=30)
+    sample_users = users[:50]
+    month_ago = timezone.now() - timedelta(days=30)
+    quarter_ago = timezone.now() - timedelta(days=90)
+
+    def per_user(func):
+        return lambda: [func(user) for user in sample_users]
+
+    return [
+        ('user policies list (x50)', per_user(lambda u: list(
+            HealthInsurancePolicy.objects.filter(user=u).order_by('-created_at')[:20].values_list('id', flat=True)))),
+        ('user expiring health (x50)', per_user(lambda u: HealthInsurancePolicy.objects.filter(
+            user=u, status='active', expiry_date__range=[today, soon]).count())),
+        ('user expiring car (x50)', per_user(lambda u: CarPolicy.objects.filter(
+            user=u, status='active', expiry_date__range=[today, soon]).count())),
+        ('user pending quotes (x50)', per_user(lambda u: HealthInsuranceQuote.objects.filter(
+            user=u, status='quoted').count() + CarInsuranceQuote.objects.filter(user=u, status='pending').count())),
+        ('all expiring policies', lambda: HealthInsurancePolicy.objects.filter(
+            status='active', expiry_date__range=[today, soon]).count() + CarPolicy.objects.filter(
+            status='active', expiry_date__range=[today, soon]).count()),
+        ('admin new pending (30d)', lambda: HealthInsurancePolicy.objects.filter(
+            status='pending', created_at__gte=month_ago).count() + CarPolicy.objects.filter(
+            status='pending', created_at__gte=month_ago).count()),
+        ('financial range (90d)', lambda: HealthInsurancePolicy.objects.filter(
+            created_at__gte=quarter_ago).count() + CarPolicy.objects.filter(created_at__gte=quarter_ago).count()),
+    ]
+
+
+def run(queries, repeat=3):
+    results = {}
+    for label, func in queries:
+        func()
+        start = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        results[label] = (time.perf_counter() - start) / repeat * 1000
+    return results
+
+
+def analyze(connection):
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+
+if __name__ == '__main__':
+    policies_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    users_count = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'saferatio.settings')
+    import django
+    django.setup()
+
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0)
+    try:
+        from car_insurance.models import CarInsuranceQuote, CarPolicy
+        from health_insurance.models import HealthInsurancePolicy, HealthInsuranceQuote
+
+        print(f'🌱 توليد {policies_count:,} وثيقة ({users_count:,} مستخدم) على {connection.vendor}')
+        started = time.perf_counter()
+        users = seed(policies_count, users_count)
+        print(f'   {time.perf_counter() - started:.1f} s')
+        analyze(connection)
+
+        queries = benchmark_queries(users)
+        with_indexes = run(queries)
+
+        models_with_indexes = [HealthInsurancePolicy, HealthInsuranceQuote, CarPolicy, CarInsuranceQuote]
+        with connection.schema_editor() as editor:
+            for model in models_with_indexes:
+                for index in model._meta.indexes:
+                    editor.remove_index(model, index)
+        analyze(connection)
+        without_indexes = run(queries)
+
+        print(f"{'query':<30} {'no indexes':>12} {'indexes':>12} {'speedup':>9}")
+        for label, _ in queries:
+            before, after = without_indexes[label], with_indexes[label]
+            print(f'{label:<30} {before:10.2f} ms {after:10.2f} ms {before / max(after, 1e-6):8.1f}x')
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
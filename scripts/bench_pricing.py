@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+"""
+قياسات دقيقة لمحركات التسعير مع خط أساس JSON وبوابة تراجع
+
+الحالات (بمدخلات اصطناعية ثابتة وعدة أحجام):
+  car.compute_adjustments / car.calculate_premium                 [عدد المركبات في الدفعة]
+  health.calculate_health_premium                                 [عدد الشركات في الدفعة]
+  health.UniversalPricingEngine.calculate_company_premium         [عدد موظفي الشركة]
+  app.InsuranceDataValidator.calculate_premium_breakdown           [عدد الموظفين]
+
+ينشئ قاعدة بيانات اختبار مؤقتة (بنفس محرك الإعدادات الحالية) ثم يحذفها.
+Usage:
+  python scripts/bench_pricing.py                       # عرض النتائج
+  python scripts/bench_pricing.py --save                # حفظ خط الأساس
+  python scripts/bench_pricing.py --compare --threshold 0.2   # فشل (exit 1) عند تراجع > 20%
+"""
+import argparse
+import os
+import random
+import sys
+from decimal import Decimal
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines', 'bench_pricing.json')
+
+BATCH_SIZES = (1, 100, 1000)
+ROSTER_SIZES = (10, 500, 5000)
+BREAKDOWN_SIZES = (10, 1000, 100000)
+
+
+def build_suite():
+    from app.utils.validators import InsuranceDataValidator
+    from car_insurance.calculations import calculate_premium
+    from car_insurance.models import Vehicle
+    from car_insurance.rules import compute_adjustments
+    from health_insurance.calculations import calculate_health_premium
+    from health_insurance.models import Company, Employee, HealthCoveragePlan, SectorPricingFactor
+    from health_insurance.services.roster_stats import rebuild_roster_stats
+    from health_insurance.services.universal_pricing_engine import UniversalPricingEngine
+    from saferatio.benchmarking import BenchmarkSuite
+    from users.models import CustomUser
+
+    suite = BenchmarkSuite('pricing')
+    sectors = [code for code, _ in Company.SECTOR_CHOICES]
+    for i, sector in enumerate(sectors[::2]):
+        SectorPricingFactor.objects.get_or_create(sector=sector, defaults={'base_factor': Decimal('1.00') + i % 5 / Decimal('10')})
+    plan = HealthCoveragePlan.objects.create(name='خطة القياس', base_price_per_employee=Decimal('1200.00'))
+    owner = CustomUser.objects.create(username='bench_pricing')
+
+    def car_inputs(size):
+        rng = random.Random(size)
+        return [
+            (
+                Vehicle(
+                    year=rng.randint(2000, 2025),
+                    current_value=Decimal(rng.randint(3000, 90000)),
+                    engine_size=Decimal(rng.choice(['1.2', '1.6', '2.0', '2.5', '3.5'])),
+                    vehicle_type=rng.choice(['car', 'suv', 'truck', 'motorcycle']),
+                ),
+                rng.choice(['third_party', 'third_party_fire_theft', 'comprehensive']),
+                rng.randint(18, 75),
+                rng.randint(0, 3),
+                rng.randint(0, 10),
+            )
+            for _ in range(size)
+        ]
+
+    @suite.case('car.compute_adjustments', sizes=BATCH_SIZES)
+    def car_adjustments(size):
+        inputs = car_inputs(size)
+        return lambda: [compute_adjustments(*args) for args in inputs]
+
+    @suite.case('car.calculate_premium', sizes=BATCH_SIZES)
+    def car_premium(size):
+        inputs = car_inputs(size)
+        return lambda: [calculate_premium(*args) for args in inputs]
+
+    @suite.case('health.calculate_health_premium', sizes=BATCH_SIZES)
+    def health_premium(size):
+        rng = random.Random(size)
+        companies = [
+            Company(
+                sector=rng.choice(sectors),
+                size_category=rng.choice(['micro', 'small', 'medium', 'large', 'enterprise']),
+                establishment_age=rng.randint(0, 30),
+                risk_level=rng.choice(['low', 'medium', 'high', 'very_high']),
+                work_environment=rng.choice(['office', 'field', 'mixed', 'remote', 'hazardous']),
+                city=rng.choice(['صنعاء', 'عدن', 'تعز']),
+                claims_history=rng.randint(0, 5),
+                has_previous_insurance=rng.random() < 0.5,
+                previous_insurance_years=rng.randint(0, 10),
+            )
+            for _ in range(size)
+        ]
+        counts = [rng.randint(1, 2000) for _ in range(size)]
+        return lambda: [calculate_health_premium(c, plan, n) for c, n in zip(companies, counts)]
+
+    @suite.case('health.UniversalPricingEngine.calculate_company_premium', sizes=ROSTER_SIZES)
+    def company_premium(size):
+        rng = random.Random(size)
+        company = Company.objects.create(
+            user=owner, name=f'شركة القياس {size}', sector='tech_software', cr_number=f'BENCH-{size}',
+            address='صنعاء', phone='777000000', email='bench@example.com', total_employees=size,
+        )
+        Employee.objects.bulk_create([
+            Employee(
+                company=company, name=f'موظف {n}', age=rng.randint(18, 64),
+                gender=rng.choice(['male', 'female']), marital_status=rng.choice(['single', 'married']),
+                position='موظف', department='العمليات', base_salary=Decimal(rng.randint(20000, 250000)),
+                children_count=rng.randint(0, 4), wives_count=rng.randint(0, 1),
+            )
+            for n in range(size)
+        ], batch_size=2000)
+        rebuild_roster_stats(company.id)
+        engine = UniversalPricingEngine()
+        return lambda: engine.calculate_company_premium(company, None, plan)
+
+    @suite.case('app.InsuranceDataValidator.calculate_premium_breakdown', sizes=BREAKDOWN_SIZES)
+    def premium_breakdown(size):
+        employees = [{'age': 20 + n % 45} for n in range(size)]
+        family = {'spouses': size // 2, 'children': size, 'parents': size // 4}
+        options = {'maternity': True, 'dental': True, 'optical': False, 'chronic_medication': True}
+        return lambda: [
+            InsuranceDataValidator.calculate_premium_breakdown(kind, employees, family, options)
+            for kind in ('A', 'B', 'C')
+        ]
+
+    return suite
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Pricing microbenchmarks')
+    parser.add_argument('--save', nargs='?', const=DEFAULT_BASELINE, help='حفظ النتائج كخط أساس')
+    parser.add_argument('--compare', nargs='?', const=DEFAULT_BASELINE, help='المقارنة بخط الأساس')
+    parser.add_argument('--threshold', type=float, default=None, help='نسبة التراجع المسموحة (0.25 = 25%%)')
+    parser.add_argument('--filter', action='append', default=[], help='تشغيل الحالات التي يحتوي اسمها النص فقط')
+    parser.add_argument('--rounds', type=int, default=None)
+    parser.add_argument('--min-time', type=float, default=None, help='أدنى زمن للجولة بالثواني')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    args = parse_args()
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'saferatio.settings')
+    import django
+    django.setup()
+
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+
+    from saferatio.benchmarking import (
+        DEFAULT_MIN_TIME, DEFAULT_ROUNDS, DEFAULT_THRESHOLD, compare, format_comparison, load_baseline,
+        save_baseline,
+    )
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0)
+    try:
+        report = build_suite().run(
+            selected=args.filter,
+            rounds=args.rounds or DEFAULT_ROUNDS,
+            min_time=args.min_time or DEFAULT_MIN_TIME,
+            log=print,
+        )
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    exit_code = 0
+    if args.compare:
+        threshold = args.threshold if args.threshold is not None else float(
+            os.environ.get('BENCH_REGRESSION_THRESHOLD', DEFAULT_THRESHOLD)
+        )
+        baseline = load_baseline(args.compare)
+        if args.filter:
+            baseline = dict(baseline, results={
+                key: value for key, value in baseline['results'].items() if key in report['results']
+            })
+        rows = compare(baseline, report, threshold)
+        print(format_comparison(rows, threshold))
+        exit_code = 1 if any(row['regressed'] for row in rows) else 0
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        save_baseline(report, args.save)
+        print(f'💾 {args.save}')
+    sys.exit(exit_code)
@@ -1,7 +1,7 @@
 # users/admin.py
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import CustomUser, Profile
+from .models import AvatarImage, CustomUser, Profile
 
 class CustomUserAdmin(UserAdmin):
     list_display = ('username', 'email', 'user_type', 'phone', 'country', 'is_active')
@@ -15,4 +15,10 @@ class ProfileAdmin(admin.ModelAdmin):
     list_display = ('user', 'date_of_birth', 'gender', 'marital_status', 'occupation')
     list_filter = ('gender', 'marital_status')
 
+@admin.register(AvatarImage)
+class AvatarImageAdmin(admin.ModelAdmin):
+    list_display = ('content_hash', 'width', 'height', 'status', 'created_at')
+    list_filter = ('status',)
+    readonly_fields = ('content_hash', 'thumbnails')
+
 admin.site.register(CustomUser, CustomUserAdmin)
\ No newline at end of file
@@ -0,0 +1,34 @@
+# users/management/commands/process_avatars.py
+from django.core.management.base import BaseCommand
+
+from saferatio.background import get_background_worker
+from users.models import AvatarImage, CustomUser
+from users.services.avatars import InvalidAvatar, generate_avatar_thumbnails, save_avatar
+
+
+class Command(BaseCommand):
+    help = 'معالجة الصور الشخصية المرفوعة قبل خط المعالجة: تنظيف، إزالة التكرار وتوليد الصور المصغرة'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retry-failed', action='store_true', help='إعادة توليد الصور المصغرة التي فشلت')
+
+    def handle(self, *args, **options):
+        processed = skipped = 0
+        users = CustomUser.objects.filter(avatar_image__isnull=True).exclude(avatar='').exclude(avatar__isnull=True)
+        for user in users.iterator():
+            try:
+                with user.avatar.open('rb') as f:
+                    data = f.read()
+                save_avatar(user, data)
+                processed += 1
+            except (InvalidAvatar, OSError) as e:
+                skipped += 1
+                self.stdout.write(f'⚠️ {user.username}: {e}')
+
+        if options['retry_failed']:
+            for avatar_id in AvatarImage.objects.filter(status='failed').values_list('pk', flat=True):
+                AvatarImage.objects.filter(pk=avatar_id).update(status='pending')
+                generate_avatar_thumbnails(avatar_id)
+
+        get_background_worker().join()  # الصور المصغرة الجديدة
+        self.stdout.write(f'🖼️ عولجت {processed} صورة، تخطي {skipped}')
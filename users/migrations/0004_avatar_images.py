@@ -0,0 +1,40 @@
+# Generated by Django 5.2.8 on 2026-10-19 04:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_alter_profile_options_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AvatarImage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=64, unique=True)),
+                ('image', models.ImageField(upload_to='avatars/')),
+                ('width', models.PositiveIntegerField(default=0)),
+                ('height', models.PositiveIntegerField(default=0)),
+                ('thumbnails', models.JSONField(blank=True, default=dict)),
+                ('status', models.CharField(choices=[('pending', 'قيد المعالجة'), ('ready', 'جاهزة'), ('failed', 'فشلت')], default='pending', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'users_avatar_image',
+            },
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='avatar_thumbnails',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='avatar_image',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='users', to='users.avatarimage'),
+        ),
+    ]
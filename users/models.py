@@ -3,6 +3,35 @@ from django.contrib.auth.models import AbstractUser
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
 
+class AvatarImage(models.Model):
+    """
+    صورة شخصية بعد المعالجة (users/services/avatars.py)
+
+    صف واحد لكل محتوى مرفوع (sha256 للبايتات الأصلية)، فرفع نفس الصورة مرة أخرى أو من مستخدم
+    آخر لا يعيد فك الترميز ولا التخزين. image نسخة منظفة من البيانات الوصفية بأبعاد محدودة،
+    والصور المصغرة تُولد في الخلفية.
+    """
+    STATUSES = (
+        ('pending', 'قيد المعالجة'),
+        ('ready', 'جاهزة'),
+        ('failed', 'فشلت'),
+    )
+
+    content_hash = models.CharField(max_length=64, unique=True)
+    image = models.ImageField(upload_to='avatars/')
+    width = models.PositiveIntegerField(default=0)
+    height = models.PositiveIntegerField(default=0)
+    thumbnails = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUSES, default='pending')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'users_avatar_image'
+
+    def __str__(self):
+        return f"{self.content_hash[:12]} ({self.width}x{self.height}, {self.status})"
+
+
 class CustomUser(AbstractUser):
     USER_TYPE_CHOICES = (
         ('individual', 'Individual'),
@@ -15,6 +44,11 @@ class CustomUser(AbstractUser):
     country = models.CharField(max_length=50, default='Yemen')
     language = models.CharField(max_length=10, default='ar')
     avatar = models.ImageField(upload_to='avatars/', null=True, blank=True)
+    # الصورة المعالجة وأسماء صورها المصغرة (نسخة من AvatarImage.thumbnails حتى لا تحتاج القوائم join)
+    avatar_image = models.ForeignKey(
+        'AvatarImage', on_delete=models.SET_NULL, null=True, blank=True, related_name='users',
+    )
+    avatar_thumbnails = models.JSONField(default=dict, blank=True)
     
     class Meta:
         db_table = 'users_customuser'
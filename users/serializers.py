@@ -4,6 +4,7 @@ from django.core.exceptions import ValidationError as DjangoValidationError
 from django.utils import timezone
 import os
 from .models import CustomUser, Profile
+from .services.avatars import avatar_url
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, required=True, validators=[validate_password])
@@ -63,13 +64,17 @@ class UserProfileSerializer(serializers.ModelSerializer):
         read_only_fields = ('username', 'user_type', 'age', 'profile_completed')
 
     def get_avatar_url(self, obj):
-        """الحصول على رابط الصورة الشخصية"""
+        """
+        الحصول على رابط الصورة الشخصية: medium لملف مستخدم واحد، وsmall في القوائم والحقول
+        المتداخلة (أو context['avatar_size'])
+        """
         if obj.avatar:
+            size = self.context.get('avatar_size') or ('medium' if self.parent is None else 'small')
             # في التطوير
             if self.context.get('request'):
-                return self.context['request'].build_absolute_uri(obj.avatar.url)
+                return avatar_url(obj, size, request=self.context['request'])
             # أو الرابط المباشر
-            return f"http://localhost:8000{obj.avatar.url}"
+            return f"http://localhost:8000{avatar_url(obj, size)}"
         return None
     
         def update(self, instance, validated_data):
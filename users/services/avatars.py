@@ -0,0 +1,206 @@
+# users/services/avatars.py
+"""
+معالجة الصور الشخصية: تنظيف، إزالة التكرار، وصور مصغرة بأحجام ثابتة
+
+- الطلب يحسب sha256 للملف المرفوع؛ إذا وُجد AvatarImage بنفس البصمة يُربط به المستخدم مباشرة
+  (بدون فك ترميز ولا تخزين جديد).
+- غير ذلك تُفك الصورة مرة واحدة (prepare_avatar): تدوير حسب EXIF، إزالة كل البيانات الوصفية
+  (EXIF/GPS/ICC)، تصغير الأصل إلى MAX_DIMENSION، وحفظها JPEG (أو PNG إذا فيها شفافية).
+  الصور التي تتجاوز MAX_PIXELS تُرفض قبل فك البكسلات (حماية من decompression bombs).
+- generate_avatar_thumbnails في العامل الخلفي (run_after_commit): فك النسخة المنظفة مرة واحدة
+  ثم قص مربع لكل حجم في SIZES وحفظه بكل صيغة في FORMATS (WebP وJPEG)، ونسخ الأسماء إلى
+  CustomUser.avatar_thumbnails لكل المستخدمين المرتبطين بالصورة.
+- avatar_url(user, size) يعيد رابط الصورة المصغرة المطلوبة، أو النسخة المنظفة حتى تجهز.
+"""
+import hashlib
+import logging
+from io import BytesIO
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from saferatio.async_views import run_io
+from saferatio.background import run_after_commit
+
+from ..models import AvatarImage, CustomUser
+
+logger = logging.getLogger('saferatio.avatars')
+
+DEFAULTS = {
+    'SIZES': {'small': 64, 'medium': 256},
+    'FORMATS': ['webp', 'jpeg'],
+    'URL_FORMAT': 'webp',
+    'MAX_DIMENSION': 1024,
+    'MAX_PIXELS': 40_000_000,
+    'QUALITY': 82,
+}
+PIL_FORMATS = {'jpeg': 'JPEG', 'png': 'PNG', 'webp': 'WEBP'}
+EXTENSIONS = {'jpeg': 'jpg', 'png': 'png', 'webp': 'webp'}
+
+
+class InvalidAvatar(ValueError):
+    """الملف ليس صورة يمكن فكها أو أبعادها أكبر من المسموح"""
+
+
+def get_avatar_settings():
+    return dict(DEFAULTS, **getattr(settings, 'AVATAR_IMAGES', {}))
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def master_name(digest, fmt):
+    return f'avatars/{digest[:2]}/{digest}.{EXTENSIONS[fmt]}'
+
+
+def thumbnail_name(digest, label, fmt):
+    return f'avatars/thumbs/{digest[:2]}/{digest}_{label}.{EXTENSIONS[fmt]}'
+
+
+def encode(image, fmt, quality):
+    """ترميز صورة بدون بيانات وصفية (info فارغ فلا يُنسخ ICC أو EXIF)"""
+    if fmt == 'jpeg' and image.mode != 'RGB':
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A') if 'A' in image.getbands() else None)
+        image = background
+    image.info = {}
+    options = {
+        'jpeg': {'quality': quality, 'optimize': True, 'progressive': True},
+        'webp': {'quality': quality, 'method': 4},
+        'png': {'optimize': True},
+    }[fmt]
+    buffer = BytesIO()
+    image.save(buffer, PIL_FORMATS[fmt], **options)
+    return buffer.getvalue()
+
+
+def prepare_avatar(data, config=None):
+    """فك الصورة المرفوعة مرة واحدة وإرجاع النسخة المنظفة {'content', 'format', 'width', 'height'}"""
+    config = config or get_avatar_settings()
+    try:
+        with Image.open(BytesIO(data)) as source:
+            if source.width * source.height > config['MAX_PIXELS']:
+                raise InvalidAvatar('image dimensions too large')
+            image = ImageOps.exif_transpose(source)
+            image.load()
+    except InvalidAvatar:
+        raise
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, SyntaxError, ValueError) as e:
+        raise InvalidAvatar(str(e)) from e
+
+    has_alpha = image.mode in ('RGBA', 'LA', 'PA') or (image.mode == 'P' and 'transparency' in image.info)
+    image = image.convert('RGBA' if has_alpha else 'RGB')
+    image.thumbnail((config['MAX_DIMENSION'], config['MAX_DIMENSION']), Image.Resampling.LANCZOS)
+    fmt = 'png' if has_alpha else 'jpeg'
+    return {
+        'content': encode(image, fmt, config['QUALITY']),
+        'format': fmt,
+        'width': image.width,
+        'height': image.height,
+    }
+
+
+def register_avatar(digest, name, prepared):
+    """صف AvatarImage للملف المحفوظ؛ يعيد (الصورة، أُنشئت؟)"""
+    avatar, created = AvatarImage.objects.get_or_create(content_hash=digest, defaults={
+        'image': name, 'width': prepared['width'], 'height': prepared['height'],
+    })
+    if created:
+        run_after_commit(generate_avatar_thumbnails, avatar.pk)
+    return avatar, created
+
+
+def assign_avatar(user, avatar):
+    user.avatar = avatar.image.name
+    user.avatar_image = avatar
+    user.avatar_thumbnails = avatar.thumbnails if avatar.status == 'ready' else {}
+    user.save(update_fields=['avatar', 'avatar_image', 'avatar_thumbnails'])
+    if avatar.status == 'pending':
+        # العامل قد يكون أنهى الصور المصغرة بعد قراءة الحالة وقبل حفظ المستخدم
+        thumbnails = AvatarImage.objects.filter(pk=avatar.pk, status='ready').values_list(
+            'thumbnails', flat=True,
+        ).first()
+        if thumbnails:
+            user.avatar_thumbnails = thumbnails
+            CustomUser.objects.filter(pk=user.pk).update(avatar_thumbnails=thumbnails)
+
+
+def _image_storage():
+    return AvatarImage._meta.get_field('image').storage
+
+
+def save_avatar(user, data):
+    """المسار المتزامن (أوامر الإدارة): ربط بايتات صورة بالمستخدم؛ يعيد AvatarImage"""
+    digest = content_hash(data)
+    avatar = AvatarImage.objects.filter(content_hash=digest).first()
+    if avatar is None:
+        prepared = prepare_avatar(data)
+        name = _image_storage().save(master_name(digest, prepared['format']), ContentFile(prepared['content']))
+        avatar, created = register_avatar(digest, name, prepared)
+        if not created:
+            _image_storage().delete(name)
+    assign_avatar(user, avatar)
+    return avatar
+
+
+async def asave_avatar(user, upload):
+    """
+    مسار الطلب غير المتزامن: القراءة والفك والتخزين في خيوط I/O (run_io)، وقاعدة البيانات
+    في خيط Django المتزامن
+    """
+    data = await run_io(upload.read)
+    digest = content_hash(data)
+    avatar = await AvatarImage.objects.filter(content_hash=digest).afirst()
+    if avatar is None:
+        prepared = await run_io(prepare_avatar, data)
+        storage = _image_storage()
+        name = await run_io(storage.save, master_name(digest, prepared['format']), ContentFile(prepared['content']))
+        avatar, created = await sync_to_async(register_avatar)(digest, name, prepared)
+        if not created:  # رفع متزامن لنفس الصورة سبقنا
+            await run_io(storage.delete, name)
+    await sync_to_async(assign_avatar)(user, avatar)
+    return avatar
+
+
+def generate_avatar_thumbnails(avatar_id):
+    """الصور المصغرة لكل الأحجام والصيغ من فك واحد للنسخة المنظفة (في العامل الخلفي)"""
+    avatar = AvatarImage.objects.filter(pk=avatar_id).first()
+    if avatar is None or avatar.status == 'ready':
+        return None
+    config = get_avatar_settings()
+    storage = avatar.image.storage
+    thumbnails = {}
+    try:
+        with avatar.image.open('rb') as f, Image.open(f) as source:
+            source.load()
+            for label, size in config['SIZES'].items():
+                thumbnail = ImageOps.fit(source, (size, size), Image.Resampling.LANCZOS)
+                for fmt in config['FORMATS']:
+                    name = thumbnail_name(avatar.content_hash, label, fmt)
+                    if storage.exists(name):
+                        storage.delete(name)
+                    thumbnails.setdefault(label, {})[fmt] = storage.save(
+                        name, ContentFile(encode(thumbnail, fmt, config['QUALITY'])),
+                    )
+    except Exception:
+        logger.exception('avatar thumbnails failed', extra={'data': {'avatar_id': avatar_id}})
+        AvatarImage.objects.filter(pk=avatar_id).update(status='failed')
+        return None
+
+    # الترتيب مهم: الحالة أولاً ثم المستخدمون (assign_avatar يفحص الحالة بعد حفظ المستخدم)
+    AvatarImage.objects.filter(pk=avatar_id).update(thumbnails=thumbnails, status='ready')
+    CustomUser.objects.filter(avatar_image_id=avatar_id).update(avatar_thumbnails=thumbnails)
+    return thumbnails
+
+
+def avatar_url(user, size='medium', fmt=None, request=None):
+    """رابط الصورة الشخصية بالحجم المطلوب (النسخة المنظفة أو الأصل حتى تجهز الصور المصغرة)"""
+    if not user.avatar:
+        return None
+    fmt = fmt or get_avatar_settings()['URL_FORMAT']
+    name = (user.avatar_thumbnails or {}).get(size, {}).get(fmt)
+    url = user.avatar.storage.url(name) if name else user.avatar.url
+    return request.build_absolute_uri(url) if request else url
@@ -0,0 +1,97 @@
+from io import BytesIO, StringIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase, override_settings
+from PIL import Image
+
+from users.models import AvatarImage, CustomUser
+from users.serializers import UserProfileSerializer
+from users.services.avatars import InvalidAvatar, prepare_avatar, save_avatar
+
+IN_MEMORY_STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.InMemoryStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
+
+def image_bytes(size=(300, 200), color=(10, 120, 200), fmt='JPEG', **save_options):
+    buffer = BytesIO()
+    Image.new('RGB', size, color).save(buffer, fmt, **save_options)
+    return buffer.getvalue()
+
+
+@override_settings(STORAGES=IN_MEMORY_STORAGES, BACKGROUND_TASKS={'ASYNC': False})
+class AvatarPipelineTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='pipe1', email='pipe1@example.com', password='Pass12345!')
+        self.other = CustomUser.objects.create_user(username='pipe2', email='pipe2@example.com', password='Pass12345!')
+
+    def test_metadata_stripped_and_orientation_applied(self):
+        exif = Image.Exif()
+        exif[0x010F] = 'PhoneMaker'  # Make
+        exif[0x0112] = 6  # Orientation: تدوير 90°
+        prepared = prepare_avatar(image_bytes(exif=exif.tobytes()))
+        self.assertEqual((prepared['format'], prepared['width'], prepared['height']), ('jpeg', 200, 300))
+        with Image.open(BytesIO(prepared['content'])) as image:
+            self.assertEqual(dict(image.getexif()), {})
+            self.assertNotIn('icc_profile', image.info)
+
+    def test_large_and_invalid_images_rejected(self):
+        prepared = prepare_avatar(image_bytes(size=(3000, 1500)))
+        self.assertEqual((prepared['width'], prepared['height']), (1024, 512))
+        with override_settings(AVATAR_IMAGES={'MAX_PIXELS': 1000}):
+            with self.assertRaises(InvalidAvatar):
+                prepare_avatar(image_bytes())
+        with self.assertRaises(InvalidAvatar):
+            prepare_avatar(b'not an image')
+
+    def test_identical_uploads_share_one_file(self):
+        data = image_bytes()
+        first = save_avatar(self.user, data)
+        second = save_avatar(self.other, data)
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(AvatarImage.objects.count(), 1)
+        self.assertEqual(self.user.avatar.name, self.other.avatar.name)
+        _, files = default_storage.listdir(f'avatars/{first.content_hash[:2]}')
+        self.assertEqual(files, [f'{first.content_hash}.jpg'])
+
+    def test_thumbnails_generated_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            avatar = save_avatar(self.user, image_bytes())
+        avatar.refresh_from_db()
+        self.assertEqual(avatar.status, 'ready')
+        self.assertEqual(set(avatar.thumbnails), {'small', 'medium'})
+        for label, size in (('small', 64), ('medium', 256)):
+            for fmt, pil_format in (('webp', 'WEBP'), ('jpeg', 'JPEG')):
+                with default_storage.open(avatar.thumbnails[label][fmt]) as f, Image.open(f) as image:
+                    self.assertEqual((image.format, image.size), (pil_format, (size, size)))
+
+        # المستخدم الثاني يرث الصور المصغرة الجاهزة مباشرة
+        save_avatar(self.other, image_bytes())
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.avatar_thumbnails, avatar.thumbnails)
+        self.assertEqual(self.other.avatar_thumbnails, avatar.thumbnails)
+
+    def test_serializer_picks_thumbnail_size(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            avatar = save_avatar(self.user, image_bytes())
+        avatar.refresh_from_db()
+        self.user.refresh_from_db()
+        request = RequestFactory().get('/')
+        detail = UserProfileSerializer(self.user, context={'request': request}).data
+        self.assertTrue(detail['avatar_url'].endswith(avatar.thumbnails['medium']['webp']))
+        listing = UserProfileSerializer([self.user], many=True, context={'request': request}).data
+        self.assertTrue(listing[0]['avatar_url'].endswith(avatar.thumbnails['small']['webp']))
+
+    def test_process_avatars_command(self):
+        self.user.avatar = default_storage.save('avatars/legacy.png', ContentFile(image_bytes(fmt='PNG')))
+        self.user.save(update_fields=['avatar'])
+        out = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('process_avatars', stdout=out)
+        self.user.refresh_from_db()
+        self.assertIsNotNone(self.user.avatar_image_id)
+        self.assertEqual(self.user.avatar_image.status, 'ready')
+        self.assertIn('small', self.user.avatar_thumbnails)
@@ -1,8 +1,14 @@
+import shutil
+import tempfile
+
+from django.test import override_settings
 from django.urls import reverse
 from rest_framework.test import APITestCase
 from django.contrib.auth import get_user_model
 from rest_framework import status
 from django.core.files.uploadedfile import SimpleUploadedFile
+from io import BytesIO
+from PIL import Image
 
 User = get_user_model()
 
@@ -12,6 +18,12 @@ class AvatarUploadTests(APITestCase):
         self.user = User.objects.create_user(username='avatuser', email='avat@example.com', password='Pass12345!')
         self.login_url = '/api/auth/login/'
         self.upload_url = '/api/auth/upload-avatar/'
+        # الصور المرفوعة خارج media/ في المستودع
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, True)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
 
     def authenticate(self):
         resp = self.client.post(self.login_url, {'username': 'avatuser', 'password': 'Pass12345!'}, format='json')
@@ -20,10 +32,20 @@ class AvatarUploadTests(APITestCase):
 
     def test_upload_valid_image(self):
         self.authenticate()
-        img = SimpleUploadedFile('test.png', b'\x89PNG\r\n\x1a\n' + b'a' * 1000, content_type='image/png')
+        buffer = BytesIO()
+        Image.new('RGB', (32, 32), (200, 30, 30)).save(buffer, 'PNG')
+        img = SimpleUploadedFile('test.png', buffer.getvalue(), content_type='image/png')
         resp = self.client.post(self.upload_url, {'avatar': img}, format='multipart')
         self.assertEqual(resp.status_code, status.HTTP_200_OK)
         self.assertIn('avatar_url', resp.data)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.avatar.path.startswith(self.media_root))
+
+    def test_upload_corrupt_image(self):
+        self.authenticate()
+        img = SimpleUploadedFile('test.png', b'\x89PNG\r\n\x1a\n' + b'a' * 1000, content_type='image/png')
+        resp = self.client.post(self.upload_url, {'avatar': img}, format='multipart')
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
 
     def test_upload_invalid_type(self):
         self.authenticate()
@@ -5,6 +5,7 @@ from django.utils.http import urlsafe_base64_encode
 from django.utils.encoding import force_bytes
 from django.contrib.auth.tokens import default_token_generator
 from users.models import CustomUser
+from insurance.services.email_outbox import deliver_pending
 
 
 class EmailResetTests(TestCase):
@@ -19,7 +20,9 @@ class EmailResetTests(TestCase):
         # send verification
         resp = self.client.post(self.send_ver_url, {'email': self.user.email}, content_type='application/json')
         self.assertEqual(resp.status_code, 200)
-        # email sent
+        # email queued, then sent by the outbox sender
+        self.assertEqual(len(mail.outbox), 0)
+        deliver_pending()
         self.assertGreaterEqual(len(mail.outbox), 1)
         email = mail.outbox[-1]
         self.assertIn('Verify your SafeRatio account', email.subject)
@@ -34,6 +37,7 @@ class EmailResetTests(TestCase):
         # send reset
         resp = self.client.post(self.send_reset_url, {'email': self.user.email}, content_type='application/json')
         self.assertEqual(resp.status_code, 200)
+        deliver_pending()
         self.assertGreaterEqual(len(mail.outbox), 1)
         email = mail.outbox[-1]
         self.assertIn('Reset your SafeRatio password', email.subject)
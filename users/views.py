@@ -10,19 +10,19 @@ from .serializers import (
     UserRegistrationSerializer, UserProfileSerializer, 
     SensitiveInfoSerializer, ProfileSerializer, ProfileUpdateSerializer
 )
-from django.core.mail import send_mail
 from django.template.loader import render_to_string
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.utils.encoding import force_bytes, force_str
 from django.contrib.auth.tokens import default_token_generator
 from django.conf import settings
-import os
-import time
 from django.core.files.storage import default_storage
 from django.core.files.base import ContentFile
 from rest_framework.views import APIView
 from django.shortcuts import get_object_or_404
 from django.contrib.auth import get_user_model
+from insurance.services.email_outbox import aenqueue_email
+from saferatio.async_views import async_api_view
+from .services.avatars import InvalidAvatar, asave_avatar, avatar_url
 
 User = get_user_model()
 
@@ -275,15 +275,14 @@ def test_endpoint(request):
     })
 
 
-@api_view(['POST'])
-@permission_classes([AllowAny])
-def send_verification(request):
+@async_api_view(['POST'])
+async def send_verification(request):
     """Send email verification link to a user (by email)."""
     email = request.data.get('email')
     if not email:
         return Response({'error': 'Email is required.'}, status=400)
     try:
-        user = CustomUser.objects.filter(email=email).first()
+        user = await CustomUser.objects.filter(email=email).afirst()
         if not user:
             return Response({'error': 'User with that email not found.'}, status=404)
 
@@ -294,16 +293,15 @@ def send_verification(request):
         # render simple text email
         subject = 'Verify your SafeRatio account'
         message = render_to_string('emails/verification_email.txt', {'user': user, 'confirm_link': confirm_link})
-        send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, [user.email])
+        await aenqueue_email(subject, message, [user.email], kind='verification')
         return Response({'detail': 'Verification email sent.'})
     except Exception as e:
         return Response({'error': str(e)}, status=500)
 
 
-@api_view(['POST'])
-@permission_classes([IsAuthenticated])
-def upload_avatar(request):
-    """Accepts an uploaded file (multipart/form-data) under key 'avatar', saves to MEDIA_ROOT/avatars/, and returns absolute URL."""
+@async_api_view(['POST'], authenticated=True)
+async def upload_avatar(request):
+    """Accepts an uploaded image (multipart/form-data) under key 'avatar', stores a cleaned, deduplicated copy and returns its absolute URL (thumbnails are generated in the background)."""
     user = request.user
     avatar = request.FILES.get('avatar')
     if not avatar:
@@ -317,17 +315,16 @@ def upload_avatar(request):
         if avatar.size > max_size:
             return Response({'error': 'File too large.'}, status=400)
 
-        # ensure profile exists (CustomUser now has avatar field; save there)
-        # save to user.avatar
-        filename = f"avatar_{user.pk}_{int(time.time())}{os.path.splitext(avatar.name)[1]}"
-        user.avatar.save(filename, avatar, save=True)
+        try:
+            await asave_avatar(user, avatar)
+        except InvalidAvatar:
+            return Response({'error': 'Invalid image.'}, status=400)
         # build absolute URL
-        avatar_url = None
         try:
-            avatar_url = request.build_absolute_uri(user.avatar.url)
+            url = avatar_url(user, 'medium', request=request)
         except Exception:
-            avatar_url = None
-        return Response({'avatar_url': avatar_url})
+            url = None
+        return Response({'avatar_url': url})
     except Exception as e:
         return Response({'error': str(e)}, status=500)
 
@@ -353,14 +350,13 @@ def confirm_verification(request):
         return Response({'error': str(e)}, status=400)
 
 
-@api_view(['POST'])
-@permission_classes([AllowAny])
-def send_password_reset(request):
+@async_api_view(['POST'])
+async def send_password_reset(request):
     email = request.data.get('email')
     if not email:
         return Response({'error': 'Email is required.'}, status=400)
     try:
-        user = CustomUser.objects.filter(email=email).first()
+        user = await CustomUser.objects.filter(email=email).afirst()
         if not user:
             return Response({'error': 'User with that email not found.'}, status=404)
 
@@ -370,7 +366,7 @@ def send_password_reset(request):
 
         subject = 'Reset your SafeRatio password'
         message = render_to_string('emails/reset_email.txt', {'user': user, 'reset_link': reset_link})
-        send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, [user.email])
+        await aenqueue_email(subject, message, [user.email], kind='password_reset')
         return Response({'detail': 'Password reset email sent.'})
     except Exception as e:
         return Response({'error': str(e)}, status=500)